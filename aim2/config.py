@@ -3,12 +3,31 @@ AIM2 Configuration Module
 
 This module provides a centralized configuration system for the AIM2 project.
 It loads configuration from a YAML file and allows overrides via environment variables.
+
+get_config() returns a frozen Config snapshot. Sections can be read like the
+plain dicts they are loaded from (``config["corpus"]["pubmed"]["delay"]``) or
+as attributes (``config.corpus.pubmed.delay``), which is a single instance
+dict lookup per level. Well-known sections such as ``corpus.pubmed`` and
+``extraction.llm`` are typed: their values are converted to the declared
+types and defaulted when missing. Snapshots are never modified, so they can
+be shared between threads and pickled into worker processes as they are.
+Code on hot paths should hold on to the section it needs rather than call
+get_config(), which checks AIM2_CONFIG on every call.
+
+Long-running workers can pick up edits without a restart: ConfigWatcher
+polls the modification time of the configuration file, validates the new
+configuration and swaps the snapshot, and subscribe() registers callbacks
+that are told when the section they depend on changed.
 """
+import logging
 import os
+import threading
 import yaml
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Default configuration paths to check if not specified in environment
 DEFAULT_CONFIG_PATHS = [
     Path("config.yml"),
@@ -16,8 +35,298 @@ DEFAULT_CONFIG_PATHS = [
     Path("/etc/aim2/config.yml"),
 ]
 
-# The loaded configuration
-_config: Optional[Dict[str, Any]] = None
+# The loaded configuration and the file it was loaded from
+_config: Optional["Config"] = None
+_config_source: Optional[Path] = None
+# (config_path argument, AIM2_CONFIG) of the last get_config() call that loaded _config
+_config_request: Optional[Tuple[Optional[Path], Optional[str]]] = None
+# Serializes loading; reads of an already loaded snapshot take no lock
+_config_lock = threading.RLock()
+# (dotted section or None for the whole config, callback) pairs, see subscribe()
+_subscribers: List[Tuple[Optional[str], Callable[[Any, Any], None]]] = []
+
+class ConfigSection(dict):
+    """
+    A read-only configuration section.
+    
+    Sections are dicts, so indexing runs at dict speed and existing code that
+    expects the parsed YAML keeps working; every mutating method raises.
+    Values are also stored in the instance ``__dict__``, so attribute access
+    costs the same as a dict lookup. Nested dicts become sections and lists
+    become tuples. Keys that are not identifiers, or that clash with dict
+    methods such as ``items``, are only available through indexing.
+    """
+    
+    # Declared value types and defaults of typed sections
+    _types: Dict[str, type] = {}
+    _defaults: Dict[str, Any] = {}
+    
+    def __init__(self, values: Optional[Dict[str, Any]] = None, path: str = ""):
+        data = dict(self._defaults)
+        if values:
+            data.update(values)
+        items = {}
+        for key, value in data.items():
+            key = str(key)
+            items[key] = _freeze(value, f"{path}.{key}" if path else key)
+            if key in self._types:
+                items[key] = _coerce(items[key], self._types[key], f"{path}.{key}")
+        dict.__init__(self, items)
+        attributes = self.__dict__
+        for key, value in items.items():
+            if key.isidentifier() and not hasattr(type(self), key):
+                attributes[key] = value
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not keys of the section
+        raise AttributeError(f"Configuration section has no key '{name}'")
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Configuration snapshots are read-only")
+    
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Configuration snapshots are read-only")
+    
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Configuration snapshots are read-only")
+    
+    def __copy__(self) -> "ConfigSection":
+        return self
+    
+    def __deepcopy__(self, memo) -> "ConfigSection":
+        return self
+    
+    def __reduce__(self):
+        # Restore the items and attributes as they are, without converting again
+        return (_restore_section, (type(self), dict(self), self.__dict__))
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a mutable deep copy of the section as plain dicts and lists."""
+        result = {}
+        for key, value in self.items():
+            result[key] = _thaw(value)
+        return result
+
+def _restore_section(cls, items: Dict[str, Any], attributes: Dict[str, Any]) -> ConfigSection:
+    section = dict.__new__(cls)
+    dict.update(section, items)
+    section.__dict__.update(attributes)
+    return section
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, ConfigSection):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        result = []
+        for item in value:
+            result.append(_thaw(item))
+        return result
+    return value
+
+def _freeze(value: Any, path: str) -> Any:
+    """Convert a parsed YAML value into its read-only form."""
+    if isinstance(value, ConfigSection):
+        return value
+    if isinstance(value, dict):
+        return TYPED_SECTIONS.get(path, ConfigSection)(value, path)
+    if isinstance(value, list):
+        result = []
+        for index, item in enumerate(value):
+            result.append(_freeze(item, f"{path}[{index}]"))
+        return tuple(result)
+    return value
+
+def _coerce(value: Any, expected: type, path: str) -> Any:
+    """Convert a value to the declared type of a typed section key."""
+    if value is None or isinstance(value, expected) and not (expected is int and isinstance(value, bool)):
+        return value
+    try:
+        if expected is bool:
+            if isinstance(value, str):
+                return value.lower() in ('true', '1', 't', 'y', 'yes')
+            return bool(value)
+        if expected is tuple:
+            return (value,)
+        return expected(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for config key '{path}': {value!r} "
+                         f"(expected {expected.__name__})")
+
+class PathsConfig(ConfigSection):
+    """The ``paths`` section."""
+    _types = {"data_dir": str, "log_dir": str, "cache_dir": str, "output_dir": str}
+    _defaults = {"data_dir": "data", "log_dir": "logs", "cache_dir": ".cache", "output_dir": "output"}
+    data_dir: str
+    log_dir: str
+    cache_dir: str
+    output_dir: str
+
+class OntologyConfig(ConfigSection):
+    """The ``ontology`` section."""
+    _types = {"files": tuple, "cache_enabled": bool, "cache_dir": str, "cache_max_size_mb": float}
+    _defaults = {"files": (), "cache_enabled": False, "cache_dir": ".cache/ontologies",
+                 "cache_max_size_mb": 2048}
+    files: Tuple[str, ...]
+    cache_enabled: bool
+    cache_dir: str
+    cache_max_size_mb: float
+
+class PubMedConfig(ConfigSection):
+    """The ``corpus.pubmed`` section."""
+    _types = {"email": str, "api_key": str, "batch_size": int, "max_retries": int,
+              "delay": float, "max_workers": int}
+    _defaults = {"api_key": None, "batch_size": 100, "max_retries": 5, "delay": 0.34,
+                 "max_workers": 3}
+    email: str
+    api_key: Optional[str]
+    batch_size: int
+    max_retries: int
+    delay: float
+    max_workers: int
+
+class PdfConfig(ConfigSection):
+    """The ``corpus.pdf`` section."""
+    _types = {"max_pages": int, "dpi": int, "timeout": float}
+    _defaults = {"max_pages": 100, "dpi": 300, "timeout": 300}
+    max_pages: int
+    dpi: int
+    timeout: float
+
+class BrowserConfig(ConfigSection):
+    """The ``corpus.browser`` section."""
+    _types = {"workers": int, "max_pages_per_session": int, "per_domain": int,
+              "headless": bool, "retries": int}
+    _defaults = {"workers": 2, "max_pages_per_session": 50, "per_domain": 1,
+                 "headless": True, "retries": 1}
+    workers: int
+    max_pages_per_session: int
+    per_domain: int
+    headless: bool
+    retries: int
+
+class ChunkingConfig(ConfigSection):
+    """The ``extraction.chunking`` section."""
+    _types = {"chunk_size": int, "chunk_overlap": int, "separator": str}
+    _defaults = {"chunk_size": 1000, "chunk_overlap": 200, "separator": "\n"}
+    chunk_size: int
+    chunk_overlap: int
+    separator: str
+
+class LLMConfig(ConfigSection):
+    """The ``extraction.llm`` section."""
+    _types = {"model": str, "temperature": float, "max_tokens": int, "top_p": float,
+              "cache_enabled": bool, "cache_dir": str, "cache_max_size_mb": float,
+              "cache_max_age_days": float, "api_key": str, "base_url": str,
+              "max_concurrency": int, "requests_per_minute": float,
+              "tokens_per_minute": float, "max_retries": int, "timeout": float}
+    _defaults = {"model": "gpt-4", "temperature": 0.2, "max_tokens": 1000, "top_p": 1.0,
+                 "cache_enabled": True, "cache_dir": ".cache/llm", "cache_max_size_mb": 1024,
+                 "cache_max_age_days": None, "api_key": None,
+                 "base_url": "https://api.openai.com/v1", "max_concurrency": 8,
+                 "requests_per_minute": None, "tokens_per_minute": None, "max_retries": 5,
+                 "timeout": 120}
+    model: str
+    temperature: float
+    max_tokens: int
+    top_p: float
+    cache_enabled: bool
+    cache_dir: str
+    cache_max_size_mb: float
+    cache_max_age_days: Optional[float]
+    api_key: Optional[str]
+    base_url: str
+    max_concurrency: int
+    requests_per_minute: Optional[float]
+    tokens_per_minute: Optional[float]
+    max_retries: int
+    timeout: float
+
+class NERConfig(ConfigSection):
+    """The ``extraction.ner`` section."""
+    _types = {"token_budget": int, "max_chunks": int, "output_tokens_per_chunk": int}
+    _defaults = {"token_budget": 6000, "max_chunks": 8, "output_tokens_per_chunk": 120}
+    token_budget: int
+    max_chunks: int
+    output_tokens_per_chunk: int
+
+class RelationsConfig(ConfigSection):
+    """The ``extraction.relations`` section."""
+    _types = {"sentence_window": int, "max_pairs": int, "token_budget": int}
+    _defaults = {"sentence_window": 1, "max_pairs": 24, "token_budget": 4000}
+    sentence_window: int
+    max_pairs: int
+    token_budget: int
+
+class DedupeConfig(ConfigSection):
+    """The ``postprocessing.dedupe`` section."""
+    _types = {"sample_size": int, "threshold": float, "recall_weight": float, "precision_weight": float}
+    _defaults = {"sample_size": 10000, "threshold": 0.5, "recall_weight": 1.0, "precision_weight": 1.0}
+    sample_size: int
+    threshold: float
+    recall_weight: float
+    precision_weight: float
+
+class NormalizationConfig(ConfigSection):
+    """The ``postprocessing.normalization`` section."""
+    _types = {"min_confidence": float, "max_candidates": int}
+    _defaults = {"min_confidence": 0.7, "max_candidates": 5}
+    min_confidence: float
+    max_candidates: int
+
+# Dotted path -> section class of the typed sections
+TYPED_SECTIONS = {
+    "paths": PathsConfig,
+    "ontology": OntologyConfig,
+    "corpus.pubmed": PubMedConfig,
+    "corpus.pdf": PdfConfig,
+    "corpus.browser": BrowserConfig,
+    "extraction.chunking": ChunkingConfig,
+    "extraction.llm": LLMConfig,
+    "extraction.ner": NERConfig,
+    "extraction.relations": RelationsConfig,
+    "postprocessing.dedupe": DedupeConfig,
+    "postprocessing.normalization": NormalizationConfig,
+}
+
+class Config(ConfigSection):
+    """A frozen snapshot of the whole configuration."""
+
+def _resolve_config_path(config_path: Optional[Path] = None) -> Path:
+    """
+    Determine which configuration file to load.
+    
+    Args:
+        config_path: Explicit path to the configuration file. If None, checks the
+                    AIM2_CONFIG environment variable and then default locations.
+                    
+    Returns:
+        Path of the configuration file.
+        
+    Raises:
+        FileNotFoundError: If no configuration file can be found.
+    """
+    if config_path is not None:
+        return Path(config_path)
+    
+    env_config = os.environ.get("AIM2_CONFIG")
+    if env_config:
+        return Path(env_config)
+    
+    # Try default locations
+    for path in DEFAULT_CONFIG_PATHS:
+        if path.exists():
+            return path
+    
+    raise FileNotFoundError(
+        "No configuration file found. Please set AIM2_CONFIG environment variable "
+        "or place a config.yml in one of the default locations."
+    )
 
 def _load_config_file(config_path: Optional[Path] = None) -> Dict[str, Any]:
     """
@@ -33,22 +342,7 @@ def _load_config_file(config_path: Optional[Path] = None) -> Dict[str, Any]:
         FileNotFoundError: If the configuration file cannot be found.
         yaml.YAMLError: If the configuration file is not valid YAML.
     """
-    # If no config path is provided, check environment variable or default locations
-    if config_path is None:
-        env_config = os.environ.get("AIM2_CONFIG")
-        if env_config:
-            config_path = Path(env_config)
-        else:
-            # Try default locations
-            for path in DEFAULT_CONFIG_PATHS:
-                if path.exists():
-                    config_path = path
-                    break
-            else:
-                raise FileNotFoundError(
-                    "No configuration file found. Please set AIM2_CONFIG environment variable "
-                    "or place a config.yml in one of the default locations."
-                )
+    config_path = _resolve_config_path(config_path)
     
     # Ensure the config file exists
     if not config_path.exists():
@@ -75,15 +369,13 @@ def _apply_environment_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         A new dictionary with environment overrides applied.
     """
-    result = {}
-    
-    # Make a deep copy of the config to avoid modifying the original
-    import copy
-    result = copy.deepcopy(config)
+    # Copy only the dicts on the path of an override, never the whole config
+    result = dict(config)
+    copied = set()
     
-    # Process all environment variables that start with AIM2_
+    # Process the environment variables that start with AIM2_
     for env_key, value in os.environ.items():
-        if not env_key.startswith('AIM2_'):
+        if not env_key.startswith('AIM2_') or env_key == 'AIM2_CONFIG':
             continue
             
         # Remove the AIM2_ prefix and convert to lowercase
@@ -91,9 +383,12 @@ def _apply_environment_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
         
         # Navigate to the appropriate level in the config
         current = result
-        for part in key_parts[:-1]:
-            if part not in current:
-                current[part] = {}
+        for depth, part in enumerate(key_parts[:-1]):
+            path = tuple(key_parts[:depth + 1])
+            if path not in copied:
+                existing = current.get(part)
+                current[part] = dict(existing) if isinstance(existing, dict) else {}
+                copied.add(path)
             current = current[part]
         
         # Set the value, converting from string to appropriate type if needed
@@ -114,51 +409,285 @@ def _apply_environment_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
     
     return result
 
-def get_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
+def _check_range(section: Optional[ConfigSection], key: str, low: Optional[float] = None,
+                 high: Optional[float] = None) -> None:
+    if section is None or section.get(key) is None:
+        return
+    value = section[key]
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise ValueError(f"Config value {key}={value!r} is outside [{low}, {high}]")
+
+def validate_config(config: "Config") -> None:
+    """
+    Check the values of the typed sections beyond their types.
+    
+    Raises:
+        ValueError: If a value is out of range.
+    """
+    pubmed = get_section(config, "corpus.pubmed")
+    _check_range(pubmed, "batch_size", 1)
+    _check_range(pubmed, "max_retries", 0)
+    _check_range(pubmed, "delay", 0)
+    _check_range(pubmed, "max_workers", 1)
+    pdf = get_section(config, "corpus.pdf")
+    _check_range(pdf, "max_pages", 1)
+    _check_range(pdf, "timeout", 0)
+    browser = get_section(config, "corpus.browser")
+    _check_range(browser, "workers", 1)
+    _check_range(browser, "max_pages_per_session", 1)
+    _check_range(browser, "per_domain", 1)
+    _check_range(browser, "retries", 0)
+    chunking = get_section(config, "extraction.chunking")
+    _check_range(chunking, "chunk_size", 1)
+    if chunking is not None:
+        _check_range(chunking, "chunk_overlap", 0, chunking.chunk_size - 1)
+    llm = get_section(config, "extraction.llm")
+    _check_range(llm, "temperature", 0, 2)
+    _check_range(llm, "top_p", 0, 1)
+    _check_range(llm, "max_tokens", 1)
+    _check_range(llm, "cache_max_size_mb", 0)
+    _check_range(llm, "cache_max_age_days", 0)
+    _check_range(llm, "max_concurrency", 1)
+    _check_range(llm, "requests_per_minute", 0)
+    _check_range(llm, "tokens_per_minute", 0)
+    _check_range(llm, "max_retries", 0)
+    _check_range(llm, "timeout", 0)
+    ner = get_section(config, "extraction.ner")
+    _check_range(ner, "token_budget", 1)
+    _check_range(ner, "max_chunks", 1)
+    _check_range(ner, "output_tokens_per_chunk", 1)
+    relations = get_section(config, "extraction.relations")
+    _check_range(relations, "sentence_window", 0)
+    _check_range(relations, "max_pairs", 1)
+    _check_range(relations, "token_budget", 1)
+    normalization = get_section(config, "postprocessing.normalization")
+    _check_range(normalization, "min_confidence", 0, 1)
+    _check_range(get_section(config, "postprocessing.dedupe"), "threshold", 0, 1)
+    _check_range(get_section(config, "ontology"), "cache_max_size_mb", 0)
+
+def get_section(config: ConfigSection, path: str) -> Optional[ConfigSection]:
+    """Return the section at a dotted path such as 'corpus.pubmed', or None."""
+    section = config
+    for part in path.split("."):
+        if not isinstance(section, dict):
+            return None
+        section = section.get(part)
+    return section
+
+def _build_config(source: Path) -> "Config":
+    """Load, override and validate the configuration of a file."""
+    config = Config(_apply_environment_overrides(_load_config_file(source)))
+    validate_config(config)
+    return config
+
+def subscribe(callback: Callable[[Any, Any], None], section: Optional[str] = None) -> Callable[[], None]:
+    """
+    Call callback(new, old) whenever a reload changes a section.
+    
+    Callbacks run in the thread that reloaded the configuration, usually the
+    ConfigWatcher thread, and should only adjust settings (a rate, a pool
+    size) rather than block. Exceptions they raise are logged and ignored.
+    
+    Args:
+        callback: Receives the new and old values of the section.
+        section: Dotted path such as 'corpus.pubmed'; None watches the whole
+                configuration.
+    
+    Returns:
+        A function that removes the subscription.
+    """
+    entry = (section, callback)
+    with _config_lock:
+        _subscribers.append(entry)
+    
+    def unsubscribe() -> None:
+        with _config_lock:
+            if entry in _subscribers:
+                _subscribers.remove(entry)
+    return unsubscribe
+
+def _notify(old: Optional["Config"], new: "Config") -> None:
+    """Tell the subscribers whose section differs between two snapshots."""
+    if old is None:
+        return
+    with _config_lock:
+        subscribers = list(_subscribers)
+    for section, callback in subscribers:
+        if section is None:
+            old_value, new_value = old, new
+        else:
+            old_value, new_value = get_section(old, section), get_section(new, section)
+        if old_value == new_value:
+            continue
+        try:
+            callback(new_value, old_value)
+        except Exception as e:
+            logger.error(f"Config subscriber {callback!r} failed: {e}")
+
+def get_config(config_path: Optional[Path] = None) -> "Config":
     """
     Get the application configuration.
     
     This function loads the configuration from the specified file (or the default location)
     and applies any environment variable overrides. The configuration is cached after the
-    first load.
+    first load, and reloaded if a different configuration file is requested.
+    
+    Loading is serialized, so threads asking for the configuration concurrently
+    get the same snapshot; once it is loaded, calls with the same arguments
+    return it without touching the file system.
     
     Args:
         config_path: Optional path to the configuration file. If not provided,
                     checks the AIM2_CONFIG environment variable and then default locations.
                     
     Returns:
-        A dictionary containing the application configuration.
+        A frozen Config snapshot of the application configuration.
         
     Raises:
         FileNotFoundError: If the configuration file cannot be found.
         yaml.YAMLError: If the configuration file is not valid YAML.
+        ValueError: If a typed section holds a value of the wrong type or
+                   out of range.
     """
-    global _config
-    
-    # Return cached config if available
-    if _config is not None:
-        return _config
-    
-    # Load configuration from file
-    config = _load_config_file(config_path)
+    global _config, _config_source, _config_request
     
-    # Apply environment variable overrides
-    _config = _apply_environment_overrides(config)
+    request = (config_path, os.environ.get("AIM2_CONFIG"))
+    config = _config
+    if config is not None and request == _config_request:
+        return config
     
-    return _config
+    with _config_lock:
+        source = _resolve_config_path(config_path)
+        
+        # Return cached config if it was loaded from the same file
+        if _config is not None and source == _config_source:
+            _config_request = request
+            return _config
+        
+        # Load configuration from file and apply environment variable overrides
+        config = _build_config(source)
+        
+        _config = config
+        _config_source = source
+        _config_request = request
+        return config
 
-def reload_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
+def reload_config(config_path: Optional[Path] = None) -> "Config":
     """
     Reload the configuration from disk, ignoring any cached values.
     
     This is useful for development or when the configuration changes at runtime.
+    Subscribers are notified of the sections that changed.
     
     Args:
         config_path: Optional path to the configuration file.
         
     Returns:
-        A dictionary containing the reloaded application configuration.
+        The reloaded Config snapshot.
     """
     global _config
-    _config = None  # Clear the cache
-    return get_config(config_path)
+    with _config_lock:
+        old = _config
+        _config = None  # Clear the cache
+        try:
+            new = get_config(config_path)
+        except Exception:
+            _config = old
+            raise
+    _notify(old, new)
+    return new
+
+class ConfigWatcher:
+    """
+    Reloads the configuration when its file changes, by polling its mtime.
+    
+    The file is only parsed when its modification time or size changed. A
+    new configuration that fails to parse or validate is logged and ignored,
+    keeping the current snapshot; a valid one replaces the snapshot returned
+    by get_config() in one assignment, then subscribers are notified.
+    
+    Use start() for a background polling thread, or call check() from a
+    worker's own loop.
+    """
+    
+    def __init__(self, config_path: Optional[Path] = None, interval: float = 1.0):
+        """
+        Initialize the watcher.
+        
+        Args:
+            config_path: Configuration file to watch. Defaults to the file
+                        get_config() loads.
+            interval: Seconds between two polls of the background thread.
+        """
+        self.config_path = config_path
+        self.interval = interval
+        self.reloads = 0
+        self.errors = 0
+        self._stamp = self._file_stamp()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = _resolve_config_path(self.config_path).stat()
+        except (FileNotFoundError, OSError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def check(self) -> bool:
+        """
+        Reload the configuration if the file changed since the last check.
+        
+        Returns:
+            True if a new snapshot was installed.
+        """
+        global _config, _config_source, _config_request
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        
+        with _config_lock:
+            source = _resolve_config_path(self.config_path)
+            try:
+                new = _build_config(source)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Ignoring invalid configuration in {source}: {e}")
+                return False
+            old = _config
+            _config = new
+            _config_source = source
+            _config_request = (self.config_path, os.environ.get("AIM2_CONFIG"))
+        self.reloads += 1
+        logger.info(f"Reloaded configuration from {source}")
+        _notify(old, new)
+        return True
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Configuration watcher error: {e}")
+    
+    def start(self) -> "ConfigWatcher":
+        """Start polling in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="aim2-config-watcher", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def __enter__(self) -> "ConfigWatcher":
+        return self.start()
+    
+    def __exit__(self, *exc) -> None:
+        self.stop()
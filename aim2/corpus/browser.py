@@ -0,0 +1,317 @@
+"""
+Pooled headless browser sessions for the PDF fallback tier.
+
+Publisher sites need a real browser (undetected-chromedriver) to get past
+their JavaScript checks, and starting one costs seconds and hundreds of MB.
+BrowserPool keeps a bounded number of long-lived sessions instead of one
+browser per PMID:
+
+- each of ``corpus.browser.workers`` threads owns one driver, started on
+  first use and reused for the following downloads;
+- a session is restarted after ``max_pages_per_session`` pages, which keeps
+  the memory growth of long-lived browsers in check, and after any error,
+  in which case the download is retried on the fresh session;
+- jobs are handed to sessions so that at most ``per_domain`` downloads run
+  against one publisher host at a time; jobs for other hosts overtake
+  jobs that would have to wait.
+
+Drivers are created by a factory, so tests and benchmarks can use a stub
+driver. A driver needs ``get(url)``, ``page_source`` and ``quit()``;
+download_pdf() also uses ``get_cookies()`` and ``execute_script()``.
+"""
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BrowserStats:
+    """Counters of a BrowserPool."""
+    sessions_started: int = 0
+    sessions_recycled: int = 0
+    crashes: int = 0
+    jobs: int = 0
+    failures: int = 0
+    retries: int = 0
+
+@dataclass
+class DownloadResult:
+    """Outcome of one job run by BrowserPool.map()."""
+    url: str
+    value: object = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class _Job:
+    __slots__ = ("url", "domain", "task", "future", "attempts")
+
+    def __init__(self, url: str, task: Callable):
+        self.url = url
+        self.domain = urlsplit(url).netloc.lower()
+        self.task = task
+        self.future: Future = Future()
+        self.attempts = 0
+
+class _MetaParser(HTMLParser):
+    """Finds the citation_pdf_url meta tag publishers add for indexers."""
+
+    def __init__(self):
+        super().__init__()
+        self.pdf_url: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "meta" or self.pdf_url is not None:
+            return
+        values = dict(attrs)
+        if (values.get("name") or "").lower() == "citation_pdf_url":
+            self.pdf_url = values.get("content")
+
+def citation_pdf_url(html: str, base_url: str = "") -> Optional[str]:
+    """Return the PDF URL an article page declares in its citation_pdf_url meta tag."""
+    parser = _MetaParser()
+    parser.feed(html)
+    parser.close()
+    if not parser.pdf_url:
+        return None
+    return urljoin(base_url, parser.pdf_url)
+
+def fetch_page(driver, url: str) -> str:
+    """Load a page and return its HTML."""
+    driver.get(url)
+    return driver.page_source
+
+def download_pdf(driver, url: str, timeout: float = 60) -> bytes:
+    """
+    Download the PDF of an article page through a browser session.
+
+    The browser loads the article page, which passes the site's checks and
+    sets its cookies; the PDF it links to is then fetched with those cookies
+    and the browser's user agent.
+
+    Raises:
+        ValueError: If the response is not a PDF.
+    """
+    driver.get(url)
+    pdf_url = citation_pdf_url(driver.page_source, url) or url
+    cookies = []
+    for cookie in driver.get_cookies():
+        cookies.append(f"{cookie['name']}={cookie['value']}")
+    headers = {"User-Agent": driver.execute_script("return navigator.userAgent"), "Referer": url}
+    if cookies:
+        headers["Cookie"] = "; ".join(cookies)
+    request = urllib.request.Request(pdf_url, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+    if not data.startswith(b"%PDF"):
+        raise ValueError(f"{pdf_url} did not return a PDF")
+    return data
+
+def chrome_driver_factory(headless: bool = True) -> Callable[[], object]:
+    """Return a factory of undetected-chromedriver sessions."""
+    def create():
+        import undetected_chromedriver as uc
+        options = uc.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        return uc.Chrome(options=options)
+    return create
+
+class BrowserPool:
+    """Bounded pool of reusable browser sessions with per-domain limits."""
+
+    def __init__(self, driver_factory: Callable[[], object], workers: int = 2,
+                 max_pages_per_session: int = 50, per_domain: int = 1, retries: int = 1):
+        """
+        Initialize the pool; sessions are started on first use.
+
+        Args:
+            driver_factory: Creates a driver session.
+            workers: Number of sessions (and threads).
+            max_pages_per_session: Jobs a session runs before it is restarted.
+            per_domain: Concurrent jobs per host.
+            retries: Times a failed job is retried on a fresh session.
+        """
+        self.driver_factory = driver_factory
+        self.workers = workers
+        self.max_pages_per_session = max_pages_per_session
+        self.per_domain = per_domain
+        self.retries = retries
+        self.stats = BrowserStats()
+        self._pending: Deque[_Job] = deque()
+        self._active: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, settings: Dict, driver_factory: Optional[Callable[[], object]] = None,
+                    **kwargs) -> "BrowserPool":
+        """Create a pool from the 'corpus.browser' config section."""
+        options = {
+            "workers": settings.get("workers", 2),
+            "max_pages_per_session": settings.get("max_pages_per_session", 50),
+            "per_domain": settings.get("per_domain", 1),
+            "retries": settings.get("retries", 1),
+        }
+        options.update(kwargs)
+        factory = driver_factory or chrome_driver_factory(settings.get("headless", True))
+        return cls(factory, **options)
+
+    def submit(self, url: str, task: Callable = fetch_page) -> Future:
+        """
+        Queue a job; task(driver, url) runs on one of the sessions.
+
+        Returns:
+            A Future with the task's return value.
+        """
+        job = _Job(url, task)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+            self._pending.append(job)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"browser-{len(self._threads)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return job.future
+
+    def map(self, urls: Iterable[str], task: Callable = fetch_page) -> Iterator[DownloadResult]:
+        """Run task on every URL and yield the results in completion order."""
+        futures = {}
+        for url in urls:
+            futures[self.submit(url, task)] = (url, time.perf_counter())
+        for future in as_completed(futures):
+            url, submitted = futures[future]
+            result = DownloadResult(url=url, seconds=time.perf_counter() - submitted)
+            error = future.exception()
+            if error is None:
+                result.value = future.result()
+            else:
+                result.error = f"{type(error).__name__}: {error}"
+            yield result
+
+    def close(self, cancel_pending: bool = False) -> None:
+        """
+        Stop the sessions once the queued jobs are done.
+
+        Args:
+            cancel_pending: Cancel the jobs that have not started instead.
+        """
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                while self._pending:
+                    self._pending.popleft().future.cancel()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _next_job(self) -> Optional[_Job]:
+        """Take the oldest job whose host is below its limit; None when closing."""
+        with self._condition:
+            while True:
+                for job in self._pending:
+                    if self._active.get(job.domain, 0) < self.per_domain:
+                        self._pending.remove(job)
+                        self._active[job.domain] = self._active.get(job.domain, 0) + 1
+                        return job
+                if self._closed and not self._pending:
+                    return None
+                self._condition.wait()
+
+    def _release(self, job: _Job, retry: bool = False) -> None:
+        with self._condition:
+            self._active[job.domain] -= 1
+            if retry:
+                self._pending.appendleft(job)
+            self._condition.notify_all()
+
+    def _quit(self, driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Browser session did not quit cleanly: {e}")
+
+    def _run(self) -> None:
+        """Session thread: run jobs on one driver, restarting it as needed."""
+        driver = None
+        pages = 0
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            # A retried job's future is already running
+            if job.attempts == 0 and not job.future.set_running_or_notify_cancel():
+                self._release(job)
+                continue
+            try:
+                if driver is None:
+                    driver = self.driver_factory()
+                    pages = 0
+                    with self._condition:
+                        self.stats.sessions_started += 1
+                value = job.task(driver, job.url)
+            except Exception as e:
+                if driver is not None:
+                    self._quit(driver)
+                    driver = None
+                retry = job.attempts < self.retries
+                with self._condition:
+                    self.stats.crashes += 1
+                    if retry:
+                        self.stats.retries += 1
+                    else:
+                        self.stats.jobs += 1
+                        self.stats.failures += 1
+                if retry:
+                    job.attempts += 1
+                    logger.debug(f"Retrying {job.url} on a new session after: {e}")
+                    self._release(job, retry=True)
+                else:
+                    logger.warning(f"Browser download of {job.url} failed: {e}")
+                    self._release(job)
+                    job.future.set_exception(e)
+                continue
+            pages += 1
+            with self._condition:
+                self.stats.jobs += 1
+            self._release(job)
+            job.future.set_result(value)
+            if pages >= self.max_pages_per_session:
+                self._quit(driver)
+                driver = None
+                with self._condition:
+                    self.stats.sessions_recycled += 1
+        if driver is not None:
+            self._quit(driver)
+
+__all__ = [
+    'BrowserPool',
+    'BrowserStats',
+    'DownloadResult',
+    'chrome_driver_factory',
+    'citation_pdf_url',
+    'download_pdf',
+    'fetch_page',
+]
@@ -0,0 +1,275 @@
+"""
+Offset-preserving text chunking.
+
+The extraction stages send documents to the LLM in chunks of about
+``extraction.chunking.chunk_size`` characters, with ``chunk_overlap``
+characters repeated between neighbours so that an entity cut by a chunk
+boundary is seen whole in one of them. Splitters that return chunk strings
+copy every character once (and the overlap twice), and the entity offsets
+the LLM reports are then relative to a string that no longer knows where it
+came from.
+
+TextChunker returns Chunk views instead: a document id, a start and an end
+offset, and a reference to the one document text they all share. Offsets are
+relative to that text (Document.text for documents), so an entity found at
+``i`` in a chunk is at ``chunk.start + i`` in the document, and the chunk's
+string is only built when ``chunk.text`` is read.
+
+Like a recursive character splitter, the text is split on the first
+separator of a hierarchy that yields pieces of at most ``chunk_size``, with
+larger pieces split on the next one: paragraphs (blank lines), the
+configured separator, sentence boundaries, then clauses, words and finally
+characters. Neighbouring pieces are then merged up to ``chunk_size``, but not
+across the edges of a piece that had to be split further, so a chunk does
+not join the end of one paragraph to the start of a long one. Pieces cover
+the text without gaps, so a chunk is always one contiguous span, trimmed of
+surrounding whitespace.
+"""
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .document import Document
+
+logger = logging.getLogger(__name__)
+
+# Marks the sentence boundary level of a separator hierarchy
+SENTENCES = None
+
+# Words ending with a period that do not end a sentence
+ABBREVIATIONS = frozenset([
+    "al", "approx", "ca", "cf", "cv", "e.g", "eq", "eqs", "fig", "figs", "i.e", "no", "nos",
+    "ref", "refs", "resp", "sp", "spp", "ssp", "subsp", "tab", "var", "viz", "vs",
+])
+
+_TERMINATORS = ".?!"
+_CLOSERS = "\"')]"
+
+class Chunk:
+    """A (doc_id, start, end) view into a shared document text."""
+
+    __slots__ = ("doc_id", "start", "end", "buffer")
+
+    def __init__(self, doc_id: str, start: int, end: int, buffer: str):
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+        self.buffer = buffer
+
+    @property
+    def text(self) -> str:
+        """The chunk's text (a new string)."""
+        return self.buffer[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return (self.doc_id, self.start, self.end) == (other.doc_id, other.start, other.end)
+
+    def __hash__(self) -> int:
+        return hash((self.doc_id, self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.doc_id!r}, {self.start}, {self.end})"
+
+def _is_sentence_end(text: str, position: int, start: int) -> bool:
+    """Whether the terminator at position ends a sentence (the next character is a space)."""
+    char = text[position]
+    if char != ".":
+        return True
+    # The word before the period, e.g. "Fig" or "A" in "A. thaliana"
+    word_start = position
+    while word_start > start and not text[word_start - 1].isspace() and text[word_start - 1] != "(":
+        word_start -= 1
+    word = text[word_start:position]
+    if not word:
+        return True
+    if len(word) == 1 and word.isalpha():
+        return False
+    return word.lower() not in ABBREVIATIONS
+
+def sentence_ends(text: str, start: int = 0, end: Optional[int] = None) -> List[int]:
+    """
+    Offsets just after each sentence-ending punctuation in text[start:end].
+
+    A sentence ends at '.', '?' or '!' (and any closing quotes or brackets)
+    followed by a space and an uppercase letter, a digit or an opening
+    bracket. Periods after initials and common abbreviations do not count.
+    """
+    end = len(text) if end is None else end
+    # Only spaces after a terminator or a closer can end a sentence
+    spaces = []
+    for char in _TERMINATORS + _CLOSERS:
+        position = text.find(char + " ", start, end)
+        while position != -1:
+            spaces.append(position + 1)
+            position = text.find(char + " ", position + 2, end)
+    spaces.sort()
+    ends = []
+    for position in spaces:
+        if position + 1 >= end:
+            continue
+        following = text[position + 1]
+        before = position - 1
+        while before > start and text[before] in _CLOSERS:
+            before -= 1
+        if (text[before] in _TERMINATORS
+                and (following.isupper() or following.isdigit() or following in "([")
+                and _is_sentence_end(text, before, start)):
+            ends.append(position + 1)
+    return ends
+
+def _separator_ends(text: str, separator: str, start: int, end: int) -> List[int]:
+    """Offsets just after each occurrence of separator in text[start:end]."""
+    ends = []
+    position = text.find(separator, start, end)
+    while position != -1:
+        position += len(separator)
+        ends.append(position)
+        position = text.find(separator, position, end)
+    return ends
+
+class TextChunker:
+    """Splits texts into overlapping chunks along a separator hierarchy."""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, separator: str = "\n",
+                 separators: Optional[Sequence[Optional[str]]] = None, strip: bool = True):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Most characters in a chunk.
+            chunk_overlap: Most characters shared by neighbouring chunks.
+            separator: Separator tried after paragraph breaks.
+            separators: The whole hierarchy, replacing the default
+                       ["\\n\\n", separator, SENTENCES, "; ", ", ", " ", ""];
+                       SENTENCES stands for sentence boundaries and "" for
+                       single characters.
+            strip: Trim whitespace at the ends of chunks.
+
+        Raises:
+            ValueError: If the overlap is not smaller than the chunk size.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be less than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.strip = strip
+        if separators is None:
+            separators = []
+            for candidate in ("\n\n", separator, SENTENCES, "; ", ", ", " "):
+                if candidate not in separators:
+                    separators.append(candidate)
+        self.separators: List[Optional[str]] = list(separators)
+        if "" not in self.separators:
+            self.separators.append("")
+
+    @classmethod
+    def from_config(cls, settings: Dict, **kwargs) -> "TextChunker":
+        """Create a chunker from the 'extraction.chunking' config section."""
+        options = {
+            "chunk_size": settings.get("chunk_size", 1000),
+            "chunk_overlap": settings.get("chunk_overlap", 200),
+            "separator": settings.get("separator", "\n"),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def _boundaries(self, text: str, start: int, end: int, level: int) -> List[int]:
+        separator = self.separators[level]
+        if separator is SENTENCES:
+            return sentence_ends(text, start, end)
+        if separator == "":
+            return list(range(start + self.chunk_size, end, self.chunk_size))
+        return _separator_ends(text, separator, start, end)
+
+    def pieces(self, text: str, start: int = 0, end: Optional[int] = None,
+               level: int = 0) -> Iterator[Optional[Tuple[int, int]]]:
+        """
+        Yield contiguous (start, end) pieces of text[start:end] of at most
+        chunk_size characters, split on the highest separator possible.
+
+        None is yielded around the pieces of a span that had to be split on
+        a lower separator; chunks are not merged across it.
+        """
+        end = len(text) if end is None else end
+        piece_start = start
+        boundaries = self._boundaries(text, start, end, level)
+        boundaries.append(end)
+        for boundary in boundaries:
+            if boundary <= piece_start:
+                continue
+            if boundary - piece_start <= self.chunk_size or level + 1 >= len(self.separators):
+                yield piece_start, boundary
+            else:
+                yield None
+                yield from self.pieces(text, piece_start, boundary, level + 1)
+                yield None
+            piece_start = boundary
+
+    def _view(self, doc_id: str, text: str, start: int, end: int) -> Optional[Chunk]:
+        if self.strip:
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+        if start == end:
+            return None
+        return Chunk(doc_id, start, end, text)
+
+    def split(self, text: str, doc_id: str = "") -> Iterator[Chunk]:
+        """Yield the chunks of one text in order."""
+        window: Deque[Tuple[int, int]] = deque()
+        for piece in self.pieces(text):
+            if piece is None:
+                if window:
+                    chunk = self._view(doc_id, text, window[0][0], window[-1][1])
+                    if chunk is not None:
+                        yield chunk
+                    window.clear()
+                continue
+            start, end = piece
+            if window and end - window[0][0] > self.chunk_size:
+                chunk = self._view(doc_id, text, window[0][0], window[-1][1])
+                if chunk is not None:
+                    yield chunk
+                # Keep the trailing pieces that fit in the overlap and leave
+                # room for the new piece
+                while window and (window[-1][1] - window[0][0] > self.chunk_overlap
+                                  or end - window[0][0] > self.chunk_size):
+                    window.popleft()
+            window.append((start, end))
+        if window:
+            chunk = self._view(doc_id, text, window[0][0], window[-1][1])
+            if chunk is not None:
+                yield chunk
+
+    def chunk_documents(self, documents: Iterable[Union[Document, Tuple[str, str]]]) -> Iterator[Chunk]:
+        """
+        Chunk a stream of documents lazily.
+
+        Args:
+            documents: Documents, chunked over Document.text, or (doc_id, text) pairs.
+
+        Yields:
+            The chunks of each document in order.
+        """
+        for document in documents:
+            if isinstance(document, Document):
+                doc_id, text = document.doc_id, document.text
+            else:
+                doc_id, text = document
+            yield from self.split(text, doc_id)
+
+__all__ = [
+    'ABBREVIATIONS',
+    'Chunk',
+    'SENTENCES',
+    'TextChunker',
+    'sentence_ends',
+]
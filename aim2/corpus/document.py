@@ -0,0 +1,46 @@
+"""
+Document model shared by the corpus parsers and the preprocessing stages.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class Section:
+    """A titled part of a document's text."""
+    title: str
+    text: str
+
+@dataclass
+class Document:
+    """
+    Text of one article, as extracted from PMC XML or a PDF.
+
+    ``doc_id`` is the PMCID or PMID for XML, or whatever identifier the
+    caller gave a PDF; ``source`` names where the text came from (the
+    archive member or file).
+    """
+    doc_id: str
+    title: str = ""
+    abstract: str = ""
+    sections: List[Section] = field(default_factory=list)
+    pmid: Optional[str] = None
+    pmcid: Optional[str] = None
+    doi: Optional[str] = None
+    source: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Title, abstract and sections as one text, separated by blank lines."""
+        parts = []
+        if self.title:
+            parts.append(self.title)
+        if self.abstract:
+            parts.append(self.abstract)
+        for section in self.sections:
+            if section.title:
+                parts.append(section.title)
+            if section.text:
+                parts.append(section.text)
+        return "\n\n".join(parts)
+
+__all__ = ['Document', 'Section']
@@ -0,0 +1,229 @@
+"""
+Streaming parser for PMC / JATS full-text XML.
+
+PMC Open Access bulk packages are .tar.gz archives with thousands of
+articles, and efetch from the pmc database returns many articles in one
+``<pmc-articleset>``. Parsing those into a DOM first makes memory grow with
+the input. iter_articles() instead:
+
+- reads archives member by member in tarfile's streaming mode, without
+  extracting anything to disk or seeking;
+- parses each stream incrementally with ElementTree.iterparse, building a
+  Document as soon as an ``<article>`` element is complete;
+- drops every finished element from the tree, so memory holds at most one
+  article whatever the size of the input.
+
+Tables, figures, formulas and supplementary material are left out of the
+section text.
+"""
+import gzip
+import io
+import logging
+import tarfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+from .document import Document, Section
+
+logger = logging.getLogger(__name__)
+
+# Archive members parsed as articles
+XML_SUFFIXES = (".nxml", ".xml")
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+# Elements whose text is not part of the article text
+SKIP_TAGS = frozenset((
+    "table-wrap", "table-wrap-group", "fig", "fig-group", "disp-formula",
+    "inline-formula", "supplementary-material", "ref-list", "math",
+))
+
+def _local(tag) -> str:
+    """Tag name without its namespace."""
+    if not isinstance(tag, str):
+        return ""
+    return tag.rpartition("}")[2]
+
+def _skipped(tag) -> bool:
+    if tag in SKIP_TAGS:
+        return True
+    return tag[:1] == "{" and _local(tag) in SKIP_TAGS
+
+def _gather(element: ET.Element, parts: List[str]) -> None:
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        if not _skipped(child.tag):
+            _gather(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+def element_text(element: Optional[ET.Element]) -> str:
+    """Text of an element and its descendants, with whitespace collapsed."""
+    if element is None:
+        return ""
+    parts: List[str] = []
+    _gather(element, parts)
+    return " ".join("".join(parts).split())
+
+def _paragraphs(container: ET.Element, result: List[str]) -> None:
+    """Collect the paragraphs of a section, including nested section titles."""
+    for child in container:
+        tag = _local(child.tag)
+        if tag in SKIP_TAGS or tag in ("title", "label"):
+            continue
+        if tag == "sec":
+            title = element_text(child.find("title"))
+            if title:
+                result.append(title)
+            _paragraphs(child, result)
+            continue
+        text = element_text(child)
+        if text:
+            result.append(text)
+
+def _abstract(meta: ET.Element) -> str:
+    """Text of the main abstract; graphical and other typed abstracts are a fallback."""
+    chosen = None
+    for abstract in meta.iterfind("abstract"):
+        if abstract.get("abstract-type") in (None, "structured"):
+            chosen = abstract
+            break
+        if chosen is None:
+            chosen = abstract
+    if chosen is None:
+        return ""
+    paragraphs: List[str] = []
+    _paragraphs(chosen, paragraphs)
+    return "\n\n".join(paragraphs)
+
+def article_document(article: ET.Element, source: Optional[str] = None) -> Document:
+    """Build a Document from a complete ``<article>`` element."""
+    meta = article.find("front/article-meta")
+    if meta is None:
+        meta = ET.Element("article-meta")
+    document = Document(doc_id="", source=source)
+    for article_id in meta.iterfind("article-id"):
+        kind = article_id.get("pub-id-type")
+        value = (article_id.text or "").strip()
+        if not value:
+            continue
+        if kind == "pmid":
+            document.pmid = value
+        elif kind in ("pmc", "pmcid"):
+            document.pmcid = value if value.startswith("PMC") else f"PMC{value}"
+        elif kind == "doi":
+            document.doi = value
+    document.doc_id = document.pmcid or document.pmid or document.doi or source or ""
+    document.title = element_text(meta.find("title-group/article-title"))
+    document.abstract = _abstract(meta)
+
+    body = article.find("body")
+    if body is not None:
+        loose: List[str] = []
+        for child in body:
+            tag = _local(child.tag)
+            if tag in SKIP_TAGS:
+                continue
+            if tag == "sec":
+                paragraphs: List[str] = []
+                _paragraphs(child, paragraphs)
+                document.sections.append(Section(element_text(child.find("title")), "\n\n".join(paragraphs)))
+            else:
+                text = element_text(child)
+                if text:
+                    loose.append(text)
+        if loose:
+            document.sections.insert(0, Section("", "\n\n".join(loose)))
+    return document
+
+def iter_stream(stream: BinaryIO, source: Optional[str] = None) -> Iterator[Document]:
+    """
+    Parse the articles of one XML stream incrementally.
+
+    The stream may hold a single ``<article>`` or any wrapper around many
+    of them (``<pmc-articleset>``, OAI-PMH records).
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the XML is malformed; the
+            articles before the error have been yielded.
+    """
+    stack: List[ET.Element] = []
+    depth = 0
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        is_article = tag == "article" or tag.endswith("}article")
+        if event == "start":
+            stack.append(element)
+            depth += is_article
+            continue
+        stack.pop()
+        if is_article:
+            depth -= 1
+            if depth == 0:
+                yield article_document(element, source)
+                element.clear()
+        # Outside articles nothing is needed once an element is complete
+        if depth == 0 and stack:
+            stack[-1].remove(element)
+
+def iter_archive(archive: Union[str, Path, BinaryIO], skip_errors: bool = True) -> Iterator[Document]:
+    """
+    Parse the XML members of a tar archive (optionally compressed) as a stream.
+
+    Args:
+        archive: Path or binary file object of the archive.
+        skip_errors: Log and skip malformed members instead of raising.
+    """
+    if isinstance(archive, (str, Path)):
+        tar = tarfile.open(archive, mode="r|*")
+    else:
+        tar = tarfile.open(fileobj=archive, mode="r|*")
+    with tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith(XML_SUFFIXES):
+                continue
+            stream = tar.extractfile(member)
+            try:
+                yield from iter_stream(stream, member.name)
+            except ET.ParseError as e:
+                if not skip_errors:
+                    raise
+                logger.warning(f"Skipping malformed article {member.name}: {e}")
+
+def iter_articles(source: Union[str, Path, BinaryIO], skip_errors: bool = True) -> Iterator[Document]:
+    """
+    Parse the articles of an XML file, a gzipped XML file or a tar archive.
+
+    Args:
+        source: Path, or binary file object of an XML stream.
+        skip_errors: Log and skip malformed archive members instead of raising.
+    """
+    if not isinstance(source, (str, Path)):
+        yield from iter_stream(source)
+        return
+    name = str(source)
+    if name.endswith(ARCHIVE_SUFFIXES):
+        yield from iter_archive(source, skip_errors)
+    elif name.endswith(".gz"):
+        with gzip.open(source, "rb") as stream:
+            yield from iter_stream(stream, Path(name).name)
+    else:
+        with open(source, "rb") as stream:
+            yield from iter_stream(stream, Path(name).name)
+
+def parse_article(data: bytes, source: Optional[str] = None) -> Optional[Document]:
+    """Parse the first article of an XML document held in memory."""
+    for document in iter_stream(io.BytesIO(data), source):
+        return document
+    return None
+
+__all__ = [
+    'article_document',
+    'element_text',
+    'iter_archive',
+    'iter_articles',
+    'iter_stream',
+    'parse_article',
+]
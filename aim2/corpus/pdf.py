@@ -0,0 +1,270 @@
+"""
+Process-pool PDF text extraction.
+
+PDFs that fail tier 1 are the slow, unreliable part of the corpus: text
+extraction is CPU-bound, and a malformed file can make PyMuPDF spin or
+crash. PdfExtractor runs extraction on a pool of worker processes that it
+manages itself, rather than through ProcessPoolExecutor, so that it can:
+
+- kill a worker that exceeds ``corpus.pdf.timeout`` on one document and
+  start a replacement, instead of waiting for it;
+- notice a worker that died (e.g. on a segfault) and report the document as
+  failed while the rest of the batch continues;
+- yield results in completion order, as soon as each document is done.
+
+Only the first ``corpus.pdf.max_pages`` pages are read, as text. Pages are
+rendered at ``corpus.pdf.dpi`` for OCR only when OCR is requested and a page
+has no text layer.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .document import Document, Section
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PdfResult:
+    """Outcome of the extraction of one PDF."""
+    doc_id: str
+    path: str
+    document: Optional[Document] = None
+    pages: int = 0
+    page_count: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def extract_pdf_text(path: str, doc_id: Optional[str] = None, max_pages: int = 100,
+                     ocr: bool = False, dpi: int = 300) -> Tuple[Document, int, int]:
+    """
+    Extract the text of a PDF with PyMuPDF, one section per page.
+
+    Args:
+        path: PDF file.
+        doc_id: Identifier of the document; defaults to the file name.
+        max_pages: Number of leading pages to read.
+        ocr: OCR the pages without a text layer (needs Tesseract).
+        dpi: Resolution of the pages rendered for OCR.
+
+    Returns:
+        The document, the number of pages read and the page count of the file.
+    """
+    import fitz
+
+    document = Document(doc_id=doc_id or Path(path).stem, source=str(path))
+    with fitz.open(path) as pdf:
+        page_count = pdf.page_count
+        document.title = (pdf.metadata or {}).get("title") or ""
+        pages = min(page_count, max_pages)
+        for number in range(pages):
+            page = pdf[number]
+            text = page.get_text("text")
+            if ocr and not text.strip():
+                textpage = page.get_textpage_ocr(dpi=dpi, full=True)
+                text = page.get_text("text", textpage=textpage)
+            document.sections.append(Section(f"Page {number + 1}", text.strip()))
+    return document, pages, page_count
+
+def _worker_main(conn, extract: Callable, options: Dict) -> None:
+    """Extract the documents sent over conn until None is received."""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        doc_id, path = job
+        try:
+            conn.send((extract(path, doc_id=doc_id, **options), None))
+        except Exception as e:
+            conn.send((None, f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    """One worker process and the job it is running."""
+
+    def __init__(self, context, extract: Callable, options: Dict):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, extract, options),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job: Optional[Tuple[str, str]] = None
+        self.started = 0.0
+
+    def submit(self, job: Tuple[str, str]) -> None:
+        self.job = job
+        self.started = time.perf_counter()
+        self.conn.send(job)
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class PdfExtractor:
+    """Extracts PDF text on a pool of killable worker processes."""
+
+    def __init__(self, workers: Optional[int] = None, max_pages: int = 100, dpi: int = 300,
+                 timeout: float = 300, ocr: bool = False, extract: Callable = extract_pdf_text,
+                 mp_context=None):
+        """
+        Initialize the extractor; workers are started on first use.
+
+        Args:
+            workers: Number of worker processes; defaults to the CPU count.
+            max_pages: Number of leading pages read per document.
+            dpi: Resolution of pages rendered for OCR.
+            timeout: Seconds a document may take before its worker is killed.
+            ocr: OCR pages without a text layer.
+            extract: Module-level function called as extract(path, doc_id=...,
+                    max_pages=..., ocr=..., dpi=...) in the workers; returns
+                    (Document, pages read, page count).
+            mp_context: multiprocessing context; defaults to the platform's.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.options = {"max_pages": max_pages, "ocr": ocr, "dpi": dpi}
+        self.extract = extract
+        self.context = mp_context or multiprocessing.get_context()
+        self._pool: List[_Worker] = []
+        self.timeouts = 0
+        self.crashes = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict, **kwargs) -> "PdfExtractor":
+        """Create an extractor from the 'corpus.pdf' config section."""
+        options = {
+            "max_pages": settings.get("max_pages", 100),
+            "dpi": settings.get("dpi", 300),
+            "timeout": settings.get("timeout", 300),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def _start_worker(self) -> _Worker:
+        return _Worker(self.context, self.extract, self.options)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        pool, self._pool = self._pool, []
+        for worker in pool:
+            worker.stop()
+
+    def __enter__(self) -> "PdfExtractor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        replacement = self._start_worker()
+        self._pool[self._pool.index(worker)] = replacement
+        return replacement
+
+    def extract_all(self, jobs: Iterable[Union[str, Path, Tuple[str, Union[str, Path]]]]) -> Iterator[PdfResult]:
+        """
+        Extract a stream of PDFs, yielding results in completion order.
+
+        Args:
+            jobs: PDF paths, or (doc_id, path) pairs.
+
+        Yields:
+            One PdfResult per job. Failures, timeouts and crashed workers are
+            reported as results with an error instead of raising.
+        """
+        while len(self._pool) < self.workers:
+            self._pool.append(self._start_worker())
+        pending = iter(jobs)
+        idle = list(self._pool)
+        busy: List[_Worker] = []
+        exhausted = False
+
+        try:
+            while True:
+                while idle and not exhausted:
+                    job = next(pending, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    if isinstance(job, (str, Path)):
+                        job = (Path(job).stem, str(job))
+                    else:
+                        job = (job[0], str(job[1]))
+                    worker = idle.pop()
+                    try:
+                        worker.submit(job)
+                    except OSError:
+                        # The worker died while idle
+                        worker = self._replace(worker)
+                        worker.submit(job)
+                    busy.append(worker)
+                if not busy:
+                    return
+
+                first_started = busy[0].started
+                handles = []
+                for worker in busy:
+                    first_started = min(first_started, worker.started)
+                    handles.append(worker.conn)
+                    handles.append(worker.process.sentinel)
+                remaining = first_started + self.timeout - time.perf_counter()
+                ready = wait(handles, timeout=max(0.0, remaining))
+
+                now = time.perf_counter()
+                for running in list(busy):
+                    worker = running
+                    doc_id, path = worker.job
+                    result = PdfResult(doc_id=doc_id, path=path, seconds=now - worker.started)
+                    if worker.conn in ready or worker.process.sentinel in ready:
+                        try:
+                            extracted, error = worker.conn.recv()
+                        except (EOFError, OSError):
+                            extracted, error = None, f"worker exited with code {worker.process.exitcode}"
+                            self.crashes += 1
+                            worker = self._replace(worker)
+                        if error is None:
+                            result.document, result.pages, result.page_count = extracted
+                        else:
+                            result.error = error
+                    elif now - worker.started >= self.timeout:
+                        result.error = f"timed out after {self.timeout}s"
+                        result.timed_out = True
+                        self.timeouts += 1
+                        logger.warning(f"Killing PDF worker stuck on {path}")
+                        worker = self._replace(worker)
+                    else:
+                        continue
+                    busy.remove(running)
+                    idle.append(worker)
+                    if result.error:
+                        logger.debug(f"PDF extraction failed for {path}: {result.error}")
+                    yield result
+        finally:
+            # Abandoned jobs (the caller stopped iterating) would leave stale
+            # results in the pipes
+            for worker in busy:
+                self._replace(worker)
+
+__all__ = ['PdfExtractor', 'PdfResult', 'extract_pdf_text']
@@ -0,0 +1,397 @@
+"""
+Text cleaning and normalization for extracted documents.
+
+Text extracted from PDFs, and to a lesser degree from XML, carries artifacts:
+repeated page headers and footers, page numbers, words hyphenated across
+line breaks, hard line breaks inside paragraphs, and many Unicode variants of
+the same character. Applying one substitution rule after another rescans the
+whole document once per rule, and the line-based rules each walk every
+line in Python. TextCleaner instead compiles its rules once into two stages:
+
+1. a character stage: Unicode NFKC normalization, then the character rules
+   (quotes, dashes, spaces, invisible characters). Each rule is a C-level
+   substring search that only rewrites the text when the character occurs;
+   this is cheaper than a single ``str.translate``, which looks every
+   character of non-ASCII text up in the table. ASCII text skips the
+   rules for non-ASCII characters;
+2. a line pass over the whitespace-collapsed lines that, in one scan,
+   drops page numbers and repeated headers/footers, rejoins hyphenated
+   words and reflows lines into paragraphs.
+
+Headers and footers are found by counting, across the pages of a document,
+the lines near the top and bottom of each page with digits ignored (so that
+"Page 3" and "Page 4" match); lines present on at least ``min_fraction`` of
+the pages are dropped from those positions.
+
+sequential_clean() applies the same rules one pass per rule and serves as
+the reference the combined engine is checked against.
+"""
+import logging
+import math
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .document import Document, Section
+
+logger = logging.getLogger(__name__)
+
+# Character rules, applied after NFKC normalization
+CHAR_RULES: Dict[str, str] = {
+    "\r": "\n",
+    "\t": " ",
+    "\u00ad": "",   # soft hyphen
+    "\u200b": "",   # zero-width space
+    "\u200c": "",   # zero-width non-joiner
+    "\u200d": "",   # zero-width joiner
+    "\ufeff": "",   # byte order mark
+    "\u2010": "-",  # hyphen
+    "\u2011": "-",  # non-breaking hyphen
+    "\u2012": "-",  # figure dash
+    "\u2013": "-",  # en dash
+    "\u2014": "-",  # em dash
+    "\u2212": "-",  # minus sign
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201a": "'",
+    "\u201b": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u201e": '"',
+    "\u201f": '"',
+    "\u2022": "*",  # bullet
+}
+
+# Lines near each page edge considered for header/footer detection
+EDGE_LINES = 3
+
+_MASK_DIGITS = str.maketrans("0123456789", "##########")
+
+def is_page_number(line: str) -> bool:
+    """
+    Whether a whitespace-collapsed line is only a page number.
+
+    Matches "12", "- 12 -", "Page 12", "page 12 of 30" and "12 of 30".
+    """
+    # Most lines are ruled out by their length or last character
+    if len(line) > 24 or not (line[-1].isdigit() or line[-1] == "-"):
+        return False
+    words = line.lower().split(" ")
+    while words and words[0] in ("-", "page", "p."):
+        words = words[1:]
+    while words and words[-1] == "-":
+        words = words[:-1]
+    if len(words) == 1:
+        return words[0].isdigit()
+    if len(words) == 3 and words[1] in ("of", "/"):
+        return words[0].isdigit() and words[2].isdigit()
+    return False
+
+def line_key(line: str) -> str:
+    """Key used to count repeated lines: lower case, digits replaced by '#'."""
+    return line.lower().translate(_MASK_DIGITS)
+
+def _edge_indexes(lines: Sequence[str], edge_lines: int) -> Set[int]:
+    """Indexes of the first and last edge_lines non-empty lines."""
+    filled = []
+    for index, line in enumerate(lines):
+        if line:
+            filled.append(index)
+    return set(filled[:edge_lines]) | set(filled[-edge_lines:])
+
+def _collapse(text: str) -> List[str]:
+    lines = []
+    for line in text.split("\n"):
+        lines.append(" ".join(line.split()))
+    return lines
+
+def detect_repeated_lines(pages: Sequence[List[str]], min_fraction: float = 0.5,
+                          edge_lines: int = EDGE_LINES, min_pages: int = 3) -> Set[str]:
+    """
+    Find the header and footer lines of a document.
+
+    Args:
+        pages: Whitespace-collapsed lines of each page.
+        min_fraction: Fraction of pages a line must appear on.
+        edge_lines: Lines from the top and bottom of each page considered.
+        min_pages: Documents with fewer pages have no detected headers.
+
+    Returns:
+        The line_key() of the repeated lines.
+    """
+    if len(pages) < min_pages:
+        return set()
+    counts: Dict[str, int] = {}
+    for lines in pages:
+        keys = set()
+        for index in _edge_indexes(lines, edge_lines):
+            keys.add(line_key(lines[index]))
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    threshold = max(2, math.ceil(min_fraction * len(pages)))
+    repeated = set()
+    for key, count in counts.items():
+        if count >= threshold:
+            repeated.add(key)
+    return repeated
+
+class TextCleaner:
+    """Compiled cleaning rules applied in a character stage and a line pass."""
+
+    def __init__(self, normalize_unicode: bool = True, char_rules: Optional[Dict[str, str]] = None,
+                 drop_page_numbers: bool = True, remove_headers: bool = True,
+                 dehyphenate: bool = True, join_lines: bool = True,
+                 min_fraction: float = 0.5, edge_lines: int = EDGE_LINES, min_pages: int = 3):
+        """
+        Compile the rules.
+
+        Args:
+            normalize_unicode: Apply NFKC normalization.
+            char_rules: Character replacements added to (or overriding) CHAR_RULES.
+            drop_page_numbers: Drop lines that are only a page number.
+            remove_headers: Drop repeated header and footer lines of paged input.
+            dehyphenate: Rejoin words hyphenated across a line break.
+            join_lines: Join the lines of a paragraph with spaces; blank lines
+                       separate paragraphs. Otherwise line breaks are kept.
+            min_fraction: Fraction of pages a header or footer appears on.
+            edge_lines: Lines from the top and bottom of a page checked for headers.
+            min_pages: Fewest pages for header detection.
+        """
+        rules = dict(CHAR_RULES)
+        rules.update(char_rules or {})
+        self.rules = rules
+        self.normalize_unicode = normalize_unicode
+        self.drop_page_numbers = drop_page_numbers
+        self.remove_headers = remove_headers
+        self.dehyphenate = dehyphenate
+        self.join_lines = join_lines
+        self.min_fraction = min_fraction
+        self.edge_lines = edge_lines
+        self.min_pages = min_pages
+        self._replacements: List[Tuple[str, str]] = []
+        self._ascii_replacements: List[Tuple[str, str]] = []
+        for source, target in rules.items():
+            self._replacements.append((source, target))
+            if source.isascii():
+                self._ascii_replacements.append((source, target))
+
+    def settings(self) -> Dict:
+        """Constructor arguments, e.g. for sequential_clean() or worker processes."""
+        return {
+            "normalize_unicode": self.normalize_unicode,
+            "char_rules": self.rules,
+            "drop_page_numbers": self.drop_page_numbers,
+            "remove_headers": self.remove_headers,
+            "dehyphenate": self.dehyphenate,
+            "join_lines": self.join_lines,
+            "min_fraction": self.min_fraction,
+            "edge_lines": self.edge_lines,
+            "min_pages": self.min_pages,
+        }
+
+    def normalize_chars(self, text: str) -> str:
+        """Apply the character stage."""
+        if "\r\n" in text:
+            text = text.replace("\r\n", "\n")
+        if text.isascii():
+            replacements = self._ascii_replacements
+        else:
+            replacements = self._replacements
+            if self.normalize_unicode:
+                text = unicodedata.normalize("NFKC", text)
+        for source, target in replacements:
+            if source in text:
+                text = text.replace(source, target)
+        return text
+
+    def _reflow(self, pages: List[List[str]], repeated: Set[str]) -> str:
+        """The line pass over the collapsed lines of all pages."""
+        separator = " " if self.join_lines else "\n"
+        dehyphenate = self.dehyphenate and self.join_lines
+        drop_page_numbers = self.drop_page_numbers
+        paragraphs: List[str] = []
+        current: List[str] = []
+        for lines in pages:
+            edges = _edge_indexes(lines, self.edge_lines) if repeated else ()
+            index = -1
+            for line in lines:
+                index += 1
+                if not line:
+                    if current:
+                        paragraphs.append(separator.join(current))
+                        current = []
+                    continue
+                if drop_page_numbers and is_page_number(line):
+                    continue
+                if edges and index in edges and line_key(line) in repeated:
+                    continue
+                if dehyphenate and current:
+                    previous = current[-1]
+                    if (len(previous) > 1 and previous[-1] == "-" and previous[-2].isalpha()
+                            and line[0].islower()):
+                        current[-1] = previous[:-1] + line
+                        continue
+                current.append(line)
+        if current:
+            paragraphs.append(separator.join(current))
+        return "\n\n".join(paragraphs)
+
+    def clean_pages(self, pages: Sequence[str]) -> str:
+        """Clean the pages of one document into one text."""
+        collapsed = []
+        for page in pages:
+            collapsed.append(_collapse(self.normalize_chars(page)))
+        repeated: Set[str] = set()
+        if self.remove_headers:
+            repeated = detect_repeated_lines(collapsed, self.min_fraction, self.edge_lines, self.min_pages)
+        return self._reflow(collapsed, repeated)
+
+    def clean(self, text: str) -> str:
+        """Clean one text without page structure."""
+        return self._reflow([_collapse(self.normalize_chars(text))], set())
+
+    def clean_document(self, document: Document, paged: Optional[bool] = None) -> Document:
+        """
+        Return a cleaned copy of a document.
+
+        Args:
+            document: Document to clean.
+            paged: Treat the sections as pages, as PdfExtractor produces them,
+                  and clean them into a single section with headers and
+                  footers removed. Defaults to whether every section title
+                  starts with 'Page '.
+        """
+        if paged is None:
+            paged = bool(document.sections)
+            for section in document.sections:
+                if not section.title.startswith("Page "):
+                    paged = False
+                    break
+        if paged:
+            pages = []
+            for section in document.sections:
+                pages.append(section.text)
+            sections = [Section("", self.clean_pages(pages))]
+        else:
+            sections = []
+            for section in document.sections:
+                sections.append(Section(self.clean(section.title), self.clean(section.text)))
+        return replace(document, title=self.clean(document.title),
+                       abstract=self.clean(document.abstract), sections=sections)
+
+    def clean_batch(self, items: Iterable[Union[str, Document]],
+                    workers: Optional[int] = None, chunksize: int = 16) -> List[Union[str, Document]]:
+        """
+        Clean a batch of texts or documents, in order.
+
+        Args:
+            items: Texts (cleaned with clean()) or Documents.
+            workers: Clean on this many processes; None cleans in this process.
+            chunksize: Items sent to a worker at a time.
+        """
+        items = list(items)
+        if workers and workers > 1 and len(items) > chunksize:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.settings(),)) as executor:
+                return list(executor.map(_clean_item, items, chunksize=chunksize))
+        results = []
+        for item in items:
+            results.append(self.clean_document(item) if isinstance(item, Document) else self.clean(item))
+        return results
+
+_worker_cleaner: Optional[TextCleaner] = None
+
+def _init_worker(settings: Dict) -> None:
+    global _worker_cleaner
+    _worker_cleaner = TextCleaner(**settings)
+
+def _clean_item(item: Union[str, Document]) -> Union[str, Document]:
+    if isinstance(item, Document):
+        return _worker_cleaner.clean_document(item)
+    return _worker_cleaner.clean(item)
+
+def sequential_clean(pages: Union[str, Sequence[str]], **settings) -> str:
+    """
+    Reference implementation: the rules of TextCleaner, one full pass each.
+
+    Accepts the same settings as TextCleaner; a string is cleaned as one
+    page without header detection, like TextCleaner.clean().
+    """
+    cleaner = TextCleaner(**settings)
+    paged = not isinstance(pages, str)
+    texts = list(pages) if paged else [pages]
+
+    # One pass per character rule
+    normalized = []
+    for text in texts:
+        text = text.replace("\r\n", "\n")
+        if cleaner.normalize_unicode:
+            text = unicodedata.normalize("NFKC", text)
+        for source, target in cleaner.rules.items():
+            text = text.replace(source, target)
+        normalized.append(text)
+
+    # Whitespace
+    collapsed = []
+    for text in normalized:
+        collapsed.append(_collapse(text))
+
+    # Headers and footers, then page numbers, marking dropped lines as None
+    repeated: Set[str] = set()
+    if paged and cleaner.remove_headers:
+        repeated = detect_repeated_lines(collapsed, cleaner.min_fraction, cleaner.edge_lines,
+                                         cleaner.min_pages)
+    marked: List[Tuple[str, ...]] = []
+    for lines in collapsed:
+        edges = _edge_indexes(lines, cleaner.edge_lines)
+        kept = []
+        for index, line in enumerate(lines):
+            kept.append(None if line and index in edges and line_key(line) in repeated else line)
+        marked.append(tuple(kept))
+    stream: List[Optional[str]] = []
+    for lines in marked:
+        for line in lines:
+            if line and cleaner.drop_page_numbers and is_page_number(line):
+                line = None
+            stream.append(line)
+
+    # Paragraphs: blank lines separate them, dropped lines vanish
+    paragraphs: List[List[str]] = []
+    current: List[str] = []
+    for line in stream:
+        if line is None:
+            continue
+        if not line:
+            if current:
+                paragraphs.append(current)
+                current = []
+            continue
+        current.append(line)
+    if current:
+        paragraphs.append(current)
+
+    # Hyphenation, then line joins
+    texts = []
+    for lines in paragraphs:
+        if not cleaner.join_lines:
+            texts.append("\n".join(lines))
+            continue
+        joined = lines[0]
+        for line in lines[1:]:
+            if (cleaner.dehyphenate and len(joined) > 1 and joined[-1] == "-"
+                    and joined[-2].isalpha() and line[0].islower()):
+                joined = joined[:-1] + line
+            else:
+                joined = joined + " " + line
+        texts.append(joined)
+    return "\n\n".join(texts)
+
+__all__ = [
+    'CHAR_RULES',
+    'TextCleaner',
+    'detect_repeated_lines',
+    'is_page_number',
+    'line_key',
+    'sequential_clean',
+]
@@ -0,0 +1,499 @@
+"""
+Concurrent client for the NCBI Entrez E-utilities.
+
+Fetching a corpus one request at a time spends most of its time waiting on
+round trips, while NCBI allows 3 requests per second (10 with an API key).
+EntrezClient keeps that budget busy:
+
+- requests run on a thread pool, all drawing from one TokenBucket, so the
+  rate limit holds however many workers there are (and a bucket can be
+  shared between clients);
+- searches and posted PMID lists are kept on the Entrez history server, and
+  records are fetched from it in ``batch_size`` pages (WebEnv / query_key)
+  instead of sending the IDs again with every request;
+- throttling (429) and server errors are retried with jittered exponential
+  backoff, honouring Retry-After;
+- HTTP/1.1 connections are pooled and kept alive between requests.
+
+The rate, batch size and retry count come from ``corpus.pubmed`` and follow
+configuration reloads when the client is created with from_config().
+"""
+import http.client
+import logging
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from ..config import get_config, subscribe
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+
+# Requests per second allowed by NCBI without and with an API key
+KEYLESS_RATE = 3.0
+API_KEY_RATE = 10.0
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# IDs sent per epost request
+EPOST_CHUNK = 10000
+
+class EntrezError(RuntimeError):
+    """An E-utilities request failed or returned an error message."""
+
+@dataclass
+class SearchResult:
+    """
+    A set of records on the Entrez history server.
+
+    ``ids`` holds the IDs returned with the search itself, which may be fewer
+    than ``count``; fetch() pages through all of them.
+    """
+    count: int
+    webenv: Optional[str] = None
+    query_key: Optional[str] = None
+    ids: List[str] = field(default_factory=list)
+    db: str = "pubmed"
+
+@dataclass
+class EntrezStats:
+    """Request counters of an EntrezClient."""
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    connections: int = 0
+    bytes_received: int = 0
+
+def request_rate(delay: Optional[float], api_key: Optional[str] = None) -> float:
+    """
+    Requests per second allowed by the configuration.
+
+    Args:
+        delay: Seconds between requests (``corpus.pubmed.delay``).
+        api_key: NCBI API key, which raises the limit to API_KEY_RATE.
+    """
+    if api_key:
+        return API_KEY_RATE
+    if not delay:
+        return KEYLESS_RATE
+    return 1 / delay
+
+class _ConnectionPool:
+    """Keep-alive HTTP connections to one host, each used by one thread at a time."""
+
+    def __init__(self, url: str, size: int, timeout: float, stats: EntrezStats):
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.size = size
+        self.timeout = timeout
+        self.stats = stats
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.stats.connections += 1
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def put(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+def _text(root: ET.Element, tag: str) -> Optional[str]:
+    element = root.find(tag)
+    return None if element is None else element.text
+
+class EntrezClient:
+    """Rate-limited, concurrent E-utilities client."""
+
+    def __init__(self, email: str, api_key: Optional[str] = None, tool: str = "aim2",
+                 base_url: str = EUTILS_URL, delay: float = 0.34,
+                 rate: Optional[float] = None, limiter: Optional[TokenBucket] = None,
+                 batch_size: int = 100, max_retries: int = 5, max_workers: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, timeout: float = 30.0):
+        """
+        Initialize the client.
+
+        Args:
+            email: Contact address sent with every request, as NCBI requires.
+            api_key: NCBI API key.
+            tool: Tool name sent with every request.
+            base_url: E-utilities base URL.
+            delay: Seconds between requests without an API key.
+            rate: Requests per second; overrides delay and api_key.
+            limiter: Token bucket shared with other clients; overrides rate.
+            batch_size: Records per efetch / IDs per elink request.
+            max_retries: Retries of a failed request before giving up.
+            max_workers: Concurrent requests.
+            backoff_base: First retry delay in seconds, doubled per attempt.
+            backoff_max: Upper bound of a retry delay.
+            timeout: Socket timeout in seconds.
+        """
+        if not base_url.endswith("/"):
+            base_url += "/"
+        self.email = email
+        self.api_key = api_key
+        self.tool = tool
+        self.base_url = base_url
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = limiter or TokenBucket(rate or request_rate(delay, api_key))
+        self.stats = EntrezStats()
+        self._path = urlsplit(base_url).path
+        self._pool = _ConnectionPool(base_url, max_workers, timeout, self.stats)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="entrez")
+        self._stats_lock = threading.Lock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    @classmethod
+    def from_config(cls, watch: bool = True, **kwargs) -> "EntrezClient":
+        """
+        Create a client from the ``corpus.pubmed`` configuration.
+
+        Args:
+            watch: Follow configuration reloads (rate, batch size, retries).
+            **kwargs: Overrides of the configured arguments.
+        """
+        pubmed = get_config().corpus.pubmed
+        settings = {
+            "email": pubmed.email,
+            "api_key": pubmed.api_key,
+            "delay": pubmed.delay,
+            "batch_size": pubmed.batch_size,
+            "max_retries": pubmed.max_retries,
+            "max_workers": pubmed.max_workers,
+        }
+        settings.update(kwargs)
+        client = cls(**settings)
+        if watch:
+            client._unsubscribe = subscribe(client._on_config_change, "corpus.pubmed")
+        return client
+
+    def _on_config_change(self, new, old) -> None:
+        """Apply a reloaded ``corpus.pubmed`` section."""
+        if new is None:
+            return
+        self.limiter.set_rate(request_rate(new.delay, new.api_key or self.api_key))
+        self.batch_size = new.batch_size
+        self.max_retries = new.max_retries
+        logger.info(f"PubMed client now limited to {self.limiter.rate:.2f} requests/s")
+
+    def close(self) -> None:
+        """Stop the workers and close the pooled connections."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+    def __enter__(self) -> "EntrezClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _count(self, **counters) -> None:
+        with self._stats_lock:
+            for name, value in counters.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def request(self, endpoint: str, params: Dict[str, object]) -> bytes:
+        """
+        POST one E-utilities request, retrying transient failures.
+
+        Args:
+            endpoint: Utility name such as 'esearch'.
+            params: Query parameters; list values are repeated.
+
+        Returns:
+            The response body.
+
+        Raises:
+            EntrezError: On a non-retryable status or once retries run out.
+        """
+        params = dict(params)
+        params.setdefault("tool", self.tool)
+        params.setdefault("email", self.email)
+        if self.api_key:
+            params.setdefault("api_key", self.api_key)
+        body = urlencode(params, doseq=True).encode("ascii")
+        path = f"{self._path}{endpoint}.fcgi"
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self._count(requests=1)
+            retry_after = None
+            conn = self._pool.get()
+            try:
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._pool.put(conn)
+                self._count(bytes_received=len(data))
+                if response.status == 200:
+                    return data
+                error = f"HTTP {response.status}"
+                if response.status not in RETRY_STATUSES:
+                    self._count(failures=1)
+                    raise EntrezError(f"{endpoint} failed: {error}")
+                header = response.getheader("Retry-After")
+                if header:
+                    try:
+                        retry_after = float(header)
+                    except ValueError:
+                        pass
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            logger.debug(f"{endpoint} failed ({error}), retrying in {delay:.2f}s")
+            self._count(retries=1)
+            time.sleep(delay)
+        self._count(failures=1)
+        raise EntrezError(f"{endpoint} failed after {self.max_retries + 1} attempts: {error}")
+
+    def _parse(self, endpoint: str, data: bytes) -> ET.Element:
+        """Parse an XML response, raising its ERROR message if any."""
+        try:
+            root = ET.fromstring(data)
+        except ET.ParseError as e:
+            raise EntrezError(f"Invalid {endpoint} response: {e}")
+        message = _text(root, "ERROR")
+        if message:
+            raise EntrezError(f"{endpoint} error: {message}")
+        return root
+
+    def search(self, term: str, db: str = "pubmed", retmax: int = 0,
+               webenv: Optional[str] = None) -> SearchResult:
+        """
+        Run a search and keep its result on the history server.
+
+        Args:
+            term: Entrez query.
+            db: Database to search.
+            retmax: Number of IDs to return with the result itself.
+            webenv: History session to add the result to.
+        """
+        params = {"db": db, "term": term, "usehistory": "y", "retmax": retmax}
+        if webenv:
+            params["WebEnv"] = webenv
+        root = self._parse("esearch", self.request("esearch", params))
+        ids = []
+        for element in root.iterfind("IdList/Id"):
+            ids.append(element.text)
+        return SearchResult(count=int(_text(root, "Count") or 0), webenv=_text(root, "WebEnv"),
+                            query_key=_text(root, "QueryKey"), ids=ids, db=db)
+
+    def post(self, ids: List[str], db: str = "pubmed", webenv: Optional[str] = None) -> SearchResult:
+        """Upload a list of IDs to the history server."""
+        params = {"db": db, "id": ",".join(ids)}
+        if webenv:
+            params["WebEnv"] = webenv
+        root = self._parse("epost", self.request("epost", params))
+        return SearchResult(count=len(ids), webenv=_text(root, "WebEnv"),
+                            query_key=_text(root, "QueryKey"), ids=list(ids), db=db)
+
+    def efetch(self, result: SearchResult, retstart: int = 0, retmax: Optional[int] = None,
+               rettype: str = "xml", retmode: str = "xml") -> bytes:
+        """Fetch one page of the records of a history result."""
+        params = {
+            "db": result.db,
+            "WebEnv": result.webenv,
+            "query_key": result.query_key,
+            "retstart": retstart,
+            "retmax": retmax or self.batch_size,
+            "rettype": rettype,
+            "retmode": retmode,
+        }
+        return self.request("efetch", params)
+
+    def _run(self, tasks: Iterable[Tuple[object, Callable[[], object]]]) -> Iterator[Tuple[object, object]]:
+        """
+        Run (key, function) tasks on the pool and yield (key, result) as they finish.
+
+        At most twice as many tasks as workers are in flight, so results are
+        consumed as fast as they arrive rather than buffered.
+        """
+        tasks = iter(tasks)
+        pending = {}
+        limit = self.max_workers * 2
+        try:
+            while True:
+                for key, function in tasks:
+                    pending[self._executor.submit(function)] = key
+                    if len(pending) >= limit:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    yield key, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _fetch_tasks(self, results: List[SearchResult], batch_size: int, rettype: str,
+                     retmode: str, max_records: Optional[int]):
+        for result in results:
+            count = result.count if max_records is None else min(result.count, max_records)
+            for retstart in range(0, count, batch_size):
+                retmax = min(batch_size, count - retstart)
+                yield (result, retstart), (lambda result=result, retstart=retstart, retmax=retmax:
+                                           self.efetch(result, retstart, retmax, rettype, retmode))
+
+    def fetch(self, result: SearchResult, batch_size: Optional[int] = None,
+              rettype: str = "xml", retmode: str = "xml",
+              max_records: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        Fetch every record of a history result in concurrent pages.
+
+        Args:
+            result: Result of search(), post() or link_history().
+            batch_size: Records per request; defaults to the client's.
+            rettype: efetch return type.
+            retmode: efetch return mode.
+            max_records: Stop after this many records.
+
+        Yields:
+            (retstart, response body) in completion order.
+        """
+        tasks = self._fetch_tasks([result], batch_size or self.batch_size, rettype, retmode,
+                                  max_records)
+        for (_, retstart), data in self._run(tasks):
+            yield retstart, data
+
+    def fetch_pmids(self, pmids: Iterable[str], batch_size: Optional[int] = None,
+                    rettype: str = "xml", retmode: str = "xml") -> Iterator[Tuple[int, bytes]]:
+        """
+        Post PMIDs to the history server and fetch their records concurrently.
+
+        Yields:
+            (offset of the first record of the page in pmids, response body)
+            in completion order.
+        """
+        pmids = list(pmids)
+        results = []
+        offsets = []
+        webenv = None
+        for start in range(0, len(pmids), EPOST_CHUNK):
+            result = self.post(pmids[start:start + EPOST_CHUNK], webenv=webenv)
+            webenv = result.webenv
+            results.append(result)
+            offsets.append(start)
+        starts = {}
+        for result, offset in zip(results, offsets):
+            starts[id(result)] = offset
+        tasks = self._fetch_tasks(results, batch_size or self.batch_size, rettype, retmode, None)
+        for (result, retstart), data in self._run(tasks):
+            yield starts[id(result)] + retstart, data
+
+    def link(self, ids: Iterable[str], db: str = "pmc", dbfrom: str = "pubmed",
+             linkname: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Find the records of another database linked to each ID.
+
+        IDs are sent ``batch_size`` at a time, concurrently, each as its own
+        ``id`` parameter so that Entrez answers with one link set per ID.
+
+        Returns:
+            ID -> linked IDs, for the IDs with at least one link.
+        """
+        ids = list(ids)
+        linkname = linkname or f"{dbfrom}_{db}"
+
+        def link_batch(batch: List[str]) -> bytes:
+            return self.request("elink", {"dbfrom": dbfrom, "db": db, "linkname": linkname, "id": batch})
+
+        tasks = []
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            tasks.append((start, lambda batch=batch: link_batch(batch)))
+        links: Dict[str, List[str]] = {}
+        for _, data in self._run(tasks):
+            root = self._parse("elink", data)
+            for linkset in root.iterfind("LinkSet"):
+                source = _text(linkset, "IdList/Id")
+                targets = []
+                for element in linkset.iterfind("LinkSetDb/Link/Id"):
+                    targets.append(element.text)
+                if source and targets:
+                    links[source] = targets
+        return links
+
+    def link_history(self, result: SearchResult, db: str = "pmc",
+                     linkname: Optional[str] = None) -> SearchResult:
+        """
+        Link a whole history result to another database on the server.
+
+        The linked records stay on the history server (``neighbor_history``)
+        and can be passed to fetch() without downloading their IDs.
+        """
+        linkname = linkname or f"{result.db}_{db}"
+        params = {
+            "dbfrom": result.db,
+            "db": db,
+            "linkname": linkname,
+            "cmd": "neighbor_history",
+            "WebEnv": result.webenv,
+            "query_key": result.query_key,
+        }
+        root = self._parse("elink", self.request("elink", params))
+        webenv = _text(root, "LinkSet/WebEnv") or result.webenv
+        query_key = _text(root, "LinkSet/LinkSetDbHistory/QueryKey")
+        if query_key is None:
+            return SearchResult(count=0, webenv=webenv, db=db)
+        # The link itself does not report a count; searching the history key does
+        return self.search(f"#{query_key}", db=db, webenv=webenv)
+
+__all__ = [
+    'API_KEY_RATE',
+    'EUTILS_URL',
+    'EntrezClient',
+    'EntrezError',
+    'EntrezStats',
+    'KEYLESS_RATE',
+    'SearchResult',
+    'request_rate',
+]
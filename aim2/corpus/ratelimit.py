@@ -0,0 +1,81 @@
+"""
+Rate limiting shared by the corpus retrieval workers.
+"""
+import threading
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are added continuously at ``rate`` per second up to ``capacity``;
+    acquire() blocks until enough tokens are available. A capacity of 1 spaces
+    calls evenly, which is what NCBI asks for ("no more than 3 requests per
+    second"), no matter how many threads share the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens, i.e. the largest burst.
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, waiting until they are available.
+
+        Args:
+            tokens: Number of tokens to take; at most the capacity.
+            timeout: Give up after this many seconds.
+
+        Returns:
+            True if the tokens were taken, False on timeout.
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.capacity}")
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.waited_seconds += now - start
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    wait = min(wait, deadline - now)
+                self._condition.wait(wait)
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Change the rate (and capacity) without disturbing waiting threads."""
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        with self._condition:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if capacity is not None:
+                self.capacity = float(capacity)
+                self._tokens = min(self._tokens, self.capacity)
+            self._condition.notify_all()
+
+__all__ = ['TokenBucket']
@@ -0,0 +1,442 @@
+"""
+Resumable download state of the literature corpus.
+
+Corpus retrieval is tiered: the PMC XML of an article is tried first and its
+PDF only if that fails. Over hundreds of thousands of PMIDs this runs for
+hours, so CorpusState records under ``paths.data_dir`` which searches have
+been run and, for every PMID and tier, its status, the SHA-256 and size of
+the downloaded content, the number of attempts and the last error.
+
+A restarted run picks up exactly where the previous one stopped:
+
+- searches already recorded are not run again (search_done());
+- finished tiers are never handed out again;
+- items claimed by a run that crashed are returned to ``pending`` when the
+  store is opened.
+
+Several processes may share the store, so a claim is a lease: the row
+records its owner (host and PID) and when it was taken or last renewed
+(touch()). Opening the store only reclaims items whose owner is a process of
+this host that no longer exists, or whose lease is older than
+``lease_seconds`` (the only test for owners on other hosts); items other live
+processes are working on are left alone.
+
+Updates are applied in batches with ``executemany`` in one transaction, and
+(tier, status) is indexed, so "all PMIDs pending tier 2" is one range scan.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Name of the SQLite file inside paths.data_dir
+STATE_FILENAME = "corpus_state.sqlite3"
+
+# Retrieval tiers, tried in order
+TIER_PMC_XML = 1
+TIER_PDF = 2
+TIERS = (TIER_PMC_XML, TIER_PDF)
+
+# Status of a PMID at one tier
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+STATUSES = (PENDING, RUNNING, DONE, FAILED, SKIPPED)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS searches ("
+    " term TEXT PRIMARY KEY, count INTEGER NOT NULL, completed_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS items ("
+    " pmid TEXT PRIMARY KEY, query TEXT, added_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS tiers ("
+    " pmid TEXT NOT NULL, tier INTEGER NOT NULL, status TEXT NOT NULL,"
+    " sha256 TEXT, size INTEGER, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+    " updated_at REAL NOT NULL, owner TEXT, PRIMARY KEY (pmid, tier)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS tiers_status ON tiers (tier, status, pmid)",
+)
+
+# Parameters per IN (...) query
+_QUERY_CHUNK = 500
+
+# Claims older than this are reclaimed even if their owner may be alive
+DEFAULT_LEASE_SECONDS = 3600.0
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process of this host exists."""
+    if os.name == "nt":
+        # os.kill() would terminate it; rely on the lease instead
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+@dataclass
+class TierState:
+    """State of one PMID at one tier."""
+    pmid: str
+    tier: int
+    status: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    updated_at: float = 0.0
+    owner: Optional[str] = None
+
+class CorpusState:
+    """
+    Persistent per-PMID, per-tier retrieval state.
+
+    The store can be shared by the threads of one run; all statements go
+    through one connection under a lock.
+    """
+
+    def __init__(self, path: Union[str, Path], tiers=TIERS,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file, created on first use.
+            tiers: Tier numbers in fallback order.
+            lease_seconds: Age after which a claimed item is handed out
+                          again, whether or not its owner is known to be dead.
+        """
+        self.path = Path(path)
+        self.tiers = tuple(tiers)
+        self.lease_seconds = lease_seconds
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}"
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, settings: Dict, **kwargs) -> "CorpusState":
+        """Create the store under the data_dir of the 'paths' config section."""
+        return cls(Path(settings.get("data_dir") or "data") / STATE_FILENAME, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating it and recovering interrupted items."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent on a crash; at worst the last
+            # commits are lost and redone
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+            columns = []
+            for row in self._db.execute("PRAGMA table_info(tiers)"):
+                columns.append(row[1])
+            if "owner" not in columns:
+                self._db.execute("ALTER TABLE tiers ADD COLUMN owner TEXT")
+            self._db.commit()
+            recovered = self._recover(self._db)
+            if recovered:
+                logger.info(f"Resuming {recovered} interrupted downloads from {self.path}")
+        return self._db
+
+    def _stale_owner(self, owner: Optional[str]) -> bool:
+        """Check whether the claims of an owner can be taken over."""
+        if owner is None:
+            return True
+        host, _, pid = owner.rpartition(":")
+        return host == self.host and pid.isdigit() and not _process_alive(int(pid))
+
+    def _recover(self, db: sqlite3.Connection) -> int:
+        """Return the items of dead owners and expired leases to pending."""
+        with db:
+            owners = []
+            for (owner,) in db.execute("SELECT DISTINCT owner FROM tiers WHERE status=?", (RUNNING,)):
+                if self._stale_owner(owner):
+                    owners.append(owner)
+            recovered = db.execute(
+                "UPDATE tiers SET status=?, owner=NULL WHERE status=? AND updated_at<?",
+                (PENDING, RUNNING, time.time() - self.lease_seconds)).rowcount
+            for owner in owners:
+                if owner is None:
+                    query = "UPDATE tiers SET status=? WHERE status=? AND owner IS NULL"
+                    params = (PENDING, RUNNING)
+                else:
+                    query = "UPDATE tiers SET status=?, owner=NULL WHERE status=? AND owner=?"
+                    params = (PENDING, RUNNING, owner)
+                recovered += db.execute(query, params).rowcount
+        return recovered
+
+    def recover(self) -> int:
+        """
+        Return items claimed by dead processes or with expired leases to pending.
+
+        This runs when the store is opened; long runs can call it to pick up
+        what crashed workers left behind.
+
+        Returns:
+            The number of items returned to pending.
+        """
+        with self._lock:
+            return self._recover(self._connect())
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "CorpusState":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _next_tier(self, tier: int) -> Optional[int]:
+        position = self.tiers.index(tier)
+        return self.tiers[position + 1] if position + 1 < len(self.tiers) else None
+
+    # Searches
+
+    def search_done(self, term: str) -> Optional[int]:
+        """Return the result count of a recorded search, or None if it has not run."""
+        with self._lock:
+            row = self._connect().execute("SELECT count FROM searches WHERE term=?", (term,)).fetchone()
+        return None if row is None else row[0]
+
+    def add_search(self, term: str, pmids: Iterable[str]) -> int:
+        """
+        Record a finished search and queue its new PMIDs for the first tier.
+
+        Both are written in one transaction, so a search is either recorded
+        with all its PMIDs or not at all.
+
+        Returns:
+            The number of PMIDs that were not known yet.
+        """
+        pmids = list(pmids)
+        with self._lock:
+            db = self._connect()
+            with db:
+                added = self._add(db, pmids, term)
+                db.execute("INSERT OR REPLACE INTO searches VALUES (?, ?, ?)", (term, len(pmids), time.time()))
+        return added
+
+    # Items
+
+    def add_pmids(self, pmids: Iterable[str], query: Optional[str] = None) -> int:
+        """
+        Queue PMIDs for the first tier; PMIDs already known are left as they are.
+
+        Returns:
+            The number of PMIDs added.
+        """
+        with self._lock:
+            db = self._connect()
+            with db:
+                return self._add(db, pmids, query)
+
+    def _add(self, db: sqlite3.Connection, pmids: Iterable[str], query: Optional[str]) -> int:
+        now = time.time()
+        items = []
+        tiers = []
+        for pmid in pmids:
+            items.append((str(pmid), query, now))
+            tiers.append((str(pmid), self.tiers[0], PENDING, now))
+        before = db.total_changes
+        db.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?)", items)
+        added = db.total_changes - before
+        db.executemany("INSERT OR IGNORE INTO tiers (pmid, tier, status, updated_at) VALUES (?, ?, ?, ?)",
+                       tiers)
+        return added
+
+    def claim(self, tier: int, limit: int) -> List[str]:
+        """
+        Mark up to limit pending PMIDs of a tier as running and return them.
+
+        The items are leased to this process; renew the lease with touch()
+        while downloads run longer than lease_seconds. Running items that are
+        never finished (the process died) return to pending the next time
+        the store is opened, or once the lease expires.
+
+        The pending rows are read and updated under the database's write
+        lock, so concurrent processes never claim the same item.
+        """
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = db.execute(
+                    "SELECT pmid FROM tiers WHERE tier=? AND status=? ORDER BY pmid LIMIT ?",
+                    (tier, PENDING, limit)).fetchall()
+                pmids = []
+                updates = []
+                now = time.time()
+                for (pmid,) in rows:
+                    pmids.append(pmid)
+                    updates.append((RUNNING, now, self.owner, pmid, tier))
+                db.executemany("UPDATE tiers SET status=?, updated_at=?, owner=? WHERE pmid=? AND tier=?",
+                               updates)
+            except BaseException:
+                db.rollback()
+                raise
+            db.commit()
+        return pmids
+
+    def touch(self, pmids: Iterable[str], tier: int) -> int:
+        """
+        Renew the leases of items this process claimed and is still working on.
+
+        Returns:
+            The number of leases renewed; items reclaimed by another process
+            in the meantime are not counted.
+        """
+        now = time.time()
+        updates = []
+        for pmid in pmids:
+            updates.append((now, str(pmid), tier, RUNNING, self.owner))
+        with self._lock:
+            db = self._connect()
+            with db:
+                before = db.total_changes
+                db.executemany("UPDATE tiers SET updated_at=? WHERE pmid=? AND tier=? AND status=? AND owner=?",
+                               updates)
+                return db.total_changes - before
+
+    def mark_done(self, pmid: str, tier: int, sha256: Optional[str] = None,
+                  size: Optional[int] = None) -> None:
+        """Record a successful download."""
+        self.update([TierState(pmid, tier, DONE, sha256=sha256, size=size)])
+
+    def mark_failed(self, pmid: str, tier: int, error: str, fallback: bool = True) -> None:
+        """Record a failed download, queueing the next tier if fallback is set."""
+        self.update([TierState(pmid, tier, FAILED, error=error)], fallback=fallback)
+
+    def update(self, states: Iterable[TierState], fallback: bool = True) -> int:
+        """
+        Record a batch of outcomes in one transaction.
+
+        DONE and FAILED states count as an attempt. If fallback is set, FAILED
+        and SKIPPED states also queue the PMID at the next tier unless that
+        tier already has a state.
+
+        Returns:
+            The number of states recorded.
+        """
+        now = time.time()
+        rows = []
+        queued = []
+        for state in states:
+            if state.status not in STATUSES:
+                raise ValueError(f"Unknown status '{state.status}', expected one of {STATUSES}")
+            attempt = 1 if state.status in (DONE, FAILED) else 0
+            rows.append((str(state.pmid), state.tier, state.status, state.sha256, state.size,
+                         state.error, attempt, now))
+            if fallback and state.status in (FAILED, SKIPPED):
+                next_tier = self._next_tier(state.tier)
+                if next_tier is not None:
+                    queued.append((str(state.pmid), next_tier, PENDING, now))
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "INSERT INTO tiers (pmid, tier, status, sha256, size, error, attempts, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (pmid, tier) DO UPDATE SET status=excluded.status,"
+                    " sha256=excluded.sha256, size=excluded.size, error=excluded.error,"
+                    " attempts=attempts+excluded.attempts, updated_at=excluded.updated_at, owner=NULL",
+                    rows)
+                db.executemany("INSERT OR IGNORE INTO tiers (pmid, tier, status, updated_at) VALUES (?, ?, ?, ?)",
+                               queued)
+        return len(rows)
+
+    def retry_failed(self, tier: int, max_attempts: int) -> int:
+        """Return failed PMIDs of a tier with fewer than max_attempts attempts to pending."""
+        with self._lock:
+            db = self._connect()
+            with db:
+                return db.execute(
+                    "UPDATE tiers SET status=?, updated_at=? WHERE tier=? AND status=? AND attempts<?",
+                    (PENDING, time.time(), tier, FAILED, max_attempts)).rowcount
+
+    # Queries
+
+    def pmids(self, tier: int, status: str = PENDING, limit: Optional[int] = None) -> List[str]:
+        """Return the PMIDs with a given status at a tier, in PMID order."""
+        query = "SELECT pmid FROM tiers WHERE tier=? AND status=? ORDER BY pmid"
+        params = [tier, status]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        result = []
+        for (pmid,) in rows:
+            result.append(pmid)
+        return result
+
+    def pending(self, tier: int, limit: Optional[int] = None) -> List[str]:
+        """Return the PMIDs pending at a tier."""
+        return self.pmids(tier, PENDING, limit)
+
+    def get(self, pmid: str) -> Dict[int, TierState]:
+        """Return the states of a PMID by tier."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT pmid, tier, status, sha256, size, error, attempts, updated_at, owner"
+                " FROM tiers WHERE pmid=?", (str(pmid),)).fetchall()
+        states = {}
+        for row in rows:
+            states[row[1]] = TierState(*row)
+        return states
+
+    def known(self, pmids: Iterable[str]) -> List[str]:
+        """Return the PMIDs among pmids that are already in the store."""
+        pmids = list(pmids)
+        result = []
+        with self._lock:
+            db = self._connect()
+            for start in range(0, len(pmids), _QUERY_CHUNK):
+                chunk = pmids[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for (pmid,) in db.execute(f"SELECT pmid FROM items WHERE pmid IN ({placeholders})", chunk):
+                    result.append(pmid)
+        return result
+
+    def counts(self) -> Dict[int, Dict[str, int]]:
+        """Return the number of PMIDs per tier and status."""
+        counts: Dict[int, Dict[str, int]] = {}
+        for tier in self.tiers:
+            counts[tier] = dict.fromkeys(STATUSES, 0)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT tier, status, COUNT(*) FROM tiers GROUP BY tier, status").fetchall()
+        for tier, status, count in rows:
+            counts.setdefault(tier, dict.fromkeys(STATUSES, 0))[status] = count
+        return counts
+
+__all__ = [
+    'CorpusState',
+    'DEFAULT_LEASE_SECONDS',
+    'DONE',
+    'FAILED',
+    'PENDING',
+    'RUNNING',
+    'SKIPPED',
+    'STATE_FILENAME',
+    'TIERS',
+    'TIER_PDF',
+    'TIER_PMC_XML',
+    'TierState',
+]
@@ -0,0 +1,379 @@
+"""
+Content-addressed document store for the literature corpus.
+
+Keyword searches return overlapping PMIDs, and the PMC XML and the PDF of an
+article are often fetched for the same paper, so one file per download stores
+and parses the same content many times. DocumentStore keeps every document
+once, under the SHA-256 of its content:
+
+- blobs are zlib-compressed in ``<root>/objects/<first two hex digits>/<hash>``
+  and written atomically; storing content that is already present only adds
+  a reference;
+- an SQLite index maps PMIDs and DOIs (per source, e.g. ``pmc_xml`` or
+  ``pdf``) to hashes and counts the references to each blob, so that gc()
+  can remove blobs nobody points to any more;
+- pipeline stages record the hashes they have processed, so parsing or
+  extraction of content seen under another PMID, DOI or source is skipped.
+
+Several processes may share a store. put() and add_ref() check for a blob and
+reference it, and gc() deletes unreferenced blobs and their files, each in
+one transaction that takes SQLite's write lock up front (BEGIN IMMEDIATE), so
+gc() cannot remove a blob between another process finding and referencing it.
+
+The hash is that of the uncompressed content, as recorded by CorpusState.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Directory inside paths.data_dir
+STORE_DIRNAME = "documents"
+
+# Name of the SQLite index inside the store directory
+INDEX_FILENAME = "index.sqlite3"
+
+# zlib level: documents are written once and read a few times
+COMPRESS_LEVEL = 6
+
+# Kinds of document identifiers
+PMID = "pmid"
+DOI = "doi"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL,"
+    " media_type TEXT, refcount INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS refs ("
+    " kind TEXT NOT NULL, key TEXT NOT NULL, source TEXT NOT NULL, sha256 TEXT NOT NULL,"
+    " PRIMARY KEY (kind, key, source))",
+    "CREATE INDEX IF NOT EXISTS refs_sha256 ON refs (sha256)",
+    "CREATE TABLE IF NOT EXISTS processed ("
+    " stage TEXT NOT NULL, sha256 TEXT NOT NULL, processed_at REAL NOT NULL,"
+    " PRIMARY KEY (stage, sha256)) WITHOUT ROWID",
+)
+
+# Parameters per IN (...) query
+_QUERY_CHUNK = 500
+
+_DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/",
+                 "http://dx.doi.org/", "doi:")
+
+@dataclass
+class StoreStats:
+    """Size of a DocumentStore."""
+    blobs: int = 0
+    refs: int = 0
+    size: int = 0
+    stored_size: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.size / self.stored_size if self.stored_size else 0.0
+
+def normalize_doi(doi: str) -> str:
+    """Normalize a DOI for lookups: no resolver prefix, lower case."""
+    doi = doi.strip()
+    lowered = doi.lower()
+    for prefix in _DOI_PREFIXES:
+        if lowered.startswith(prefix):
+            doi = doi[len(prefix):]
+            break
+    return doi.lower()
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of a document's content, as used for its key."""
+    return hashlib.sha256(data).hexdigest()
+
+@contextmanager
+def _write_transaction(db: sqlite3.Connection):
+    """A transaction holding the database's write lock from its first statement."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+class DocumentStore:
+    """Deduplicating, reference-counted store of corpus documents."""
+
+    def __init__(self, root: Union[str, Path], compress_level: int = COMPRESS_LEVEL):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the blobs and the index.
+            compress_level: zlib level of new blobs.
+        """
+        self.root = Path(root)
+        self.compress_level = compress_level
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, settings: Dict, **kwargs) -> "DocumentStore":
+        """Create the store under the data_dir of the 'paths' config section."""
+        return cls(Path(settings.get("data_dir") or "data") / STORE_DIRNAME, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index, creating the store directory on first use."""
+        if self._db is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.root / INDEX_FILENAME), timeout=30,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+            self._db.commit()
+        return self._db
+
+    def close(self) -> None:
+        """Close the index connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "DocumentStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def blob_path(self, sha256: str) -> Path:
+        """Path of the compressed blob of a hash."""
+        return self.root / "objects" / sha256[:2] / sha256
+
+    @staticmethod
+    def _key(kind: str, key: str) -> str:
+        if kind == DOI:
+            return normalize_doi(key)
+        if kind != PMID:
+            raise ValueError(f"Unknown identifier kind '{kind}', expected '{PMID}' or '{DOI}'")
+        return str(key).strip()
+
+    # Blobs
+
+    def put(self, data: bytes, pmid: Optional[str] = None, doi: Optional[str] = None,
+            source: str = "", media_type: Optional[str] = None) -> str:
+        """
+        Store a document and reference it from its PMID and/or DOI.
+
+        Content already in the store is not written again. If the PMID or DOI
+        already referenced other content for the same source, that reference
+        is replaced. Content stored without a PMID or DOI has no references
+        and is removed by the next gc().
+
+        Returns:
+            The SHA-256 of the content.
+        """
+        sha256 = content_hash(data)
+        path = self.blob_path(sha256)
+        # Compress outside the write lock when the blob is most likely new
+        stored = None if path.exists() else zlib.compress(data, self.compress_level)
+        refs = []
+        if pmid is not None:
+            refs.append((PMID, pmid))
+        if doi is not None:
+            refs.append((DOI, doi))
+        with self._lock:
+            db = self._connect()
+            with _write_transaction(db):
+                known = db.execute("SELECT 1 FROM blobs WHERE sha256=?", (sha256,)).fetchone()
+                if known is None or not path.exists():
+                    if stored is None:
+                        stored = zlib.compress(data, self.compress_level)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    # Write through a temporary file so readers never see a partial blob
+                    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb") as f:
+                            f.write(stored)
+                        os.replace(tmp_path, path)
+                    except BaseException:
+                        Path(tmp_path).unlink(missing_ok=True)
+                        raise
+                    db.execute("INSERT OR IGNORE INTO blobs (sha256, size, stored_size, media_type,"
+                               " created_at) VALUES (?, ?, ?, ?, ?)",
+                               (sha256, len(data), len(stored), media_type, time.time()))
+                for kind, key in refs:
+                    self._reference(db, sha256, kind, key, source)
+        return sha256
+
+    def get(self, sha256: str, verify: bool = False) -> bytes:
+        """
+        Return the content of a blob.
+
+        Raises:
+            KeyError: If the hash is not in the store.
+            ValueError: If verify is set and the content does not match the hash.
+        """
+        try:
+            with open(self.blob_path(sha256), "rb") as f:
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            raise KeyError(sha256)
+        if verify and content_hash(data) != sha256:
+            raise ValueError(f"Blob {sha256} is corrupted")
+        return data
+
+    def __contains__(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM blobs WHERE sha256=?", (sha256,)).fetchone()
+        return row is not None
+
+    # References
+
+    def _reference(self, db: sqlite3.Connection, sha256: str, kind: str, key: str, source: str) -> None:
+        key = self._key(kind, key)
+        old = db.execute("SELECT sha256 FROM refs WHERE kind=? AND key=? AND source=?",
+                         (kind, key, source)).fetchone()
+        if old is not None:
+            if old[0] == sha256:
+                return
+            db.execute("UPDATE blobs SET refcount=refcount-1 WHERE sha256=?", (old[0],))
+        db.execute("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?)", (kind, key, source, sha256))
+        db.execute("UPDATE blobs SET refcount=refcount+1 WHERE sha256=?", (sha256,))
+
+    def add_ref(self, sha256: str, kind: str, key: str, source: str = "") -> None:
+        """Reference an existing blob from a PMID or DOI."""
+        with self._lock:
+            db = self._connect()
+            with _write_transaction(db):
+                if db.execute("SELECT 1 FROM blobs WHERE sha256=?", (sha256,)).fetchone() is None:
+                    raise KeyError(sha256)
+                self._reference(db, sha256, kind, key, source)
+
+    def release(self, kind: str, key: str, source: Optional[str] = None) -> int:
+        """
+        Drop the references of a PMID or DOI (of one source, or all).
+
+        Blobs left without references stay on disk until gc().
+
+        Returns:
+            The number of references removed.
+        """
+        key = self._key(kind, key)
+        query = "SELECT source, sha256 FROM refs WHERE kind=? AND key=?"
+        params = [kind, key]
+        if source is not None:
+            query += " AND source=?"
+            params.append(source)
+        with self._lock:
+            db = self._connect()
+            with db:
+                rows = db.execute(query, params).fetchall()
+                for ref_source, sha256 in rows:
+                    db.execute("DELETE FROM refs WHERE kind=? AND key=? AND source=?",
+                               (kind, key, ref_source))
+                    db.execute("UPDATE blobs SET refcount=refcount-1 WHERE sha256=?", (sha256,))
+        return len(rows)
+
+    def lookup(self, kind: str, key: str) -> Dict[str, str]:
+        """Return source -> hash of the documents of a PMID or DOI."""
+        key = self._key(kind, key)
+        with self._lock:
+            rows = self._connect().execute("SELECT source, sha256 FROM refs WHERE kind=? AND key=?",
+                                           (kind, key)).fetchall()
+        return dict(rows)
+
+    def refcount(self, sha256: str) -> int:
+        """Number of PMID/DOI references to a blob (0 if it is unknown)."""
+        with self._lock:
+            row = self._connect().execute("SELECT refcount FROM blobs WHERE sha256=?", (sha256,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def gc(self) -> Tuple[int, int]:
+        """
+        Delete the blobs without references, and their processing records.
+
+        The files are removed before the deletions commit, while no other
+        process can reference the blobs; if the commit fails, put() writes
+        the content again.
+
+        Returns:
+            The number of blobs removed and the bytes freed on disk.
+        """
+        with self._lock:
+            db = self._connect()
+            freed = 0
+            with _write_transaction(db):
+                rows = db.execute("SELECT sha256, stored_size FROM blobs WHERE refcount<=0").fetchall()
+                for sha256, stored_size in rows:
+                    db.execute("DELETE FROM blobs WHERE sha256=?", (sha256,))
+                    db.execute("DELETE FROM processed WHERE sha256=?", (sha256,))
+                    self.blob_path(sha256).unlink(missing_ok=True)
+                    freed += stored_size
+        if rows:
+            logger.info(f"Removed {len(rows)} unreferenced documents ({freed} bytes)")
+        return len(rows), freed
+
+    # Processing records
+
+    def mark_processed(self, stage: str, hashes: Iterable[str]) -> None:
+        """Record that a pipeline stage has processed some blobs."""
+        now = time.time()
+        rows = []
+        for sha256 in hashes:
+            rows.append((stage, sha256, now))
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany("INSERT OR IGNORE INTO processed VALUES (?, ?, ?)", rows)
+
+    def is_processed(self, stage: str, sha256: str) -> bool:
+        """Whether a stage has already processed a blob."""
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM processed WHERE stage=? AND sha256=?",
+                                          (stage, sha256)).fetchone()
+        return row is not None
+
+    def unprocessed(self, stage: str, hashes: Iterable[str]) -> List[str]:
+        """Return the hashes a stage has not processed yet, in order, without duplicates."""
+        hashes = list(dict.fromkeys(hashes))
+        done = set()
+        with self._lock:
+            db = self._connect()
+            for start in range(0, len(hashes), _QUERY_CHUNK):
+                chunk = hashes[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for (sha256,) in db.execute(
+                        f"SELECT sha256 FROM processed WHERE stage=? AND sha256 IN ({placeholders})",
+                        [stage] + chunk):
+                    done.add(sha256)
+        result = []
+        for sha256 in hashes:
+            if sha256 not in done:
+                result.append(sha256)
+        return result
+
+    def stats(self) -> StoreStats:
+        """Return the number and total sizes of the stored blobs."""
+        with self._lock:
+            db = self._connect()
+            blobs, size, stored_size = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()
+            refs = db.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        return StoreStats(blobs=blobs, refs=refs, size=size, stored_size=stored_size)
+
+__all__ = [
+    'DOI',
+    'DocumentStore',
+    'PMID',
+    'STORE_DIRNAME',
+    'StoreStats',
+    'content_hash',
+    'normalize_doi',
+]
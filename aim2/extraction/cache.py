@@ -0,0 +1,254 @@
+"""
+Persistent cache of LLM responses.
+
+LLM calls are the slowest and most expensive stage of extraction, and most
+re-runs (after a post-processing fix, or on a corpus that only grew) send
+prompts that were already answered. ResponseCache stores every response
+under ``extraction.llm.cache_dir``, keyed by a SHA-256 of the rendered
+prompt, the model and the sampling parameters, so an unchanged prompt is
+never sent twice while a changed template, model or temperature misses.
+
+Entries live in a single SQLite file, their responses zlib-compressed, so
+the cache is one compact file rather than a directory of small files.
+SQLite's locking makes concurrent readers and writers in several processes
+safe; a writer waits up to ``timeout`` seconds for another one's
+transaction. Least recently used entries are evicted beyond
+``cache_max_size_mb``, and entries older than ``cache_max_age_days`` are
+dropped. Recording the last access of every hit would turn reads into
+writes, so hits are recorded in batches.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+# Name of the cache database inside the cache directory
+CACHE_FILENAME = "responses.sqlite3"
+
+# Used when the configuration does not define extraction.llm.cache_max_size_mb
+DEFAULT_MAX_SIZE_MB = 1024
+
+# Hits recorded before their access times are written
+TOUCH_BATCH = 256
+
+# Writes between checks of the size budget
+EVICT_EVERY = 128
+
+COMPRESS_LEVEL = 6
+
+@dataclass
+class ResponseCacheStats:
+    """Counters describing how the cache has been used by this process."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    bytes_written: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def cache_key(prompt: str, model: str, params: Optional[Dict] = None) -> str:
+    """
+    Hash of a rendered prompt, the model and the sampling parameters.
+
+    Parameters are serialized with sorted keys, so their order does not
+    matter; parameters set to None are left out.
+    """
+    settings = {}
+    for name, value in (params or {}).items():
+        if value is not None:
+            settings[name] = value
+    material = json.dumps([model, settings, prompt], sort_keys=True, ensure_ascii=False,
+                          separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """On-disk LRU cache of LLM responses, shared by processes."""
+
+    def __init__(self, cache_dir: Union[str, Path], max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+                 max_age_days: Optional[float] = None, timeout: float = 30):
+        """
+        Initialize the cache; the database is created on first use.
+
+        Args:
+            cache_dir: Directory holding the cache database.
+            max_size_mb: Total compressed size of the responses before the
+                        least recently used ones are evicted.
+            max_age_days: Age after which responses are evicted; None keeps them.
+            timeout: Seconds to wait for another process's write.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400 if max_age_days is not None else None
+        self.timeout = timeout
+        self.stats = ResponseCacheStats()
+        self._db: Optional[sqlite3.Connection] = None
+        self._touched: Set[str] = set()
+        self._writes_since_evict = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict) -> Optional["ResponseCache"]:
+        """
+        Create a cache from the 'extraction.llm' config section.
+
+        Returns:
+            The cache, or None if extraction.llm.cache_enabled is false.
+        """
+        if not settings.get("cache_enabled", True):
+            return None
+        return cls(settings.get("cache_dir") or ".cache/llm",
+                   settings.get("cache_max_size_mb", DEFAULT_MAX_SIZE_MB),
+                   settings.get("cache_max_age_days"))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating the cache directory on first use."""
+        if self._db is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.cache_dir / CACHE_FILENAME), timeout=self.timeout,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, data BLOB NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+                " WITHOUT ROWID"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_access ON responses (last_access)")
+            self._db.commit()
+        return self._db
+
+    def close(self) -> None:
+        """Record pending access times and close the database."""
+        if self._db is not None:
+            self._flush_touched()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        now = time.time()
+        rows = []
+        for key in self._touched:
+            rows.append((now, key))
+        self._touched = set()
+        db = self._connect()
+        with db:
+            db.executemany("UPDATE responses SET last_access=? WHERE key=?", rows)
+
+    def get(self, prompt: str, model: str, params: Optional[Dict] = None) -> Optional[str]:
+        """Return the cached response to a prompt, or None."""
+        return self.get_key(cache_key(prompt, model, params))
+
+    def get_key(self, key: str) -> Optional[str]:
+        """Return the cached response stored under a cache_key(), or None."""
+        row = self._connect().execute(
+            "SELECT data, created FROM responses WHERE key=?", (key,)
+        ).fetchone()
+        if row is None or (self.max_age_seconds is not None
+                           and time.time() - row[1] > self.max_age_seconds):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._touched.add(key)
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touched()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, prompt: str, model: str, params: Optional[Dict], response: str) -> str:
+        """
+        Store the response to a prompt.
+
+        Returns:
+            The cache key.
+        """
+        key = cache_key(prompt, model, params)
+        self.put_key(key, model, response)
+        return key
+
+    def put_key(self, key: str, model: str, response: str) -> None:
+        """Store a response under a cache_key()."""
+        data = zlib.compress(response.encode("utf-8"), COMPRESS_LEVEL)
+        now = time.time()
+        db = self._connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                       (key, model, data, len(data), now, now))
+        self.stats.writes += 1
+        self.stats.bytes_written += len(data)
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= EVICT_EVERY:
+            self.evict()
+
+    def get_or_call(self, prompt: str, model: str, params: Optional[Dict],
+                    call: Callable[[str], str]) -> str:
+        """Return the cached response to a prompt, calling call(prompt) and caching its result on a miss."""
+        key = cache_key(prompt, model, params)
+        response = self.get_key(key)
+        if response is None:
+            response = call(prompt)
+            self.put_key(key, model, response)
+        return response
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, then least recently used ones beyond the size budget.
+
+        Returns:
+            The number of entries removed.
+        """
+        self._writes_since_evict = 0
+        self._flush_touched()
+        db = self._connect()
+        removed = 0
+        with db:
+            if self.max_age_seconds is not None:
+                removed += db.execute("DELETE FROM responses WHERE created < ?",
+                                      (time.time() - self.max_age_seconds,)).rowcount
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_size_bytes:
+                rows = db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+                keys = []
+                for key, size in rows:
+                    if total <= self.max_size_bytes:
+                        break
+                    keys.append((key,))
+                    total -= size
+                db.executemany("DELETE FROM responses WHERE key=?", keys)
+                removed += len(keys)
+        if removed:
+            self.stats.evictions += removed
+            logger.info(f"Evicted {removed} cached LLM responses")
+        return removed
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        """Total compressed size of the cached responses."""
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def metrics(self) -> Dict[str, float]:
+        """Return the cache counters and hit rate as a flat dictionary."""
+        metrics = asdict(self.stats)
+        metrics["hit_rate"] = self.stats.hit_rate
+        return metrics
+
+__all__ = ['ResponseCache', 'ResponseCacheStats', 'cache_key']
@@ -0,0 +1,583 @@
+"""
+Asynchronous, batched client for OpenAI-compatible chat completion APIs.
+
+Extraction sends one prompt per chunk (or per packed group of chunks), and
+the latency of each call, not the API's throughput, is what limits a
+sequential loop. AsyncLLMClient runs many requests at once on one event
+loop while staying inside the provider's limits:
+
+- at most ``max_concurrency`` requests are in flight;
+- request-per-minute and token-per-minute budgets are enforced with token
+  buckets; a request is charged its estimated tokens up front and the
+  difference to the reported usage afterwards;
+- 429 and 5xx responses are retried with full-jitter exponential backoff,
+  never sooner than the ``Retry-After`` (or ``retry-after-ms``) the server
+  sends, and a 429 pauses every worker, not just the one that got it;
+- map() reads prompts from an (async) iterable through a bounded queue, so a
+  chunk producer is only advanced when there is room, instead of the whole
+  corpus being buffered as pending requests.
+
+Responses are served from and stored in a ResponseCache when one is given.
+Requests go over keep-alive HTTP/1.1 connections opened with asyncio
+streams, so no HTTP library is needed.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import ssl
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import (AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union)
+from urllib.parse import urlsplit
+
+from .cache import ResponseCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Statuses worth retrying: timeouts, rate limits and server errors
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# Characters per token assumed when estimating prompt sizes
+CHARS_PER_TOKEN = 4
+
+class LLMError(RuntimeError):
+    """Raised when a completion request fails for good."""
+
+@dataclass
+class LLMResponse:
+    """Outcome of one completion request."""
+    prompt: str
+    text: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class LLMStats:
+    """Counters of an AsyncLLMClient."""
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    connections: int = 0
+    throttled_seconds: float = 0.0
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, for budgeting before the API reports usage."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def retry_after_seconds(headers: Dict[str, str]) -> Optional[float]:
+    """Delay requested by a response's retry-after-ms or Retry-After header."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AsyncTokenBucket:
+    """
+    Token bucket for one event loop.
+
+    Holds up to ``capacity`` tokens, refilled at ``rate`` per second. Per
+    minute budgets use capacity=budget and rate=budget/60.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, budget: float) -> "AsyncTokenBucket":
+        return cls(budget / 60.0, budget)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens, waiting until they are available.
+
+        Requests larger than the capacity take the whole capacity.
+
+        Returns:
+            The seconds waited.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return waited
+            delay = (tokens - self._tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def adjust(self, tokens: float) -> None:
+        """Give back (positive) or charge (negative) tokens after the fact."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+class _ConnectionLost(ConnectionError):
+    """The connection failed before any byte of the response arrived."""
+
+class _HTTPConnection:
+    """One keep-alive HTTP/1.1 connection over asyncio streams."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    async def post(self, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """
+        Send a POST and read the response.
+
+        Returns:
+            (status, lower-cased headers, body, whether the connection can be reused)
+        """
+        lines = [f"POST {path} HTTP/1.1"]
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        try:
+            self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        except ConnectionError as e:
+            raise _ConnectionLost(str(e)) from e
+        if not status_line:
+            raise _ConnectionLost("connection closed before the response")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status = int(parts[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        reusable = response_headers.get("connection", "").lower() != "close"
+        if "content-length" in response_headers:
+            data = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            pieces = []
+            while True:
+                size_line = await self.reader.readline()
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                pieces.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            data = b"".join(pieces)
+        else:
+            data = await self.reader.read()
+            reusable = False
+        return status, response_headers, data, reusable
+
+    def close(self) -> None:
+        self.writer.close()
+
+class _AsyncConnectionPool:
+    """Keep-alive connections to one host, each used by one request at a time."""
+
+    def __init__(self, url: str, size: int, stats: LLMStats):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.https = parts.scheme == "https"
+        self.port = parts.port or (443 if self.https else 80)
+        self.size = size
+        self.stats = stats
+        self._ssl = ssl.create_default_context() if self.https else None
+        self._idle: List[_HTTPConnection] = []
+
+    async def get(self) -> _HTTPConnection:
+        if self._idle:
+            connection = self._idle.pop()
+            connection.reused = True
+            return connection
+        self.stats.connections += 1
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+        return _HTTPConnection(reader, writer)
+
+    def put(self, connection: _HTTPConnection) -> None:
+        if len(self._idle) < self.size:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+class AsyncLLMClient:
+    """Concurrent, rate-limited chat completion client with backpressure."""
+
+    def __init__(self, model: str = "gpt-4", api_key: Optional[str] = None,
+                 base_url: str = DEFAULT_BASE_URL, temperature: float = 0.2, max_tokens: int = 1000,
+                 top_p: float = 1.0, max_concurrency: int = 8,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_queue: Optional[int] = None,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 timeout: float = 120.0, cache: Optional[ResponseCache] = None):
+        """
+        Initialize the client; connections are opened on first use.
+
+        Args:
+            model: Model name sent with every request.
+            api_key: Bearer token; defaults to the OPENAI_API_KEY environment variable.
+            base_url: API base URL; requests go to {base_url}/chat/completions.
+            temperature: Default sampling temperature.
+            max_tokens: Default completion token limit.
+            top_p: Default nucleus sampling parameter.
+            max_concurrency: Requests in flight at once.
+            requests_per_minute: Request budget; None for no limit.
+            tokens_per_minute: Token budget (prompt and completion); None for no limit.
+            max_queue: Prompts map() reads ahead of the workers; defaults to
+                      twice max_concurrency.
+            max_retries: Retries of a failed request before giving up.
+            backoff_base: First retry delay in seconds, doubled per attempt.
+            backoff_max: Upper bound of a retry delay.
+            timeout: Seconds a request may take.
+            cache: Response cache consulted before every request.
+        """
+        if not base_url.endswith("/"):
+            base_url += "/"
+        self.model = model
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.params = {"temperature": temperature, "max_tokens": max_tokens, "top_p": top_p}
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue or 2 * max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = LLMStats()
+        self.request_bucket = AsyncTokenBucket.per_minute(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = AsyncTokenBucket.per_minute(tokens_per_minute) if tokens_per_minute else None
+        parts = urlsplit(base_url)
+        self._path = f"{parts.path}chat/completions"
+        self._host_header = parts.netloc
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[_AsyncConnectionPool] = None
+        self._paused_until = 0.0
+
+    @classmethod
+    def from_config(cls, settings: Dict, cache: Union[ResponseCache, None, bool] = True,
+                    **kwargs) -> "AsyncLLMClient":
+        """
+        Create a client from the 'extraction.llm' config section.
+
+        Args:
+            settings: The section.
+            cache: A cache to use, True for the configured one, None or False for none.
+            **kwargs: Overrides of the configured arguments.
+        """
+        options = {}
+        for name in ("model", "api_key", "base_url", "temperature", "max_tokens", "top_p",
+                     "max_concurrency", "requests_per_minute", "tokens_per_minute",
+                     "max_retries", "timeout"):
+            if settings.get(name) is not None:
+                options[name] = settings[name]
+        if cache is True:
+            cache = ResponseCache.from_config(settings)
+        options["cache"] = cache or None
+        options.update(kwargs)
+        return cls(**options)
+
+    def _bind_loop(self) -> None:
+        """Create the loop-bound primitives for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._pool = _AsyncConnectionPool(self.base_url, self.max_concurrency, self.stats)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+            self._loop = None
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _settings(self, params: Dict) -> Dict:
+        settings = dict(self.params)
+        settings.update(params)
+        return settings
+
+    async def _throttle(self, tokens: int) -> None:
+        """Wait for a pause after a 429 and for the request and token budgets."""
+        waited = 0.0
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            waited += pause
+            await asyncio.sleep(pause)
+        if self.request_bucket is not None:
+            waited += await self.request_bucket.acquire(1)
+        if self.token_bucket is not None:
+            waited += await self.token_bucket.acquire(tokens)
+        self.stats.throttled_seconds += waited
+
+    async def _send(self, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        headers = {"Host": self._host_header, "Content-Type": "application/json",
+                   "Accept": "application/json", "Connection": "keep-alive"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        connection = await self._pool.get()
+        try:
+            status, response_headers, data, reusable = await asyncio.wait_for(
+                connection.post(self._path, headers, body), self.timeout)
+        except _ConnectionLost as e:
+            connection.close()
+            if not connection.reused:
+                raise
+            # The server closed an idle keep-alive connection before reading
+            # the request; use a new one. Timeouts and failures after the
+            # response started go through the retries of complete() instead.
+            logger.debug(f"Reconnecting after stale connection: {e}")
+            connection = await self._pool.get()
+            try:
+                status, response_headers, data, reusable = await asyncio.wait_for(
+                    connection.post(self._path, headers, body), self.timeout)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+        if reusable:
+            self._pool.put(connection)
+        else:
+            connection.close()
+        return status, response_headers, data
+
+    async def complete(self, prompt: str, system: Optional[str] = None, **params) -> LLMResponse:
+        """
+        Complete one prompt.
+
+        Args:
+            prompt: The user message.
+            system: Optional system message.
+            **params: Overrides of temperature, max_tokens, top_p and other
+                     request fields.
+
+        Returns:
+            The response; cached responses have ``cached`` set.
+
+        Raises:
+            LLMError: On a non-retryable status or once retries run out.
+        """
+        self._bind_loop()
+        settings = self._settings(params)
+        key = None
+        if self.cache is not None:
+            key_params = dict(settings)
+            key_params["system"] = system
+            key = cache_key(prompt, self.model, key_params)
+            text = self.cache.get_key(key)
+            if text is not None:
+                self.stats.cache_hits += 1
+                return LLMResponse(prompt=prompt, text=text, cached=True)
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        payload = {"model": self.model, "messages": messages}
+        payload.update(settings)
+        body = json.dumps(payload).encode("utf-8")
+        estimate = estimate_tokens(prompt) + estimate_tokens(system or "") + int(settings.get("max_tokens") or 0)
+
+        start = time.perf_counter()
+        error = None
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._throttle(estimate)
+                self.stats.requests += 1
+                retry_after = None
+                try:
+                    status, headers, data = await self._send(body)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if status == 200:
+                        response = self._parse(prompt, data, estimate)
+                        response.attempts = attempt + 1
+                        response.seconds = time.perf_counter() - start
+                        if key is not None:
+                            self.cache.put_key(key, self.model, response.text)
+                        return response
+                    error = f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+                    if status not in RETRY_STATUSES:
+                        self.stats.failures += 1
+                        raise LLMError(error)
+                    retry_after = retry_after_seconds(headers)
+                    if status == 429 and retry_after:
+                        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                if attempt == self.max_retries:
+                    break
+                delay = self._backoff(attempt, retry_after)
+                logger.debug(f"LLM request failed ({error}), retrying in {delay:.2f}s")
+                self.stats.retries += 1
+                await asyncio.sleep(delay)
+        self.stats.failures += 1
+        raise LLMError(f"Request failed after {self.max_retries + 1} attempts: {error}")
+
+    def _parse(self, prompt: str, data: bytes, estimate: int) -> LLMResponse:
+        try:
+            result = json.loads(data)
+            text = result["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.stats.failures += 1
+            raise LLMError(f"Malformed completion response: {e}")
+        usage = result.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(prompt)
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(text or "")
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+        if self.token_bucket is not None:
+            self.token_bucket.adjust(estimate - prompt_tokens - completion_tokens)
+        return LLMResponse(prompt=prompt, text=text or "", prompt_tokens=prompt_tokens,
+                           completion_tokens=completion_tokens)
+
+    async def map(self, prompts: Union[Iterable[str], AsyncIterable[str]], system: Optional[str] = None,
+                  **params) -> AsyncIterator[Tuple[int, LLMResponse]]:
+        """
+        Complete a stream of prompts, yielding (index, response) in completion order.
+
+        Prompts are read only as workers free up (at most ``max_queue``
+        ahead), and workers wait while the caller has not consumed
+        ``max_queue`` results, so a slow consumer also slows the producer.
+        Failed requests are yielded as responses with ``error`` set.
+        """
+        self._bind_loop()
+        pending: asyncio.Queue = asyncio.Queue(self.max_queue)
+        results: asyncio.Queue = asyncio.Queue(self.max_queue)
+        done = object()
+
+        async def produce():
+            index = 0
+            try:
+                if hasattr(prompts, "__aiter__"):
+                    async for prompt in prompts:
+                        await pending.put((index, prompt))
+                        index += 1
+                else:
+                    for prompt in prompts:
+                        await pending.put((index, prompt))
+                        index += 1
+            finally:
+                for _ in range(self.max_concurrency):
+                    await pending.put(None)
+
+        async def work():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                index, prompt = item
+                try:
+                    response = await self.complete(prompt, system=system, **params)
+                except LLMError as e:
+                    response = LLMResponse(prompt=prompt, error=str(e))
+                await results.put((index, response))
+
+        async def finish(workers):
+            await asyncio.gather(*workers, return_exceptions=True)
+            await results.put(done)
+
+        producer = asyncio.ensure_future(produce())
+        workers = []
+        for _ in range(self.max_concurrency):
+            workers.append(asyncio.ensure_future(work()))
+        tasks = [producer, asyncio.ensure_future(finish(workers))]
+        tasks.extend(workers)
+        try:
+            while True:
+                item = await results.get()
+                if item is done:
+                    break
+                yield item
+            # Surface an exception of the prompt source
+            await producer
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def complete_all(self, prompts: Iterable[str], system: Optional[str] = None, **params) -> List[LLMResponse]:
+        """Complete prompts from synchronous code; responses are returned in prompt order."""
+        async def run():
+            responses: Dict[int, LLMResponse] = {}
+            try:
+                async for index, response in self.map(prompts, system=system, **params):
+                    responses[index] = response
+            finally:
+                await self.aclose()
+            ordered = []
+            for index in range(len(responses)):
+                ordered.append(responses[index])
+            return ordered
+        return asyncio.run(run())
+
+__all__ = [
+    'AsyncLLMClient',
+    'AsyncTokenBucket',
+    'LLMError',
+    'LLMResponse',
+    'LLMStats',
+    'estimate_tokens',
+    'retry_after_seconds',
+]
@@ -0,0 +1,738 @@
+"""
+LLM-based named entity recognition over text chunks.
+
+An NER prompt repeats the same instructions and entity schema for every
+chunk, and at ``extraction.chunking.chunk_size`` characters a chunk is a
+small part of what a request can hold. PromptPacker therefore packs several
+chunks, from the same or different documents, into one prompt up to
+``extraction.ner.token_budget`` estimated tokens, with each chunk wrapped in
+a ``<chunk id="C1">`` block. The number of chunks per prompt is also capped so
+that their answers fit in ``extraction.llm.max_tokens``.
+
+The model answers with JSON in which every entity names the chunk it was
+found in. parse_response() splits a packed answer back into per-chunk
+results and locates each entity in its chunk, so that entity offsets are
+document offsets (relative to the text the chunks view, see
+aim2.corpus.chunker). Models are unreliable at counting characters, so an
+offset given by the model is only used when the text at that position
+matches; otherwise the entity is searched in the chunk.
+
+Many chunks need no model at all. EntityDictionary is an Aho-Corasick
+automaton over word tokens, built from the labels and synonyms of the loaded
+ontologies, that tags every mention of a known term in one pass over the
+text. With a dictionary, EntityExtractor accepts chunks whose terms are all
+unambiguous as they are, resolves chunks without any term without a
+request, and sends the model only the sentences around ambiguous terms
+(terms of several entity types, related synonyms and short acronyms). The
+automaton is persisted next to the ontology file by AIM2Ontology.save(), see
+AIM2Ontology.entity_dictionary().
+"""
+import bisect
+import json
+import logging
+import pickle
+import zlib
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..corpus.chunker import Chunk, sentence_ends
+from .llm_interface import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Entity types of the extraction schema, with their descriptions
+ENTITY_TYPES: Dict[str, str] = {
+    "Chemical": "A specific chemical compound or metabolite.",
+    "Species": "A plant species.",
+    "PlantAnatomy": "A specific part or tissue of a plant.",
+    "ExperimentalCondition": "A condition applied during an experiment (abiotic or biotic).",
+    "Gene": "A specific gene or protein.",
+    "MolecularTrait": "A molecular-level trait or process.",
+    "PlantTrait": "A phenotypic trait of a plant.",
+    "HumanTrait": "A human health-related trait or effect.",
+}
+
+# Ontology category of each entity type
+ENTITY_CATEGORIES: Dict[str, str] = {
+    "Chemical": "Structural",
+    "Species": "Source",
+    "PlantAnatomy": "Source",
+    "ExperimentalCondition": "Source",
+    "Gene": "Functional",
+    "MolecularTrait": "Functional",
+    "PlantTrait": "Functional",
+    "HumanTrait": "Functional",
+}
+
+NER_INSTRUCTIONS = """You are annotating plant biology literature.
+Find every mention of the following entity types in the text chunks below.
+
+Entity types:
+{schema}
+
+Each chunk is enclosed in <chunk id="..."> and </chunk>. Annotate each chunk
+on its own. Answer with JSON only, in this form:
+{{"entities": [{{"chunk": "C1", "text": "quercetin", "type": "Chemical", "start": 17}}]}}
+where "text" is the mention exactly as written in the chunk, "start" is its
+character offset in the chunk and "chunk" is the id of the chunk it occurs in.
+List a mention once per occurrence. Answer {{"entities": []}} if there are none.
+"""
+
+def render_schema(entity_types: Dict[str, str]) -> str:
+    lines = []
+    for name, description in entity_types.items():
+        lines.append(f"- {name}: {description}")
+    return "\n".join(lines)
+
+@dataclass
+class Entity:
+    """An entity mention at document offsets."""
+    doc_id: str
+    start: int
+    end: int
+    text: str
+    label: str
+    source: str = "llm"
+    iri: Optional[str] = None
+
+@dataclass
+class NERPrompt:
+    """A prompt and the chunks it packs, by their ids in the prompt."""
+    text: str
+    chunks: Dict[str, Chunk] = field(default_factory=dict)
+
+@dataclass
+class NERResult:
+    """Entities found in one chunk."""
+    chunk: Chunk
+    entities: List[Entity] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class PromptPacker:
+    """Packs chunks into NER prompts up to a token budget."""
+
+    def __init__(self, token_budget: int = 6000, max_chunks: int = 8,
+                 output_tokens_per_chunk: int = 120, max_output_tokens: Optional[int] = None,
+                 entity_types: Optional[Dict[str, str]] = None, instructions: str = NER_INSTRUCTIONS):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget: Estimated prompt tokens (instructions and chunks) per prompt.
+            max_chunks: Most chunks per prompt; 1 gives one prompt per chunk.
+            output_tokens_per_chunk: Answer tokens expected per chunk.
+            max_output_tokens: Completion token limit of the model
+                              (extraction.llm.max_tokens); caps the chunks per
+                              prompt at max_output_tokens / output_tokens_per_chunk.
+            entity_types: Entity types and descriptions; defaults to ENTITY_TYPES.
+            instructions: Template with a {schema} field.
+        """
+        self.entity_types = entity_types or ENTITY_TYPES
+        self.instructions = instructions.format(schema=render_schema(self.entity_types))
+        self.token_budget = token_budget
+        self.max_chunks = max_chunks
+        if max_output_tokens:
+            self.max_chunks = max(1, min(max_chunks, max_output_tokens // max(1, output_tokens_per_chunk)))
+        self.header_tokens = estimate_tokens(self.instructions)
+
+    @classmethod
+    def from_config(cls, settings: Dict, max_output_tokens: Optional[int] = None, **kwargs) -> "PromptPacker":
+        """Create a packer from the 'extraction.ner' config section."""
+        options = {
+            "token_budget": settings.get("token_budget", 6000),
+            "max_chunks": settings.get("max_chunks", 8),
+            "output_tokens_per_chunk": settings.get("output_tokens_per_chunk", 120),
+            "max_output_tokens": max_output_tokens,
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def _render(self, blocks: List[str]) -> str:
+        return self.instructions + "\n" + "".join(blocks)
+
+    def pack(self, chunks: Iterable[Chunk]) -> Iterator[NERPrompt]:
+        """
+        Pack a stream of chunks into prompts, in order.
+
+        A chunk that does not fit in a prompt that already holds chunks
+        starts the next prompt; a chunk too large for the budget on its own
+        gets a prompt to itself.
+        """
+        blocks: List[str] = []
+        members: Dict[str, Chunk] = {}
+        tokens = self.header_tokens
+        for chunk in chunks:
+            chunk_id = f"C{len(members) + 1}"
+            block = f'<chunk id="{chunk_id}">\n{chunk.text}\n</chunk>\n'
+            block_tokens = estimate_tokens(block)
+            if members and (tokens + block_tokens > self.token_budget or len(members) >= self.max_chunks):
+                yield NERPrompt(self._render(blocks), members)
+                blocks, members, tokens = [], {}, self.header_tokens
+                chunk_id = "C1"
+                block = f'<chunk id="C1">\n{chunk.text}\n</chunk>\n'
+            blocks.append(block)
+            members[chunk_id] = chunk
+            tokens += block_tokens
+        if members:
+            yield NERPrompt(self._render(blocks), members)
+
+def json_payload(text: str) -> str:
+    """The JSON value in a model answer, without code fences or commentary."""
+    starts = []
+    for opener in ("{", "["):
+        position = text.find(opener)
+        if position != -1:
+            starts.append(position)
+    if not starts:
+        return text
+    start = min(starts)
+    closer = "}" if text[start] == "{" else "]"
+    end = text.rfind(closer)
+    return text[start:end + 1] if end > start else text[start:]
+
+def locate(chunk: Chunk, mention: str, start: Optional[int] = None, after: int = 0) -> Optional[int]:
+    """
+    Document offset of a mention in a chunk, or None.
+
+    Uses start (an offset in the chunk) when the text there matches,
+    otherwise the first occurrence at or after offset ``after`` of the chunk,
+    falling back to a case-insensitive search.
+    """
+    buffer = chunk.buffer
+    if isinstance(start, int) and 0 <= start and chunk.start + start + len(mention) <= chunk.end:
+        if buffer.startswith(mention, chunk.start + start):
+            return chunk.start + start
+    for origin in (chunk.start + after, chunk.start):
+        position = buffer.find(mention, origin, chunk.end)
+        if position != -1:
+            return position
+    text = chunk.text
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        position = lowered.find(mention.lower())
+        if position != -1:
+            return chunk.start + position
+    return None
+
+def parse_response(answer: str, prompt: NERPrompt,
+                   entity_types: Optional[Dict[str, str]] = None) -> Dict[str, List[Entity]]:
+    """
+    Split a (packed) NER answer into the entities of each chunk.
+
+    Returns:
+        Entities by chunk id, for every chunk of the prompt. Entities with an
+        unknown chunk id or type, or whose text is not in their chunk, are
+        dropped.
+
+    Raises:
+        ValueError: If the answer is not JSON of the expected shape.
+    """
+    entity_types = entity_types or ENTITY_TYPES
+    data = json.loads(json_payload(answer))
+    items = data.get("entities") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("NER answer has no entity list")
+    results: Dict[str, List[Entity]] = {}
+    for chunk_id in prompt.chunks:
+        results[chunk_id] = []
+    # Where the next mention of a text is searched in a chunk
+    cursors: Dict[Tuple[str, str], int] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        chunk_id = str(item.get("chunk", "C1" if len(prompt.chunks) == 1 else ""))
+        mention = item.get("text")
+        label = item.get("type") or item.get("label")
+        chunk = prompt.chunks.get(chunk_id)
+        if chunk is None or not isinstance(mention, str) or not mention or label not in entity_types:
+            logger.debug(f"Dropping NER item {item!r}")
+            continue
+        position = locate(chunk, mention, item.get("start"), cursors.get((chunk_id, mention), 0))
+        if position is None:
+            logger.debug(f"NER mention {mention!r} not found in chunk {chunk!r}")
+            continue
+        cursors[(chunk_id, mention)] = position - chunk.start + len(mention)
+        results[chunk_id].append(Entity(chunk.doc_id, position, position + len(mention),
+                                        chunk.buffer[position:position + len(mention)], label))
+    return results
+
+def merge_entities(entities: Iterable[Entity]) -> List[Entity]:
+    """Entities in document order, without the duplicates of overlapping chunks."""
+    unique: Dict[Tuple[str, int, int, str], Entity] = {}
+    for entity in entities:
+        unique.setdefault((entity.doc_id, entity.start, entity.end, entity.label), entity)
+    ordered = list(unique.values())
+    ordered.sort(key=lambda entity: (entity.doc_id, entity.start, entity.end))
+    return ordered
+
+# Entity type of the classes of each source ontology, by IRI prefix (local name before "_")
+ONTOLOGY_ENTITY_TYPES: Dict[str, str] = {
+    "CHEBI": "Chemical",
+    "NCBITaxon": "Species",
+    "PO": "PlantAnatomy",
+    "PECO": "ExperimentalCondition",
+    "GO": "MolecularTrait",
+    "TO": "PlantTrait",
+}
+
+# Synonym scopes (see aim2.ontology.export) used, and whether their terms are ambiguous
+SYNONYM_AMBIGUITY = {"hasExactSynonym": False, "hasRelatedSynonym": True}
+
+# Single-token terms shorter than this are ambiguous (acronyms, symbols)
+DEFAULT_MIN_LENGTH = 4
+
+# Bump when the persisted layout changes
+DICTIONARY_VERSION = 2
+
+def _separator_table() -> Dict[int, str]:
+    """Map whitespace and punctuation to spaces, so tokens are runs of letters and digits."""
+    table = {}
+    for code in range(0x3100):
+        char = chr(code)
+        if char.isspace() or not char.isalnum():
+            table[code] = " "
+    return table
+
+_SEPARATORS = _separator_table()
+
+def fold(text: str) -> str:
+    """
+    Lower-case text with separators replaced by spaces, at the same offsets.
+
+    Characters whose lower case is longer (such as a dotted capital I) are
+    kept as they are, so that offsets into the result are offsets into text.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        chars = []
+        for char in text:
+            lower = char.lower()
+            chars.append(lower if len(lower) == 1 else char)
+        lowered = "".join(chars)
+    return lowered.translate(_SEPARATORS)
+
+def term_key(text: str) -> str:
+    """Dictionary key of a term: its folded tokens, separated by single spaces."""
+    return " ".join(fold(text).split())
+
+def entity_type_of(iri: str) -> Optional[str]:
+    """Entity type of an ontology class from its IRI prefix, e.g. CHEBI_16243 -> Chemical."""
+    local = iri
+    for separator in ("#", "/"):
+        position = local.rfind(separator)
+        if position != -1:
+            local = local[position + 1:]
+    prefix = local.split("_", 1)[0]
+    return ONTOLOGY_ENTITY_TYPES.get(prefix)
+
+@dataclass
+class DictionaryMatch:
+    """A dictionary term found in a text, at offsets into that text."""
+    start: int
+    end: int
+    label: str
+    iri: str
+    ambiguous: bool
+
+def dictionary_path(owl_path: Union[str, Path]) -> Path:
+    """Return where the entity dictionary of an ontology file is persisted."""
+    owl_path = Path(owl_path)
+    return owl_path.with_name(owl_path.name + ".dict")
+
+class EntityDictionary:
+    """
+    Aho-Corasick automaton over word tokens of ontology terms.
+
+    Every state is a token sequence; ``goto`` holds the transitions of each
+    state, ``fail`` the state of its longest proper suffix that is also a
+    prefix of a term. A state that completes a term has a term number in
+    ``terms``; ``emit`` points to the first state on the failure chain (the
+    state itself included) that completes a term, and ``next_emit`` from
+    there to the next one, so a scan touches only the terms that match.
+    """
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail = array("i", (0,))
+        self.depth = array("i", (0,))
+        self.terms = array("i", (-1,))
+        self.emit = array("i", (-1,))
+        self.next_emit = array("i", (-1,))
+        # Term number -> (entity type, class IRI, ambiguous)
+        self.entries: List[Tuple[str, str, bool]] = []
+        # What the terms were taken from, to tell whether a saved copy is stale
+        self.sources: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, terms: Iterable[Tuple[str, str, str, bool]],
+              min_length: int = DEFAULT_MIN_LENGTH) -> "EntityDictionary":
+        """
+        Build the automaton.
+
+        Args:
+            terms: (text, entity type, class IRI, ambiguous) tuples.
+            min_length: Single-token terms shorter than this are ambiguous.
+
+        A term with entries of several entity types is ambiguous; its first
+        unambiguous entry is kept (the first entry if there is none).
+        """
+        # Term key -> [entity type, IRI, ambiguous, entity types seen]
+        merged: Dict[str, list] = {}
+        for text, label, iri, ambiguous in terms:
+            key = term_key(text)
+            if not key:
+                continue
+            if " " not in key and len(key) < min_length:
+                ambiguous = True
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [label, iri, ambiguous, {label}]
+                continue
+            entry[3].add(label)
+            if entry[2] and not ambiguous:
+                entry[0], entry[1], entry[2] = label, iri, False
+
+        dictionary = cls()
+        goto = dictionary.goto
+        for key, (label, iri, ambiguous, labels) in merged.items():
+            state = 0
+            for token in key.split(" "):
+                following = goto[state].get(token)
+                if following is None:
+                    following = len(goto)
+                    goto[state][token] = following
+                    goto.append({})
+                    dictionary.fail.append(0)
+                    dictionary.depth.append(dictionary.depth[state] + 1)
+                    dictionary.terms.append(-1)
+                    dictionary.emit.append(-1)
+                    dictionary.next_emit.append(-1)
+                state = following
+            dictionary.terms[state] = len(dictionary.entries)
+            dictionary.entries.append((label, iri, ambiguous or len(labels) > 1))
+        dictionary._link()
+        return dictionary
+
+    def _link(self) -> None:
+        """Compute the failure and output links, breadth first."""
+        goto, fail, terms, emit, next_emit = self.goto, self.fail, self.terms, self.emit, self.next_emit
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            link = emit[fail[state]]
+            if terms[state] != -1:
+                emit[state] = state
+                next_emit[state] = link
+            else:
+                emit[state] = link
+            for token, child in goto[state].items():
+                suffix = fail[state]
+                while suffix and token not in goto[suffix]:
+                    suffix = fail[suffix]
+                if state:
+                    fail[child] = goto[suffix].get(token, 0)
+                queue.append(child)
+
+    @classmethod
+    def from_ontology(cls, ontologies, type_of: Callable[[str], Optional[str]] = entity_type_of,
+                      min_length: int = DEFAULT_MIN_LENGTH) -> "EntityDictionary":
+        """
+        Build the dictionary from the labels and synonyms of ontology classes.
+
+        Args:
+            ontologies: An AIM2Ontology (its ontology and all imported ones),
+                       or Owlready2 ontologies.
+            type_of: Entity type of a class IRI; classes without one are skipped.
+            min_length: Single-token terms shorter than this are ambiguous.
+        """
+        from ..ontology.export import SYNONYM_SCOPES, dump_columns
+
+        if hasattr(ontologies, "imported_ontologies"):
+            ontologies = [ontologies.onto] + list(ontologies.imported_ontologies.values())
+
+        def terms():
+            for onto in ontologies:
+                columns = dump_columns(onto)
+                for cls_number, text in zip(columns.label_class, columns.label_text):
+                    iri = columns.classes[cls_number]
+                    label = type_of(iri)
+                    if label is not None:
+                        yield text, label, iri, False
+                for cls_number, scope, text in zip(columns.synonym_class, columns.synonym_scope,
+                                                   columns.synonym_text):
+                    ambiguous = SYNONYM_AMBIGUITY.get(SYNONYM_SCOPES[scope])
+                    iri = columns.classes[cls_number]
+                    label = type_of(iri)
+                    if label is not None and ambiguous is not None:
+                        yield text, label, iri, ambiguous
+
+        return cls.build(terms(), min_length)
+
+    def scan(self, text: str, start: int = 0, end: Optional[int] = None) -> List[DictionaryMatch]:
+        """
+        Find the terms in text[start:end].
+
+        Returns:
+            Leftmost-longest, non-overlapping matches of whole tokens, in
+            order, at offsets into text.
+        """
+        end = len(text) if end is None else end
+        folded = fold(text[start:end])
+        tokens = folded.split()
+        goto, fail, depth, emit, next_emit = self.goto, self.fail, self.depth, self.emit, self.next_emit
+        root = goto[0]
+        # (first token, last token, state) of every term occurrence
+        found = []
+        state = 0
+        for index, token in enumerate(tokens):
+            if state == 0:
+                state = root.get(token, 0)
+                if state == 0:
+                    continue
+            else:
+                following = goto[state].get(token)
+                while following is None and state:
+                    state = fail[state]
+                    following = goto[state].get(token)
+                state = following or 0
+            matched = emit[state]
+            while matched != -1:
+                found.append((index - depth[matched] + 1, index, matched))
+                matched = next_emit[matched]
+        if not found:
+            return []
+
+        found.sort(key=lambda item: (item[0], -item[1]))
+        selected = []
+        covered = -1
+        for first, last, matched in found:
+            if first > covered:
+                selected.append((first, last, matched))
+                covered = last
+
+        # Offsets of tokens: the n-th occurrence of " token " in the padded text
+        padded = " " + folded + " "
+        resolved = 0
+        position = 0
+        offsets: Dict[int, int] = {}
+        for first, last, _ in selected:
+            for index in (first, last):
+                if index in offsets:
+                    continue
+                token = tokens[index]
+                needle = " " + token + " "
+                for _ in range(tokens[resolved:index].count(token) + 1):
+                    position = padded.find(needle, position) + 1
+                offsets[index] = position - 1
+                position += len(token)
+                resolved = index + 1
+
+        matches = []
+        for first, last, matched in selected:
+            label, iri, ambiguous = self.entries[self.terms[matched]]
+            matches.append(DictionaryMatch(start + offsets[first], start + offsets[last] + len(tokens[last]),
+                                           label, iri, ambiguous))
+        return matches
+
+    def tag(self, chunk: Chunk) -> List[DictionaryMatch]:
+        """Find the terms of a chunk, at document offsets."""
+        return self.scan(chunk.buffer, chunk.start, chunk.end)
+
+    def save(self, path: Union[str, Path], fingerprint: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Persist the automaton.
+
+        Args:
+            path: Destination file, usually dictionary_path(owl_path).
+            fingerprint: file_fingerprint() of the ontology file it belongs to.
+        """
+        data = {"version": DICTIONARY_VERSION, "fingerprint": fingerprint, "sources": self.sources,
+                "goto": self.goto,
+                "fail": self.fail, "depth": self.depth, "terms": self.terms, "emit": self.emit,
+                "next_emit": self.next_emit, "entries": self.entries}
+        Path(path).write_bytes(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1))
+
+    @classmethod
+    def load(cls, path: Union[str, Path], fingerprint: Optional[Tuple[int, int]] = None,
+             sources: Optional[tuple] = None) -> Optional["EntityDictionary"]:
+        """
+        Load a persisted automaton.
+
+        Args:
+            path: File written by save().
+            fingerprint: file_fingerprint() of the ontology file.
+            sources: What the terms must have been taken from (see
+                    AIM2Ontology.entity_dictionary()).
+
+        Returns:
+            The dictionary, or None if the file is missing, of another
+            version or does not match the ontology file and sources.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        data = pickle.loads(zlib.decompress(path.read_bytes()))
+        if data.get("version") != DICTIONARY_VERSION or data.get("fingerprint") != fingerprint or \
+                data.get("sources") != sources:
+            return None
+        dictionary = cls()
+        for name in ("goto", "fail", "depth", "terms", "emit", "next_emit", "entries", "sources"):
+            setattr(dictionary, name, data[name])
+        return dictionary
+
+def sentence_windows(chunk: Chunk, spans: Iterable[Tuple[int, int]]) -> List[Chunk]:
+    """
+    The sentences of a chunk around spans (document offsets), as chunk views.
+
+    Sentences around overlapping or adjacent spans are merged into one view.
+    """
+    bounds = [chunk.start] + sentence_ends(chunk.buffer, chunk.start, chunk.end) + [chunk.end]
+    windows: List[Chunk] = []
+    for start, end in spans:
+        window_start = bounds[bisect.bisect_right(bounds, start) - 1]
+        window_end = bounds[min(bisect.bisect_left(bounds, end), len(bounds) - 1)]
+        if windows and window_start <= windows[-1].end:
+            windows[-1].end = max(windows[-1].end, window_end)
+        else:
+            windows.append(Chunk(chunk.doc_id, window_start, window_end, chunk.buffer))
+    return windows
+
+@dataclass
+class _PendingChunk:
+    """A chunk waiting for the answers about its ambiguous sentences."""
+    chunk: Chunk
+    entities: List[Entity]
+    remaining: int
+    error: Optional[str] = None
+
+class EntityExtractor:
+    """Runs packed NER prompts through an AsyncLLMClient."""
+
+    def __init__(self, client, packer: Optional[PromptPacker] = None,
+                 dictionary: Optional[EntityDictionary] = None):
+        """
+        Initialize the extractor.
+
+        Args:
+            client: AsyncLLMClient (or anything with its map()).
+            packer: Prompt packer; defaults to PromptPacker() capped by the
+                   client's max_tokens.
+            dictionary: Dictionary pre-pass. Without one, every chunk is sent
+                       to the model.
+        """
+        self.client = client
+        if packer is None:
+            params = getattr(client, "params", {})
+            packer = PromptPacker(max_output_tokens=params.get("max_tokens"))
+        self.packer = packer
+        self.dictionary = dictionary
+        self.prompts = 0
+        # Chunks resolved by the dictionary alone
+        self.skipped = 0
+
+    def _requests(self, chunks: Iterable[Chunk], ready: Deque[NERResult],
+                  pending: Dict[int, _PendingChunk]) -> Iterator[Chunk]:
+        """
+        The chunks (or sentence views) the model has to see.
+
+        Chunks resolved by the dictionary are appended to ready; the views of
+        partly resolved chunks are registered in pending by id().
+        """
+        for chunk in chunks:
+            if self.dictionary is None:
+                yield chunk
+                continue
+            known: List[Entity] = []
+            ambiguous = []
+            for match in self.dictionary.tag(chunk):
+                if match.ambiguous:
+                    ambiguous.append((match.start, match.end))
+                else:
+                    known.append(Entity(chunk.doc_id, match.start, match.end,
+                                        chunk.buffer[match.start:match.end], match.label,
+                                        "dictionary", match.iri))
+            if not ambiguous:
+                self.skipped += 1
+                ready.append(NERResult(chunk, known))
+                continue
+            windows = sentence_windows(chunk, ambiguous)
+            waiting = _PendingChunk(chunk, known, len(windows))
+            for window in windows:
+                pending[id(window)] = waiting
+                yield window
+
+    async def extract(self, chunks: Iterable[Chunk]) -> AsyncIterator[NERResult]:
+        """
+        Find the entities of a stream of chunks.
+
+        Yields:
+            One NERResult per chunk, in completion order. Chunks whose
+            request or answer failed carry the error.
+        """
+        packed: Dict[int, NERPrompt] = {}
+        ready: Deque[NERResult] = deque()
+        pending: Dict[int, _PendingChunk] = {}
+
+        def prompts():
+            for index, prompt in enumerate(self.packer.pack(self._requests(chunks, ready, pending))):
+                packed[index] = prompt
+                self.prompts += 1
+                yield prompt.text
+
+        async for index, response in self.client.map(prompts()):
+            prompt = packed.pop(index)
+            error = response.error
+            entities: Dict[str, List[Entity]] = {}
+            if error is None:
+                try:
+                    entities = parse_response(response.text, prompt, self.packer.entity_types)
+                except (ValueError, AttributeError) as e:
+                    error = f"Unparseable NER answer: {e}"
+            if error is not None:
+                logger.warning(f"NER failed for {len(prompt.chunks)} chunks: {error}")
+            for chunk_id, chunk in prompt.chunks.items():
+                found = entities.get(chunk_id, [])
+                waiting = pending.pop(id(chunk), None)
+                if waiting is None:
+                    yield NERResult(chunk, found, error)
+                    continue
+                waiting.entities.extend(found)
+                waiting.error = waiting.error or error
+                waiting.remaining -= 1
+                if not waiting.remaining:
+                    yield NERResult(waiting.chunk, merge_entities(waiting.entities), waiting.error)
+            while ready:
+                yield ready.popleft()
+        while ready:
+            yield ready.popleft()
+
+__all__ = [
+    'DictionaryMatch',
+    'ENTITY_CATEGORIES',
+    'ENTITY_TYPES',
+    'Entity',
+    'EntityDictionary',
+    'EntityExtractor',
+    'NERPrompt',
+    'NERResult',
+    'ONTOLOGY_ENTITY_TYPES',
+    'PromptPacker',
+    'dictionary_path',
+    'entity_type_of',
+    'fold',
+    'json_payload',
+    'locate',
+    'merge_entities',
+    'parse_response',
+    'sentence_windows',
+]
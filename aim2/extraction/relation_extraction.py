@@ -0,0 +1,418 @@
+"""
+Relation extraction between the entities of a document.
+
+Relations are only looked for between entities in the same or nearby
+sentences. Pairing every entity with every other one is quadratic in the
+entities of a document, and sending one prompt per pair repeats the
+instructions and the sentence for each of them. Here:
+
+- SentenceIndex holds the sorted sentence start offsets of a document, so
+  the sentence of an entity is a bisect;
+- candidate_pairs() buckets the entities by sentence and pairs each bucket
+  with itself and the next ``extraction.relations.sentence_window`` buckets,
+  which takes time linear in the entities plus the pairs produced;
+- a pair is kept only if a relation may hold between its entity types in
+  one direction or the other. The allowed types come from the domain and
+  range of each relation in aim2/ontology/schema.py (``accumulates_in`` only
+  goes from a structural entity to a source entity, for instance), with the
+  entity types mapped to their category by ENTITY_CATEGORIES. ``is_a``
+  also only links entities of the same type;
+- group_pairs() puts the pairs whose sentences overlap into one prompt that
+  quotes those sentences once, up to ``max_pairs`` pairs and
+  ``token_budget`` estimated tokens per prompt.
+"""
+import bisect
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (AsyncIterator, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from ..corpus.chunker import sentence_ends
+from .llm_interface import CHARS_PER_TOKEN, estimate_tokens
+from .ner import ENTITY_CATEGORIES, Entity, fold, json_payload
+
+logger = logging.getLogger(__name__)
+
+# Relations of the schema looked for in text, with their descriptions
+RELATION_DESCRIPTIONS: Dict[str, str] = {
+    "is_a": "the first entity is a kind of the second (quercetin is a flavonol)",
+    "made_via": "the first entity is produced through the second (a pathway, enzyme or process)",
+    "accumulates_in": "the first entity (a compound) accumulates in the second (tissue, species or condition)",
+    "affects": "the first entity affects the second, without a more specific direction",
+    "upregulates": "the first entity increases the level or activity of the second",
+    "downregulates": "the first entity decreases the level or activity of the second",
+    "inhibits": "the first entity inhibits the second",
+    "activates": "the first entity activates the second",
+}
+
+RELATION_INSTRUCTIONS = """You are extracting relations from plant biology literature.
+For each candidate pair of entities listed below, decide from the text which
+of the relations given for that pair it states, if any. A pair without a
+list of relations may take any of them.
+
+Relations:
+{relations}
+
+Answer with JSON only, in this form:
+{{"relations": [{{"head": "E1", "relation": "accumulates_in", "tail": "E2"}}]}}
+where head and tail are entity ids and the relation goes from head to tail.
+Only report relations stated in the text. Answer {{"relations": []}} if there are none.
+"""
+
+# Relation name -> (categories of the domain, categories of the range); None allows any
+Signatures = Dict[str, Tuple[Optional[FrozenSet[str]], Optional[FrozenSet[str]]]]
+
+def _categories(classes) -> Optional[FrozenSet[str]]:
+    """Entity categories (Structural, Source, Functional) covered by a domain or range."""
+    names = set()
+    for cls in classes:
+        if getattr(cls, "name", None) == "Thing":
+            return None
+        for subclass in cls.descendants():
+            name = subclass.name
+            if name.endswith("Annotation") and name != "Annotation":
+                names.add(name[:-len("Annotation")])
+    return frozenset(names) if names else None
+
+def relation_signatures(onto=None, relations: Iterable[str] = tuple(RELATION_DESCRIPTIONS)) -> Signatures:
+    """
+    Entity categories allowed at each end of each relation, from the schema.
+
+    Args:
+        onto: AIM2 ontology namespace. Defaults to aim2.ontology.schema.get_onto().
+        relations: Names of the relations (object properties) to read.
+
+    Raises:
+        ValueError: If a relation is not an object property of the ontology.
+    """
+    if onto is None:
+        from ..ontology.schema import get_onto
+        onto = get_onto()
+    signatures: Signatures = {}
+    for name in relations:
+        prop = getattr(onto, name, None)
+        if prop is None or not hasattr(prop, "domain"):
+            raise ValueError(f"'{name}' is not a property of the ontology")
+        signatures[name] = (_categories(prop.domain), _categories(prop.range))
+    return signatures
+
+def allowed_relations(head: Entity, tail: Entity, signatures: Signatures) -> List[str]:
+    """Relations that may go from head to tail, given their entity types."""
+    head_category = ENTITY_CATEGORIES.get(head.label)
+    tail_category = ENTITY_CATEGORIES.get(tail.label)
+    allowed = []
+    for name, (domain, range_) in signatures.items():
+        if name == "is_a" and head.label != tail.label:
+            continue
+        if (domain is None or head_category in domain) and (range_ is None or tail_category in range_):
+            allowed.append(name)
+    return allowed
+
+class SentenceIndex:
+    """Sentence spans of a text: sentence i covers starts[i] up to starts[i + 1]."""
+
+    def __init__(self, text: str, start: int = 0, end: Optional[int] = None):
+        self.end = len(text) if end is None else end
+        self.starts = [start] + sentence_ends(text, start, self.end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def sentence_of(self, offset: int) -> int:
+        """Index of the sentence containing an offset."""
+        return max(0, bisect.bisect_right(self.starts, offset) - 1)
+
+    def span(self, first: int, last: Optional[int] = None) -> Tuple[int, int]:
+        """Offsets of sentences first to last (inclusive)."""
+        last = first if last is None else last
+        end = self.starts[last + 1] if last + 1 < len(self.starts) else self.end
+        return self.starts[first], end
+
+@dataclass
+class CandidatePair:
+    """Two entities a relation may hold between, in document order."""
+    first: Entity
+    second: Entity
+    relations: Tuple[str, ...]
+    # Sentences of the first and the second entity
+    first_sentence: int
+    second_sentence: int
+
+def candidate_pairs(entities: Iterable[Entity], index: SentenceIndex, signatures: Signatures,
+                    sentence_window: int = 1) -> List[CandidatePair]:
+    """
+    Pairs of entities at most sentence_window sentences apart that a relation may link.
+
+    Overlapping mentions and repeated mentions of the same term are not
+    paired with each other.
+    """
+    buckets: Dict[int, List[Entity]] = {}
+    for entity in sorted(entities, key=lambda entity: (entity.start, entity.end)):
+        buckets.setdefault(index.sentence_of(entity.start), []).append(entity)
+    keys: Dict[int, str] = {}
+
+    def key_of(entity: Entity) -> str:
+        key = keys.get(id(entity))
+        if key is None:
+            key = keys[id(entity)] = entity.label + ":" + " ".join(fold(entity.text).split())
+        return key
+
+    # Entity types of a pair -> relations allowed in either direction
+    allowed: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+    pairs: List[CandidatePair] = []
+    for sentence in sorted(buckets):
+        bucket = buckets[sentence]
+        for other in range(sentence, sentence + sentence_window + 1):
+            others = buckets.get(other)
+            if others is None:
+                continue
+            for position, first in enumerate(bucket):
+                for second in (others[position + 1:] if other == sentence else others):
+                    if second.start < first.end or key_of(first) == key_of(second):
+                        continue
+                    labels = (first.label, second.label)
+                    relations = allowed.get(labels)
+                    if relations is None:
+                        both = set(allowed_relations(first, second, signatures))
+                        both.update(allowed_relations(second, first, signatures))
+                        relations = allowed[labels] = tuple(sorted(both))
+                    if relations:
+                        pairs.append(CandidatePair(first, second, relations, sentence, other))
+    return pairs
+
+@dataclass
+class RelationPrompt:
+    """A prompt over a run of sentences and the candidate pairs it asks about."""
+    doc_id: str
+    text: str
+    entities: Dict[str, Entity] = field(default_factory=dict)
+    pairs: List[CandidatePair] = field(default_factory=list)
+
+@dataclass
+class Relation:
+    """A relation stated between two entity mentions."""
+    head: Entity
+    relation: str
+    tail: Entity
+
+@dataclass
+class RelationResult:
+    """Relations found in one document."""
+    doc_id: str
+    relations: List[Relation] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def render_relations(signatures: Signatures) -> str:
+    lines = []
+    for name in signatures:
+        lines.append(f"- {name}: {RELATION_DESCRIPTIONS.get(name, name.replace('_', ' '))}")
+    return "\n".join(lines)
+
+def _render_prompt(instructions: str, context: str, pairs: List[CandidatePair],
+                   relation_count: int) -> Tuple[str, Dict[str, Entity]]:
+    ids: Dict[int, str] = {}
+    entities: Dict[str, Entity] = {}
+    entity_lines = []
+    pair_lines = []
+    for pair in pairs:
+        names = []
+        for entity in (pair.first, pair.second):
+            name = ids.get(id(entity))
+            if name is None:
+                name = ids[id(entity)] = f"E{len(ids) + 1}"
+                entities[name] = entity
+                entity_lines.append(f"{name}: {entity.text} ({entity.label})")
+            names.append(name)
+        if len(pair.relations) < relation_count:
+            pair_lines.append(f"{names[0]} - {names[1]}: {', '.join(pair.relations)}")
+        else:
+            pair_lines.append(f"{names[0]} - {names[1]}")
+    text = (f"{instructions}\nText:\n{context}\n\nEntities:\n" + "\n".join(entity_lines)
+            + "\n\nCandidate pairs:\n" + "\n".join(pair_lines) + "\n")
+    return text, entities
+
+def group_pairs(doc_id: str, text: str, index: SentenceIndex, pairs: List[CandidatePair],
+                instructions: str, relation_count: int, max_pairs: int = 24,
+                token_budget: int = 4000) -> Iterator[RelationPrompt]:
+    """
+    Batch pairs (as returned by candidate_pairs()) into prompts over shared sentences.
+
+    A prompt covers a run of sentences; the next pair joins it if its
+    sentences overlap or touch that run and the prompt stays within
+    max_pairs and token_budget (a single pair always gets a prompt).
+    Pairs that may take all relation_count relations are listed without them.
+    """
+    header_tokens = estimate_tokens(instructions)
+    batch: List[CandidatePair] = []
+    first = last = 0
+    # Estimated tokens of the entity and pair lines of the batch
+    tokens = 0
+    for pair in pairs:
+        pair_tokens = estimate_tokens(f"{pair.first.text}{pair.second.text}{pair.relations}") + 12
+        if batch:
+            new_last = max(last, pair.second_sentence)
+            start, end = index.span(first, new_last)
+            fits = (pair.first_sentence <= last + 1 and len(batch) < max_pairs
+                    and header_tokens + (end - start) // CHARS_PER_TOKEN + tokens + pair_tokens <= token_budget)
+            if fits:
+                batch.append(pair)
+                last = new_last
+                tokens += pair_tokens
+                continue
+            start, end = index.span(first, last)
+            prompt, entities = _render_prompt(instructions, text[start:end].strip(), batch, relation_count)
+            yield RelationPrompt(doc_id, prompt, entities, batch)
+        batch = [pair]
+        first, last = pair.first_sentence, pair.second_sentence
+        tokens = pair_tokens
+    if batch:
+        start, end = index.span(first, last)
+        prompt, entities = _render_prompt(instructions, text[start:end].strip(), batch, relation_count)
+        yield RelationPrompt(doc_id, prompt, entities, batch)
+
+def parse_relations(answer: str, prompt: RelationPrompt, signatures: Signatures) -> List[Relation]:
+    """
+    Relations of an answer to a relation prompt.
+
+    Relations between entities that were not asked about as a pair, and
+    relations the entity types do not allow in the given direction, are
+    dropped.
+
+    Raises:
+        ValueError: If the answer is not JSON of the expected shape.
+    """
+    data = json.loads(json_payload(answer))
+    items = data.get("relations") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Relation answer has no relation list")
+    asked = set()
+    for pair in prompt.pairs:
+        asked.add((id(pair.first), id(pair.second)))
+        asked.add((id(pair.second), id(pair.first)))
+    relations = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        head = prompt.entities.get(str(item.get("head")))
+        tail = prompt.entities.get(str(item.get("tail")))
+        name = item.get("relation")
+        if (head is None or tail is None or (id(head), id(tail)) not in asked
+                or name not in allowed_relations(head, tail, signatures)):
+            logger.debug(f"Dropping relation {item!r}")
+            continue
+        relations.append(Relation(head, name, tail))
+    return relations
+
+class RelationExtractor:
+    """Finds relations between the entities of documents through an AsyncLLMClient."""
+
+    def __init__(self, client, signatures: Optional[Signatures] = None, sentence_window: int = 1,
+                 max_pairs: int = 24, token_budget: int = 4000):
+        """
+        Initialize the extractor.
+
+        Args:
+            client: AsyncLLMClient (or anything with its map()).
+            signatures: Allowed entity categories per relation; defaults to
+                       relation_signatures() of the AIM2 schema.
+            sentence_window: Pair entities at most this many sentences apart.
+            max_pairs: Candidate pairs per prompt.
+            token_budget: Estimated prompt tokens per prompt.
+        """
+        self.client = client
+        self.signatures = signatures if signatures is not None else relation_signatures()
+        self.instructions = RELATION_INSTRUCTIONS.format(relations=render_relations(self.signatures))
+        self.sentence_window = sentence_window
+        self.max_pairs = max_pairs
+        self.token_budget = token_budget
+        self.pairs = 0
+        self.prompts = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict, client, **kwargs) -> "RelationExtractor":
+        """Create an extractor from the 'extraction.relations' config section."""
+        options = {
+            "sentence_window": settings.get("sentence_window", 1),
+            "max_pairs": settings.get("max_pairs", 24),
+            "token_budget": settings.get("token_budget", 4000),
+        }
+        options.update(kwargs)
+        return cls(client, **options)
+
+    def prompts_for(self, doc_id: str, text: str, entities: Iterable[Entity]) -> List[RelationPrompt]:
+        """The relation prompts of one document."""
+        index = SentenceIndex(text)
+        pairs = candidate_pairs(entities, index, self.signatures, self.sentence_window)
+        self.pairs += len(pairs)
+        prompts = list(group_pairs(doc_id, text, index, pairs, self.instructions,
+                                   len(self.signatures), self.max_pairs, self.token_budget))
+        self.prompts += len(prompts)
+        return prompts
+
+    async def extract(self, documents: Iterable[Tuple[str, str, List[Entity]]]) -> AsyncIterator[RelationResult]:
+        """
+        Find the relations of a stream of (doc_id, text, entities) documents.
+
+        Yields:
+            One RelationResult per document, in completion order.
+        """
+        packed: Dict[int, RelationPrompt] = {}
+        ready: Deque[RelationResult] = deque()
+        # doc_id -> [result, prompts outstanding]
+        pending: Dict[str, list] = {}
+
+        def prompts():
+            index = 0
+            for doc_id, text, entities in documents:
+                document_prompts = self.prompts_for(doc_id, text, entities)
+                if not document_prompts:
+                    ready.append(RelationResult(doc_id))
+                    continue
+                pending[doc_id] = [RelationResult(doc_id), len(document_prompts)]
+                for prompt in document_prompts:
+                    packed[index] = prompt
+                    index += 1
+                    yield prompt.text
+
+        async for index, response in self.client.map(prompts()):
+            prompt = packed.pop(index)
+            waiting = pending[prompt.doc_id]
+            result = waiting[0]
+            error = response.error
+            if error is None:
+                try:
+                    result.relations.extend(parse_relations(response.text, prompt, self.signatures))
+                except (ValueError, AttributeError) as e:
+                    error = f"Unparseable relation answer: {e}"
+            if error is not None:
+                logger.warning(f"Relation extraction failed for {prompt.doc_id}: {error}")
+                result.error = result.error or error
+            waiting[1] -= 1
+            if not waiting[1]:
+                del pending[prompt.doc_id]
+                yield result
+            while ready:
+                yield ready.popleft()
+        while ready:
+            yield ready.popleft()
+
+__all__ = [
+    'CandidatePair',
+    'RELATION_DESCRIPTIONS',
+    'Relation',
+    'RelationExtractor',
+    'RelationPrompt',
+    'RelationResult',
+    'SentenceIndex',
+    'allowed_relations',
+    'candidate_pairs',
+    'group_pairs',
+    'parse_relations',
+    'relation_signatures',
+]
@@ -2,17 +2,32 @@
 AIM2 Ontology Module
 
 This module contains the core ontology definitions and management for the AIM2 system.
+
+Importing this package is cheap: Owlready2 is only imported, and the ontology
+only built, when one of the exported names is first accessed.
 """
+import importlib
 
-# Import the main classes and functions
-from .manager import AIM2Ontology
+# Map each exported name to the submodule that defines it
+_LAZY_EXPORTS = {
+    'AIM2Ontology': '.manager',
+    'onto': '.schema',
+    'init_ontology': '.schema',
+}
 
-# Initialize the ontology and export commonly used classes and properties
-from .schema import init_ontology, onto
+def __getattr__(name):
+    """Import the submodule providing ``name`` on first access."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    if name != 'onto':
+        # Cache plain imports; 'onto' is resolved by schema's own accessor
+        globals()[name] = value
+    return value
 
-# Initialize the ontology if not already done
-if onto is None:
-    onto = init_ontology()
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_EXPORTS.keys()))
 
 # Export commonly used classes and properties
 __all__ = [
@@ -0,0 +1,261 @@
+"""
+Import cache for external ontologies.
+
+Parsing large sources such as GO or PO dominates the ontology build. The
+OntologyCache stores each imported ontology under ``ontology.cache_dir`` as a
+compressed, pickled TripleSet that can be inserted into a world without any
+XML parsing. Entries are keyed by IRI and content hash, and carry the
+ETag/Last-Modified validators of the source so that an unchanged source is
+neither downloaded nor parsed again.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import zlib
+from dataclasses import asdict, dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from .triples import TripleSet, parse_triples
+
+logger = logging.getLogger(__name__)
+
+# Used when the configuration does not define ontology.cache_max_size_mb
+DEFAULT_MAX_SIZE_MB = 2048
+
+# Name of the SQLite index inside the cache directory
+INDEX_FILENAME = "import_cache.sqlite3"
+
+@dataclass
+class CacheStats:
+    """Counters describing how the cache has been used by this process."""
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    evictions: int = 0
+    bytes_fetched: int = 0
+    parse_seconds: float = 0.0
+    load_seconds: float = 0.0
+
+    def add(self, other: "CacheStats") -> None:
+        """Add the counters of another CacheStats, e.g. from a worker process."""
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class OntologyCache:
+    """
+    Size-bounded LRU cache of parsed ontologies, keyed by IRI and content hash.
+
+    A lookup first revalidates the source: ``file://`` IRIs and local paths are
+    compared by modification time and size, HTTP IRIs with a conditional
+    request. If the source is unchanged, or its content hash matches the cached
+    entry, the cached triples are returned without parsing. If the source
+    cannot be reached, a cached entry is used as is.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the index and the cached entries.
+            max_size_mb: Total size of the cached entries before the least
+                        recently used ones are evicted.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.stats = CacheStats()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_config(cls, settings: Dict) -> Optional["OntologyCache"]:
+        """
+        Create a cache from the 'ontology' config section.
+
+        Returns:
+            The cache, or None if ontology.cache_enabled is false.
+        """
+        if not settings.get("cache_enabled", False):
+            return None
+        return cls(settings.get("cache_dir") or ".cache/ontologies",
+                   settings.get("cache_max_size_mb", DEFAULT_MAX_SIZE_MB))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index, creating the cache directory on first use."""
+        if self._db is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.cache_dir / INDEX_FILENAME), timeout=30,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " iri TEXT PRIMARY KEY, content_hash TEXT NOT NULL,"
+                " etag TEXT, last_modified TEXT, filename TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def close(self) -> None:
+        """Close the index connection."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _lookup(self, iri: str) -> Optional[Dict]:
+        """Return the index entry for an IRI if its file is still present."""
+        row = self._connect().execute(
+            "SELECT content_hash, etag, last_modified, filename FROM entries WHERE iri=?", (iri,)
+        ).fetchone()
+        if row is None or not (self.cache_dir / row[3]).exists():
+            return None
+        return {"content_hash": row[0], "etag": row[1], "last_modified": row[2], "filename": row[3]}
+
+    def _fetch(self, iri: str, entry: Optional[Dict]) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """
+        Fetch the source unless it is known to be unchanged.
+
+        Returns:
+            (content, etag, last_modified); content is None when the cached
+            entry is still valid.
+        """
+        parsed = urlparse(iri)
+        if parsed.scheme in ("http", "https"):
+            request = urllib.request.Request(iri)
+            if entry and entry["etag"]:
+                request.add_header("If-None-Match", entry["etag"])
+            if entry and entry["last_modified"]:
+                request.add_header("If-Modified-Since", entry["last_modified"])
+            try:
+                with urllib.request.urlopen(request) as response:
+                    content = response.read()
+                    return content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and entry:
+                    return None, entry["etag"], entry["last_modified"]
+                raise
+
+        path = Path(url2pathname(parsed.path)) if parsed.scheme == "file" else Path(iri)
+        stat = path.stat()
+        etag = f"{stat.st_mtime_ns}-{stat.st_size}"
+        if entry and entry["etag"] == etag:
+            return None, etag, entry["last_modified"]
+        return path.read_bytes(), etag, formatdate(stat.st_mtime, usegmt=True)
+
+    def _read_entry(self, iri: str, entry: Dict) -> TripleSet:
+        """Load the triples of a cached entry and mark it as recently used."""
+        start = time.perf_counter()
+        with open(self.cache_dir / entry["filename"], "rb") as f:
+            triples = pickle.loads(zlib.decompress(f.read()))
+        db = self._connect()
+        db.execute("UPDATE entries SET last_access=? WHERE iri=?", (time.time(), iri))
+        db.commit()
+        self.stats.hits += 1
+        self.stats.load_seconds += time.perf_counter() - start
+        return triples
+
+    def _write_entry(self, iri: str, content_hash: str, etag: Optional[str],
+                     last_modified: Optional[str], triples: TripleSet) -> None:
+        """Store the triples of a source and evict old entries if needed."""
+        key = hashlib.sha256(f"{iri}\n{content_hash}".encode("utf-8")).hexdigest()
+        filename = f"{key}.triples"
+        data = zlib.compress(pickle.dumps(triples, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+        # Write through a temporary file so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.cache_dir / filename)
+
+        db = self._connect()
+        old = db.execute("SELECT filename FROM entries WHERE iri=?", (iri,)).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (iri, content_hash, etag, last_modified, filename, len(data), time.time()),
+        )
+        db.commit()
+        if old and old[0] != filename:
+            (self.cache_dir / old[0]).unlink(missing_ok=True)
+        self._evict(keep=iri)
+
+    def _update_validators(self, iri: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        db = self._connect()
+        db.execute("UPDATE entries SET etag=?, last_modified=? WHERE iri=?", (etag, last_modified, iri))
+        db.commit()
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used entries until the cache fits its budget."""
+        db = self._connect()
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        rows = db.execute(
+            "SELECT iri, filename, size FROM entries WHERE iri != ? ORDER BY last_access", (keep,)
+        ).fetchall()
+        for iri, filename, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            db.execute("DELETE FROM entries WHERE iri=?", (iri,))
+            (self.cache_dir / filename).unlink(missing_ok=True)
+            total -= size
+            self.stats.evictions += 1
+            logger.info(f"Evicted cached ontology {iri}")
+        db.commit()
+
+    def get(self, iri: str) -> TripleSet:
+        """
+        Return the triples of an ontology, from the cache when possible.
+
+        Args:
+            iri: IRI of the ontology, a file:// IRI or a local path.
+
+        Returns:
+            The ontology's triples.
+        """
+        entry = self._lookup(iri)
+        try:
+            content, etag, last_modified = self._fetch(iri, entry)
+        except (OSError, urllib.error.URLError) as e:
+            if entry is None:
+                raise
+            logger.warning(f"Could not revalidate {iri} ({e}); using cached copy")
+            return self._read_entry(iri, entry)
+
+        if content is None:
+            self.stats.revalidations += 1
+            return self._read_entry(iri, entry)
+
+        self.stats.bytes_fetched += len(content)
+        content_hash = hashlib.sha256(content).hexdigest()
+        if entry and entry["content_hash"] == content_hash:
+            self._update_validators(iri, etag, last_modified)
+            return self._read_entry(iri, entry)
+
+        self.stats.misses += 1
+        logger.info(f"Parsing ontology {iri} for the import cache")
+        triples = parse_triples(content, iri)
+        self.stats.parse_seconds += triples.parse_seconds
+        self._write_entry(iri, content_hash, etag, last_modified, triples)
+        return triples
+
+    def metrics(self) -> Dict[str, float]:
+        """Return the cache counters and hit rate as a flat dictionary."""
+        metrics = asdict(self.stats)
+        metrics["hit_rate"] = self.stats.hit_rate
+        return metrics
+
+__all__ = ['OntologyCache', 'CacheStats']
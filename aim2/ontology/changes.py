@@ -0,0 +1,82 @@
+"""
+Change tracking for the relation triples of a world.
+
+The closure index and the incremental reasoner read new relation triples
+past a rowid watermark, which cannot see triples that were removed, nor rows
+added under a rowid SQLite reused after deleting the last row. Two tools
+cover that without scanning the relations on every call:
+
+- objs_removals() counts the rows deleted from or updated in the ``objs``
+  table through the world's connection, with a temporary trigger. Reading it
+  is a single-row lookup; as long as it does not move, the watermark read is
+  complete.
+- edge_state() counts and checksums the triples of each property. It scans
+  every relation triple, so it is only compared, against the state
+  accumulated with add_to_state() from the rows read, once the removal
+  counter moved (or on request, e.g. when another process may have written).
+"""
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+# Per-property (count, checksum) of the relation triples
+EdgeState = Dict[int, Tuple[int, int]]
+
+# Terms of the row checksum; small enough that SQLite's SUM cannot overflow
+_CHECKSUM_SQL = "((s % 1000003) * 1000033 + (p % 1009) * 7919 + o) % 1000000007"
+
+_COUNTER_SCHEMA = (
+    "CREATE TEMP TABLE IF NOT EXISTS aim2_objs_removals (n INTEGER NOT NULL)",
+    "INSERT INTO aim2_objs_removals SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM aim2_objs_removals)",
+    "CREATE TEMP TRIGGER IF NOT EXISTS aim2_objs_deleted AFTER DELETE ON main.objs"
+    " BEGIN UPDATE aim2_objs_removals SET n=n+1; END",
+    "CREATE TEMP TRIGGER IF NOT EXISTS aim2_objs_updated AFTER UPDATE ON main.objs"
+    " BEGIN UPDATE aim2_objs_removals SET n=n+1; END",
+)
+
+def add_to_state(state: EdgeState, s: int, p: int, o: int) -> None:
+    """Account for one (s, p, o) triple in a state, as edge_state() does in SQL."""
+    count, checksum = state.get(p, (0, 0))
+    state[p] = (count + 1, checksum + ((s % 1000003) * 1000033 + (p % 1009) * 7919 + o) % 1000000007)
+
+def edge_state(graph, props: List[int], exclude_c: Optional[int] = None) -> EdgeState:
+    """
+    Count and checksum the triples of each property between named entities.
+
+    Args:
+        graph: The world's quadstore (world.graph).
+        props: Storids of the properties.
+        exclude_c: Ontology (graph.c) whose triples are left out.
+    """
+    placeholders = ",".join("?" * len(props))
+    query = (f"SELECT p, COUNT(*), SUM({_CHECKSUM_SQL}) FROM objs "
+             f"WHERE s > 0 AND o > 0 AND p IN ({placeholders})")
+    args = list(props)
+    if exclude_c is not None:
+        query += " AND c != ?"
+        args.append(exclude_c)
+    state: EdgeState = {}
+    for p, count, checksum in graph.execute(query + " GROUP BY p", args):
+        state[p] = (count, checksum)
+    return state
+
+def objs_removals(world) -> int:
+    """
+    Number of object triples deleted or updated through the world's connection.
+
+    The counter starts at 0 when first read and only covers this process;
+    writes of other processes sharing a quadstore are not counted.
+    """
+    db = world.graph.db
+    row = None
+    try:
+        row = db.execute("SELECT n FROM aim2_objs_removals").fetchone()
+    except sqlite3.OperationalError:
+        # Not installed on this connection yet
+        pass
+    if row is None:
+        for statement in _COUNTER_SCHEMA:
+            db.execute(statement)
+        row = db.execute("SELECT n FROM aim2_objs_removals").fetchone()
+    return row[0]
+
+__all__ = ['EdgeState', 'add_to_state', 'edge_state', 'objs_removals']
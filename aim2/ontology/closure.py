@@ -0,0 +1,434 @@
+"""
+Materialized transitive-closure index over the AIM2 hierarchy relations.
+
+Queries such as "everything located in any part of the root" otherwise walk
+Owlready2 objects recursively. ClosureIndex precomputes reachability for
+``part_of`` (with its inverse ``has_part``), ``located_in`` (with
+``has_location``) and the ``affects`` hierarchy (``affects`` and all its
+sub-properties) using interval labels:
+
+- every node gets a number in DFS postorder over a spanning forest, so the
+  nodes below a node in the tree form one contiguous range;
+- every node stores the merged ranges of all nodes below it, including the
+  ones reached through non-tree edges.
+
+``x`` is below ``a`` if the number of ``x`` falls in one of the ranges of
+``a``: a bisect over what is a single range for tree-shaped hierarchies.
+Enumerating a subtree is a slice of the postorder array per range.
+
+New relation triples are merged incrementally (tracked by SQLite rowid, as in
+the incremental reasoner). Once triples were deleted (see aim2.ontology.changes),
+a count and checksum of the triples of each property tell whether relations
+were removed, or added under a reused rowid; the index is then rebuilt, as it
+is when ranges become too fragmented. It can be saved next to the
+ontology file and reloaded without a rebuild.
+"""
+import bisect
+import logging
+import os
+import pickle
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .changes import EdgeState, add_to_state, edge_state, objs_removals
+
+logger = logging.getLogger(__name__)
+
+# Relation name -> (forward properties, inverse properties)
+RELATIONS = {
+    "part_of": (("part_of",), ("has_part",)),
+    "located_in": (("located_in",), ("has_location",)),
+    "affects": (("affects",), ()),
+}
+
+# Rebuild from scratch once nodes hold this many ranges on average
+MAX_RANGES_PER_NODE = 4
+
+# Bump when the persisted layout changes
+INDEX_VERSION = 1
+
+def closure_path(owl_path: Union[str, Path]) -> Path:
+    """Return where the closure index of an ontology file is persisted."""
+    owl_path = Path(owl_path)
+    return owl_path.with_name(owl_path.name + ".closure")
+
+def file_fingerprint(path: Union[str, Path]) -> Tuple[int, int]:
+    """Size and modification time of a file, to detect a stale index."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _merge_ranges(a: array, b: array) -> array:
+    """Union of two sorted flat range arrays [lo0, hi0, lo1, hi1, ...]."""
+    pairs = []
+    for ranges in (a, b):
+        for i in range(0, len(ranges), 2):
+            pairs.append((ranges[i], ranges[i + 1]))
+    pairs.sort()
+    merged = array("i")
+    for lo, hi in pairs:
+        if merged and lo <= merged[-1] + 1:
+            if hi > merged[-1]:
+                merged[-1] = hi
+        else:
+            merged.append(lo)
+            merged.append(hi)
+    return merged
+
+class _RelationIndex:
+    """Interval-labelled reachability for one relation."""
+
+    def __init__(self):
+        self.post: Dict[int, int] = {}          # storid -> postorder number
+        self.order = array("q")                 # postorder number -> storid
+        self.parents: Dict[int, List[int]] = {}  # postorder number -> parents
+        self.ranges: List[array] = []           # postorder number -> flat ranges
+        self.n_ranges = 0
+
+    def build(self, edges: Iterable[Tuple[int, int]]) -> None:
+        """Build the index from (child, parent) storid pairs."""
+        children: Dict[int, List[int]] = {}
+        parents: Dict[int, List[int]] = {}
+        nodes: Dict[int, None] = {}
+        for child, parent in edges:
+            if child == parent:
+                continue
+            children.setdefault(parent, []).append(child)
+            parents.setdefault(child, []).append(parent)
+            nodes[child] = None
+            nodes[parent] = None
+
+        self.post = {}
+        self.order = array("q")
+        low: List[int] = []
+        # Start from the roots; a second sweep covers nodes only on cycles
+        starts = []
+        for node in nodes:
+            if node not in parents:
+                starts.append(node)
+        starts.extend(nodes.keys())
+        visiting: Set[int] = set()
+        for start in starts:
+            if start in self.post or start in visiting:
+                continue
+            stack = [(start, iter(children.get(start, ())), len(self.order))]
+            visiting.add(start)
+            while stack:
+                node, child_iter, entry = stack[-1]
+                child = next(child_iter, None)
+                if child is None:
+                    stack.pop()
+                    visiting.discard(node)
+                    self.post[node] = len(self.order)
+                    self.order.append(node)
+                    low.append(entry)
+                elif child in visiting:
+                    logger.warning(f"Cycle through storid {child}; reachability may be incomplete")
+                elif child not in self.post:
+                    visiting.add(child)
+                    stack.append((child, iter(children.get(child, ())), len(self.order)))
+
+        # Children are numbered before their parents, so one pass suffices
+        self.parents = {}
+        self.ranges = []
+        self.n_ranges = 0
+        for number, node in enumerate(self.order):
+            ranges = array("i", (low[number], number))
+            for child in children.get(node, ()):
+                # A child numbered later is only reachable through a cycle
+                if self.post[child] < number:
+                    ranges = _merge_ranges(ranges, self.ranges[self.post[child]])
+            self.ranges.append(ranges)
+            self.n_ranges += len(ranges) // 2
+            node_parents = []
+            for parent in parents.get(node, ()):
+                node_parents.append(self.post[parent])
+            self.parents[number] = node_parents
+
+    def _number(self, storid: int) -> int:
+        """Return the number of a node, appending it if new."""
+        number = self.post.get(storid)
+        if number is None:
+            number = len(self.order)
+            self.post[storid] = number
+            self.order.append(storid)
+            self.ranges.append(array("i", (number, number)))
+            self.parents[number] = []
+            self.n_ranges += 1
+        return number
+
+    def _contains(self, ancestor: int, number: int) -> bool:
+        ranges = self.ranges[ancestor]
+        i = bisect.bisect_right(ranges, number)
+        # An odd position means number lies inside a [lo, hi] pair
+        return i % 2 == 1 or (i > 0 and ranges[i - 1] == number)
+
+    def ancestor_numbers(self, number: int) -> Set[int]:
+        """All numbers above a node, following parent links."""
+        seen: Set[int] = set()
+        stack = list(self.parents.get(number, ()))
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.parents.get(current, ()))
+        return seen
+
+    def add_edge(self, child: int, parent: int) -> None:
+        """Merge one new (child, parent) storid pair into the index."""
+        if child == parent:
+            return
+        c = self._number(child)
+        p = self._number(parent)
+        if p in self.parents[c]:
+            return
+        self.parents[c].append(p)
+        if _ranges_cover(self.ranges[p], self.ranges[c]):
+            # Already reachable through another path: only the parent link is new
+            return
+        targets = self.ancestor_numbers(p)
+        targets.add(p)
+        for number in targets:
+            before = len(self.ranges[number]) // 2
+            self.ranges[number] = _merge_ranges(self.ranges[number], self.ranges[c])
+            self.n_ranges += len(self.ranges[number]) // 2 - before
+
+    def is_below(self, storid: int, ancestor: int) -> bool:
+        number = self.post.get(storid)
+        top = self.post.get(ancestor)
+        if number is None or top is None or number == top:
+            return False
+        return self._contains(top, number)
+
+    def below(self, storid: int) -> List[int]:
+        top = self.post.get(storid)
+        if top is None:
+            return []
+        ranges = self.ranges[top]
+        result = []
+        for i in range(0, len(ranges), 2):
+            for node in self.order[ranges[i]:ranges[i + 1] + 1]:
+                if node != storid:
+                    result.append(node)
+        return result
+
+    def fragmented(self) -> bool:
+        return bool(self.order) and self.n_ranges > MAX_RANGES_PER_NODE * len(self.order)
+
+def _ranges_cover(outer: array, inner: array) -> bool:
+    """Check whether every range of inner lies within outer."""
+    return _merge_ranges(outer, inner) == outer
+
+class ClosureIndex:
+    """
+    Transitive-closure index for the part_of, located_in and affects relations.
+
+    Example:
+        index = ClosureIndex(onto)
+        parts = index.descendants("part_of", root) + [root.storid]
+        located = set()
+        for part in parts:
+            located.update(index.descendants("located_in", part))
+    """
+
+    def __init__(self, onto):
+        """
+        Initialize an empty index for the relations of the AIM2 schema.
+
+        Args:
+            onto: The AIM2 ontology (namespace) defining the properties.
+        """
+        self.world = onto.world
+        self._forward: Dict[int, str] = {}
+        self._inverse: Dict[int, str] = {}
+        for name, (forward, inverse) in RELATIONS.items():
+            for prop_name in forward:
+                prop = getattr(onto, prop_name)
+                self._forward[prop.storid] = name
+                for child in prop.descendants():
+                    self._forward[child.storid] = name
+            for prop_name in inverse:
+                self._inverse[getattr(onto, prop_name).storid] = name
+        self.relations: Dict[str, _RelationIndex] = {}
+        self._watermark = 0
+        self._state: EdgeState = {}
+        self._removals = 0
+        self._built = False
+
+    def _props(self) -> List[int]:
+        return list(self._forward.keys()) + list(self._inverse.keys())
+
+    def _read_edges(self, after: int) -> Tuple[Dict[str, List[Tuple[int, int]]], int]:
+        """Read (child, parent) pairs per relation from rows after a rowid, into the state."""
+        props = self._props()
+        placeholders = ",".join("?" * len(props))
+        rows = self.world.graph.execute(
+            f"SELECT rowid, s, p, o FROM objs WHERE rowid > ? AND p IN ({placeholders})",
+            [after] + props,
+        ).fetchall()
+        edges: Dict[str, List[Tuple[int, int]]] = {}
+        for name in RELATIONS:
+            edges[name] = []
+        watermark = after
+        for rowid, s, p, o in rows:
+            watermark = max(watermark, rowid)
+            if s < 0 or o < 0:
+                continue
+            add_to_state(self._state, s, p, o)
+            if p in self._forward:
+                edges[self._forward[p]].append((s, o))
+            else:
+                edges[self._inverse[p]].append((o, s))
+        return edges, watermark
+
+    def rebuild(self) -> None:
+        """Build the whole index from the current triples."""
+        start = time.perf_counter()
+        self._state = {}
+        self._removals = objs_removals(self.world)
+        edges, self._watermark = self._read_edges(0)
+        for name, pairs in edges.items():
+            index = _RelationIndex()
+            index.build(pairs)
+            self.relations[name] = index
+        self._built = True
+        logger.info(f"Built closure index in {time.perf_counter() - start:.3f}s")
+
+    def update(self, check_removals: bool = False) -> int:
+        """
+        Merge the relation triples added since the last update.
+
+        If triples were deleted since then, the relation triples are counted
+        and checksummed, and the index is rebuilt when relations were removed
+        or replaced. Otherwise only the new rows are read.
+
+        Args:
+            check_removals: Count and checksum the relations even if this
+                           process deleted nothing, e.g. when another process
+                           writes to the same quadstore.
+
+        Returns:
+            The number of new edges merged.
+        """
+        if not self._built:
+            self.rebuild()
+            return 0
+        removals = objs_removals(self.world)
+        edges, self._watermark = self._read_edges(self._watermark)
+        if check_removals or removals != self._removals:
+            self._removals = removals
+            if edge_state(self.world.graph, self._props()) != self._state:
+                logger.info("Relation triples were removed or replaced; rebuilding closure index")
+                self.rebuild()
+                return 0
+        count = 0
+        for name, pairs in edges.items():
+            index = self.relations[name]
+            for child, parent in pairs:
+                index.add_edge(child, parent)
+                count += 1
+            if index.fragmented():
+                logger.info(f"Closure index for {name} is fragmented; rebuilding")
+                self.rebuild()
+                break
+        return count
+
+    def _storid(self, node) -> int:
+        return node if isinstance(node, int) else node.storid
+
+    def is_ancestor(self, relation: str, ancestor, node) -> bool:
+        """
+        Check whether node reaches ancestor through the relation.
+
+        For part_of, ``is_ancestor("part_of", shoot, leaf)`` is True when the
+        leaf is (transitively) part of the shoot.
+        """
+        return self.relations[relation].is_below(self._storid(node), self._storid(ancestor))
+
+    def descendants(self, relation: str, node) -> List[int]:
+        """Return the storids of every node that reaches node through the relation."""
+        return self.relations[relation].below(self._storid(node))
+
+    def ancestors(self, relation: str, node) -> List[int]:
+        """Return the storids of every node reached from node through the relation."""
+        index = self.relations[relation]
+        number = index.post.get(self._storid(node))
+        if number is None:
+            return []
+        result = []
+        for ancestor in index.ancestor_numbers(number):
+            result.append(index.order[ancestor])
+        return result
+
+    def save(self, path: Union[str, Path], fingerprint: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Persist the index, keyed by IRIs so it survives reloading the ontology.
+
+        Args:
+            path: Destination file, usually closure_path(owl_path).
+            fingerprint: file_fingerprint() of the ontology file the index
+                        belongs to.
+        """
+        iris = dict(self.world.graph.execute("SELECT storid, iri FROM resources"))
+        relations = {}
+        for name, index in self.relations.items():
+            nodes = []
+            for storid in index.order:
+                nodes.append(iris[storid])
+            edges = array("i")
+            ranges = array("i")
+            offsets = array("i", (0,))
+            for number in range(len(index.order)):
+                for parent in index.parents[number]:
+                    edges.append(number)
+                    edges.append(parent)
+                ranges.extend(index.ranges[number])
+                offsets.append(len(ranges))
+            relations[name] = {"nodes": nodes, "edges": edges, "ranges": ranges, "offsets": offsets}
+        data = {"version": INDEX_VERSION, "fingerprint": fingerprint, "relations": relations}
+        Path(path).write_bytes(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1))
+
+    def load(self, path: Union[str, Path], fingerprint: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Load a persisted index if it matches the ontology file.
+
+        Returns:
+            True if the index was loaded; False if it is missing, stale or
+            refers to entities that are not in the world.
+        """
+        path = Path(path)
+        if not path.exists():
+            return False
+        data = pickle.loads(zlib.decompress(path.read_bytes()))
+        if data.get("version") != INDEX_VERSION or data.get("fingerprint") != fingerprint:
+            return False
+
+        relations = {}
+        for name, stored in data["relations"].items():
+            index = _RelationIndex()
+            for iri in stored["nodes"]:
+                storid = self.world.graph._abbreviate(iri, False)
+                if storid is None:
+                    return False
+                index.post[storid] = len(index.order)
+                index.order.append(storid)
+                index.parents[len(index.order) - 1] = []
+            offsets = stored["offsets"]
+            for number in range(len(index.order)):
+                index.ranges.append(stored["ranges"][offsets[number]:offsets[number + 1]])
+            index.n_ranges = len(stored["ranges"]) // 2
+            edges = stored["edges"]
+            for i in range(0, len(edges), 2):
+                index.parents[edges[i]].append(edges[i + 1])
+            relations[name] = index
+
+        self.relations = relations
+        self._watermark = self.world.graph.execute("SELECT MAX(rowid) FROM objs").fetchone()[0] or 0
+        self._state = edge_state(self.world.graph, self._props())
+        self._removals = objs_removals(self.world)
+        self._built = True
+        return True
+
+__all__ = ['ClosureIndex', 'RELATIONS', 'closure_path', 'file_fingerprint']
@@ -0,0 +1,306 @@
+"""
+Export formats for the AIM2 ontology.
+
+RDF/XML is what other OWL tools expect, but it is the slowest format to write
+and to parse. This module adds:
+
+- ``ntriples``: one line per triple, streamed from the quadstore tables in
+  chunks rather than built as a document;
+- ``columns``: a compact columnar dump of the class hierarchy, labels and
+  synonyms (integer arrays indexing one list of IRIs), which load_columns()
+  reads back without Owlready2;
+- gzip compression of any format, chosen by a ``.gz`` suffix.
+
+export_ontology() always writes to a temporary file in the destination
+directory and renames it into place, so readers never see a partial export.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from owlready2 import label
+from owlready2.base import owl_class, rdf_type, rdfs_subclassof
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("rdfxml", "ntriples", "columns")
+
+# Format used for each file suffix (after removing .gz)
+SUFFIX_FORMATS = {
+    ".owl": "rdfxml",
+    ".rdf": "rdfxml",
+    ".xml": "rdfxml",
+    ".nt": "ntriples",
+    ".cols": "columns",
+}
+
+# Favour speed: exports are rewritten far more often than they are shipped
+GZIP_LEVEL = 6
+
+# Bump when the columnar layout changes
+COLUMNS_VERSION = 1
+
+# Rows fetched and written per round when streaming N-Triples
+_FETCH_SIZE = 50000
+
+OBO_IN_OWL = "http://www.geneontology.org/formats/oboInOwl#"
+
+# Synonym properties, in the order of their scope codes
+SYNONYM_SCOPES = ("hasExactSynonym", "hasRelatedSynonym", "hasBroadSynonym", "hasNarrowSynonym")
+
+@dataclass
+class OntologyColumns:
+    """
+    Class hierarchy, labels and synonyms of an ontology as parallel columns.
+
+    Every ``*_class`` / ``subclass_*`` column holds indexes into ``classes``;
+    ``synonym_scope`` indexes SYNONYM_SCOPES.
+    """
+    base_iri: str
+    classes: List[str] = field(default_factory=list)
+    subclass_child: array = field(default_factory=lambda: array("i"))
+    subclass_parent: array = field(default_factory=lambda: array("i"))
+    label_class: array = field(default_factory=lambda: array("i"))
+    label_text: List[str] = field(default_factory=list)
+    synonym_class: array = field(default_factory=lambda: array("i"))
+    synonym_scope: array = field(default_factory=lambda: array("b"))
+    synonym_text: List[str] = field(default_factory=list)
+
+    def _index(self) -> Dict[str, int]:
+        index = self.__dict__.get("_iri_index")
+        if index is None:
+            index = {}
+            for number, iri in enumerate(self.classes):
+                index[iri] = number
+            self.__dict__["_iri_index"] = index
+        return index
+
+    def parents(self, iri: str) -> List[str]:
+        """Return the IRIs of the direct named superclasses of a class."""
+        number = self._index().get(iri)
+        result = []
+        for child, parent in zip(self.subclass_child, self.subclass_parent):
+            if child == number:
+                result.append(self.classes[parent])
+        return result
+
+    def labels(self, iri: str) -> List[str]:
+        """Return the labels of a class."""
+        number = self._index().get(iri)
+        result = []
+        for cls, text in zip(self.label_class, self.label_text):
+            if cls == number:
+                result.append(text)
+        return result
+
+    def synonyms(self, iri: str) -> List[Tuple[str, str]]:
+        """Return the (scope, text) synonyms of a class."""
+        number = self._index().get(iri)
+        result = []
+        for cls, scope, text in zip(self.synonym_class, self.synonym_scope, self.synonym_text):
+            if cls == number:
+                result.append((SYNONYM_SCOPES[scope], text))
+        return result
+
+def export_format(path: Union[str, Path]) -> Tuple[str, bool]:
+    """
+    Guess the export format and compression from a file name.
+
+    Returns:
+        The format name and whether the file is gzip-compressed; unknown
+        suffixes default to RDF/XML.
+    """
+    path = Path(path)
+    compress = path.suffix == ".gz"
+    if compress:
+        path = path.with_suffix("")
+    return SUFFIX_FORMATS.get(path.suffix, "rdfxml"), compress
+
+def ontology_state(onto) -> str:
+    """
+    Digest of the triples of an ontology, to tell whether it changed.
+
+    Row ids are no marker of change: SQLite reuses the largest rowid once
+    that row is deleted, so replacing a value (e.g. relabelling an entity)
+    can leave both the largest rowid and the number of triples as they
+    were. The digest covers the content of every object and data triple of
+    the ontology instead; a changed row order only costs an extra save.
+    """
+    onto = onto.ontology
+    graph = onto.world.graph
+    c = onto.graph.c
+    digest = hashlib.sha256()
+    for query in ("SELECT s, p, o FROM objs WHERE c=?", "SELECT s, p, o, d FROM datas WHERE c=?"):
+        cursor = graph.execute(query, (c,))
+        while True:
+            rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                break
+            digest.update(repr(rows).encode("utf-8"))
+        digest.update(b"|")
+    return digest.hexdigest()
+
+def _escape(text: str) -> str:
+    """Escape a string literal for N-Triples."""
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+
+def _term(storid: int, iris: Dict[int, str]) -> str:
+    if storid < 0:
+        return f"_:b{-storid}"
+    return f"<{iris[storid]}>"
+
+def write_ntriples(onto, f) -> int:
+    """
+    Stream the triples of an ontology to a binary file as N-Triples.
+
+    Returns:
+        The number of triples written.
+    """
+    onto = onto.ontology
+    graph = onto.world.graph
+    c = onto.graph.c
+    iris = dict(graph.execute("SELECT storid, iri FROM resources"))
+    count = 0
+
+    cursor = graph.execute("SELECT s, p, o FROM objs WHERE c=?", (c,))
+    while True:
+        rows = cursor.fetchmany(_FETCH_SIZE)
+        if not rows:
+            break
+        lines = []
+        for s, p, o in rows:
+            lines.append(f"{_term(s, iris)} <{iris[p]}> {_term(o, iris)} .\n")
+        f.write("".join(lines).encode("utf-8"))
+        count += len(rows)
+
+    cursor = graph.execute("SELECT s, p, o, d FROM datas WHERE c=?", (c,))
+    while True:
+        rows = cursor.fetchmany(_FETCH_SIZE)
+        if not rows:
+            break
+        lines = []
+        for s, p, o, d in rows:
+            literal = f'"{_escape(str(o))}"'
+            if isinstance(d, str) and d.startswith("@"):
+                literal += d
+            elif d:
+                literal += f"^^<{iris[d]}>"
+            lines.append(f"{_term(s, iris)} <{iris[p]}> {literal} .\n")
+        f.write("".join(lines).encode("utf-8"))
+        count += len(rows)
+    return count
+
+def dump_columns(onto) -> OntologyColumns:
+    """Collect the class hierarchy, labels and synonyms of an ontology."""
+    onto = onto.ontology
+    graph = onto.world.graph
+    c = onto.graph.c
+    columns = OntologyColumns(base_iri=onto.base_iri)
+    numbers: Dict[int, int] = {}
+    iris = dict(graph.execute("SELECT storid, iri FROM resources"))
+
+    def number(storid: int) -> int:
+        result = numbers.get(storid)
+        if result is None:
+            result = numbers[storid] = len(columns.classes)
+            columns.classes.append(iris[storid])
+        return result
+
+    for (s,) in graph.execute("SELECT s FROM objs WHERE c=? AND p=? AND o=? AND s>0",
+                              (c, rdf_type, owl_class)):
+        number(s)
+    for s, o in graph.execute("SELECT s, o FROM objs WHERE c=? AND p=? AND s>0 AND o>0",
+                              (c, rdfs_subclassof)):
+        columns.subclass_child.append(number(s))
+        columns.subclass_parent.append(number(o))
+    for s, o in graph.execute("SELECT s, o FROM datas WHERE c=? AND p=? AND s>0", (c, label.storid)):
+        if s in numbers:
+            columns.label_class.append(numbers[s])
+            columns.label_text.append(str(o))
+    for scope, name in enumerate(SYNONYM_SCOPES):
+        p = graph._abbreviate(OBO_IN_OWL + name, False)
+        if p is None:
+            continue
+        for s, o in graph.execute("SELECT s, o FROM datas WHERE c=? AND p=? AND s>0", (c, p)):
+            if s in numbers:
+                columns.synonym_class.append(numbers[s])
+                columns.synonym_scope.append(scope)
+                columns.synonym_text.append(str(o))
+    return columns
+
+def load_columns(path: Union[str, Path]) -> OntologyColumns:
+    """Read a columnar dump written by export_ontology()."""
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        data = pickle.loads(zlib.decompress(f.read()))
+    if data.get("version") != COLUMNS_VERSION:
+        raise ValueError(f"Unsupported columnar dump version in {path}: {data.get('version')}")
+    return data["columns"]
+
+def _write(onto, f, format: str) -> None:
+    if format == "rdfxml":
+        onto.save(file=f, format="rdfxml")
+    elif format == "ntriples":
+        write_ntriples(onto, f)
+    else:
+        data = {"version": COLUMNS_VERSION, "columns": dump_columns(onto)}
+        f.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1))
+
+def export_ontology(onto, path: Union[str, Path], format: Optional[str] = None,
+                    compress: Optional[bool] = None) -> Path:
+    """
+    Write an ontology atomically in one of EXPORT_FORMATS.
+
+    Args:
+        onto: The ontology (or namespace) to export.
+        path: Destination file.
+        format: Export format. Defaults to the one implied by the suffix.
+        compress: Gzip the output. Defaults to whether the suffix is .gz.
+
+    Returns:
+        The destination path.
+    """
+    path = Path(path)
+    guessed_format, guessed_compress = export_format(path)
+    format = format or guessed_format
+    compress = guessed_compress if compress is None else compress
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}', expected one of {EXPORT_FORMATS}")
+
+    start = time.perf_counter()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if compress:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as f:
+                    _write(onto, f, format)
+            else:
+                _write(onto, raw, format)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    logger.debug(f"Exported {format}{' (gzip)' if compress else ''} to {path} "
+                 f"in {time.perf_counter() - start:.2f}s")
+    return path
+
+__all__ = [
+    'EXPORT_FORMATS',
+    'OntologyColumns',
+    'export_format',
+    'export_ontology',
+    'load_columns',
+    'ontology_state',
+    'write_ntriples',
+]
@@ -0,0 +1,11 @@
+"""
+Importers that prepare external source ontologies for the AIM2 ontology.
+"""
+from .trimmer import TrimReport, load_allow_list, normalize_term_id, trim_ontology
+
+__all__ = [
+    'TrimReport',
+    'load_allow_list',
+    'normalize_term_id',
+    'trim_ontology',
+]
@@ -0,0 +1,297 @@
+"""
+Streaming allow-list trimmer for large RDF/XML source ontologies.
+
+Sources such as PO and GO are cut down to an allow-listed subset before they
+are merged into the AIM2 hierarchy. Loading all of go-basic.owl into Owlready2
+only to discard most of it is the largest memory cost of the ontology build,
+so this module works on the RDF/XML stream instead:
+
+1. A first pass records the named superclasses of every class.
+2. The allow-listed terms and all their ancestors form the set of kept terms.
+3. A second pass writes out the top-level elements describing kept terms,
+   clearing every element once handled.
+
+Only the parent map and the kept set are held in memory, never the full graph.
+
+Usage:
+    python -m aim2.ontology.importers.trimmer SOURCE DESTINATION ALLOW_LIST
+"""
+import argparse
+import gzip
+import logging
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Set, Union
+from xml.sax.saxutils import escape, quoteattr
+
+logger = logging.getLogger(__name__)
+
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS_NS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL_NS = "http://www.w3.org/2002/07/owl#"
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+RDF_ABOUT = f"{{{RDF_NS}}}about"
+RDF_RESOURCE = f"{{{RDF_NS}}}resource"
+OWL_CLASS = f"{{{OWL_NS}}}Class"
+OWL_AXIOM = f"{{{OWL_NS}}}Axiom"
+OWL_ANNOTATED_SOURCE = f"{{{OWL_NS}}}annotatedSource"
+RDFS_SUBCLASS_OF = f"{{{RDFS_NS}}}subClassOf"
+
+# Top-level elements that are always copied: the ontology header and the
+# property declarations, which are few and needed by the kept axioms
+ALWAYS_KEPT = {
+    f"{{{OWL_NS}}}Ontology",
+    f"{{{OWL_NS}}}ObjectProperty",
+    f"{{{OWL_NS}}}AnnotationProperty",
+    f"{{{OWL_NS}}}DatatypeProperty",
+    f"{{{OWL_NS}}}TransitiveProperty",
+}
+
+@dataclass
+class TrimReport:
+    """Summary of one trimming run."""
+    total_classes: int = 0
+    kept_classes: int = 0
+    missing_terms: int = 0
+    elements_read: int = 0
+    elements_written: int = 0
+    dropped_axioms: int = 0
+    seconds: float = 0.0
+
+def normalize_term_id(term: str) -> str:
+    """
+    Reduce a term reference to its local identifier, e.g. 'GO_0008150'.
+
+    Accepts CURIEs ('GO:0008150'), local ids and full IRIs.
+    """
+    term = term.strip()
+    cut = max(term.rfind("/"), term.rfind("#"))
+    if cut >= 0:
+        term = term[cut + 1:]
+    return term.replace(":", "_")
+
+def load_allow_list(path: Union[str, Path]) -> Set[str]:
+    """
+    Read an allow-list file with one term per line.
+
+    Blank lines and lines starting with '#' are ignored; anything after the
+    first whitespace on a line (such as a label) is ignored too.
+    """
+    terms = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            terms.add(normalize_term_id(line.split()[0]))
+    return terms
+
+def _open_source(path: Path):
+    """Open a source ontology, transparently decompressing .gz files."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+def _collect_parents(source: Path, report: TrimReport) -> Dict[str, Set[str]]:
+    """First pass: map the local id of every class to its named superclasses."""
+    parents: Dict[str, Set[str]] = {}
+    depth = 0
+    current = None
+    root = None
+    with _open_source(source) as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                elif depth == 2 and elem.tag == OWL_CLASS and elem.get(RDF_ABOUT):
+                    current = normalize_term_id(elem.get(RDF_ABOUT))
+                    parents.setdefault(current, set())
+                continue
+
+            if depth == 3 and current is not None and elem.tag == RDFS_SUBCLASS_OF:
+                parent = elem.get(RDF_RESOURCE)
+                if parent:
+                    parents[current].add(normalize_term_id(parent))
+            depth -= 1
+            if depth == 1:
+                # Drop the finished element so the tree never grows
+                current = None
+                root.clear()
+    report.total_classes = len(parents)
+    return parents
+
+def _ancestor_closure(allow_list: Iterable[str], parents: Dict[str, Set[str]],
+                      report: TrimReport) -> Set[str]:
+    """Return the allow-listed terms that exist plus all their ancestors."""
+    kept: Set[str] = set()
+    stack = []
+    for term in allow_list:
+        if term in parents:
+            stack.append(term)
+        else:
+            report.missing_terms += 1
+            logger.warning(f"Allow-listed term {term} not found in source")
+    while stack:
+        term = stack.pop()
+        if term in kept:
+            continue
+        kept.add(term)
+        for parent in parents.get(term, ()):
+            if parent in parents and parent not in kept:
+                stack.append(parent)
+    return kept
+
+def _qname(tag: str, prefixes: Dict[str, str]) -> str:
+    """Turn a '{namespace}local' tag into a prefixed name."""
+    if not tag.startswith("{"):
+        return tag
+    namespace, local = tag[1:].split("}", 1)
+    if namespace == XML_NS:
+        return f"xml:{local}"
+    prefix = prefixes[namespace]
+    return f"{prefix}:{local}" if prefix else local
+
+def _write_element(out, elem, prefixes: Dict[str, str], indent: str) -> None:
+    """Serialize an element using the namespace prefixes of the source root."""
+    tag = _qname(elem.tag, prefixes)
+    out.write(f"{indent}<{tag}")
+    for name, value in elem.attrib.items():
+        out.write(f" {_qname(name, prefixes)}={quoteattr(value)}")
+    children = list(elem)
+    text = elem.text.strip() if elem.text else ""
+    if not children and not text:
+        out.write("/>\n")
+        return
+    out.write(">")
+    if text:
+        out.write(escape(elem.text))
+    if children:
+        out.write("\n")
+        for child in children:
+            _write_element(out, child, prefixes, indent + "  ")
+        out.write(indent)
+    out.write(f"</{tag}>\n")
+
+def _references_dropped_class(elem, parents: Dict[str, Set[str]], kept: Set[str]) -> bool:
+    """Check whether an axiom refers to a class of the source that is not kept."""
+    for node in elem.iter():
+        resource = node.get(RDF_RESOURCE)
+        if resource:
+            term = normalize_term_id(resource)
+            if term in parents and term not in kept:
+                return True
+    return False
+
+def _is_kept(elem, kept: Set[str]) -> bool:
+    """Decide whether a top-level element belongs to the trimmed ontology."""
+    if elem.tag in ALWAYS_KEPT:
+        return True
+    if elem.tag == OWL_AXIOM:
+        source = elem.find(OWL_ANNOTATED_SOURCE)
+        return source is not None and normalize_term_id(source.get(RDF_RESOURCE, "")) in kept
+    about = elem.get(RDF_ABOUT)
+    return about is not None and normalize_term_id(about) in kept
+
+def trim_ontology(source: Union[str, Path], destination: Union[str, Path],
+                  allow_list: Iterable[str]) -> TrimReport:
+    """
+    Write the allow-listed subset of an RDF/XML ontology, streaming the source.
+
+    Kept classes retain their labels, synonyms and other annotations. Axioms
+    that refer to classes outside the kept set, such as part_of restrictions
+    on a dropped term, are removed so that the subset has no dangling terms.
+
+    Args:
+        source: RDF/XML source ontology, optionally gzip-compressed.
+        destination: Path of the trimmed RDF/XML ontology.
+        allow_list: Term ids, CURIEs or IRIs to keep.
+
+    Returns:
+        A TrimReport with class counts and timing.
+    """
+    start = time.perf_counter()
+    source = Path(source)
+    destination = Path(destination)
+    report = TrimReport()
+
+    allowed = set()
+    for term in allow_list:
+        allowed.add(normalize_term_id(term))
+    parents = _collect_parents(source, report)
+    kept = _ancestor_closure(allowed, parents, report)
+    report.kept_classes = len(kept)
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    prefixes: Dict[str, str] = {}
+    late_prefixes: Dict[str, str] = {}
+    depth = 0
+    root = None
+    root_tag = None
+    with _open_source(source) as f, open(destination, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0"?>\n')
+        for event, elem in ET.iterparse(f, events=("start-ns", "start", "end")):
+            if event == "start-ns":
+                prefix, namespace = elem
+                if namespace in prefixes:
+                    continue
+                if root is None:
+                    prefixes[namespace] = prefix
+                else:
+                    # Declared below the root: redeclare on the elements we write
+                    prefixes[namespace] = prefix or f"ns{len(late_prefixes)}"
+                    late_prefixes[namespace] = prefixes[namespace]
+                continue
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                    root_tag = _qname(elem.tag, prefixes)
+                    out.write(f"<{root_tag}")
+                    for namespace, prefix in prefixes.items():
+                        name = f"xmlns:{prefix}" if prefix else "xmlns"
+                        out.write(f" {name}={quoteattr(namespace)}")
+                    for name, value in elem.attrib.items():
+                        out.write(f" {_qname(name, prefixes)}={quoteattr(value)}")
+                    out.write(">\n")
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+            report.elements_read += 1
+            if _is_kept(elem, kept):
+                for child in list(elem):
+                    if _references_dropped_class(child, parents, kept):
+                        elem.remove(child)
+                        report.dropped_axioms += 1
+                for namespace, prefix in late_prefixes.items():
+                    elem.set(f"xmlns:{prefix}", namespace)
+                _write_element(out, elem, prefixes, "  ")
+                report.elements_written += 1
+            root.clear()
+        out.write(f"</{root_tag}>\n")
+
+    report.seconds = time.perf_counter() - start
+    logger.info(f"Trimmed {source.name}: kept {report.kept_classes} of {report.total_classes} "
+                f"classes in {report.seconds:.2f}s")
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trim an RDF/XML ontology to an allow-list.")
+    parser.add_argument("source", type=Path)
+    parser.add_argument("destination", type=Path)
+    parser.add_argument("allow_list", type=Path)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = trim_ontology(args.source, args.destination, load_allow_list(args.allow_list))
+    print(report)
+
+if __name__ == "__main__":
+    main()
+
+__all__ = ['TrimReport', 'load_allow_list', 'normalize_term_id', 'trim_ontology']
@@ -6,50 +6,235 @@ managing, and saving the AIM2 ontology and its imported ontologies.
 """
 import logging
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, Iterable, List, Tuple, Union
 
 from owlready2 import get_ontology, sync_reasoner, default_world, World
 
-from .schema import init_ontology, onto
+from ..config import get_config
+from .cache import CacheStats, OntologyCache
+from .closure import ClosureIndex, closure_path, file_fingerprint
+from .export import export_format, export_ontology, ontology_state
+from .facts import DEFAULT_BATCH_SIZE, BulkInsertStats, bulk_add_facts
+from .profiling import METRICS_FILENAME, OntologyProfiler, OperationMetrics, profiled
+from .reasoning import IncrementalReasoner, ReasoningStats
+from .schema import base_iri, get_onto, init_ontology
+from .triples import TripleSet, insert_triple_sets, insert_triples, parse_triples
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Used when the configuration does not define ontology.cache_dir
+DEFAULT_CACHE_DIR = Path(".cache/ontologies")
+
+# File name of the persistent quadstore inside ontology.cache_dir
+QUADSTORE_FILENAME = "aim2_quadstore.sqlite3"
+
+def _ontology_settings() -> Dict:
+    """Return the 'ontology' config section, or {} if no config file exists."""
+    try:
+        return get_config().get("ontology") or {}
+    except FileNotFoundError:
+        return {}
+
+def default_quadstore_path() -> Path:
+    """Return the quadstore location under the configured ontology.cache_dir."""
+    cache_dir = _ontology_settings().get("cache_dir") or DEFAULT_CACHE_DIR
+    return Path(cache_dir) / QUADSTORE_FILENAME
+
+def default_metrics_path() -> Path:
+    """Return the metrics log location under the configured paths.log_dir."""
+    try:
+        paths = get_config().get("paths") or {}
+    except FileNotFoundError:
+        paths = {}
+    return Path(paths.get("log_dir") or "logs") / METRICS_FILENAME
+
+def _load_source(iri: str, cache_dir: Optional[str],
+                 cache_max_size_mb: float) -> Tuple[TripleSet, float, Optional[CacheStats]]:
+    """
+    Parse one source ontology into triples; runs in a worker process.
+    
+    Returns:
+        The triples, the seconds spent, and the worker's cache counters.
+    """
+    start = time.perf_counter()
+    if cache_dir is None:
+        return parse_triples(iri), time.perf_counter() - start, None
+    cache = OntologyCache(cache_dir, cache_max_size_mb)
+    try:
+        triples = cache.get(iri)
+    finally:
+        cache.close()
+    return triples, time.perf_counter() - start, cache.stats
+
 class AIM2Ontology:
     """
     Main class for managing the AIM2 ontology.
     
     This class handles the loading, integration, and saving of the AIM2 ontology
     and its imported ontologies.
+    
+    By default the ontology lives in the in-memory default world. With
+    ``use_quadstore=True`` it is instead kept in an Owlready2 SQLite quadstore
+    under ``ontology.cache_dir``: loading an already populated store does not
+    parse anything, several read-only processes can share the same file, and
+    ``commit()`` writes changes incrementally. Writing RDF/XML remains an
+    explicit ``save()`` step in both modes.
     """
     
-    def __init__(self, owl_path: Optional[Union[str, Path]] = None):
+    def __init__(self, owl_path: Optional[Union[str, Path]] = None,
+                 use_quadstore: bool = False,
+                 quadstore_path: Optional[Union[str, Path]] = None,
+                 read_only: bool = False,
+                 cache: Optional[OntologyCache] = None,
+                 use_cache: bool = True,
+                 metrics_log: Optional[Union[bool, str, Path]] = None,
+                 metrics: bool = True, entity_counts: bool = False,
+                 reset_peak_rss: bool = False):
         """
         Initialize the AIM2 ontology manager.
         
         Args:
             owl_path: Path to save/load the ontology file. If None, a temporary
                      in-memory ontology will be used.
+            use_quadstore: Back the ontology with a persistent SQLite quadstore.
+                          Implied when quadstore_path is given.
+            quadstore_path: Location of the quadstore file. Defaults to
+                           default_quadstore_path().
+            read_only: Open the quadstore read-only, so that many processes
+                      can share it.
+            cache: Import cache for load() and import_ontology(). Defaults to
+                  one built from the ontology config section, which is None
+                  when ontology.cache_enabled is false.
+            use_cache: Set to False to always fetch and parse imports.
+            metrics_log: Append the metrics of every operation as JSON lines
+                        to this file, or to default_metrics_path() if True.
+                        Metrics are available from self.metrics.
+            metrics: Set to False to record no metrics at all.
+            entity_counts: Record exact triple counts and the individuals of
+                          each class with the metrics; this scans the world
+                          before and after every operation.
+            reset_peak_rss: Measure the peak RSS of each operation on its own
+                           by resetting the process's high-water mark (Linux),
+                           which other peak RSS measurements then miss.
         """
         self.owl_path = Path(owl_path) if owl_path else None
         self.imported_ontologies: Dict[str, object] = {}
         self._initialized = False
+        self.read_only = read_only
+        self.quadstore_path: Optional[Path] = None
+        self._reasoner: Optional[IncrementalReasoner] = None
+        self._closure: Optional[ClosureIndex] = None
+        self._dictionary = None
+        # Resolved path -> (ontology state and format, file fingerprint) of the last save
+        self._saved: Dict[Path, Tuple[Tuple, Tuple[int, int]]] = {}
+        self.cache: Optional[OntologyCache] = None
+        if use_cache:
+            self.cache = cache if cache is not None else OntologyCache.from_config(_ontology_settings())
+        
+        if use_quadstore or quadstore_path:
+            self.quadstore_path = Path(quadstore_path) if quadstore_path else default_quadstore_path()
+            self.world = self._open_quadstore()
+            self.onto = self._quadstore_ontology()
+        else:
+            # Initialize the base ontology (built on first use, shared per process)
+            self.onto = get_onto()
+            self.world = self.onto.world or default_world
         
-        # Initialize the base ontology
-        self.onto = onto or init_ontology()
-        self.world = self.onto.world or default_world
+        if metrics_log is True:
+            metrics_log = default_metrics_path()
+        self.profiler = OntologyProfiler(self.world, metrics_log or None,
+                                         entity_counts=entity_counts, enabled=metrics,
+                                         reset_peak_rss=reset_peak_rss)
         
         logger.info("AIM2Ontology initialized")
     
+    @property
+    def metrics(self) -> List[OperationMetrics]:
+        """Metrics of the load, save, reason and import calls made so far."""
+        return self.profiler.records
+    
+    @property
+    def persistent(self) -> bool:
+        """Whether the ontology is backed by a quadstore file."""
+        return self.quadstore_path is not None
+    
+    def _open_quadstore(self) -> World:
+        """Open (or create) the SQLite quadstore at self.quadstore_path."""
+        if self.read_only:
+            if not self.quadstore_path.exists():
+                raise FileNotFoundError(f"Quadstore not found: {self.quadstore_path}")
+            logger.info(f"Opening quadstore read-only at {self.quadstore_path}")
+            return World(filename=str(self.quadstore_path), exclusive=False, read_only=True)
+        
+        self.quadstore_path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Opening quadstore at {self.quadstore_path}")
+        # Non-exclusive WAL mode lets read-only processes use the file while we write
+        return World(filename=str(self.quadstore_path), exclusive=False, journal_mode="WAL")
+    
+    def _has_schema(self) -> bool:
+        """Check whether the quadstore already contains the AIM2 schema."""
+        return self.world[f"{base_iri}#Annotation"] is not None
+    
+    def _quadstore_ontology(self):
+        """
+        Return the AIM2 namespace of the quadstore.
+        
+        A new store is populated once, from owl_path if that file exists and
+        from the schema definitions otherwise.
+        """
+        if not self._has_schema():
+            if self.read_only:
+                raise RuntimeError(f"Quadstore {self.quadstore_path} does not contain the AIM2 ontology")
+            if self.owl_path and self.owl_path.exists():
+                logger.info(f"Populating quadstore from {self.owl_path}")
+                self.world.get_ontology(str(self.owl_path)).load()
+            else:
+                init_ontology(self.world)
+            self.world.save()
+        self._initialized = True
+        return self.world.get_ontology(base_iri).get_namespace(base_iri)
+    
+    def commit(self) -> None:
+        """
+        Commit pending changes to the quadstore.
+        
+        Only the changes made since the last commit are written.
+        """
+        if not self.persistent:
+            raise RuntimeError("commit() requires a quadstore-backed ontology")
+        if self.read_only:
+            raise RuntimeError("Cannot commit a read-only quadstore")
+        self.world.save()
+    
+    def close(self) -> None:
+        """Commit pending changes and close the quadstore."""
+        if not self.persistent:
+            return
+        if not self.read_only:
+            self.world.save()
+        self.world.close()
+    
+    @profiled("load")
     def load(self, path: Optional[Union[str, Path]] = None) -> None:
         """
         Load the ontology from a file.
         
+        For a quadstore-backed ontology, a store that already holds the AIM2
+        ontology is used as is and the file is not parsed, unless a path is
+        given explicitly.
+        
         Args:
             path: Path to the ontology file. If None, uses self.owl_path.
         """
+        if self.persistent and path is None and self._has_schema():
+            logger.info(f"Using ontology already stored in {self.quadstore_path}")
+            self._initialized = True
+            return
+        
         load_path = Path(path) if path else self.owl_path
         if not load_path:
             raise ValueError("No path provided and no default path set")
@@ -61,19 +246,46 @@ class AIM2Ontology:
         
         logger.info(f"Loading ontology from {load_path}")
         try:
-            self.onto = get_ontology(str(load_path)).load()
+            if self.persistent:
+                if self.read_only:
+                    raise RuntimeError("Cannot load a file into a read-only quadstore")
+                self.onto = self.world.get_ontology(str(load_path)).load()
+                self.world.save()
+            elif self.cache is not None:
+                self.onto = insert_triples(self.world, self.cache.get(str(load_path.resolve())))
+            else:
+                self.onto = get_ontology(str(load_path)).load()
             self._initialized = True
+            self._closure = None
+            self._dictionary = None
             logger.info("Ontology loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load ontology: {e}")
             raise
     
-    def save(self, path: Optional[Union[str, Path]] = None) -> None:
+    @profiled("save")
+    def save(self, path: Optional[Union[str, Path]] = None, format: Optional[str] = None,
+             compress: Optional[bool] = None, force: bool = False) -> bool:
         """
         Save the ontology to a file.
         
+        For a quadstore-backed ontology this also commits pending changes;
+        use commit() alone to persist changes without exporting RDF/XML.
+        
+        The file is written through a temporary file and renamed into place.
+        Saving again to the same file and format is skipped while neither the
+        ontology nor the file changed since the previous save.
+        
         Args:
             path: Path to save the ontology file. If None, uses self.owl_path.
+            format: 'rdfxml', 'ntriples' or 'columns' (class hierarchy, labels
+                   and synonyms only, see aim2.ontology.export). Defaults to
+                   the format implied by the file suffix, RDF/XML otherwise.
+            compress: Gzip the output. Defaults to whether the path ends in .gz.
+            force: Write even if nothing changed.
+        
+        Returns:
+            True if the file was written, False if the save was skipped.
         """
         if not self._initialized:
             raise RuntimeError("Ontology not initialized. Call load() or create() first.")
@@ -82,32 +294,179 @@ class AIM2Ontology:
         if not save_path:
             raise ValueError("No path provided and no default path set")
         
-        # Ensure the directory exists
-        save_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.persistent and not self.read_only:
+            self.world.save()
+        
+        guessed_format, guessed_compress = export_format(save_path)
+        format = format or guessed_format
+        compress = guessed_compress if compress is None else compress
+        key = save_path.resolve()
+        state = (ontology_state(self.onto), format, compress)
+        previous = self._saved.get(key)
+        if not force and previous is not None and previous[0] == state and \
+                save_path.exists() and previous[1] == file_fingerprint(save_path):
+            logger.info(f"Ontology unchanged since last save to {save_path}, skipping")
+            self.profiler.note(skipped=True)
+            return False
         
         logger.info(f"Saving ontology to {save_path}")
         try:
-            self.onto.save(file=str(save_path), format="rdfxml")
+            export_ontology(self.onto, save_path, format, compress)
+            self._saved[key] = (state, file_fingerprint(save_path))
+            if self._closure is not None:
+                self._closure.update()
+                self._closure.save(closure_path(save_path), file_fingerprint(save_path))
+            if self._dictionary is not None:
+                if self._dictionary.sources == self._dictionary_sources(state[0]):
+                    from ..extraction.ner import dictionary_path
+                    self._dictionary.save(dictionary_path(save_path), file_fingerprint(save_path))
+                else:
+                    logger.info("Ontology changed since the entity dictionary was built; dropping it")
+                    self._dictionary = None
             logger.info("Ontology saved successfully")
         except Exception as e:
             logger.error(f"Failed to save ontology: {e}")
             raise
+        return True
     
-    def reason(self) -> None:
+    @profiled("reason", with_target=False)
+    def reason(self, incremental: bool = False, full: bool = False) -> Optional[ReasoningStats]:
         """
         Run the reasoner on the ontology.
+        
+        By default HermiT is run on the AIM2 ontology only, not on the whole
+        world with every imported ontology. With ``incremental=True`` the AIM2
+        property axioms (sub-properties of affects, inverses, transitive
+        part_of/has_part) are materialized instead, only for the relations
+        added since the previous incremental run.
+        
+        Args:
+            incremental: Use the incremental materializer instead of HermiT.
+            full: With incremental, recompute everything from scratch. Runs
+                 after facts were removed do so on their own.
+        
+        Returns:
+            ReasoningStats for incremental runs, None otherwise.
         """
         if not self._initialized:
             raise RuntimeError("Ontology not initialized. Call load() or create() first.")
         
+        if incremental:
+            if self._reasoner is None:
+                self._reasoner = IncrementalReasoner(self.onto)
+            return self._reasoner.reason(full=full)
+        
         logger.info("Running reasoner...")
         try:
-            sync_reasoner()
+            sync_reasoner([self.onto.ontology])
             logger.info("Reasoning completed")
         except Exception as e:
             logger.error(f"Reasoning failed: {e}")
             raise
+        return None
     
+    def bulk_add_facts(self, facts: Iterable,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> BulkInsertStats:
+        """
+        Add extracted facts with batched triple inserts.
+        
+        Much faster than creating individuals and assigning relations one
+        attribute at a time; see aim2.ontology.facts. For a quadstore-backed
+        ontology, call commit() afterwards to persist the facts.
+        
+        Args:
+            facts: Fact records or (subject, predicate, object[, confidence[,
+                  source]]) tuples.
+            batch_size: Number of facts written per round.
+        
+        Returns:
+            BulkInsertStats for the call.
+        """
+        if not self._initialized:
+            raise RuntimeError("Ontology not initialized. Call load() or create() first.")
+        if self.read_only:
+            raise RuntimeError("Cannot add facts to a read-only quadstore")
+        return bulk_add_facts(self.onto, facts, batch_size)
+    
+    def closure_index(self) -> ClosureIndex:
+        """
+        Return the transitive-closure index, brought up to date with the ontology.
+        
+        On first use the index persisted next to the ontology file by save()
+        is reused if it matches that file; otherwise it is built. Later calls
+        only merge the relations added since the previous call; relations are
+        checked for removals only after triples were deleted.
+        """
+        if not self._initialized:
+            raise RuntimeError("Ontology not initialized. Call load() or create() first.")
+        
+        if self._closure is None:
+            self._closure = ClosureIndex(self.onto)
+            index_path = closure_path(self.owl_path) if self.owl_path else None
+            if index_path and self.owl_path.exists() and \
+                    self._closure.load(index_path, file_fingerprint(self.owl_path)):
+                logger.info(f"Loaded closure index from {index_path}")
+        self._closure.update()
+        return self._closure
+    
+    def _dictionary_sources(self, state: Optional[str] = None) -> tuple:
+        """
+        Identify what the entity dictionary is built from.
+        
+        That is the content digest of the AIM2 ontology and, for each
+        imported ontology, its prefix, IRI and triple counts. Imports are
+        inserted whole and not edited, and counting their rows is cheap
+        where digesting them is not.
+        
+        Args:
+            state: ontology_state() of the AIM2 ontology, if already known.
+        """
+        sources = [(self.onto.base_iri, state or ontology_state(self.onto))]
+        graph = self.world.graph
+        for prefix in sorted(self.imported_ontologies):
+            onto = self.imported_ontologies[prefix]
+            c = onto.graph.c
+            objs = graph.execute("SELECT COUNT(*) FROM objs WHERE c=?", (c,)).fetchone()[0]
+            datas = graph.execute("SELECT COUNT(*) FROM datas WHERE c=?", (c,)).fetchone()[0]
+            sources.append((prefix, onto.base_iri, objs, datas))
+        return tuple(sources)
+    
+    def entity_dictionary(self, rebuild: bool = False):
+        """
+        Return the dictionary NER automaton over the labels and synonyms of
+        the ontology and its imports (see aim2.extraction.ner).
+        
+        On first use the automaton persisted next to the ontology file by
+        save() is reused if it matches that file and the ontologies loaded;
+        otherwise it is built. Loading or importing ontologies discards it,
+        and save() drops it if the ontology changed since it was built.
+        
+        Args:
+            rebuild: Build it again, e.g. after classes were added.
+        """
+        if not self._initialized:
+            raise RuntimeError("Ontology not initialized. Call load() or create() first.")
+        
+        if self._dictionary is not None and not rebuild:
+            return self._dictionary
+        
+        from ..extraction.ner import EntityDictionary, dictionary_path
+        sources = self._dictionary_sources()
+        self._dictionary = None
+        if not rebuild and self.owl_path and self.owl_path.exists():
+            path = dictionary_path(self.owl_path)
+            self._dictionary = EntityDictionary.load(path, file_fingerprint(self.owl_path), sources)
+            if self._dictionary is not None:
+                logger.info(f"Loaded entity dictionary from {path}")
+        if self._dictionary is None:
+            start = time.perf_counter()
+            self._dictionary = EntityDictionary.from_ontology(self)
+            self._dictionary.sources = sources
+            logger.info(f"Built entity dictionary of {len(self._dictionary)} terms "
+                        f"in {time.perf_counter() - start:.2f}s")
+        return self._dictionary
+    
+    @profiled("import_ontology")
     def import_ontology(self, iri: str, prefix: str) -> None:
         """
         Import an external ontology.
@@ -125,12 +484,86 @@ class AIM2Ontology:
         
         logger.info(f"Importing ontology: {iri}")
         try:
-            imported_onto = get_ontology(iri).load()
+            if self.cache is not None:
+                imported_onto = insert_triples(self.world, self.cache.get(iri))
+            else:
+                imported_onto = self.world.get_ontology(iri).load()
             self.imported_ontologies[prefix] = imported_onto
+            self._dictionary = None
             logger.info(f"Successfully imported ontology: {iri}")
         except Exception as e:
             logger.error(f"Failed to import ontology {iri}: {e}")
             raise
+    
+    @profiled("import_ontologies", with_target=False)
+    def import_ontologies(self, sources: Optional[Dict[str, str]] = None,
+                          max_workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Import several external ontologies, parsing them concurrently.
+        
+        Sources are parsed (or read from the import cache) in a process pool,
+        then merged into the world with one bulk triple insert per source,
+        all in a single write transaction.
+        
+        Args:
+            sources: Mapping of prefix to ontology IRI or path. Defaults to the
+                    files listed under ontology.files, keyed by file stem.
+            max_workers: Size of the process pool. Defaults to one worker per
+                        source, up to the number of CPUs.
+        
+        Returns:
+            Per-prefix timings: parse_seconds (in the worker), insert_seconds
+            (its insert into the world) and the number of triples.
+        """
+        if not self._initialized:
+            raise RuntimeError("Ontology not initialized. Call load() or create() first.")
+        
+        if sources is None:
+            sources = {}
+            for path in _ontology_settings().get("files") or []:
+                sources[Path(path).stem] = str(path)
+        
+        pending = {}
+        for prefix, iri in sources.items():
+            if prefix in self.imported_ontologies:
+                logger.warning(f"Ontology with prefix '{prefix}' already imported. Skipping.")
+            else:
+                pending[prefix] = iri
+        if not pending:
+            return {}
+        
+        cache_dir = str(self.cache.cache_dir) if self.cache is not None else None
+        cache_max_size_mb = self.cache.max_size_bytes / (1024 * 1024) if self.cache is not None else 0
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        logger.info(f"Importing {len(pending)} ontologies with {workers} workers")
+        
+        report: Dict[str, Dict[str, float]] = {}
+        parsed: Dict[str, TripleSet] = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {}
+                for prefix, iri in pending.items():
+                    futures[prefix] = pool.submit(_load_source, iri, cache_dir, cache_max_size_mb)
+                for prefix, future in futures.items():
+                    triples, seconds, cache_stats = future.result()
+                    parsed[prefix] = triples
+                    report[prefix] = {"parse_seconds": seconds, "triples": len(triples)}
+                    if cache_stats is not None:
+                        self.cache.stats.add(cache_stats)
+        except Exception as e:
+            logger.error(f"Failed to import ontologies: {e}")
+            raise
+        
+        ontologies, insert_seconds = insert_triple_sets(self.world, list(parsed.values()))
+        
+        self._dictionary = None
+        for prefix, onto, seconds in zip(parsed.keys(), ontologies, insert_seconds):
+            self.imported_ontologies[prefix] = onto
+            report[prefix]["insert_seconds"] = seconds
+            logger.info(f"Imported '{prefix}' ({report[prefix]['triples']} triples, "
+                        f"parsed in {report[prefix]['parse_seconds']:.2f}s)")
+        self.profiler.note(sources=report)
+        return report
 
 # Export the main class
 __all__ = ['AIM2Ontology']
@@ -0,0 +1,281 @@
+"""
+Timing and resource metrics for ontology operations.
+
+AIM2Ontology records an OperationMetrics entry for every load, save, reason
+and import: wall and CPU time, peak RSS and the number of triples in the
+world. Triples are estimated from the largest rowids, which costs two index
+lookups; exact counts, with the number of individuals of each Annotation
+class and of declared properties, scan the world before and after every
+operation and are opt-in (``entity_counts=True``). The entries are kept in
+memory (``AIM2Ontology.metrics``) and can also be appended as JSON lines to a
+file, by default ``<paths.log_dir>/ontology_metrics.jsonl``, to compare
+builds across releases. ``AIM2Ontology(metrics=False)`` records nothing.
+
+Peak RSS is the peak of the process so far. On Linux the high-water mark can
+be reset through /proc/self/clear_refs to measure each operation on its own,
+but that reset affects the whole process, including other threads' measures
+and the caller's own measurements, so it is opt-in (``reset_peak_rss=True``)
+and skipped while another operation is being measured.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from owlready2.base import rdf_type
+
+from .. import __version__
+from .schema import base_iri
+
+logger = logging.getLogger(__name__)
+
+# Operations being measured in this process, by any profiler or thread
+_active_measures = 0
+_active_lock = threading.Lock()
+
+# File written under paths.log_dir when metrics logging is enabled
+METRICS_FILENAME = "ontology_metrics.jsonl"
+
+PROPERTY_TYPES = {
+    "ObjectProperty": "http://www.w3.org/2002/07/owl#ObjectProperty",
+    "DatatypeProperty": "http://www.w3.org/2002/07/owl#DatatypeProperty",
+    "AnnotationProperty": "http://www.w3.org/2002/07/owl#AnnotationProperty",
+}
+
+@dataclass
+class OperationMetrics:
+    """Metrics of one ontology operation."""
+    operation: str
+    target: Optional[str] = None
+    started_at: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    triples: int = 0
+    triples_added: int = 0
+    entity_counts: Dict[str, int] = field(default_factory=dict)
+    details: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    version: str = __version__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def _reset_peak_rss() -> bool:
+    """Reset the RSS high-water mark of the process, where the OS allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size in MB since the last reset (or process start)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+def _children_cpu_seconds() -> float:
+    """CPU time of terminated child processes, e.g. import workers."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def count_triples(world) -> int:
+    """Number of triples in a world."""
+    graph = world.graph
+    objs = graph.execute("SELECT COUNT(*) FROM objs").fetchone()[0]
+    datas = graph.execute("SELECT COUNT(*) FROM datas").fetchone()[0]
+    return objs + datas
+
+def estimate_triples(world) -> int:
+    """
+    Estimate the number of triples in a world from the largest rowids.
+
+    Exact while triples are only added; rows deleted below the largest
+    rowid are still counted.
+    """
+    graph = world.graph
+    objs = graph.execute("SELECT MAX(rowid) FROM objs").fetchone()[0] or 0
+    datas = graph.execute("SELECT MAX(rowid) FROM datas").fetchone()[0] or 0
+    return objs + datas
+
+def count_entities(world) -> Dict[str, int]:
+    """
+    Count the individuals of every Annotation class and the declared properties.
+
+    Individuals are counted under their asserted classes only.
+    """
+    graph = world.graph
+    counts = {}
+    annotation = world[f"{base_iri}#Annotation"]
+    for cls in (annotation.descendants() if annotation is not None else ()):
+        counts[cls.name] = graph.execute(
+            "SELECT COUNT(*) FROM objs WHERE p=? AND o=?", (rdf_type, cls.storid)).fetchone()[0]
+    for name, iri in PROPERTY_TYPES.items():
+        storid = graph._abbreviate(iri, False)
+        counts[name] = 0 if storid is None else graph.execute(
+            "SELECT COUNT(*) FROM objs WHERE p=? AND o=?", (rdf_type, storid)).fetchone()[0]
+    return counts
+
+class OntologyProfiler:
+    """Records OperationMetrics for the operations of one ontology."""
+
+    def __init__(self, world, log_path: Optional[Union[str, Path]] = None,
+                 entity_counts: bool = False, enabled: bool = True,
+                 reset_peak_rss: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            world: The Owlready2 World holding the ontology.
+            log_path: JSON lines file to append every record to, or None to
+                     keep records in memory only.
+            entity_counts: Count triples exactly and individuals per class
+                          around each operation, instead of estimating triples.
+            enabled: Set to False to measure and record nothing.
+            reset_peak_rss: Reset the process's RSS high-water mark at the
+                           start of each operation (Linux), unless another
+                           one is being measured, so that peak_rss_mb is the
+                           operation's own peak.
+        """
+        self.world = world
+        self.log_path = Path(log_path) if log_path else None
+        self.entity_counts = entity_counts
+        self.enabled = enabled
+        self.reset_peak_rss = reset_peak_rss
+        self.records: List[OperationMetrics] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def measure(self, operation: str, target: Optional[str] = None):
+        """Measure the enclosed block as one operation; yields its record."""
+        record = OperationMetrics(operation=operation, target=target, started_at=time.time())
+        if not self.enabled:
+            yield record
+            return
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(record)
+        world = self.world
+        triples_before = self._count_triples(world)
+        global _active_measures
+        with _active_lock:
+            alone = _active_measures == 0
+            _active_measures += 1
+        rss_reset = self.reset_peak_rss and alone and _reset_peak_rss()
+        cpu_start = time.process_time() + _children_cpu_seconds()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_start
+            record.cpu_seconds = time.process_time() + _children_cpu_seconds() - cpu_start
+            record.peak_rss_mb = _peak_rss_mb()
+            if not rss_reset:
+                record.details.setdefault("peak_rss_scope", "process")
+            with _active_lock:
+                _active_measures -= 1
+            stack.pop()
+            self._finish(record, world, triples_before)
+
+    def _count_triples(self, world) -> int:
+        return count_triples(world) if self.entity_counts else estimate_triples(world)
+
+    def _finish(self, record: OperationMetrics, world, triples_before: int) -> None:
+        try:
+            record.triples = self._count_triples(world)
+            record.triples_added = record.triples - triples_before
+            if self.entity_counts:
+                record.entity_counts = count_entities(world)
+            else:
+                record.details.setdefault("triples_scope", "max_rowid")
+        except Exception as e:
+            # The world may have been closed by the operation
+            logger.debug(f"Could not count triples after {record.operation}: {e}")
+        with self._lock:
+            self.records.append(record)
+            if self.log_path is not None:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record.to_dict(), default=str) + "\n")
+        logger.debug(f"{record.operation} took {record.wall_seconds:.3f}s "
+                     f"({record.cpu_seconds:.3f}s CPU, {record.triples_added:+d} triples)")
+
+    def note(self, **details) -> None:
+        """Attach details to the operation being measured by this thread."""
+        stack = self._local.__dict__.get("stack")
+        if stack:
+            stack[-1].details.update(details)
+
+    def last(self, operation: Optional[str] = None) -> Optional[OperationMetrics]:
+        """Return the latest record, optionally of a given operation."""
+        with self._lock:
+            for record in reversed(self.records):
+                if operation is None or record.operation == operation:
+                    return record
+        return None
+
+def profiled(operation: str, with_target: bool = True):
+    """
+    Decorate an AIM2Ontology method so that its calls are measured.
+
+    Args:
+        operation: Name recorded for the calls.
+        with_target: Record the first positional argument (a path or IRI)
+                    as the target.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            target = None
+            if with_target and args and args[0] is not None:
+                target = str(args[0])
+            with self.profiler.measure(operation, target):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def load_metrics(path: Union[str, Path]) -> List[OperationMetrics]:
+    """Read the records of a JSON lines metrics file."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(OperationMetrics(**json.loads(line)))
+    return records
+
+__all__ = [
+    'METRICS_FILENAME',
+    'OntologyProfiler',
+    'OperationMetrics',
+    'count_entities',
+    'count_triples',
+    'estimate_triples',
+    'load_metrics',
+    'profiled',
+]
@@ -0,0 +1,267 @@
+"""
+Incremental materialization of the AIM2 property axioms.
+
+Running HermiT through sync_reasoner() re-reasons over the whole world after
+every batch of extracted facts. Most of what the pipeline needs from the
+reasoner is, however, entailed by a few property axioms of the AIM2 schema:
+
+- sub-properties: ``upregulates``, ``downregulates``, ``inhibits`` and
+  ``activates`` imply ``affects``
+- inverses: ``part_of``/``has_part``, ``located_in``/``has_location`` and
+  ``participates_in``/``has_participant``
+- transitivity of ``part_of`` and ``has_part``
+
+IncrementalReasoner materializes these entailments into a separate ontology
+of the same world. It keeps the transitive closures in memory and, on each
+run, only reads the relation triples asserted since the previous run (tracked
+by SQLite rowid), so the cost of a run depends on the size of the batch
+rather than on the size of the ontology. Removed or replaced triples, which a
+rowid watermark cannot see, make the run a full one; the asserted triples
+are only counted and checksummed to find them after triples were deleted
+(see aim2.ontology.changes).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .changes import EdgeState, add_to_state, edge_state, objs_removals
+
+logger = logging.getLogger(__name__)
+
+# Ontology that receives the materialized triples
+INFERRED_IRI = "http://purl.obolibrary.org/obo/aim2-inferred.owl"
+
+# Properties treated as transitive (the schema does not declare them so)
+TRANSITIVE_PROPERTIES = ("part_of", "has_part")
+
+# Properties whose inverse is maintained
+INVERSE_PROPERTIES = ("part_of", "located_in", "participates_in")
+
+# Every sub-property of these is materialized as the parent property
+SUPER_PROPERTIES = ("affects",)
+
+Edge = Tuple[int, int, int]  # (p, s, o) storids
+
+@dataclass
+class ReasoningStats:
+    """Outcome of one reasoning run."""
+    full: bool = False
+    asserted_triples: int = 0
+    inferred_triples: int = 0
+    seconds: float = 0.0
+
+class IncrementalReasoner:
+    """
+    Materializes the AIM2 property axioms, updating only what a batch affects.
+
+    Deleting asserted relations is not tracked incrementally: a run that
+    finds some removed recomputes everything, as ``reason(full=True)`` does.
+    """
+
+    def __init__(self, onto):
+        """
+        Initialize the reasoner.
+
+        Args:
+            onto: The AIM2 ontology (namespace) whose schema defines the
+                 properties.
+        """
+        self.world = onto.world
+        self.inferred = self.world.get_ontology(INFERRED_IRI)
+
+        self._props: Dict[int, object] = {}
+        self._super: Dict[int, List[int]] = {}
+        self._inverse: Dict[int, int] = {}
+        self._transitive: Set[int] = set()
+
+        for name in SUPER_PROPERTIES:
+            parent = getattr(onto, name)
+            self._props[parent.storid] = parent
+            for child in parent.descendants():
+                if child is not parent:
+                    self._props[child.storid] = child
+                    self._super.setdefault(child.storid, []).append(parent.storid)
+        for name in INVERSE_PROPERTIES:
+            prop = getattr(onto, name)
+            inverse = prop.inverse_property
+            self._props[prop.storid] = prop
+            self._props[inverse.storid] = inverse
+            self._inverse[prop.storid] = inverse.storid
+            self._inverse[inverse.storid] = prop.storid
+        for name in TRANSITIVE_PROPERTIES:
+            self._transitive.add(getattr(onto, name).storid)
+
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget all cached state."""
+        self._watermark = 0
+        # objs_removals() when the asserted triples were last known complete
+        self._removals = 0
+        # Count and checksum of the asserted triples read, per property
+        self._state: EdgeState = {}
+        # All known (asserted or inferred) edges, per property
+        self._known: Set[Edge] = set()
+        # Closure of each transitive property, forwards and backwards
+        self._succ: Dict[int, Dict[int, Set[int]]] = {}
+        self._pred: Dict[int, Dict[int, Set[int]]] = {}
+        for p in self._transitive:
+            self._succ[p] = {}
+            self._pred[p] = {}
+
+    def _new_asserted_edges(self) -> List[Edge]:
+        """Read the relation triples asserted since the last run."""
+        props = list(self._props.keys())
+        placeholders = ",".join("?" * len(props))
+        rows = self.world.graph.execute(
+            f"SELECT rowid, s, p, o FROM objs WHERE rowid > ? AND c != ? AND p IN ({placeholders})",
+            [self._watermark, self.inferred.graph.c] + props,
+        ).fetchall()
+        edges = []
+        for rowid, s, p, o in rows:
+            if rowid > self._watermark:
+                self._watermark = rowid
+            if s > 0 and o > 0:
+                edges.append((p, s, o))
+                add_to_state(self._state, s, p, o)
+        return edges
+
+    def _asserted_changed(self) -> bool:
+        """Check whether asserted triples were removed or replaced since they were read."""
+        return edge_state(self.world.graph, list(self._props.keys()),
+                          exclude_c=self.inferred.graph.c) != self._state
+
+    def _add_transitive(self, p: int, s: int, o: int, pending: List[Edge]) -> None:
+        """Insert s -> o in the closure of p and queue every new pair."""
+        succ = self._succ[p]
+        pred = self._pred[p]
+        if o in succ.get(s, ()):
+            return
+        sources = set(pred.get(s, ()))
+        sources.add(s)
+        targets = set(succ.get(o, ()))
+        targets.add(o)
+        for x in sources:
+            x_succ = succ.setdefault(x, set())
+            for y in targets:
+                if x != y and y not in x_succ:
+                    x_succ.add(y)
+                    pred.setdefault(y, set()).add(x)
+                    pending.append((p, x, y))
+
+    def _materialize(self, asserted: Iterable[Edge]) -> List[Edge]:
+        """Apply the rules to new edges until nothing new is derived."""
+        pending = list(asserted)
+        inferred = []
+        asserted_set = set(pending)
+        while pending:
+            edge = pending.pop()
+            if edge in self._known:
+                continue
+            self._known.add(edge)
+            if edge not in asserted_set:
+                inferred.append(edge)
+            p, s, o = edge
+            for parent in self._super.get(p, ()):
+                pending.append((parent, s, o))
+            inverse = self._inverse.get(p)
+            if inverse is not None:
+                pending.append((inverse, o, s))
+            if p in self._transitive:
+                self._add_transitive(p, s, o, pending)
+        return inferred
+
+    def _invalidate(self, edges: Iterable[Edge]) -> None:
+        """Drop the attribute caches Owlready2 keeps for the ends of changed edges."""
+        for p, s, o in edges:
+            for storid in (s, o):
+                entity = self.world._entities.get(storid)
+                if entity is not None:
+                    for prop_storid in (p, self._inverse.get(p)):
+                        if prop_storid in self._props:
+                            entity.__dict__.pop(self._props[prop_storid].python_name, None)
+
+    def _clear(self) -> None:
+        """Delete every materialized triple."""
+        c = self.inferred.graph.c
+        graph = self.world.graph
+        graph.acquire_write_lock()
+        try:
+            removed = graph.execute("SELECT p, s, o FROM objs WHERE c=?", (c,)).fetchall()
+            graph.execute("DELETE FROM objs WHERE c=?", (c,))
+        finally:
+            graph.release_write_lock()
+        self._invalidate(removed)
+
+    def _write(self, inferred: List[Edge]) -> None:
+        """Store inferred edges and drop stale attribute caches of their subjects."""
+        if not inferred:
+            return
+        c = self.inferred.graph.c
+        rows = []
+        for p, s, o in inferred:
+            rows.append((c, s, p, o))
+        graph = self.world.graph
+        graph.acquire_write_lock()
+        try:
+            graph.db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", rows)
+        finally:
+            graph.release_write_lock()
+        self._watermark = max(self._watermark,
+                              graph.execute("SELECT MAX(rowid) FROM objs").fetchone()[0] or 0)
+
+        # Owlready2 caches relation values on loaded entities
+        self._invalidate(inferred)
+
+    def reason(self, full: bool = False) -> ReasoningStats:
+        """
+        Materialize the entailments of the relations asserted since the last run.
+
+        Args:
+            full: Discard all materialized triples and cached closures and
+                 start from scratch. Implied when asserted triples were
+                 removed since the previous run.
+
+        Returns:
+            ReasoningStats for this run.
+        """
+        start = time.perf_counter()
+        full = full or self._watermark == 0
+        asserted = []
+        if not full:
+            removals = objs_removals(self.world)
+            asserted = self._new_asserted_edges()
+            if removals != self._removals and self._asserted_changed():
+                logger.info("Asserted relations were removed or replaced; reasoning from scratch")
+                full = True
+            self._removals = removals
+        if full:
+            self._reset()
+            self._clear()
+            self._removals = objs_removals(self.world)
+            asserted = self._new_asserted_edges()
+        inferred = self._materialize(asserted)
+        self._write(inferred)
+
+        stats = ReasoningStats(full=full, asserted_triples=len(asserted),
+                               inferred_triples=len(inferred),
+                               seconds=time.perf_counter() - start)
+        logger.info(f"{'Full' if full else 'Incremental'} reasoning: {stats.asserted_triples} new "
+                    f"asserted, {stats.inferred_triples} inferred in {stats.seconds:.3f}s")
+        return stats
+
+    def closure(self, prop_name: str, subject) -> Set[int]:
+        """
+        Return the storids reachable from subject through a transitive property.
+
+        Args:
+            prop_name: Name of a transitive property, e.g. 'part_of'.
+            subject: An entity of the ontology.
+        """
+        for p in self._transitive:
+            if self._props[p].python_name == prop_name:
+                return set(self._succ[p].get(subject.storid, ()))
+        raise ValueError(f"'{prop_name}' is not a transitive property")
+
+__all__ = ['IncrementalReasoner', 'ReasoningStats', 'INFERRED_IRI']
@@ -5,7 +5,6 @@ This module defines the main classes and properties for the AIM2 ontology using
 It includes the core annotation classes and their relationships.
 """
 from owlready2 import (
-    get_ontology,
     Thing,
     ObjectProperty,
     DataProperty,
@@ -13,15 +12,22 @@ from owlready2 import (
     AnnotationProperty,
     default_world,
 )
+import threading
 
 # Import the base ontology
 base_iri = "http://purl.obolibrary.org/obo/aim2.owl"
 
 # Create a function to initialize the ontology
-def init_ontology():
-    """Initialize the ontology and return the onto object."""
+def init_ontology(world=None):
+    """
+    Initialize the ontology and return the onto object.
+
+    Args:
+        world: Owlready2 World to create the ontology in. Defaults to the
+              global default_world.
+    """
     # Get or create the ontology
-    onto = get_ontology(base_iri)
+    onto = (world or default_world).get_ontology(base_iri)
     
     # Bind the ontology to the default world
     onto = onto.get_namespace(base_iri)
@@ -93,9 +99,9 @@ def init_ontology():
             range = [Thing]
 
         class accumulates_in(ObjectProperty):
-            """Indicates where a substance or entity accumulates."""
-            domain = [Thing]
-            range = [Thing]
+            """Indicates where (tissue, species, condition) a compound accumulates."""
+            domain = [StructuralAnnotation]
+            range = [SourceAnnotation]
 
         class affects(ObjectProperty):
             """Generic relationship indicating that one entity affects another."""
@@ -160,13 +166,37 @@ def init_ontology():
     
     return onto
 
-# Initialize the ontology
-onto = init_ontology()
+# The lazily built ontology namespace, see get_onto()
+_onto = None
+_onto_lock = threading.Lock()
+
+def get_onto():
+    """
+    Return the AIM2 ontology namespace, building it on first access.
+
+    The schema is only created once per process, no matter how many threads
+    ask for it concurrently.
+    """
+    global _onto
+    if _onto is None:
+        with _onto_lock:
+            if _onto is None:
+                _onto = init_ontology()
+    return _onto
+
+def __getattr__(name):
+    """Resolve ``onto`` and the exported schema entities on first access."""
+    if name == 'onto':
+        return get_onto()
+    if name in __all__:
+        return getattr(get_onto(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Export commonly used classes and properties
 __all__ = [
     'onto',
     'init_ontology',
+    'get_onto',
     'Annotation',
     'StructuralAnnotation',
     'SourceAnnotation',
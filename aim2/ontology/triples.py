@@ -0,0 +1,152 @@
+"""
+Triple-level helpers for moving ontologies between Owlready2 worlds.
+
+Owlready2 stores triples in SQLite with per-world integer abbreviations, so a
+parsed ontology cannot be handed to another world as is. This module turns an
+ontology into a plain, picklable TripleSet (full IRIs, blank nodes as "_:N")
+and inserts a TripleSet into a world with one bulk write, using the same import
+path Owlready2 uses for its own parsers.
+"""
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+from owlready2 import World
+
+logger = logging.getLogger(__name__)
+
+# (subject, predicate, object) with IRIs or blank node ids as strings
+ObjTriple = Tuple[str, str, str]
+
+# (subject, predicate, value, datatype IRI or "@lang" or "")
+DataTriple = Tuple[str, str, object, str]
+
+@dataclass
+class TripleSet:
+    """The triples of one ontology, independent of any Owlready2 world."""
+    base_iri: str
+    objs: List[ObjTriple] = field(default_factory=list)
+    datas: List[DataTriple] = field(default_factory=list)
+    parse_seconds: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.objs) + len(self.datas)
+
+def _node(storid: int, iris: dict) -> str:
+    """Return the IRI of a storid, or a blank node id for negative storids."""
+    if storid < 0:
+        return f"_:{-storid}"
+    return iris[storid]
+
+def dump_triples(onto) -> TripleSet:
+    """
+    Export the triples of an Owlready2 ontology as a TripleSet.
+
+    Args:
+        onto: A loaded Owlready2 ontology.
+
+    Returns:
+        The ontology's triples, with every storid resolved to an IRI.
+    """
+    graph = onto.world.graph
+    c = onto.graph.c
+    iris = dict(graph.execute("SELECT storid, iri FROM resources"))
+
+    objs = []
+    for s, p, o in graph.execute("SELECT s, p, o FROM objs WHERE c=?", (c,)):
+        objs.append((_node(s, iris), iris[p], _node(o, iris)))
+
+    datas = []
+    for s, p, o, d in graph.execute("SELECT s, p, o, d FROM datas WHERE c=?", (c,)):
+        if isinstance(d, int):
+            d = iris.get(d, "")
+        datas.append((_node(s, iris), iris[p], o, d))
+
+    return TripleSet(base_iri=onto.base_iri, objs=objs, datas=datas)
+
+def parse_triples(source: Union[str, bytes], iri: Optional[str] = None) -> TripleSet:
+    """
+    Parse an ontology into a TripleSet without touching any shared world.
+
+    The ontology is parsed into a private in-memory World, so this function is
+    safe to run in worker processes.
+
+    Args:
+        source: Path or IRI of the ontology, or its serialized content.
+        iri: Base IRI used when source is raw content.
+
+    Returns:
+        The parsed triples, with parse_seconds set.
+    """
+    start = time.perf_counter()
+    world = World()
+    try:
+        if isinstance(source, bytes):
+            onto = world.get_ontology(iri or "http://anonymous/").load(fileobj=io.BytesIO(source))
+        else:
+            onto = world.get_ontology(source).load()
+        triples = dump_triples(onto)
+    finally:
+        world.close()
+    triples.parse_seconds = time.perf_counter() - start
+    return triples
+
+def insert_triples(world, triples: TripleSet):
+    """
+    Insert a TripleSet into a world as one ontology, in a single bulk write.
+
+    Existing triples of that ontology in the world are replaced.
+
+    Args:
+        world: Target Owlready2 World.
+        triples: Triples to insert.
+
+    Returns:
+        The Owlready2 ontology holding the inserted triples.
+    """
+    return insert_triple_sets(world, [triples])[0][0]
+
+def insert_triple_sets(world, triple_sets: List[TripleSet]) -> Tuple[list, List[float]]:
+    """
+    Insert several TripleSets into a world within one write transaction.
+
+    Each TripleSet becomes its own ontology; properties are resolved once all
+    sets are inserted, so that properties shared between sources are found.
+
+    Args:
+        world: Target Owlready2 World.
+        triple_sets: Triples to insert, one set per ontology.
+
+    Returns:
+        The Owlready2 ontologies and the seconds spent inserting each set,
+        both in the order of triple_sets.
+    """
+    ontologies = []
+    timings = []
+    world.graph.acquire_write_lock()
+    try:
+        for triples in triple_sets:
+            start = time.perf_counter()
+            onto = world.get_ontology(triples.base_iri)
+            insert_objs, insert_datas, _, finish = onto.graph.import_triples_from_queue(None)
+            insert_objs(triples.objs)
+            insert_datas(triples.datas)
+            finish()
+            onto.loaded = True
+            ontologies.append(onto)
+            timings.append(time.perf_counter() - start)
+            logger.debug(f"Inserted {len(triples)} triples into {triples.base_iri}")
+    finally:
+        world.graph.release_write_lock()
+
+    # Make the new properties available as Python attributes, as load() does
+    if world.graph.indexed:
+        for number, onto in enumerate(ontologies):
+            start = time.perf_counter()
+            onto._load_properties()
+            timings[number] += time.perf_counter() - start
+    return ontologies, timings
+
+__all__ = ['TripleSet', 'dump_triples', 'parse_triples', 'insert_triples', 'insert_triple_sets']
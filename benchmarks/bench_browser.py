@@ -0,0 +1,118 @@
+"""
+Benchmark pooled browser sessions against one browser per download.
+
+Uses a stub driver that simulates the launch time and resident memory of a
+headless Chrome session, and local HTTP servers standing in for publisher
+sites. Reports wall time, mean per-download latency, the number of browser
+launches, the memory allocated by all launches and the peak memory held by
+live sessions, for one session per PMID (max_pages_per_session=1) and for
+long-lived pooled sessions.
+
+Usage:
+    python -m benchmarks.bench_browser [--downloads N] [--workers N]
+                                       [--startup S] [--session-mb MB]
+"""
+import argparse
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aim2.corpus.browser import BrowserPool, download_pdf
+
+class _PublisherHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(0.02)
+        if self.path.endswith(".pdf"):
+            body = b"%PDF-1.7 " + b"x" * 50000
+        else:
+            body = f'<meta name="citation_pdf_url" content="{self.path}.pdf">'.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class _SessionTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.live = 0
+        self.peak = 0
+        self.launches = 0
+
+def stub_driver_factory(tracker: _SessionTracker, startup: float, session_mb: int):
+    class StubChrome:
+        def __init__(self):
+            time.sleep(startup)
+            # Memory a browser process would hold
+            self.ballast = bytearray(session_mb * 1024 * 1024)
+            self.page_source = ""
+            with tracker.lock:
+                tracker.launches += 1
+                tracker.live += 1
+                tracker.peak = max(tracker.peak, tracker.live)
+
+        def get(self, url):
+            with urllib.request.urlopen(url) as response:
+                self.page_source = response.read().decode()
+
+        def get_cookies(self):
+            return []
+
+        def execute_script(self, script):
+            return "StubChrome"
+
+        def quit(self):
+            self.ballast = None
+            with tracker.lock:
+                tracker.live -= 1
+    return StubChrome
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--downloads", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--startup", type=float, default=1.5, help="seconds to launch a browser")
+    parser.add_argument("--session-mb", type=int, default=50, help="memory of one browser")
+    args = parser.parse_args()
+
+    # Four publisher sites; each host:port counts as its own domain
+    servers = []
+    for _ in range(4):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _PublisherHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    urls = []
+    for number in range(args.downloads):
+        port = servers[number % len(servers)].server_address[1]
+        urls.append(f"http://127.0.0.1:{port}/article{number}")
+
+    cases = [("browser per PMID", 1), ("pooled sessions", args.downloads)]
+    print(f"{args.downloads} downloads, {args.workers} workers, {args.startup}s launch, "
+          f"{args.session_mb} MB per browser")
+    print(f"{'case':>18} {'seconds':>8} {'mean latency':>13} {'launches':>9} {'MB launched':>12} {'peak MB':>8}")
+    try:
+        for name, pages in cases:
+            tracker = _SessionTracker()
+            factory = stub_driver_factory(tracker, args.startup, args.session_mb)
+            start = time.perf_counter()
+            with BrowserPool(factory, workers=args.workers, max_pages_per_session=pages,
+                             per_domain=1) as pool:
+                for result in pool.map(urls, download_pdf):
+                    if not result.ok:
+                        raise RuntimeError(result.error)
+            seconds = time.perf_counter() - start
+            # Time a download occupies a worker, launch included
+            latency = seconds * args.workers / args.downloads
+            print(f"{name:>18} {seconds:>8.2f} {latency:>12.3f}s {tracker.launches:>9} "
+                  f"{tracker.launches * args.session_mb:>12} {tracker.peak * args.session_mb:>8}")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    main()
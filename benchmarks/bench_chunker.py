@@ -0,0 +1,162 @@
+"""
+Benchmark offset-preserving chunking against a string-copying splitter.
+
+Chunks a synthetic corpus with TextChunker and with LangChain's
+RecursiveCharacterTextSplitter (or, when LangChain is not installed, a
+port of its algorithm that likewise returns chunk strings), at the
+``extraction.chunking`` defaults. Reports MB of text per second, the peak
+traced memory of keeping every chunk of the corpus, and the peak of
+consuming TextChunker as a stream over the documents.
+
+Usage:
+    python -m benchmarks.bench_chunker [--documents N] [--paragraphs N]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+from aim2.corpus.chunker import TextChunker
+
+WORDS = ("flavonoid", "biosynthesis", "Arabidopsis", "thaliana", "transcription", "regulates",
+         "anthocyanin", "accumulation", "nitrogen", "stress", "seedlings", "quercetin",
+         "kaempferol", "glycoside", "light", "leaves", "roots", "in", "the", "of", "and", "by")
+
+def make_text(rng: random.Random, paragraphs: int) -> str:
+    result = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(2, 12)):
+            words = []
+            for _ in range(rng.randint(8, 25)):
+                words.append(rng.choice(WORDS))
+            sentences.append(" ".join(words).capitalize() + ".")
+        result.append(" ".join(sentences))
+    return "\n\n".join(result)
+
+def _split_keep(text: str, separator: str) -> List[str]:
+    """Split text, keeping each separator at the start of the following piece."""
+    parts = text.split(separator)
+    pieces = [parts[0]]
+    for part in parts[1:]:
+        pieces.append(separator + part)
+    return pieces
+
+def _merge(splits: List[str], size: int, overlap: int) -> List[str]:
+    chunks = []
+    current: List[str] = []
+    total = 0
+    for split in splits:
+        if total + len(split) > size and current:
+            chunk = "".join(current).strip()
+            if chunk:
+                chunks.append(chunk)
+            while total > overlap or (total + len(split) > size and total > 0):
+                total -= len(current[0])
+                current = current[1:]
+        current.append(split)
+        total += len(split)
+    chunk = "".join(current).strip()
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def copying_split(text: str, size: int, overlap: int,
+                  separators=("\n\n", "\n", " ", "")) -> List[str]:
+    """RecursiveCharacterTextSplitter's algorithm, returning chunk strings."""
+    separator, remaining = separators[-1], ()
+    for index, candidate in enumerate(separators):
+        if candidate == "" or candidate in text:
+            separator, remaining = candidate, separators[index + 1:]
+            break
+    splits = list(text) if separator == "" else _split_keep(text, separator)
+    chunks: List[str] = []
+    good: List[str] = []
+    for split in splits:
+        if len(split) < size:
+            good.append(split)
+            continue
+        if good:
+            chunks.extend(_merge(good, size, overlap))
+            good = []
+        if remaining:
+            chunks.extend(copying_split(split, size, overlap, remaining))
+        else:
+            chunks.append(split)
+    if good:
+        chunks.extend(_merge(good, size, overlap))
+    return chunks
+
+def string_splitter(size: int, overlap: int):
+    """Return (name, split function) of the string-returning splitter."""
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        try:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+        except ImportError:
+            RecursiveCharacterTextSplitter = None
+    if RecursiveCharacterTextSplitter is None:
+        def split(text):
+            return copying_split(text, size, overlap)
+        return "copying splitter", split
+    splitter = RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=overlap)
+    return "LangChain splitter", splitter.split_text
+
+def measure(corpus: List[str], split: Callable) -> tuple:
+    start = time.perf_counter()
+    count = 0
+    for text in corpus:
+        for _ in split(text):
+            count += 1
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    kept = []
+    for text in corpus:
+        kept.extend(split(text))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, seconds, peak
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    corpus = []
+    size = 0
+    for _ in range(args.documents):
+        text = make_text(rng, args.paragraphs)
+        size += len(text)
+        corpus.append(text)
+    megabytes = size / 1e6
+    chunker = TextChunker(args.chunk_size, args.chunk_overlap)
+    name, split = string_splitter(args.chunk_size, args.chunk_overlap)
+
+    print(f"{args.documents} documents, {megabytes:.1f} MB of text (kept outside the measurement)")
+    print(f"{'splitter':>20} {'chunks':>7} {'seconds':>8} {'MB/s':>7} {'kept MB':>8}")
+    cases = [(name, split), ("TextChunker views", chunker.split)]
+    for label, function in cases:
+        count, seconds, peak = measure(corpus, function)
+        print(f"{label:>20} {count:>7} {seconds:>8.2f} {megabytes / seconds:>7.1f} {peak / 1e6:>8.1f}")
+
+    # Streaming: documents are generated, chunked and dropped one at a time
+    def documents():
+        stream_rng = random.Random(7)
+        for number in range(args.documents):
+            yield (str(number), make_text(stream_rng, args.paragraphs))
+    tracemalloc.start()
+    count = 0
+    for _ in chunker.chunk_documents(documents()):
+        count += 1
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{'TextChunker stream':>20} {count:>7} {'':>8} {'':>7} {peak / 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
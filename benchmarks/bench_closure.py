@@ -0,0 +1,95 @@
+"""
+Benchmark closure-index queries against recursive Owlready2 traversal.
+
+A part_of tree of structural annotations is built in a private world, with a
+functional annotation located in every part. The query "everything located in
+any part of the root" is answered by walking ``has_part`` recursively and by
+the closure index.
+
+Usage:
+    python -m benchmarks.bench_closure [--nodes N] [--fanout N] [--queries N]
+"""
+import argparse
+import random
+import time
+
+from owlready2 import World
+
+from aim2.ontology.closure import ClosureIndex
+from aim2.ontology.schema import init_ontology
+
+def build_tree(onto, nodes: int, fanout: int) -> list:
+    """Add a part_of tree with one located_in fact per part."""
+    parts = []
+    with onto:
+        for i in range(nodes):
+            part = onto.StructuralAnnotation(f"part_{i}")
+            if i:
+                part.part_of.append(parts[(i - 1) // fanout])
+            parts.append(part)
+            onto.FunctionalAnnotation(f"metabolite_{i}").located_in.append(part)
+    return parts
+
+def walk_located(part) -> set:
+    """Recursive Owlready2 traversal of the parts below a part."""
+    located = set(part.has_location)
+    for child in part.has_part:
+        located |= walk_located(child)
+    return located
+
+def walk_is_ancestor(ancestor, node) -> bool:
+    """Recursive Owlready2 traversal up the part_of relation."""
+    for parent in node.part_of:
+        if parent is ancestor or walk_is_ancestor(ancestor, parent):
+            return True
+    return False
+
+def index_located(index: ClosureIndex, part) -> set:
+    """The same query answered by the closure index."""
+    located = set(index.descendants("located_in", part))
+    for storid in index.descendants("part_of", part):
+        located.update(index.descendants("located_in", storid))
+    return located
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    world = World()
+    onto = init_ontology(world)
+    parts = build_tree(onto, args.nodes, args.fanout)
+
+    start = time.perf_counter()
+    index = ClosureIndex(onto)
+    index.rebuild()
+    print(f"Index build for {args.nodes} parts: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    expected = len(walk_located(parts[0]))
+    walk_root = time.perf_counter() - start
+    start = time.perf_counter()
+    found = len(index_located(index, parts[0]))
+    index_root = time.perf_counter() - start
+    assert found == expected
+    print(f"Root query ({found} results): walk {walk_root:.3f}s, index {index_root:.3f}s")
+
+    samples = []
+    for _ in range(args.queries):
+        samples.append((rng.choice(parts), rng.choice(parts)))
+    start = time.perf_counter()
+    for ancestor, node in samples:
+        walk_is_ancestor(ancestor, node)
+    walk_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for ancestor, node in samples:
+        index.is_ancestor("part_of", ancestor, node)
+    index_seconds = time.perf_counter() - start
+    print(f"{args.queries} ancestor tests: walk {walk_seconds:.3f}s, index {index_seconds:.4f}s")
+    world.close()
+
+if __name__ == "__main__":
+    main()
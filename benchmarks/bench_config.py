@@ -0,0 +1,44 @@
+"""
+Micro-benchmark configuration lookups.
+
+Compares chained indexing of the plain dict parsed from config.yml with
+indexing and attribute access on the frozen Config snapshot, the cost of a
+get_config() call once the configuration is loaded, and pickling the
+snapshot for process-pool workers.
+
+Usage:
+    python -m benchmarks.bench_config [--iterations N]
+"""
+import argparse
+import pickle
+import timeit
+
+from aim2.config import _load_config_file, get_config
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000000)
+    args = parser.parse_args()
+
+    plain = _load_config_file()
+    config = get_config()
+    llm = config.extraction.llm
+    cases = {
+        "dict chain": lambda: plain["extraction"]["llm"]["temperature"],
+        "snapshot [] chain": lambda: config["extraction"]["llm"]["temperature"],
+        "snapshot attribute chain": lambda: config.extraction.llm.temperature,
+        "typed section attribute": lambda: llm.temperature,
+        "get_config() + attributes": lambda: get_config().extraction.llm.temperature,
+    }
+    print(f"{'lookup':>28} {'ns/op':>8}")
+    for name, lookup in cases.items():
+        seconds = timeit.timeit(lookup, number=args.iterations)
+        print(f"{name:>28} {seconds / args.iterations * 1e9:>8.1f}")
+
+    data = pickle.dumps(config)
+    rounds = 10000
+    seconds = timeit.timeit(lambda: pickle.loads(pickle.dumps(config)), number=rounds)
+    print(f"pickle round trip: {seconds / rounds * 1e6:.1f} us ({len(data)} bytes)")
+
+if __name__ == "__main__":
+    main()
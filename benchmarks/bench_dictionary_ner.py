@@ -0,0 +1,142 @@
+"""
+Benchmark the dictionary NER pre-pass: scan throughput and LLM calls avoided.
+
+Builds an EntityDictionary from synthetic ontology terms (plus a few real
+chemical, anatomy and condition names), reports build, save and load times,
+then scans synthetic abstracts in MB/s. Finally runs EntityExtractor over the
+chunks of those abstracts with and without the dictionary, against a stand-in
+client that answers instantly, and reports the prompts sent and the share of
+LLM calls avoided. That share depends on how many chunks hold no term or
+only unambiguous ones, i.e. on the corpus and the ontologies loaded.
+
+Usage:
+    python -m benchmarks.bench_dictionary_ner [--terms N] [--documents N] [--chunk-size C]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from aim2.corpus.chunker import TextChunker
+from aim2.extraction.llm_interface import LLMResponse
+from aim2.extraction.ner import EntityDictionary, EntityExtractor, PromptPacker
+
+KNOWN_TERMS = [
+    ("quercetin", "Chemical", "CHEBI_16243", False),
+    ("kaempferol", "Chemical", "CHEBI_28499", False),
+    ("anthocyanin", "Chemical", "CHEBI_38697", False),
+    ("glucosinolate", "Chemical", "CHEBI_24279", False),
+    ("ABA", "Chemical", "CHEBI_2365", False),
+    ("JA", "Chemical", "CHEBI_18292", False),
+    ("rosette leaf", "PlantAnatomy", "PO_0000014", False),
+    ("seed coat", "PlantAnatomy", "PO_0020038", False),
+    ("root", "PlantAnatomy", "PO_0009005", False),
+    ("drought", "ExperimentalCondition", "PECO_0007174", False),
+    ("high light", "ExperimentalCondition", "PECO_0007185", True),
+]
+
+# Sentences with unambiguous terms, ambiguous terms (acronyms), and none
+SENTENCES = [
+    "Quercetin and kaempferol accumulate in the rosette leaf under drought.",
+    "Anthocyanin content increased in the seed coat.",
+    "Glucosinolate levels were measured in root tissue.",
+    "Treatment with ABA or JA altered the response.",
+    "The samples were collected at three time points.",
+    "Statistical significance was assessed with a t-test.",
+    "Plants were grown in a growth chamber for four weeks.",
+    "RNA was extracted and sequenced as described previously.",
+    "These results suggest a conserved regulatory mechanism.",
+]
+
+SYLLABLES = ["ar", "ben", "cyl", "do", "eth", "flav", "gly", "hex", "ino", "lac", "myr", "no",
+             "ol", "pen", "quin", "rho", "sty", "tan", "ur", "vin", "xan", "yl", "zo"]
+
+def synthetic_terms(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    labels = ["Chemical", "PlantAnatomy", "MolecularTrait", "PlantTrait"]
+    for number in range(count):
+        words = []
+        for _ in range(rng.choice((1, 1, 2, 2, 3, 4))):
+            word = ""
+            for _ in range(rng.randint(2, 4)):
+                word += rng.choice(SYLLABLES)
+            words.append(word)
+        yield " ".join(words), rng.choice(labels), f"SYN_{number}", rng.random() < 0.1
+
+def make_documents(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents = []
+    for number in range(count):
+        sentences = []
+        for _ in range(rng.randint(6, 14)):
+            # Most sentences of an abstract mention no ontology term
+            if rng.random() < 0.85:
+                sentences.append(rng.choice(SENTENCES[4:]))
+            else:
+                sentences.append(rng.choice(SENTENCES[:4]))
+        documents.append((f"PMID{number}", " ".join(sentences)))
+    return documents
+
+class _InstantClient:
+    """Answers every NER prompt with no entities."""
+    params = {"max_tokens": 1000}
+
+    async def map(self, prompts):
+        for index, prompt in enumerate(prompts):
+            yield index, LLMResponse(prompt, '{"entities": []}')
+
+def count_prompts(chunks, dictionary):
+    extractor = EntityExtractor(_InstantClient(), PromptPacker(max_output_tokens=1000), dictionary)
+
+    async def run():
+        async for _ in extractor.extract(chunks):
+            pass
+    asyncio.run(run())
+    return extractor.prompts, extractor.skipped
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--terms", type=int, default=200000)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    terms = list(synthetic_terms(args.terms)) + KNOWN_TERMS
+    dictionary = EntityDictionary.build(terms)
+    build_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "aim2.owl.dict"
+        start = time.perf_counter()
+        dictionary.save(path)
+        save_seconds = time.perf_counter() - start
+        size = path.stat().st_size
+        start = time.perf_counter()
+        EntityDictionary.load(path)
+        load_seconds = time.perf_counter() - start
+    print(f"{len(dictionary)} terms, {len(dictionary.goto)} states: built in {build_seconds:.2f}s, "
+          f"saved in {save_seconds:.2f}s ({size / 2**20:.1f} MB), loaded in {load_seconds:.2f}s")
+
+    documents = make_documents(args.documents)
+    total = 0
+    for _, text in documents:
+        total += len(text)
+    start = time.perf_counter()
+    matches = 0
+    for _, text in documents:
+        matches += len(dictionary.scan(text))
+    seconds = time.perf_counter() - start
+    print(f"scanned {total / 2**20:.1f} MB in {seconds:.2f}s: {total / 2**20 / seconds:.1f} MB/s, "
+          f"{matches} matches")
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_size // 5)
+    chunks = list(chunker.chunk_documents(documents))
+    baseline, _ = count_prompts(chunks, None)
+    prompts, skipped = count_prompts(chunks, dictionary)
+    print(f"{len(chunks)} chunks: {baseline} prompts without the dictionary, {prompts} with it "
+          f"({skipped} chunks resolved locally); {1 - prompts / baseline:.0%} of LLM calls avoided")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark the export formats: write time, file size and reload time.
+
+A private world gets --classes labelled classes with synonyms and --facts
+extracted facts, then the AIM2 ontology is exported in every format.
+RDF/XML and N-Triples are reloaded with Owlready2, the columnar dump with
+load_columns().
+
+Usage:
+    python -m benchmarks.bench_export [--classes N] [--facts N]
+"""
+import argparse
+import gzip
+import tempfile
+import time
+from pathlib import Path
+
+from owlready2 import AnnotationProperty, World
+
+from aim2.ontology.export import export_ontology, load_columns
+from aim2.ontology.facts import bulk_add_facts
+from aim2.ontology.schema import init_ontology
+
+FILES = ("aim2.owl", "aim2.owl.gz", "aim2.nt", "aim2.nt.gz", "aim2.cols")
+
+def build(classes: int, facts: int):
+    """Create the benchmark world and return it with the AIM2 namespace."""
+    world = World()
+    onto = init_ontology(world)
+    with world.get_ontology("http://www.geneontology.org/formats/oboInOwl#"):
+        type("hasExactSynonym", (AnnotationProperty,), {})
+    with onto:
+        for i in range(classes):
+            cls = type(f"Term_{i}", (onto.StructuralAnnotation,), {})
+            cls.label = [f"term {i}"]
+            cls.hasExactSynonym = [f"synonym {i}"]
+    records = []
+    for i in range(facts):
+        records.append((f"gene_{i}", "has_functional_annotation", f"function_{i % 500}", 0.9, f"PMID:{i}"))
+    bulk_add_facts(onto, records)
+    return world, onto
+
+def reload(path: Path) -> None:
+    if path.name.endswith(".cols"):
+        load_columns(path)
+        return
+    world = World()
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            world.get_ontology("http://purl.obolibrary.org/obo/aim2.owl").load(fileobj=f)
+    else:
+        world.get_ontology(str(path)).load()
+    world.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--classes", type=int, default=20000)
+    parser.add_argument("--facts", type=int, default=50000)
+    args = parser.parse_args()
+
+    world, onto = build(args.classes, args.facts)
+    print(f"{'file':>12} {'write s':>8} {'size MB':>8} {'reload s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in FILES:
+            path = Path(tmp) / name
+            start = time.perf_counter()
+            export_ontology(onto, path)
+            write_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            reload(path)
+            reload_seconds = time.perf_counter() - start
+            size = path.stat().st_size / (1024 * 1024)
+            print(f"{name:>12} {write_seconds:>8.2f} {size:>8.2f} {reload_seconds:>9.2f}")
+    world.close()
+
+if __name__ == "__main__":
+    main()
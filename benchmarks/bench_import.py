@@ -0,0 +1,71 @@
+"""
+Startup benchmark for the AIM2 package.
+
+Each statement is timed in a fresh interpreter so that the numbers reflect a
+cold import, the way a newly spawned pipeline worker sees it.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat N]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+STATEMENTS = [
+    "import aim2",
+    "import aim2.ontology",
+    "from aim2.ontology import AIM2Ontology",
+    "from aim2.ontology import onto",
+]
+
+# Runs inside the child interpreter and prints one JSON line
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "owlready2_loaded": "owlready2" in sys.modules,
+}}))
+"""
+
+def measure(statement: str, repeat: int) -> dict:
+    """Run ``statement`` in ``repeat`` fresh interpreters and summarize."""
+    root = Path(__file__).resolve().parent.parent
+    timings = []
+    rss = []
+    owlready2_loaded = False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            cwd=root, check=True, capture_output=True, text=True,
+        ).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        timings.append(sample["seconds"])
+        rss.append(sample["max_rss_kb"])
+        owlready2_loaded = sample["owlready2_loaded"]
+    return {
+        "statement": statement,
+        "median_ms": statistics.median(timings) * 1000,
+        "max_rss_mb": max(rss) / 1024,
+        "owlready2_loaded": owlready2_loaded,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'statement':<45} {'median ms':>10} {'RSS MB':>8}  owlready2")
+    for statement in STATEMENTS:
+        result = measure(statement, args.repeat)
+        print(f"{result['statement']:<45} {result['median_ms']:>10.1f} "
+              f"{result['max_rss_mb']:>8.1f}  {result['owlready2_loaded']}")
+
+if __name__ == "__main__":
+    main()
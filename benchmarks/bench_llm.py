@@ -0,0 +1,104 @@
+"""
+Benchmark LLM request throughput against the number of requests in flight.
+
+Runs AsyncLLMClient against a local chat completions stand-in that answers
+after a fixed latency and fails a share of requests with 429 (with
+Retry-After) or 503. Sends the same prompts one after another, as a
+per-chunk loop would, and with 4, 16 and 64 requests in flight, reporting
+requests and tokens per second and the retries made.
+
+Usage:
+    python -m benchmarks.bench_llm [--prompts N] [--latency S] [--error-rate P]
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aim2.extraction.llm_interface import AsyncLLMClient
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.latency)
+        headers = {}
+        if self.server.rng.random() < self.server.error_rate:
+            status = self.server.rng.choice([429, 503])
+            if status == 429:
+                headers["Retry-After"] = "0.1"
+            data = b'{"error": {"message": "injected"}}'
+        else:
+            status = 200
+            prompt = body["messages"][-1]["content"]
+            data = json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": '{"entities": []}'}}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 200},
+            }).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+async def run_sequential(client: AsyncLLMClient, prompts) -> None:
+    for prompt in prompts:
+        await client.complete(prompt)
+    await client.aclose()
+
+async def run_concurrent(client: AsyncLLMClient, prompts) -> None:
+    async for _, response in client.map(prompts):
+        if not response.ok:
+            raise RuntimeError(response.error)
+    await client.aclose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.latency = args.latency
+    server.error_rate = args.error_rate
+    server.rng = random.Random(5)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    chunk = "Flavonoid biosynthesis in Arabidopsis thaliana is regulated by MYB factors. " * 13
+    prompts = []
+    for number in range(args.prompts):
+        prompts.append(f"Extract the entities of chunk {number}:\n{chunk}")
+
+    print(f"{args.prompts} prompts, {args.latency}s latency, {args.error_rate:.0%} errors")
+    print(f"{'in flight':>10} {'seconds':>8} {'requests/s':>11} {'tokens/s':>9} {'retries':>8}")
+    cases = [("sequential", 1), ("4", 4), ("16", 16), ("64", 64)]
+    try:
+        for name, concurrency in cases:
+            client = AsyncLLMClient(base_url=base_url, max_concurrency=concurrency,
+                                    backoff_base=0.05, max_retries=8)
+            start = time.perf_counter()
+            if concurrency == 1:
+                asyncio.run(run_sequential(client, prompts))
+            else:
+                asyncio.run(run_concurrent(client, prompts))
+            seconds = time.perf_counter() - start
+            tokens = client.stats.prompt_tokens + client.stats.completion_tokens
+            print(f"{name:>10} {seconds:>8.2f} {args.prompts / seconds:>11.1f} "
+                  f"{tokens / seconds:>9.0f} {client.stats.retries:>8}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
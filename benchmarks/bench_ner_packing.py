@@ -0,0 +1,79 @@
+"""
+Benchmark NER prompts and tokens per 1000 documents, packed against one chunk per prompt.
+
+Chunks synthetic abstracts with TextChunker at the configured chunk size and
+builds the NER prompts with PromptPacker, once with one chunk per prompt and
+once packed up to the token budget. Reports LLM calls, estimated prompt
+tokens and the share of those tokens spent on the repeated instructions, per
+1000 documents. Costs are estimated (4 characters per token) without calling
+a model.
+
+Usage:
+    python -m benchmarks.bench_ner_packing [--documents N] [--chunk-size C] [--token-budget T]
+"""
+import argparse
+import random
+
+from aim2.corpus.chunker import TextChunker
+from aim2.extraction.llm_interface import estimate_tokens
+from aim2.extraction.ner import PromptPacker
+
+SENTENCES = [
+    "Quercetin and kaempferol accumulate in the leaves of Arabidopsis thaliana under high light.",
+    "Expression of CHS and F3H was upregulated by drought stress in roots.",
+    "Anthocyanin content increased in the seed coat of Brassica napus.",
+    "The MYB12 transcription factor regulates flavonol biosynthesis.",
+    "Treatment with methyl jasmonate induced the synthesis of glucosinolates.",
+    "These metabolites have been associated with reduced cardiovascular risk in humans.",
+]
+
+def make_documents(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents = []
+    for number in range(count):
+        sentences = []
+        # Abstract-sized documents of 6 to 14 sentences
+        for _ in range(rng.randint(6, 14)):
+            sentences.append(rng.choice(SENTENCES))
+        documents.append((f"PMID{number}", " ".join(sentences)))
+    return documents
+
+def measure(packer: PromptPacker, chunks):
+    calls = 0
+    tokens = 0
+    for prompt in packer.pack(chunks):
+        calls += 1
+        tokens += estimate_tokens(prompt.text)
+    return calls, tokens
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--token-budget", type=int, default=6000)
+    parser.add_argument("--max-chunks", type=int, default=8)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents)
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_size // 5)
+    chunks = list(chunker.chunk_documents(documents))
+    scale = 1000 / args.documents
+
+    cases = [
+        ("unpacked", PromptPacker(max_chunks=1)),
+        ("packed", PromptPacker(token_budget=args.token_budget, max_chunks=args.max_chunks,
+                                max_output_tokens=1000)),
+    ]
+    print(f"{args.documents} documents, {len(chunks)} chunks of up to {args.chunk_size} characters")
+    print(f"{'':>9} {'calls/1000 docs':>16} {'tokens/1000 docs':>17} {'instructions':>13}")
+    baseline = None
+    for name, packer in cases:
+        calls, tokens = measure(packer, chunks)
+        share = calls * packer.header_tokens / tokens
+        print(f"{name:>9} {calls * scale:>16.0f} {tokens * scale:>17.0f} {share:>13.0%}")
+        if baseline is None:
+            baseline = (calls, tokens)
+    print(f"packing saves {1 - calls / baseline[0]:.0%} of calls and {1 - tokens / baseline[1]:.0%} of prompt tokens")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark sequential versus parallel import of several source ontologies.
+
+Synthetic RDF/XML ontologies are generated in a temporary directory and
+imported once with repeated import_ontology() calls and once with
+import_ontologies(). The import cache is disabled so that every run parses.
+
+Usage:
+    python -m benchmarks.bench_ontology_import [--sources N] [--classes N] [--workers N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from owlready2 import Thing, World
+
+from aim2.ontology.manager import AIM2Ontology
+
+def write_source(path: Path, iri: str, n_classes: int) -> None:
+    """Write a synthetic ontology with a chain-shaped class hierarchy."""
+    world = World()
+    onto = world.get_ontology(iri)
+    with onto:
+        parent = Thing
+        for i in range(n_classes):
+            cls = type(f"Term_{i}", (parent,), {"namespace": onto})
+            cls.label = [f"term {i}"]
+            if i % 50 == 49:
+                parent = Thing
+            else:
+                parent = cls
+    onto.save(file=str(path), format="rdfxml")
+    world.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sources", type=int, default=4)
+    parser.add_argument("--classes", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        sources = {}
+        for n in range(args.sources):
+            path = tmp_dir / f"source_{n}.owl"
+            write_source(path, f"http://example.org/source_{n}.owl", args.classes)
+            sources[f"source_{n}"] = str(path)
+
+        sequential = AIM2Ontology(quadstore_path=tmp_dir / "sequential.sqlite3", use_cache=False)
+        start = time.perf_counter()
+        for prefix, path in sources.items():
+            sequential.import_ontology(path, prefix)
+        sequential_seconds = time.perf_counter() - start
+        sequential.close()
+
+        parallel = AIM2Ontology(quadstore_path=tmp_dir / "parallel.sqlite3", use_cache=False)
+        start = time.perf_counter()
+        report = parallel.import_ontologies(sources, max_workers=args.workers)
+        parallel_seconds = time.perf_counter() - start
+        parallel.close()
+
+    print(f"{args.sources} sources x {args.classes} classes")
+    for prefix, timing in report.items():
+        print(f"  {prefix:<12} parse {timing['parse_seconds']:.2f}s  "
+              f"insert {timing['insert_seconds']:.2f}s  {timing['triples']} triples")
+    print(f"sequential import_ontology: {sequential_seconds:.2f}s")
+    print(f"parallel import_ontologies: {parallel_seconds:.2f}s "
+          f"({sequential_seconds / parallel_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
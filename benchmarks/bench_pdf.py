@@ -0,0 +1,90 @@
+"""
+Benchmark PDF text extraction throughput against the number of workers.
+
+Generates PDFs with PyMuPDF and extracts them with PdfExtractor using 1, 2,
+4, ... workers up to the CPU count, reporting pages per second. Without
+PyMuPDF (or with --synthetic) each page is replaced by a fixed amount of
+CPU work, which still shows how the pool scales.
+
+Usage:
+    python -m benchmarks.bench_pdf [--documents N] [--pages N] [--synthetic]
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from aim2.corpus.document import Document, Section
+from aim2.corpus.pdf import PdfExtractor, extract_pdf_text
+
+TEXT = ("Flavonoid biosynthesis in Arabidopsis thaliana is regulated by MYB "
+        "transcription factors and responds to light and nitrogen stress. ")
+
+def synthetic_extract(path, doc_id=None, max_pages=100, ocr=False, dpi=300):
+    """CPU-bound stand-in for PyMuPDF: about a millisecond of work per page."""
+    pages = min(int(Path(path).stem.rsplit("-", 1)[1]), max_pages)
+    document = Document(doc_id=doc_id)
+    for number in range(pages):
+        total = 0
+        for value in range(20000):
+            total += value * value
+        document.sections.append(Section(f"Page {number + 1}", TEXT))
+    return document, pages, pages
+
+def make_pdfs(directory: Path, documents: int, pages: int):
+    import fitz
+    paths = []
+    for number in range(documents):
+        pdf = fitz.open()
+        for _ in range(pages):
+            page = pdf.new_page()
+            page.insert_textbox(page.rect + (72, 72, -72, -72), TEXT * 20)
+        path = directory / f"paper{number}-{pages}.pdf"
+        pdf.save(path)
+        paths.append(path)
+    return paths
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--synthetic", action="store_true", help="do not use PyMuPDF")
+    args = parser.parse_args()
+
+    synthetic = args.synthetic or importlib.util.find_spec("fitz") is None
+    extract = synthetic_extract if synthetic else extract_pdf_text
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+
+    print(f"{'synthetic pages' if synthetic else 'PyMuPDF'}, {args.documents} documents x "
+          f"{args.pages} pages, {cpus} CPUs")
+    print(f"{'workers':>8} {'seconds':>8} {'pages/s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        if synthetic:
+            paths = []
+            for number in range(args.documents):
+                paths.append(Path(tmp) / f"paper{number}-{args.pages}.pdf")
+        else:
+            paths = make_pdfs(Path(tmp), args.documents, args.pages)
+        baseline = None
+        for workers in counts:
+            with PdfExtractor(workers=workers, extract=extract) as extractor:
+                # Start the workers outside the measurement
+                list(extractor.extract_all(paths[:workers]))
+                start = time.perf_counter()
+                pages = 0
+                for result in extractor.extract_all(paths):
+                    pages += result.pages
+                seconds = time.perf_counter() - start
+            rate = pages / seconds
+            baseline = baseline or rate
+            print(f"{workers:>8} {seconds:>8.2f} {rate:>9.0f} {rate / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark streaming PMC XML parsing of bulk archives.
+
+Builds synthetic PMC Open Access style .tar.gz packages of increasing size
+and parses them with iter_articles(), reporting articles per second and
+the peak traced memory. For comparison, the DOM approach reads each member
+completely and parses it with ElementTree.fromstring(), on a single
+archive holding one large ``<pmc-articleset>``.
+
+Usage:
+    python -m benchmarks.bench_pmc_parser [--articles N] [--paragraphs N]
+"""
+import argparse
+import io
+import tarfile
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from aim2.corpus.parser import article_document, iter_articles
+
+PARAGRAPH = ("<p>Flavonoid biosynthesis in <italic>Arabidopsis thaliana</italic> is regulated by "
+             "MYB transcription factors <xref ref-type=\"bibr\">[12]</xref> and responds to "
+             "light and nitrogen stress in developing seeds and leaves.</p>")
+
+def make_article(number: int, paragraphs: int) -> str:
+    sections = []
+    for section in range(4):
+        sections.append(f"<sec><title>Section {section}</title>{PARAGRAPH * paragraphs}</sec>")
+    return (f"<article><front><article-meta><article-id pub-id-type=\"pmid\">{number}</article-id>"
+            f"<article-id pub-id-type=\"pmc\">PMC{number}</article-id>"
+            f"<title-group><article-title>Article {number}</article-title></title-group>"
+            f"<abstract><p>Abstract of article {number}.</p></abstract></article-meta></front>"
+            f"<body>{''.join(sections)}</body></article>")
+
+def write_archive(path: Path, articles: int, paragraphs: int, per_member: int) -> None:
+    """Write an archive of members holding per_member articles each."""
+    with tarfile.open(path, mode="w:gz") as tar:
+        for start in range(0, articles, per_member):
+            parts = []
+            for number in range(start, min(start + per_member, articles)):
+                parts.append(make_article(number, paragraphs))
+            data = f"<pmc-articleset>{''.join(parts)}</pmc-articleset>".encode("utf-8")
+            info = tarfile.TarInfo(f"oa/{start}.xml")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+def parse_dom(path: Path) -> int:
+    count = 0
+    with tarfile.open(path, mode="r|*") as tar:
+        for member in tar:
+            root = ET.fromstring(tar.extractfile(member).read())
+            for article in root.iter("article"):
+                article_document(article, member.name)
+                count += 1
+    return count
+
+def parse_stream(path: Path) -> int:
+    count = 0
+    for _ in iter_articles(path):
+        count += 1
+    return count
+
+def measure(parse, path: Path):
+    """Return (articles, seconds, peak MB); the peak is measured in a second run."""
+    start = time.perf_counter()
+    count = parse(path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    parse(path)
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return count, seconds, peak
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=1000, help="articles in the smallest archive")
+    parser.add_argument("--paragraphs", type=int, default=10, help="paragraphs per section")
+    args = parser.parse_args()
+
+    print(f"{'case':>26} {'articles':>9} {'seconds':>8} {'articles/s':>11} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in (1, 4):
+            articles = args.articles * factor
+            path = Path(tmp) / f"bulk{factor}.tar.gz"
+            write_archive(path, articles, args.paragraphs, per_member=articles)
+            cases = [("DOM, " + f"{articles} articles", parse_dom),
+                     ("streaming, " + f"{articles} articles", parse_stream)]
+            for name, parse in cases:
+                count, seconds, peak = measure(parse, path)
+                print(f"{name:>26} {count:>9} {seconds:>8.2f} {count / seconds:>11.0f} {peak:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the text cleaning engine against the rules applied one by one.
+
+Generates a synthetic corpus of paged documents with the artifacts of PDF
+text extraction (running headers, page numbers, hyphenated line breaks,
+typographic quotes, ligatures, invisible characters) and cleans it with
+TextCleaner's combined passes and with sequential_clean(), which applies
+each rule as its own pass. Reports MB of input per second and checks that
+both produce the same text.
+
+Usage:
+    python -m benchmarks.bench_preprocessor [--documents N] [--pages N] [--workers N]
+"""
+import argparse
+import random
+import time
+
+from aim2.corpus.preprocessor import TextCleaner, sequential_clean
+
+WORDS = ("flavonoid", "biosynthesis", "Arabidopsis", "thaliana", "transcription", "regulates",
+         "anthocyanin", "accumulation", "nitrogen", "stress", "seedlings", "\ufb02avonol",
+         "\u201cMYB12\u201d", "quercetin", "kaempferol", "glycoside", "co\u00adexpression",
+         "\u2013", "light", "leaves", "roots", "in", "the", "of", "and", "by")
+
+def make_document(rng: random.Random, number: int, pages: int) -> list:
+    """Pages of one synthetic paper."""
+    result = []
+    for page in range(1, pages + 1):
+        lines = [f"Journal of Plant Biology {2000 + number % 20}; {number}:{page}", ""]
+        continued = False
+        for _ in range(40):
+            words = ["ated"] if continued else []
+            for _ in range(rng.randint(8, 14)):
+                words.append(rng.choice(WORDS))
+            continued = rng.random() < 0.15
+            if continued:
+                words.append("hyphen-")
+            lines.append("  ".join(words) if rng.random() < 0.1 else " ".join(words))
+            if rng.random() < 0.08:
+                lines.append("")
+        lines.append("")
+        lines.append(f"Page {page} of {pages}")
+        result.append("\n".join(lines))
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=0, help="also time clean_batch on N processes")
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    corpus = []
+    size = 0
+    for number in range(args.documents):
+        pages = make_document(rng, number, args.pages)
+        for page in pages:
+            size += len(page.encode("utf-8"))
+        corpus.append(pages)
+    megabytes = size / 1e6
+    print(f"{args.documents} documents x {args.pages} pages, {megabytes:.1f} MB")
+    print(f"{'engine':>22} {'seconds':>8} {'MB/s':>8}")
+
+    start = time.perf_counter()
+    expected = []
+    for pages in corpus:
+        expected.append(sequential_clean(pages))
+    seconds = time.perf_counter() - start
+    print(f"{'sequential rules':>22} {seconds:>8.2f} {megabytes / seconds:>8.2f}")
+
+    cleaner = TextCleaner()
+    start = time.perf_counter()
+    cleaned = []
+    for pages in corpus:
+        cleaned.append(cleaner.clean_pages(pages))
+    seconds = time.perf_counter() - start
+    print(f"{'combined passes':>22} {seconds:>8.2f} {megabytes / seconds:>8.2f}")
+    mismatches = 0
+    for got, want in zip(cleaned, expected):
+        if got != want:
+            mismatches += 1
+
+    if args.workers > 1:
+        texts = []
+        for pages in corpus:
+            texts.append("\n".join(pages))
+        start = time.perf_counter()
+        cleaner.clean_batch(texts, workers=args.workers)
+        seconds = time.perf_counter() - start
+        label = f"batch, {args.workers} workers"
+        print(f"{label:>22} {seconds:>8.2f} {megabytes / seconds:>8.2f}")
+
+    print(f"outputs identical: {mismatches == 0} ({mismatches} of {len(corpus)} differ)")
+    if mismatches:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark PubMed retrieval throughput at a fixed request budget.
+
+Runs EntrezClient against a local E-utilities stand-in that adds a fixed
+latency to every request, and reports PMIDs per second for:
+
+- one request per PMID on a single worker (what a naive loop does);
+- history-server batches on a single worker;
+- history-server batches on a pool of workers sharing the rate limit.
+
+Every case spends the same number of requests, so the difference is how
+much each request carries and how well the rate budget is kept busy.
+
+Usage:
+    python -m benchmarks.bench_pubmed [--requests N] [--batch-size N]
+                                      [--rate R] [--latency S] [--workers N]
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from aim2.corpus.pubmed import EntrezClient
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        params = parse_qs(self.rfile.read(length).decode("ascii"))
+        time.sleep(self.server.latency)
+        if self.path.endswith("epost.fcgi"):
+            with self.server.lock:
+                query_key = str(len(self.server.history) + 1)
+                self.server.history[query_key] = params["id"][0].split(",")
+            body = f"<ePostResult><QueryKey>{query_key}</QueryKey><WebEnv>WE</WebEnv></ePostResult>"
+        else:
+            ids = self.server.history[params["query_key"][0]]
+            start = int(params["retstart"][0])
+            parts = []
+            for pmid in ids[start:start + int(params["retmax"][0])]:
+                parts.append(f"<PubmedArticle><PMID>{pmid}</PMID></PubmedArticle>")
+            body = f"<PubmedArticleSet>{''.join(parts)}</PubmedArticleSet>"
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def run_case(url: str, pmids, batch_size: int, workers: int, rate: float):
+    """Fetch pmids; returns (requests, PMIDs received, seconds)."""
+    received = 0
+    start = time.perf_counter()
+    with EntrezClient(email="bench@example.com", base_url=url, rate=rate,
+                      batch_size=batch_size, max_workers=workers) as client:
+        for _, data in client.fetch_pmids(pmids):
+            received += data.count(b"<PubmedArticle>")
+        requests = client.stats.requests
+    return requests, received, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=30, help="request budget per case")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per request")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.history = {}
+    server.latency = args.latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/entrez/eutils/"
+
+    # One epost request is part of every budget
+    fetches = args.requests - 1
+    cases = [
+        ("per-PMID, 1 worker", 1, 1),
+        ("history batches, 1 worker", args.batch_size, 1),
+        (f"history batches, {args.workers} workers", args.batch_size, args.workers),
+    ]
+    print(f"budget {args.requests} requests, {args.rate:g} req/s, {args.latency * 1000:.0f} ms latency")
+    print(f"{'case':>28} {'requests':>9} {'PMIDs':>8} {'seconds':>8} {'PMIDs/s':>9}")
+    try:
+        for name, batch_size, workers in cases:
+            pmids = []
+            for number in range(fetches * batch_size):
+                pmids.append(str(10000000 + number))
+            requests, received, seconds = run_case(url, pmids, batch_size, workers, args.rate)
+            print(f"{name:>28} {requests:>9} {received:>8} {seconds:>8.2f} {received / seconds:>9.0f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
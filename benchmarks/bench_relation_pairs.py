@@ -0,0 +1,127 @@
+"""
+Benchmark candidate pairs and relation prompts, all pairs against sentence windows.
+
+Generates synthetic abstracts and full texts with tagged entities and counts,
+per 1000 documents, the candidate pairs and prompts of:
+
+- all pairs: every two entities of a document, one prompt per pair;
+- windowed: pairs in the same or adjacent sentences that the schema allows
+  a relation between (candidate_pairs()), batched by shared sentences
+  (group_pairs()).
+
+Also reports estimated prompt tokens and the time spent enumerating pairs.
+
+Usage:
+    python -m benchmarks.bench_relation_pairs [--documents N] [--sentences S S ...]
+"""
+import argparse
+import random
+import time
+
+from aim2.extraction.llm_interface import estimate_tokens
+from aim2.extraction.ner import Entity
+from aim2.extraction.relation_extraction import (RelationExtractor, SentenceIndex, candidate_pairs,
+                                                 relation_signatures)
+
+# Sentence templates; {Type} slots become tagged entities
+TEMPLATES = [
+    "{Chemical} accumulates in the {PlantAnatomy} of {Species}.",
+    "{ExperimentalCondition} increased the level of {Chemical}.",
+    "{Gene} upregulates {Gene} under {ExperimentalCondition}.",
+    "{Chemical} is made via the {MolecularTrait} pathway.",
+    "Plants were grown for four weeks before sampling.",
+    "Statistical significance was assessed with a t-test.",
+    "{Chemical} intake has been associated with {HumanTrait}.",
+    "Mutants showed reduced {PlantTrait} and lower {Chemical}.",
+]
+
+NAMES = {
+    "Chemical": ["quercetin", "kaempferol", "rutin", "anthocyanin", "glucoraphanin", "catechin"],
+    "PlantAnatomy": ["leaf", "root", "seed coat", "petal", "trichome"],
+    "Species": ["Arabidopsis thaliana", "Brassica napus", "Vitis vinifera"],
+    "ExperimentalCondition": ["Drought", "High light", "Cold stress", "UV-B"],
+    "Gene": ["MYB12", "CHS", "F3H", "PAP1", "TT8"],
+    "MolecularTrait": ["phenylpropanoid", "flavonoid", "glucosinolate"],
+    "HumanTrait": ["lower blood pressure", "reduced inflammation"],
+    "PlantTrait": ["plant height", "seed yield", "flowering time"],
+}
+
+def make_document(doc_id: str, sentences: int, rng: random.Random):
+    """A text and its entities, from random templates."""
+    parts = []
+    entities = []
+    length = 0
+    for _ in range(sentences):
+        template = rng.choice(TEMPLATES)
+        position = 0
+        while True:
+            open_at = template.find("{", position)
+            if open_at == -1:
+                parts.append(template[position:])
+                length += len(template) - position
+                break
+            close_at = template.find("}", open_at)
+            parts.append(template[position:open_at])
+            length += open_at - position
+            label = template[open_at + 1:close_at]
+            name = rng.choice(NAMES[label])
+            entities.append(Entity(doc_id, length, length + len(name), name, label))
+            parts.append(name)
+            length += len(name)
+            position = close_at + 1
+        parts.append(" ")
+        length += 1
+    return "".join(parts), entities
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[10, 300],
+                        help="sentences per document (abstracts, full texts)")
+    args = parser.parse_args()
+
+    signatures = relation_signatures()
+    extractor = RelationExtractor(None, signatures)
+    header_tokens = estimate_tokens(extractor.instructions)
+    print(f"{'sentences':>9} {'':>9} {'pairs/1000':>11} {'prompts/1000':>13} "
+          f"{'tokens/1000':>12} {'enumerate s':>12}")
+    for sentences in args.sentences:
+        rng = random.Random(sentences)
+        count = args.documents if sentences <= 50 else max(1, args.documents // 20)
+        documents = []
+        for number in range(count):
+            documents.append((f"doc{number}",) + make_document(f"doc{number}", sentences, rng))
+        scale = 1000 / count
+
+        # Every pair of a document, one prompt (instructions, sentence pair) per pair
+        start = time.perf_counter()
+        all_pairs = 0
+        all_tokens = 0
+        for doc_id, text, entities in documents:
+            index = SentenceIndex(text)
+            for i, first in enumerate(entities):
+                for second in entities[i + 1:]:
+                    all_pairs += 1
+                    span = index.span(index.sentence_of(first.start), index.sentence_of(second.start))
+                    all_tokens += header_tokens + (span[1] - span[0]) // 4 + 20
+        naive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pairs = 0
+        for doc_id, text, entities in documents:
+            pairs += len(candidate_pairs(entities, SentenceIndex(text), signatures))
+        window_seconds = time.perf_counter() - start
+        prompts = 0
+        tokens = 0
+        for doc_id, text, entities in documents:
+            for prompt in extractor.prompts_for(doc_id, text, entities):
+                prompts += 1
+                tokens += estimate_tokens(prompt.text)
+
+        print(f"{sentences:>9} {'all':>9} {all_pairs * scale:>11.0f} {all_pairs * scale:>13.0f} "
+              f"{all_tokens * scale:>12.0f} {naive_seconds:>12.3f}")
+        print(f"{'':>9} {'windowed':>9} {pairs * scale:>11.0f} {prompts * scale:>13.0f} "
+              f"{tokens * scale:>12.0f} {window_seconds:>12.3f}")
+
+if __name__ == "__main__":
+    main()
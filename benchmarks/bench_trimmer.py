@@ -0,0 +1,98 @@
+"""
+Benchmark the streaming trimmer against loading the full source in Owlready2.
+
+A synthetic GO-like RDF/XML ontology is generated, then each approach runs in
+its own interpreter so that peak RSS can be compared:
+
+- full: load the whole source with Owlready2 (what trimming by iterating
+  over onto.classes() requires)
+- stream: trim_ontology() with an allow-list of a few hundred terms
+
+Usage:
+    python -m benchmarks.bench_trimmer [--classes N] [--keep N]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+_FULL = """
+import json, resource, time
+from owlready2 import World
+start = time.perf_counter()
+world = World()
+onto = world.get_ontology({source!r}).load()
+n_classes = len(list(onto.classes()))
+print(json.dumps({{"seconds": time.perf_counter() - start, "classes": n_classes,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+_STREAM = """
+import json, resource
+from aim2.ontology.importers import trim_ontology
+report = trim_ontology({source!r}, {destination!r}, {allow_list!r})
+print(json.dumps({{"seconds": report.seconds, "classes": report.kept_classes,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+def write_source(path: Path, n_classes: int) -> None:
+    """Write a GO-like ontology: a random tree with labels and synonyms."""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0"?>\n<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"'
+                  ' xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"'
+                  ' xmlns:owl="http://www.w3.org/2002/07/owl#"'
+                  ' xmlns:oboInOwl="http://www.geneontology.org/formats/oboInOwl#">\n')
+        out.write(f'  <owl:Ontology rdf:about="{OBO}go.owl"/>\n')
+        out.write(f'  <owl:ObjectProperty rdf:about="{OBO}BFO_0000050"/>\n')
+        for i in range(n_classes):
+            out.write(f'  <owl:Class rdf:about="{OBO}GO_{i:07d}">\n')
+            if i:
+                out.write(f'    <rdfs:subClassOf rdf:resource="{OBO}GO_{rng.randrange(i):07d}"/>\n')
+            if i > 10 and i % 3 == 0:
+                out.write('    <rdfs:subClassOf><owl:Restriction>'
+                          f'<owl:onProperty rdf:resource="{OBO}BFO_0000050"/>'
+                          f'<owl:someValuesFrom rdf:resource="{OBO}GO_{rng.randrange(i):07d}"/>'
+                          '</owl:Restriction></rdfs:subClassOf>\n')
+            out.write(f'    <rdfs:label>term {i}</rdfs:label>\n')
+            out.write(f'    <oboInOwl:hasExactSynonym>synonym of term {i}</oboInOwl:hasExactSynonym>\n')
+            out.write('  </owl:Class>\n')
+        out.write('</rdf:RDF>\n')
+
+def run(code: str) -> dict:
+    root = Path(__file__).resolve().parent.parent
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--classes", type=int, default=50000)
+    parser.add_argument("--keep", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "go.owl"
+        write_source(source, args.classes)
+        size_mb = source.stat().st_size / (1024 * 1024)
+        allow_list = []
+        for i in random.Random(7).sample(range(args.classes), args.keep):
+            allow_list.append(f"GO:{i:07d}")
+
+        full = run(_FULL.format(source=str(source)))
+        stream = run(_STREAM.format(source=str(source), destination=str(Path(tmp) / "subset.owl"),
+                                    allow_list=allow_list))
+
+    print(f"source: {args.classes} classes, {size_mb:.1f} MB; allow-list: {args.keep} terms")
+    print(f"{'mode':<8} {'seconds':>8} {'peak RSS MB':>12} {'classes':>8}")
+    for name, result in (("full", full), ("stream", stream)):
+        print(f"{name:<8} {result['seconds']:>8.2f} {result['max_rss_kb'] / 1024:>12.1f} "
+              f"{result['classes']:>8}")
+
+if __name__ == "__main__":
+    main()
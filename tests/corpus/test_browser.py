@@ -0,0 +1,141 @@
+"""
+Tests for the pooled browser sessions, with a stub driver and a local HTTP server.
+"""
+import threading
+import time
+import unittest
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _PublisherHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        host = self.headers["Host"].split(":")[0]
+        with server.lock:
+            server.active[host] = server.active.get(host, 0) + 1
+            server.peak[host] = max(server.peak.get(host, 0), server.active[host])
+        try:
+            time.sleep(0.05)
+            if self.path.endswith(".pdf"):
+                body = b"%PDF-1.7 " + self.headers.get("Cookie", "").encode()
+            else:
+                name = self.path.strip("/")
+                body = f'<html><head><meta name="citation_pdf_url" content="/{name}.pdf"></head></html>'.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active[host] -= 1
+
+class StubDriver:
+    """Minimal stand-in for a Selenium driver, fetching pages with urllib."""
+    started = 0
+    crashed = set()
+    lock = threading.Lock()
+
+    def __init__(self):
+        with StubDriver.lock:
+            StubDriver.started += 1
+        self.page_source = ""
+        self.quit_called = False
+
+    def get(self, url):
+        if "crash" in url and url not in StubDriver.crashed:
+            StubDriver.crashed.add(url)
+            raise RuntimeError("session deleted because of page crash")
+        with urllib.request.urlopen(url) as response:
+            self.page_source = response.read().decode()
+
+    def get_cookies(self):
+        return [{"name": "session", "value": "abc"}]
+
+    def execute_script(self, script):
+        return "StubBrowser/1.0"
+
+    def quit(self):
+        self.quit_called = True
+
+class TestBrowserPool(unittest.TestCase):
+    """Test cases for BrowserPool."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PublisherHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.active = {}
+        self.server.peak = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+        StubDriver.started = 0
+        StubDriver.crashed = set()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sessions_are_reused_and_recycled(self):
+        """Sessions serve many downloads and restart after max_pages_per_session."""
+        from aim2.corpus.browser import BrowserPool, download_pdf
+        urls = []
+        for number in range(12):
+            host = "127.0.0.1" if number % 2 else "localhost"
+            urls.append(f"http://{host}:{self.port}/article{number}")
+        with BrowserPool(StubDriver, workers=3, max_pages_per_session=3, per_domain=1) as pool:
+            results = list(pool.map(urls, download_pdf))
+        self.assertEqual(len(results), 12)
+        for result in results:
+            self.assertTrue(result.ok, result.error)
+            self.assertEqual(result.value, b"%PDF-1.7 session=abc")
+        # 12 pages, 3 per session
+        self.assertEqual(pool.stats.sessions_started, 4)
+        self.assertEqual(pool.stats.sessions_recycled, 4)
+        self.assertEqual(pool.stats.jobs, 12)
+        self.assertEqual(self.server.peak, {"localhost": 1, "127.0.0.1": 1})
+
+    def test_per_domain_limit_lets_other_hosts_through(self):
+        """Jobs of a busy host do not hold back jobs of other hosts."""
+        from aim2.corpus.browser import BrowserPool
+        busy = f"http://localhost:{self.port}/"
+        other = f"http://127.0.0.1:{self.port}/"
+        urls = [busy + "a", busy + "b", busy + "c", busy + "d", other + "e"]
+        with BrowserPool(StubDriver, workers=2, per_domain=1) as pool:
+            order = []
+            for result in pool.map(urls):
+                order.append(result.url)
+        self.assertLess(order.index(other + "e"), 3)
+        self.assertEqual(self.server.peak["localhost"], 1)
+
+    def test_crash_recycles_session_and_retries(self):
+        """A failing session is replaced and the job retried; persistent failures are reported."""
+        from aim2.corpus.browser import BrowserPool
+
+        def always_fails(driver, url):
+            raise RuntimeError("blocked")
+
+        with BrowserPool(StubDriver, workers=1, retries=1) as pool:
+            page = pool.submit(f"http://127.0.0.1:{self.port}/crash").result(timeout=10)
+            self.assertIn("citation_pdf_url", page)
+            self.assertEqual(pool.stats.crashes, 1)
+            self.assertEqual(pool.stats.sessions_started, 2)
+            with self.assertRaises(RuntimeError):
+                pool.submit(f"http://127.0.0.1:{self.port}/x", always_fails).result(timeout=10)
+            self.assertEqual(pool.stats.failures, 1)
+            self.assertEqual(pool.stats.retries, 2)
+        with self.assertRaises(RuntimeError):
+            pool.submit("http://127.0.0.1/late")
+
+    def test_citation_pdf_url(self):
+        """PDF links are resolved against the page URL."""
+        from aim2.corpus.browser import citation_pdf_url
+        html = '<html><head><META NAME="citation_pdf_url" CONTENT="/doi/pdf/10.1/x"></head></html>'
+        self.assertEqual(citation_pdf_url(html, "https://pub.example.org/doi/10.1/x"),
+                         "https://pub.example.org/doi/pdf/10.1/x")
+        self.assertIsNone(citation_pdf_url("<html></html>"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for the offset-preserving text chunker.
+"""
+import unittest
+
+TEXT = ("Flavonoids accumulate in A. thaliana leaves (Fig. 2). They respond to light, "
+        "e.g. UV-B, and to nitrogen stress. Anthocyanins follow! Is kaempferol next?\n"
+        "A second line.\n\n" + "Quercetin glycosides are abundant in seeds. " * 30 +
+        "\n\nShort closing paragraph.")
+
+class TestTextChunker(unittest.TestCase):
+    """Test cases for TextChunker."""
+
+    def test_chunks_are_views(self):
+        """Chunks are bounded, overlapping spans of the shared text."""
+        from aim2.corpus.chunker import TextChunker
+        chunker = TextChunker(chunk_size=200, chunk_overlap=60)
+        chunks = list(chunker.split(TEXT, "PMC1"))
+        self.assertGreater(len(chunks), 5)
+        covered = set()
+        for chunk in chunks:
+            self.assertIs(chunk.buffer, TEXT)
+            self.assertEqual(chunk.doc_id, "PMC1")
+            self.assertLessEqual(len(chunk), 200)
+            self.assertEqual(chunk.text, TEXT[chunk.start:chunk.end])
+            self.assertEqual(chunk.text, chunk.text.strip())
+            covered.update(range(chunk.start, chunk.end))
+        for index, char in enumerate(TEXT):
+            if not char.isspace():
+                self.assertIn(index, covered)
+
+        # Sentences are kept whole and neighbours overlap
+        for chunk in chunks[1:-1]:
+            self.assertTrue(chunk.text.startswith("Quercetin"), chunk.text)
+            self.assertTrue(chunk.text.endswith("seeds."), chunk.text)
+        self.assertLess(chunks[2].start, chunks[1].end)
+        # Paragraph breaks are not merged into the chunks of a long paragraph
+        self.assertTrue(chunks[0].text.endswith("A second line."))
+        self.assertEqual(chunks[-1].text, "Short closing paragraph.")
+
+    def test_sentence_ends(self):
+        """Initials and abbreviations do not end sentences."""
+        from aim2.corpus.chunker import sentence_ends
+        ends = sentence_ends(TEXT, 0, TEXT.index("\n"))
+        starts = []
+        for end in ends:
+            starts.append(TEXT[end:end + 4])
+        self.assertEqual(starts, ["They", "Anth", "Is k"])
+
+    def test_documents_and_config(self):
+        """Document streams are chunked lazily with offsets into Document.text."""
+        from aim2.corpus.chunker import TextChunker
+        from aim2.corpus.document import Document, Section
+        chunker = TextChunker.from_config({"chunk_size": 100, "chunk_overlap": 20, "separator": "\n"})
+        self.assertEqual(chunker.separators[:2], ["\n\n", "\n"])
+        documents = iter([
+            Document(doc_id="a", title="Title", sections=[Section("Results", TEXT)]),
+            ("b", "word " * 50),
+        ])
+        chunks = chunker.chunk_documents(documents)
+        first = next(chunks)
+        self.assertEqual((first.doc_id, first.text), ("a", "Title\n\nResults"))
+        rest = list(chunks)
+        self.assertEqual(rest[-1].doc_id, "b")
+        for chunk in rest:
+            self.assertLessEqual(len(chunk), 100)
+        with self.assertRaises(ValueError):
+            TextChunker(chunk_size=100, chunk_overlap=100)
+
+if __name__ == "__main__":
+    unittest.main()
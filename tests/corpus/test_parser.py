@@ -0,0 +1,111 @@
+"""
+Tests for the streaming PMC XML parser.
+"""
+import io
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+ARTICLE = """<article xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:mml="http://www.w3.org/1998/Math/MathML">
+<front><article-meta>
+<article-id pub-id-type="pmid">{pmid}</article-id>
+<article-id pub-id-type="pmc">{pmc}</article-id>
+<article-id pub-id-type="doi">10.1000/{pmid}</article-id>
+<title-group><article-title>Flavonoids in <italic>Arabidopsis</italic> {pmid}</article-title></title-group>
+<abstract abstract-type="graphical"><p>Graphical abstract.</p></abstract>
+<abstract><sec><title>Background</title><p>Plants make   flavonoids.</p></sec>
+<sec><title>Results</title><p>They protect leaves.</p></sec></abstract>
+</article-meta></front>
+<body>
+<p>Preamble paragraph.</p>
+<sec><title>Introduction</title><p>Anthocyanins <xref ref-type="bibr">[1]</xref> are pigments.</p>
+<fig id="f1"><caption><p>Figure text.</p></caption></fig>
+<sec><title>Scope</title><p>Nested text with <mml:math><mml:mi>x</mml:mi></mml:math> math.</p></sec></sec>
+<sec><title>Methods</title><p>Extraction.</p><table-wrap><table><tr><td>cell</td></tr></table></table-wrap></sec>
+</body>
+<back><ref-list><ref>Reference.</ref></ref-list></back>
+</article>"""
+
+def article(pmid, pmc="PMC1"):
+    return ARTICLE.format(pmid=pmid, pmc=pmc)
+
+def make_archive(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, text in members:
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+class TestPmcParser(unittest.TestCase):
+    """Test cases for the streaming PMC parser."""
+
+    def test_article_fields(self):
+        """Identifiers, title, abstract and sections are extracted without tables or figures."""
+        from aim2.corpus.parser import parse_article
+        document = parse_article(article("111", "222").encode("utf-8"), "a.nxml")
+        self.assertEqual((document.doc_id, document.pmid, document.pmcid, document.doi),
+                         ("PMC222", "111", "PMC222", "10.1000/111"))
+        self.assertEqual(document.title, "Flavonoids in Arabidopsis 111")
+        self.assertEqual(document.abstract,
+                         "Background\n\nPlants make flavonoids.\n\nResults\n\nThey protect leaves.")
+        titles = []
+        for section in document.sections:
+            titles.append(section.title)
+        self.assertEqual(titles, ["", "Introduction", "Methods"])
+        self.assertEqual(document.sections[0].text, "Preamble paragraph.")
+        self.assertEqual(document.sections[1].text,
+                         "Anthocyanins [1] are pigments.\n\nScope\n\nNested text with math.")
+        self.assertEqual(document.sections[2].text, "Extraction.")
+        self.assertNotIn("Reference", document.text)
+        self.assertNotIn("cell", document.text)
+
+    def test_archive_streaming(self):
+        """Archives are read member by member; malformed members are skipped."""
+        from aim2.corpus.parser import iter_archive, iter_articles
+        articleset = f"<pmc-articleset>{article('2', 'PMC2')}{article('3', 'PMC3')}</pmc-articleset>"
+        members = [
+            ("pkg/a.nxml", article("1", "PMC1")),
+            ("pkg/readme.txt", "not xml"),
+            ("pkg/broken.nxml", "<article><front>"),
+            ("pkg/set.xml", articleset),
+        ]
+        pmids = []
+        for document in iter_archive(make_archive(members)):
+            pmids.append((document.pmid, document.source))
+        self.assertEqual(pmids, [("1", "pkg/a.nxml"), ("2", "pkg/set.xml"), ("3", "pkg/set.xml")])
+
+        import xml.etree.ElementTree as ET
+        with self.assertRaises(ET.ParseError):
+            list(iter_archive(make_archive(members), skip_errors=False))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bulk.tar.gz"
+            path.write_bytes(make_archive(members).getvalue())
+            self.assertEqual(len(list(iter_articles(path))), 3)
+            single = Path(tmp) / "set.xml"
+            single.write_text(articleset, encoding="utf-8")
+            self.assertEqual(len(list(iter_articles(single))), 2)
+
+    def test_memory_does_not_grow(self):
+        """Peak memory is independent of the number of articles in a stream."""
+        import tracemalloc
+        from aim2.corpus.parser import iter_stream
+
+        def peak(count):
+            data = ("<pmc-articleset>" + article("1") * count + "</pmc-articleset>").encode("utf-8")
+            tracemalloc.start()
+            for _ in iter_stream(io.BytesIO(data)):
+                pass
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        self.assertLess(peak(2000), peak(200) * 1.5)
+
+if __name__ == "__main__":
+    unittest.main()
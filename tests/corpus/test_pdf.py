@@ -0,0 +1,97 @@
+"""
+Tests for the process-pool PDF extraction stage.
+"""
+import importlib.util
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+HAS_PYMUPDF = importlib.util.find_spec("fitz") is not None
+
+def fake_extract(path, doc_id=None, max_pages=100, ocr=False, dpi=300):
+    """Stand-in for extract_pdf_text driven by the file name."""
+    from aim2.corpus.document import Document, Section
+    name = Path(path).stem
+    if name.startswith("slow"):
+        time.sleep(float(name[4:]))
+    elif name == "hang":
+        time.sleep(60)
+    elif name == "crash":
+        os._exit(3)
+    elif name == "broken":
+        raise ValueError("cannot open broken document")
+    document = Document(doc_id=doc_id, sections=[Section("Page 1", f"text of {name}")])
+    return document, min(5, max_pages), 5
+
+class TestPdfExtractor(unittest.TestCase):
+    """Test cases for PdfExtractor."""
+
+    def test_completion_order_and_failures(self):
+        """Results stream as they finish; failures do not stall the batch."""
+        from aim2.corpus.pdf import PdfExtractor
+        jobs = ["slow0.6.pdf", "hang.pdf", "crash.pdf", "broken.pdf", "a.pdf", ("doc-b", "b.pdf")]
+        start = time.perf_counter()
+        with PdfExtractor(workers=3, timeout=1.5, max_pages=2, extract=fake_extract) as extractor:
+            results = list(extractor.extract_all(jobs))
+            elapsed = time.perf_counter() - start
+            self.assertEqual(extractor.timeouts, 1)
+            self.assertEqual(extractor.crashes, 1)
+
+            by_id = {}
+            order = []
+            for result in results:
+                by_id[result.doc_id] = result
+                order.append(result.doc_id)
+            self.assertEqual(len(results), 6)
+            self.assertLess(elapsed, 10)
+            # The hung document is reported last, after everything queued behind it
+            self.assertEqual(order[-1], "hang")
+            self.assertLess(order.index("a"), order.index("slow0.6"))
+            self.assertTrue(by_id["hang"].timed_out)
+            self.assertIn("exited", by_id["crash"].error)
+            self.assertIn("ValueError", by_id["broken"].error)
+            self.assertTrue(by_id["doc-b"].ok)
+            self.assertEqual(by_id["a"].document.text, "Page 1\n\ntext of a")
+            self.assertEqual((by_id["a"].pages, by_id["a"].page_count), (2, 5))
+
+            # The pool recovered and can run another batch
+            again = list(extractor.extract_all(["c.pdf"]))
+            self.assertTrue(again[0].ok)
+
+    def test_abandoned_iteration(self):
+        """Stopping early does not leak results into the next batch."""
+        from aim2.corpus.pdf import PdfExtractor
+        with PdfExtractor(workers=2, timeout=5, extract=fake_extract) as extractor:
+            for result in extractor.extract_all(["a.pdf", "slow0.3.pdf", "b.pdf"]):
+                break
+            results = list(extractor.extract_all(["c.pdf"]))
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0].doc_id, "c")
+
+    def test_from_config(self):
+        """Limits come from the corpus.pdf section."""
+        from aim2.corpus.pdf import PdfExtractor
+        extractor = PdfExtractor.from_config({"max_pages": 7, "dpi": 150, "timeout": 20}, workers=1)
+        self.assertEqual(extractor.options, {"max_pages": 7, "ocr": False, "dpi": 150})
+        self.assertEqual(extractor.timeout, 20)
+
+    @unittest.skipIf(not HAS_PYMUPDF, "PyMuPDF not installed")
+    def test_extract_pdf_text(self):
+        """PyMuPDF extraction reads at most max_pages pages of text."""
+        import fitz
+        from aim2.corpus.pdf import extract_pdf_text
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "paper.pdf"
+            pdf = fitz.open()
+            for number in range(3):
+                pdf.new_page().insert_text((72, 72), f"Page text {number}")
+            pdf.save(path)
+            document, pages, page_count = extract_pdf_text(str(path), max_pages=2)
+        self.assertEqual((pages, page_count), (2, 3))
+        self.assertIn("Page text 1", document.text)
+        self.assertNotIn("Page text 2", document.text)
+
+if __name__ == "__main__":
+    unittest.main()
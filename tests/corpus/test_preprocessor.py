@@ -0,0 +1,76 @@
+"""
+Tests for the text cleaning engine.
+"""
+import unittest
+
+def make_pages(count):
+    """Pages of a paper with a running header, a footer and artifacts."""
+    genes = ["CHS", "CHI", "F3H", "FLS", "DFR", "ANS"]
+    pages = []
+    for number in range(1, count + 1):
+        gene = genes[number % len(genes)]
+        pages.append(
+            f"Plant Physiology  Vol. 12\n"
+            f"{gene}  expression is regu-\n"
+            f"lated by {gene} factors (\u201cMYB12\u201d)\u2014see Fig. {number}.\n"
+            f"\n"
+            f"The \ufb01rst section on {gene} ends here\n"
+            f"and continues on the {gene} line.\n"
+            f"Page {number} of {count}\n"
+        )
+    return pages
+
+class TestTextCleaner(unittest.TestCase):
+    """Test cases for TextCleaner."""
+
+    def test_clean_text(self):
+        """Characters are normalized and lines reflowed into paragraphs."""
+        from aim2.corpus.preprocessor import TextCleaner
+        cleaner = TextCleaner()
+        text = "Dehydro-\r\nflavonol and\u00a0caf\u00adfeic acid\n  12  \n\n\nNon-\nMYB \u2013 genes"
+        self.assertEqual(cleaner.clean(text),
+                         "Dehydroflavonol and caffeic acid\n\nNon- MYB - genes")
+        self.assertEqual(TextCleaner(join_lines=False).clean("one\ntwo\n\nthree"),
+                         "one\ntwo\n\nthree")
+
+    def test_headers_and_footers(self):
+        """Lines repeated at the page edges are removed, page numbers included."""
+        from aim2.corpus.preprocessor import TextCleaner, detect_repeated_lines, is_page_number
+        self.assertTrue(is_page_number("Page 3 of 12"))
+        self.assertTrue(is_page_number("- 7 -"))
+        self.assertFalse(is_page_number("Table 3"))
+
+        cleaner = TextCleaner()
+        text = cleaner.clean_pages(make_pages(4))
+        self.assertNotIn("Plant Physiology", text)
+        self.assertNotIn("Page", text)
+        self.assertIn('CHI expression is regulated by CHI factors ("MYB12")-see Fig. 1.', text)
+        self.assertIn("The first section on FLS ends here and continues on the FLS line.", text)
+        # Two pages are too few to tell a header from content
+        self.assertIn("Plant Physiology Vol. 12", cleaner.clean_pages(make_pages(2)))
+        self.assertEqual(detect_repeated_lines([["a"], ["b"], ["c"]]), set())
+
+    def test_matches_sequential_rules(self):
+        """The combined passes give the output of the rules applied one by one."""
+        from aim2.corpus.document import Document, Section
+        from aim2.corpus.preprocessor import TextCleaner, sequential_clean
+        for settings in ({}, {"dehyphenate": False}, {"join_lines": False},
+                         {"drop_page_numbers": False, "min_fraction": 0.9}):
+            cleaner = TextCleaner(**settings)
+            pages = make_pages(5)
+            self.assertEqual(cleaner.clean_pages(pages), sequential_clean(pages, **settings))
+            for page in pages:
+                self.assertEqual(cleaner.clean(page), sequential_clean(page, **settings))
+
+        sections = []
+        for number, page in enumerate(make_pages(3)):
+            sections.append(Section(f"Page {number + 1}", page))
+        document = Document(doc_id="paper", title="A  \u201ctitle\u201d", sections=sections)
+        cleaned = TextCleaner().clean_batch([document, "x\ny"])
+        self.assertEqual(cleaned[0].title, 'A "title"')
+        self.assertEqual(len(cleaned[0].sections), 1)
+        self.assertEqual(cleaned[0].sections[0].text, sequential_clean(make_pages(3)))
+        self.assertEqual(cleaned[1], "x y")
+
+if __name__ == "__main__":
+    unittest.main()
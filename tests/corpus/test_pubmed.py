@@ -0,0 +1,254 @@
+"""
+Tests for the concurrent E-utilities client, against a local stand-in server.
+"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+class _EntrezHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers["Content-Length"])
+        params = parse_qs(self.rfile.read(length).decode("ascii"))
+        endpoint = self.path.rsplit("/", 1)[-1][:-len(".fcgi")]
+        with server.lock:
+            server.requests.append((time.monotonic(), endpoint, params))
+            failure = server.failures.pop(0) if server.failures else None
+        if failure is not None:
+            self._reply(failure, b"unavailable", {"Retry-After": "0"})
+            return
+        self._reply(200, getattr(self, endpoint)(params))
+
+    def _history(self, ids, params):
+        server = self.server
+        with server.lock:
+            webenv = params.get("WebEnv", [f"WE{len(server.history)}"])[0]
+            keys = server.history.setdefault(webenv, {})
+            query_key = str(len(keys) + 1)
+            keys[query_key] = ids
+        return webenv, query_key
+
+    def esearch(self, params):
+        term = params["term"][0]
+        if term.startswith("#"):
+            ids = self.server.history[params["WebEnv"][0]][term[1:]]
+        else:
+            ids = sorted(self.server.records)
+        webenv, query_key = self._history(ids, params)
+        retmax = int(params.get("retmax", ["20"])[0])
+        id_list = ""
+        for pmid in ids[:retmax]:
+            id_list += f"<Id>{pmid}</Id>"
+        return (f"<eSearchResult><Count>{len(ids)}</Count><QueryKey>{query_key}</QueryKey>"
+                f"<WebEnv>{webenv}</WebEnv><IdList>{id_list}</IdList></eSearchResult>").encode()
+
+    def epost(self, params):
+        webenv, query_key = self._history(params["id"][0].split(","), params)
+        return f"<ePostResult><QueryKey>{query_key}</QueryKey><WebEnv>{webenv}</WebEnv></ePostResult>".encode()
+
+    def efetch(self, params):
+        ids = self.server.history[params["WebEnv"][0]][params["query_key"][0]]
+        start = int(params["retstart"][0])
+        articles = ""
+        for pmid in ids[start:start + int(params["retmax"][0])]:
+            articles += f"<PubmedArticle><PMID>{pmid}</PMID></PubmedArticle>"
+        return f"<PubmedArticleSet>{articles}</PubmedArticleSet>".encode()
+
+    def elink(self, params):
+        if params.get("cmd") == ["neighbor_history"]:
+            ids = self.server.history[params["WebEnv"][0]][params["query_key"][0]]
+            linked = []
+            for pmid in ids:
+                if pmid in self.server.links:
+                    linked.append(self.server.links[pmid])
+            webenv, query_key = self._history(linked, params)
+            return (f"<eLinkResult><LinkSet><LinkSetDbHistory><QueryKey>{query_key}</QueryKey>"
+                    f"</LinkSetDbHistory><WebEnv>{webenv}</WebEnv></LinkSet></eLinkResult>").encode()
+        linksets = ""
+        for pmid in params["id"]:
+            links = ""
+            if pmid in self.server.links:
+                links = f"<LinkSetDb><Link><Id>{self.server.links[pmid]}</Id></Link></LinkSetDb>"
+            linksets += f"<LinkSet><IdList><Id>{pmid}</Id></IdList>{links}</LinkSet>"
+        return f"<eLinkResult>{linksets}</eLinkResult>".encode()
+
+def start_stand_in(records=25):
+    """Start a local E-utilities stand-in serving PMIDs 1..records."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EntrezHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.records = set()
+    for number in range(1, records + 1):
+        server.records.add(str(number).zfill(3))
+    server.links = {"002": "PMC2", "004": "PMC4"}
+    server.history = {}
+    server.requests = []
+    server.failures = []
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/entrez/eutils/"
+
+def _pmids(data):
+    import xml.etree.ElementTree as ET
+    pmids = []
+    for element in ET.fromstring(data).iterfind("PubmedArticle/PMID"):
+        pmids.append(element.text)
+    return pmids
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the shared token bucket."""
+
+    def test_spaces_acquisitions_across_threads(self):
+        """Tokens are handed out at the configured rate whatever the number of threads."""
+        from aim2.corpus.ratelimit import TokenBucket
+        bucket = TokenBucket(rate=50)
+
+        def acquire_five():
+            for _ in range(5):
+                bucket.acquire()
+        start = time.monotonic()
+        threads = []
+        for _ in range(4):
+            thread = threading.Thread(target=acquire_five)
+            threads.append(thread)
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 20 tokens, the first one available immediately
+        self.assertGreaterEqual(time.monotonic() - start, 19 / 50 * 0.95)
+        self.assertFalse(bucket.acquire(timeout=0))
+        with self.assertRaises(ValueError):
+            bucket.acquire(2)
+
+class TestEntrezClient(unittest.TestCase):
+    """Test cases for EntrezClient."""
+
+    def setUp(self):
+        self.server, self.url = start_stand_in()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **kwargs):
+        from aim2.corpus.pubmed import EntrezClient
+        settings = {"email": "test@example.com", "base_url": self.url, "rate": 1000,
+                    "batch_size": 10, "max_workers": 3, "backoff_base": 0.001}
+        settings.update(kwargs)
+        return EntrezClient(**settings)
+
+    def test_search_and_fetch_from_history(self):
+        """A search is fetched from the history server in concurrent pages."""
+        with self.client() as client:
+            result = client.search("anything", retmax=5)
+            self.assertEqual(result.count, 25)
+            self.assertEqual(result.ids, ["001", "002", "003", "004", "005"])
+            pages = dict(client.fetch(result))
+            self.assertEqual(sorted(pages), [0, 10, 20])
+            fetched = []
+            for retstart in sorted(pages):
+                fetched.extend(_pmids(pages[retstart]))
+            self.assertEqual(fetched, sorted(self.server.records))
+            self.assertEqual(len(dict(client.fetch(result, max_records=12))), 2)
+
+        for _, endpoint, params in self.server.requests:
+            self.assertEqual(params["email"], ["test@example.com"])
+            if endpoint == "efetch":
+                self.assertEqual(params["WebEnv"], [result.webenv])
+                self.assertNotIn("id", params)
+
+    def test_fetch_pmids_posts_ids(self):
+        """PMID lists are posted once and fetched by history key."""
+        with self.client(batch_size=4) as client:
+            pmids = ["003", "007", "011", "012", "020", "021"]
+            fetched = {}
+            for offset, data in client.fetch_pmids(pmids):
+                fetched[offset] = _pmids(data)
+        self.assertEqual(fetched, {0: pmids[:4], 4: pmids[4:]})
+        endpoints = []
+        for _, endpoint, _ in self.server.requests:
+            endpoints.append(endpoint)
+        self.assertEqual(endpoints.count("epost"), 1)
+        self.assertEqual(endpoints.count("efetch"), 2)
+
+    def test_links(self):
+        """Links are returned per ID and can stay on the history server."""
+        with self.client(batch_size=2) as client:
+            self.assertEqual(client.link(["001", "002", "003", "004"]),
+                             {"002": ["PMC2"], "004": ["PMC4"]})
+            linked = client.link_history(client.search("anything"))
+            self.assertEqual(linked.count, 2)
+            self.assertEqual(linked.db, "pmc")
+
+    def test_retries_transient_failures(self):
+        """Throttling and server errors are retried; other errors are not."""
+        from aim2.corpus.pubmed import EntrezError
+        self.server.failures = [429, 503]
+        with self.client() as client:
+            self.assertEqual(client.search("anything").count, 25)
+            self.assertEqual(client.stats.retries, 2)
+            self.assertEqual(client.stats.requests, 3)
+
+            self.server.failures = [400]
+            with self.assertRaises(EntrezError):
+                client.search("anything")
+            self.assertEqual(client.stats.retries, 2)
+
+        self.server.failures = [503, 503, 503]
+        with self.client(max_retries=2) as client:
+            with self.assertRaises(EntrezError):
+                client.search("anything")
+            self.assertEqual(client.stats.failures, 1)
+
+    def test_rate_limit_and_connection_reuse(self):
+        """Concurrent requests respect the rate and reuse pooled connections."""
+        with self.client(rate=40, batch_size=2) as client:
+            result = client.search("anything")
+            start = time.monotonic()
+            pages = list(client.fetch(result))
+            elapsed = time.monotonic() - start
+        self.assertEqual(len(pages), 13)
+        self.assertGreaterEqual(elapsed, 12 / 40 * 0.9)
+        times = []
+        for requested_at, _, _ in self.server.requests:
+            times.append(requested_at)
+        times.sort()
+        for before, after in zip(times[1:], times[2:]):
+            self.assertGreaterEqual(after - before, 1 / 40 * 0.5)
+        self.assertLessEqual(self.server.connections, 3)
+        self.assertLessEqual(client.stats.connections, 3)
+
+    def test_follows_config_reload(self):
+        """A reloaded corpus.pubmed section changes the rate and batch size."""
+        from aim2.config import PubMedConfig
+        from aim2.corpus.pubmed import API_KEY_RATE, request_rate
+        self.assertAlmostEqual(request_rate(0.5), 2.0)
+        self.assertEqual(request_rate(0.5, "key"), API_KEY_RATE)
+        with self.client(delay=0.5, rate=None) as client:
+            self.assertAlmostEqual(client.limiter.rate, 2.0)
+            client._on_config_change(PubMedConfig({"email": "x", "delay": 0.25, "batch_size": 7}), None)
+            self.assertAlmostEqual(client.limiter.rate, 4.0)
+            self.assertEqual(client.batch_size, 7)
+
+if __name__ == "__main__":
+    unittest.main()
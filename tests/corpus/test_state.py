@@ -0,0 +1,150 @@
+"""
+Tests for the resumable corpus download state store.
+"""
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+def _claim_all(path, tier, output):
+    from aim2.corpus.state import CorpusState
+    claimed = []
+    with CorpusState(path) as state:
+        while True:
+            pmids = state.claim(tier, 7)
+            if not pmids:
+                break
+            claimed.extend(pmids)
+    Path(output).write_text("\n".join(claimed))
+
+class TestCorpusState(unittest.TestCase):
+    """Test cases for CorpusState."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "state.sqlite3"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tiered_progress(self):
+        """Failures fall back to the next tier and finished items stay finished."""
+        from aim2.corpus.state import (CorpusState, DONE, FAILED, SKIPPED, TIER_PDF,
+                                       TIER_PMC_XML, TierState)
+        with CorpusState(self.path) as state:
+            self.assertIsNone(state.search_done("arabidopsis"))
+            self.assertEqual(state.add_search("arabidopsis", ["1", "2", "3", "4"]), 4)
+            self.assertEqual(state.add_search("flavonoid", ["3", "4", "5"]), 1)
+            self.assertEqual(state.search_done("arabidopsis"), 4)
+            self.assertEqual(state.pending(TIER_PMC_XML), ["1", "2", "3", "4", "5"])
+
+            state.update([
+                TierState("1", TIER_PMC_XML, DONE, sha256="ab" * 32, size=120),
+                TierState("2", TIER_PMC_XML, FAILED, error="HTTP 404"),
+                TierState("3", TIER_PMC_XML, SKIPPED),
+            ])
+            self.assertEqual(state.pending(TIER_PMC_XML), ["4", "5"])
+            self.assertEqual(state.pending(TIER_PDF), ["2", "3"])
+            item = state.get("1")[TIER_PMC_XML]
+            self.assertEqual((item.status, item.size, item.attempts), (DONE, 120, 1))
+            self.assertEqual(state.get("2")[TIER_PMC_XML].error, "HTTP 404")
+            self.assertEqual(state.known(["1", "9"]), ["1"])
+
+            self.assertEqual(state.retry_failed(TIER_PMC_XML, max_attempts=2), 1)
+            state.mark_failed("2", TIER_PMC_XML, "HTTP 404")
+            self.assertEqual(state.get("2")[TIER_PMC_XML].attempts, 2)
+            self.assertEqual(state.retry_failed(TIER_PMC_XML, max_attempts=2), 0)
+            counts = state.counts()
+            self.assertEqual(counts[TIER_PMC_XML][FAILED], 1)
+            self.assertEqual(counts[TIER_PDF]["pending"], 2)
+            with self.assertRaises(ValueError):
+                state.update([TierState("1", TIER_PMC_XML, "lost")])
+
+    def test_resume_after_crash(self):
+        """Items claimed by an interrupted run are handed out again, finished ones are not."""
+        from aim2.corpus.state import CorpusState, RUNNING, TIER_PMC_XML
+        state = CorpusState(self.path)
+        state.add_pmids(["1", "2", "3"])
+        self.assertEqual(state.claim(TIER_PMC_XML, 2), ["1", "2"])
+        self.assertEqual(state.claim(TIER_PMC_XML, 5), ["3"])
+        state.mark_done("1", TIER_PMC_XML, "00" * 32, 10)
+        self.assertEqual(state.pmids(TIER_PMC_XML, RUNNING), ["2", "3"])
+        self.assertEqual(state.get("2")[TIER_PMC_XML].owner, state.owner)
+        # Simulate a crash: the connection goes away without finishing the items
+        state.close()
+
+        # While their owner runs, the items are not handed out again
+        with CorpusState(self.path) as other:
+            self.assertEqual(other.claim(TIER_PMC_XML, 10), [])
+        with patch("aim2.corpus.state._process_alive", return_value=False):
+            resumed = CorpusState(self.path)
+            self.assertEqual(resumed.claim(TIER_PMC_XML, 10), ["2", "3"])
+        with resumed:
+            self.assertEqual(resumed.add_pmids(["1", "4"]), 1)
+            self.assertEqual(resumed.pending(TIER_PMC_XML), ["4"])
+
+    def test_expired_leases(self):
+        """Claims of other hosts are only taken over once their lease expired."""
+        from aim2.corpus.state import CorpusState, RUNNING, TIER_PMC_XML
+        with CorpusState(self.path) as state:
+            state.add_pmids(["1", "2"])
+            state.claim(TIER_PMC_XML, 2)
+            state._db.execute("UPDATE tiers SET owner='elsewhere:1', updated_at=updated_at-120")
+            state._db.commit()
+        with CorpusState(self.path, lease_seconds=300) as other:
+            self.assertEqual(other.pmids(TIER_PMC_XML, RUNNING), ["1", "2"])
+            other.lease_seconds = 60
+            self.assertEqual(other.recover(), 2)
+            self.assertEqual(other.claim(TIER_PMC_XML, 10), ["1", "2"])
+
+    def test_concurrent_claims(self):
+        """Processes claiming from one store never get the same item."""
+        from aim2.corpus.state import CorpusState, TIER_PMC_XML
+        pmids = []
+        for number in range(1500):
+            pmids.append(str(number))
+        with CorpusState(self.path) as state:
+            state.add_pmids(pmids)
+        context = multiprocessing.get_context()
+        processes = []
+        outputs = []
+        for worker in range(4):
+            output = Path(self.tmp.name) / f"claims{worker}.txt"
+            outputs.append(output)
+            process = context.Process(target=_claim_all, args=(self.path, TIER_PMC_XML, output))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+        claimed = []
+        for output in outputs:
+            text = output.read_text()
+            if text:
+                claimed.extend(text.split("\n"))
+        self.assertEqual(len(claimed), len(pmids))
+        self.assertEqual(set(claimed), set(pmids))
+
+    def test_touch_renews_lease(self):
+        """Renewed leases are not reclaimed when they would otherwise have expired."""
+        from aim2.corpus.state import CorpusState, RUNNING, TIER_PMC_XML
+        with CorpusState(self.path, lease_seconds=60) as state:
+            state.add_pmids(["1", "2"])
+            state.claim(TIER_PMC_XML, 2)
+            state._db.execute("UPDATE tiers SET updated_at=updated_at-120")
+            state._db.commit()
+            self.assertEqual(state.touch(["1", "3"], TIER_PMC_XML), 1)
+            self.assertEqual(state.recover(), 1)
+            self.assertEqual(state.pmids(TIER_PMC_XML, RUNNING), ["1"])
+            # Leases taken over by another process are not renewed
+            self.assertEqual(state.touch(["2"], TIER_PMC_XML), 0)
+
+    def test_from_config(self):
+        """The store lives under paths.data_dir."""
+        from aim2.corpus.state import CorpusState, STATE_FILENAME
+        state = CorpusState.from_config({"data_dir": self.tmp.name})
+        self.assertEqual(state.path, Path(self.tmp.name) / STATE_FILENAME)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the content-addressed corpus document store.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+class TestDocumentStore(unittest.TestCase):
+    """Test cases for DocumentStore."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "documents"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_deduplicates_content(self):
+        """The same content is stored once and found under every identifier."""
+        from aim2.corpus.store import DOI, PMID, DocumentStore, content_hash
+        article = b"<article>" + b"flavonoid biosynthesis " * 200 + b"</article>"
+        with DocumentStore(self.root) as store:
+            first = store.put(article, pmid="123", source="pmc_xml")
+            second = store.put(article, pmid="456", doi="https://doi.org/10.1000/ABC",
+                               source="pmc_xml")
+            self.assertEqual(first, second)
+            self.assertEqual(first, content_hash(article))
+            self.assertEqual(store.get(first, verify=True), article)
+            self.assertEqual(store.refcount(first), 3)
+            self.assertEqual(store.lookup(DOI, "10.1000/abc"), {"pmc_xml": first})
+            self.assertEqual(store.lookup(PMID, "123"), {"pmc_xml": first})
+
+            stats = store.stats()
+            self.assertEqual((stats.blobs, stats.refs, stats.size), (1, 3, len(article)))
+            self.assertGreater(stats.compression_ratio, 5)
+            blobs = []
+            for path in (self.root / "objects").rglob("*"):
+                if path.is_file():
+                    blobs.append(path)
+            self.assertEqual(blobs, [store.blob_path(first)])
+            with self.assertRaises(KeyError):
+                store.get("0" * 64)
+            with self.assertRaises(ValueError):
+                store.lookup("pmcid", "PMC1")
+
+    def test_reference_counting_and_gc(self):
+        """Blobs are removed once nothing references them."""
+        from aim2.corpus.store import DOI, PMID, DocumentStore
+        with DocumentStore(self.root) as store:
+            xml = store.put(b"<article/>", pmid="1", source="pmc_xml")
+            pdf = store.put(b"%PDF-1.7", pmid="1", doi="10.1/x", source="pdf")
+            # A new version of the PDF replaces the reference to the old one
+            new_pdf = store.put(b"%PDF-1.7 v2", pmid="1", source="pdf")
+            self.assertEqual(store.refcount(pdf), 1)
+            self.assertEqual(store.lookup(PMID, "1"), {"pmc_xml": xml, "pdf": new_pdf})
+
+            self.assertEqual(store.release(DOI, "10.1/X"), 1)
+            self.assertEqual(store.refcount(pdf), 0)
+            self.assertIn(pdf, store)
+            self.assertEqual(store.gc()[0], 1)
+            self.assertNotIn(pdf, store)
+            self.assertFalse(store.blob_path(pdf).exists())
+
+            self.assertEqual(store.release(PMID, "1", source="pdf"), 1)
+            store.add_ref(xml, DOI, "10.1/y")
+            self.assertEqual(store.refcount(xml), 2)
+            with self.assertRaises(KeyError):
+                store.add_ref(pdf, PMID, "2")
+            self.assertEqual(store.gc()[0], 1)
+            self.assertEqual(store.stats().blobs, 1)
+
+    def test_gc_races_with_put(self):
+        """A blob referenced again by another connection during gc() is kept."""
+        import threading
+        import time
+        from aim2.corpus.store import DocumentStore
+        collector = DocumentStore(self.root)
+        writer = DocumentStore(self.root)
+        sha256 = collector.put(b"<article/>")
+        blob_path = collector.blob_path
+        in_gc = threading.Event()
+
+        def slow_blob_path(digest):
+            in_gc.set()
+            time.sleep(0.3)
+            return blob_path(digest)
+        collector.blob_path = slow_blob_path
+        thread = threading.Thread(target=collector.gc)
+        thread.start()
+        in_gc.wait()
+        self.assertEqual(writer.put(b"<article/>", pmid="1", source="pmc_xml"), sha256)
+        thread.join()
+        self.assertEqual(writer.get(sha256), b"<article/>")
+        self.assertEqual(writer.refcount(sha256), 1)
+        collector.close()
+        writer.close()
+
+    def test_processing_records(self):
+        """Stages skip the hashes they have already processed."""
+        from aim2.corpus.store import DocumentStore
+        with DocumentStore(self.root) as store:
+            a = store.put(b"a", pmid="1")
+            b = store.put(b"b", pmid="2")
+            store.mark_processed("parse", [a])
+            self.assertTrue(store.is_processed("parse", a))
+            self.assertFalse(store.is_processed("extract", a))
+            self.assertEqual(store.unprocessed("parse", [a, b, b]), [b])
+
+        # Everything persists across instances
+        with DocumentStore(self.root) as store:
+            self.assertEqual(store.unprocessed("parse", [a, b]), [b])
+            self.assertEqual(store.get(b), b"b")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,277 @@
+"""
+Tests for prompt packing and entity extraction in the extraction module.
+"""
+import asyncio
+import json
+import unittest
+
+class _FakeClient:
+    """Stands in for AsyncLLMClient.map(), answering with a function of the prompt."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.params = {"max_tokens": 1000}
+        self.prompts = []
+
+    async def map(self, prompts):
+        from aim2.extraction.llm_interface import LLMResponse
+        for index, prompt in enumerate(prompts):
+            self.prompts.append(prompt)
+            text = self.answer(prompt)
+            if isinstance(text, Exception):
+                yield index, LLMResponse(prompt, "", error=str(text))
+            else:
+                yield index, LLMResponse(prompt, text)
+
+class TestNER(unittest.TestCase):
+    """Test cases for NER prompt packing and answer parsing."""
+
+    def test_packing(self):
+        """Chunks are packed up to the budget and the chunk cap."""
+        from aim2.corpus.chunker import Chunk
+        from aim2.extraction.ner import PromptPacker
+        from aim2.extraction.llm_interface import estimate_tokens
+        text = "Quercetin accumulates in leaves. " * 10
+        chunks = []
+        for number in range(10):
+            chunks.append(Chunk(f"doc{number % 3}", 0, len(text), text))
+
+        packer = PromptPacker(max_chunks=4)
+        prompts = list(packer.pack(chunks))
+        sizes = []
+        for prompt in prompts:
+            sizes.append(len(prompt.chunks))
+            self.assertEqual(prompt.text.count("Entity types:"), 1)
+        self.assertEqual(sizes, [4, 4, 2])
+        self.assertEqual(list(prompts[0].chunks), ["C1", "C2", "C3", "C4"])
+        self.assertIn('<chunk id="C4">', prompts[0].text)
+        self.assertIs(prompts[2].chunks["C2"], chunks[9])
+
+        # The completion limit caps the chunks per prompt
+        capped = PromptPacker(max_chunks=8, output_tokens_per_chunk=300, max_output_tokens=1000)
+        self.assertEqual(capped.max_chunks, 3)
+
+        budget = packer.header_tokens + 2 * estimate_tokens(f'<chunk id="C1">\n{text}\n</chunk>\n')
+        tight = PromptPacker(token_budget=budget, max_chunks=8)
+        sizes = []
+        for prompt in tight.pack(chunks):
+            sizes.append(len(prompt.chunks))
+            self.assertLessEqual(estimate_tokens(prompt.text), budget + 1)
+        self.assertEqual(sizes, [2, 2, 2, 2, 2])
+        self.assertEqual(list(PromptPacker(token_budget=1).pack(chunks[:2]))[1].chunks, {"C1": chunks[1]})
+
+    def test_parse_response(self):
+        """Packed answers are split per chunk at document offsets."""
+        from aim2.corpus.chunker import Chunk
+        from aim2.extraction.ner import NERPrompt, parse_response
+        first = "Title\n\nQuercetin and rutin accumulate in leaves; quercetin is a flavonol."
+        second = "Drought stress induces anthocyanin synthesis."
+        chunks = {"C1": Chunk("a", 7, len(first), first), "C2": Chunk("b", 0, len(second), second)}
+        prompt = NERPrompt("", chunks)
+        answer = "```json\n" + json.dumps({"entities": [
+            {"chunk": "C1", "text": "Quercetin", "type": "Chemical", "start": 0},
+            {"chunk": "C1", "text": "quercetin", "type": "Chemical", "start": 3},
+            {"chunk": "C1", "text": "leaves", "type": "PlantAnatomy"},
+            {"chunk": "C2", "text": "Drought stress", "type": "ExperimentalCondition", "start": 0},
+            {"chunk": "C2", "text": "anthocyanin", "type": "Chemical"},
+            {"chunk": "C2", "text": "ANTHOCYANIN", "type": "Chemical"},
+            {"chunk": "C2", "text": "catechin", "type": "Chemical"},
+            {"chunk": "C3", "text": "rutin", "type": "Chemical"},
+            {"chunk": "C1", "text": "rutin", "type": "Metabolite"},
+        ]}) + "\n```"
+        results = parse_response(answer, prompt)
+        found = []
+        for entity in results["C1"]:
+            found.append((entity.doc_id, entity.start, entity.end, entity.text, entity.label))
+            self.assertEqual(first[entity.start:entity.end], entity.text)
+        self.assertEqual(found, [("a", 7, 16, "Quercetin", "Chemical"),
+                                 ("a", 49, 58, "quercetin", "Chemical"),
+                                 ("a", 41, 47, "leaves", "PlantAnatomy")])
+        labels = []
+        for entity in results["C2"]:
+            labels.append((entity.start, entity.text))
+        self.assertEqual(labels, [(0, "Drought stress"), (23, "anthocyanin"), (23, "anthocyanin")])
+
+        with self.assertRaises(ValueError):
+            parse_response("no entities here", prompt)
+
+    def test_extractor(self):
+        """The extractor yields one result per chunk, carrying request errors."""
+        from aim2.corpus.chunker import Chunk
+        from aim2.extraction.ner import EntityExtractor, PromptPacker, merge_entities
+
+        def answer(prompt):
+            if "Fail" in prompt:
+                return RuntimeError("HTTP 500")
+            entities = []
+            marker = '<chunk id="'
+            position = prompt.find(marker)
+            while position != -1:
+                chunk_id = prompt[position + len(marker):prompt.find('"', position + len(marker))]
+                entities.append({"chunk": chunk_id, "text": "quercetin", "type": "Chemical"})
+                position = prompt.find(marker, position + 1)
+            return json.dumps({"entities": entities})
+
+        text = "Leaves store quercetin. Roots store quercetin too."
+        chunks = [Chunk("a", 0, 30, text), Chunk("a", 20, len(text), text),
+                  Chunk("b", 0, 4, "Fail"), Chunk("c", 0, 9, "quercetin")]
+        client = _FakeClient(answer)
+        extractor = EntityExtractor(client, PromptPacker(max_chunks=2))
+
+        async def run():
+            results = []
+            async for result in extractor.extract(iter(chunks)):
+                results.append(result)
+            return results
+        results = asyncio.run(run())
+        self.assertEqual(extractor.prompts, 2)
+        self.assertEqual(len(client.prompts), 2)
+        by_doc = {}
+        entities = []
+        for result in results:
+            by_doc.setdefault(result.chunk.doc_id, []).append(result.ok)
+            entities.extend(result.entities)
+        self.assertEqual(by_doc, {"a": [True, True], "b": [False], "c": [False]})
+        merged = merge_entities(entities)
+        spans = []
+        for entity in merged:
+            spans.append((entity.doc_id, entity.start))
+        self.assertEqual(spans, [("a", 13), ("a", 36)])
+
+    def test_dictionary_scan(self):
+        """Terms are matched as whole tokens, leftmost-longest, at text offsets."""
+        from aim2.corpus.chunker import Chunk
+        from aim2.extraction.ner import EntityDictionary, sentence_windows
+        dictionary = EntityDictionary.build([
+            ("quercetin", "Chemical", "chebi:1", False),
+            ("Quercetin 3-O-glucoside", "Chemical", "chebi:2", False),
+            ("rosette leaf", "PlantAnatomy", "po:1", False),
+            ("leaf", "PlantAnatomy", "po:2", False),
+            ("leaf", "PlantTrait", "to:1", False),
+            ("ABA", "Chemical", "chebi:3", False),
+            ("jasmonates", "Chemical", "chebi:4", True),
+            ("O-glucoside", "Chemical", "chebi:5", False),
+            ("glucoside x", "Chemical", "chebi:6", False),
+        ])
+        self.assertEqual(len(dictionary), 8)
+        text = ("Title. QUERCETIN 3-O-glucoside and quercetin in the rosette leaf; ABA, leaf. "
+                "O-glucoside X and quercetins, not jasmonates.")
+        found = []
+        for match in dictionary.scan(text):
+            found.append((text[match.start:match.end], match.iri, match.ambiguous))
+        self.assertEqual(found, [("QUERCETIN 3-O-glucoside", "chebi:2", False),
+                                 ("quercetin", "chebi:1", False),
+                                 ("rosette leaf", "po:1", False),
+                                 ("ABA", "chebi:3", True),
+                                 ("leaf", "po:2", True),
+                                 ("O-glucoside", "chebi:5", False),
+                                 ("jasmonates", "chebi:4", True)])
+
+        chunk = Chunk("doc", 7, 67, text)
+        starts = []
+        for match in dictionary.tag(chunk):
+            starts.append(match.start)
+        self.assertEqual(starts, [7, 35, 52])
+        windows = sentence_windows(Chunk("doc", 0, len(text), text), [(66, 69), (71, 75)])
+        self.assertEqual(windows, [Chunk("doc", 7, 77, text)])
+
+    def test_dictionary_persisted_with_ontology(self):
+        """The automaton is built from ontology labels and synonyms and saved with the ontology."""
+        import tempfile
+        from pathlib import Path
+        from unittest.mock import patch
+        from owlready2 import AnnotationProperty, Thing
+        from aim2.extraction.ner import EntityDictionary, dictionary_path
+        from aim2.ontology.manager import AIM2Ontology
+        with tempfile.TemporaryDirectory() as tmp:
+            owl_path = Path(tmp) / "aim2.owl"
+            store = Path(tmp) / "store.sqlite3"
+            ontology = AIM2Ontology(owl_path, quadstore_path=store, use_cache=False)
+            with ontology.world.get_ontology("http://www.geneontology.org/formats/oboInOwl#"):
+                exact = type("hasExactSynonym", (AnnotationProperty,), {})
+                related = type("hasRelatedSynonym", (AnnotationProperty,), {})
+            chebi = ontology.world.get_ontology("http://purl.obolibrary.org/obo/chebi.owl")
+            obo = chebi.get_namespace("http://purl.obolibrary.org/obo/")
+            with chebi:
+                flavonol = type("CHEBI_28802", (Thing,), {"namespace": obo})
+                flavonol.label = ["flavonol"]
+                quercetin = type("CHEBI_16243", (Thing,), {"namespace": obo})
+                quercetin.label = ["quercetin"]
+                exact[quercetin] = ["3,3',4',5,7-pentahydroxyflavone"]
+                related[quercetin] = ["meletin"]
+                other = type("XYZ_1", (Thing,), {"namespace": obo})
+                other.label = ["unmapped"]
+            ontology.imported_ontologies["chebi"] = chebi
+
+            dictionary = ontology.entity_dictionary()
+            self.assertEqual(len(dictionary), 4)
+            text = "Meletin (3,3',4',5,7-pentahydroxyflavone) is a flavonol; unmapped."
+            found = []
+            for match in dictionary.scan(text):
+                found.append((text[match.start:match.end], match.label, match.iri, match.ambiguous))
+            self.assertEqual(found, [
+                ("Meletin", "Chemical", quercetin.iri, True),
+                ("3,3',4',5,7-pentahydroxyflavone", "Chemical", quercetin.iri, False),
+                ("flavonol", "Chemical", flavonol.iri, False),
+            ])
+            ontology.save()
+            self.assertTrue(dictionary_path(owl_path).exists())
+            # Not saved once the ontology changed after it was built
+            with ontology.onto:
+                ontology.onto.StructuralAnnotation("leaf").label = ["leaf"]
+            dictionary_path(owl_path).unlink()
+            ontology.save()
+            self.assertFalse(dictionary_path(owl_path).exists())
+            self.assertEqual(len(ontology.entity_dictionary()), 4)
+            ontology.save(force=True)
+            ontology.close()
+            self.assertTrue(dictionary_path(owl_path).exists())
+
+            reader = AIM2Ontology(owl_path, quadstore_path=store, read_only=True, use_cache=False)
+            try:
+                reader.imported_ontologies["chebi"] = reader.world.get_ontology(chebi.base_iri)
+                with patch.object(EntityDictionary, "build", side_effect=AssertionError("rebuilt")):
+                    loaded = reader.entity_dictionary()
+                self.assertEqual(len(loaded.scan(text)), 3)
+            finally:
+                reader.close()
+
+            # Without the import its terms are not reused
+            reader = AIM2Ontology(owl_path, quadstore_path=store, read_only=True, use_cache=False)
+            try:
+                self.assertEqual(len(reader.entity_dictionary()), 0)
+            finally:
+                reader.close()
+
+    def test_extractor_with_dictionary(self):
+        """Only the sentences around ambiguous terms are sent to the model."""
+        from aim2.corpus.chunker import Chunk
+        from aim2.extraction.ner import EntityDictionary, EntityExtractor, PromptPacker
+
+        def answer(prompt):
+            self.assertNotIn("Rutin", prompt)
+            return json.dumps({"entities": [{"chunk": "C1", "text": "ABA", "type": "Chemical"}]})
+
+        dictionary = EntityDictionary.build([("rutin", "Chemical", "chebi:1", False),
+                                             ("ABA", "Chemical", "chebi:2", False)])
+        first = "Rutin was found. Levels of ABA rose. Nothing else."
+        chunks = [Chunk("a", 0, len(first), first), Chunk("b", 0, 13, "No terms here"),
+                  Chunk("c", 0, 16, "Rutin in leaves.")]
+        client = _FakeClient(answer)
+        extractor = EntityExtractor(client, PromptPacker(), dictionary)
+
+        async def run():
+            results = {}
+            async for result in extractor.extract(chunks):
+                spans = []
+                for entity in result.entities:
+                    spans.append((entity.start, entity.source))
+                results[result.chunk.doc_id] = spans
+            return results
+        results = asyncio.run(run())
+        self.assertEqual(results, {"a": [(0, "dictionary"), (27, "llm")], "b": [], "c": [(0, "dictionary")]})
+        self.assertEqual((extractor.prompts, extractor.skipped), (1, 2))
+        self.assertIn('<chunk id="C1">\nLevels of ABA rose. \n</chunk>', client.prompts[0])
+
+if __name__ == "__main__":
+    unittest.main()
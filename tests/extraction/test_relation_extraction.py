@@ -0,0 +1,140 @@
+"""
+Tests for candidate pairs and batched prompts in relation extraction.
+"""
+import asyncio
+import json
+import random
+import unittest
+
+TEXT = ("Quercetin accumulates in leaves of Arabidopsis. Drought increased quercetin. "
+        "Samples were frozen. MYB12 activates CHS. Rutin was detected in roots.")
+
+def entity(text, label, occurrence=0, doc_id="doc"):
+    from aim2.extraction.ner import Entity
+    position = -1
+    for _ in range(occurrence + 1):
+        position = TEXT.find(text, position + 1)
+    return Entity(doc_id, position, position + len(text), text, label)
+
+def sample_entities():
+    return [entity("Quercetin", "Chemical"), entity("leaves", "PlantAnatomy"),
+            entity("Arabidopsis", "Species"), entity("Drought", "ExperimentalCondition"),
+            entity("quercetin", "Chemical"), entity("MYB12", "Gene"), entity("CHS", "Gene"),
+            entity("Rutin", "Chemical"), entity("roots", "PlantAnatomy")]
+
+class _FakeClient:
+    """Stands in for AsyncLLMClient.map(), answering with a function of the prompt."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    async def map(self, prompts):
+        from aim2.extraction.llm_interface import LLMResponse
+        for index, prompt in enumerate(prompts):
+            self.prompts.append(prompt)
+            yield index, LLMResponse(prompt, self.answer(prompt))
+
+class TestRelationExtraction(unittest.TestCase):
+    """Test cases for relation candidates and prompts."""
+
+    def test_schema_constraints(self):
+        """Domains and ranges of the schema restrict the relations of a pair."""
+        from aim2.extraction.relation_extraction import allowed_relations, relation_signatures
+        signatures = relation_signatures()
+        self.assertEqual(signatures["accumulates_in"], (frozenset({"Structural"}), frozenset({"Source"})))
+        self.assertEqual(signatures["affects"], (None, None))
+        quercetin, leaves, drought = entity("Quercetin", "Chemical"), entity("leaves", "PlantAnatomy"), \
+            entity("Drought", "ExperimentalCondition")
+        self.assertIn("accumulates_in", allowed_relations(quercetin, leaves, signatures))
+        self.assertNotIn("accumulates_in", allowed_relations(leaves, quercetin, signatures))
+        self.assertNotIn("accumulates_in", allowed_relations(drought, leaves, signatures))
+        self.assertNotIn("is_a", allowed_relations(quercetin, leaves, signatures))
+        self.assertIn("is_a", allowed_relations(quercetin, entity("Rutin", "Chemical"), signatures))
+        with self.assertRaises(ValueError):
+            relation_signatures(relations=["no_such_relation"])
+
+    def test_candidate_pairs(self):
+        """Pairs only join entities in the same or adjacent sentences."""
+        from aim2.extraction.relation_extraction import SentenceIndex, candidate_pairs
+        index = SentenceIndex(TEXT)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.sentence_of(TEXT.find("Drought")), 1)
+        self.assertEqual(index.span(3, 4), (TEXT.find("MYB12"), len(TEXT)))
+        signatures = {"accumulates_in": (frozenset({"Structural"}), frozenset({"Source"})),
+                      "affects": (None, None)}
+        pairs = candidate_pairs(sample_entities(), index, signatures)
+        found = []
+        for pair in pairs:
+            found.append((pair.first.text, pair.second.text, pair.relations))
+        self.assertIn(("Quercetin", "leaves", ("accumulates_in", "affects")), found)
+        self.assertIn(("Drought", "quercetin", ("accumulates_in", "affects")), found)
+        self.assertIn(("MYB12", "Rutin", ("affects",)), found)
+        for first, second, _ in found:
+            # Repeated mentions and sentences two apart are not paired
+            self.assertNotEqual((first, second), ("Quercetin", "quercetin"))
+            self.assertFalse(first in ("Quercetin", "leaves", "Arabidopsis") and second in ("MYB12", "CHS"))
+        self.assertEqual(len(found), 15)
+
+        # Same pairs as comparing every entity with every other one
+        rng = random.Random(3)
+        text = " ".join(["Sentence number one here."] * 200)
+        wide = SentenceIndex(text)
+        labels = ["Chemical", "PlantAnatomy", "Gene", "Species"]
+        entities = []
+        from aim2.extraction.ner import Entity
+        for number in range(300):
+            start = rng.randrange(0, len(text) - 10)
+            entities.append(Entity("doc", start, start + 3, f"t{number}", rng.choice(labels)))
+        expected = 0
+        for i, first in enumerate(entities):
+            for second in entities[i + 1:]:
+                a, b = sorted((first, second), key=lambda e: (e.start, e.end))
+                apart = wide.sentence_of(b.start) - wide.sentence_of(a.start)
+                if apart <= 2 and b.start >= a.end:
+                    expected += 1
+        self.assertEqual(len(candidate_pairs(entities, wide, signatures, sentence_window=2)), expected)
+
+    def test_batched_prompts(self):
+        """Pairs sharing sentences are asked about in one prompt and answers are checked."""
+        from aim2.extraction.relation_extraction import RelationExtractor
+
+        def answer(prompt):
+            if "Rutin" in prompt:
+                return '{"relations": []}'
+            return json.dumps({"relations": [
+                {"head": "E1", "relation": "accumulates_in", "tail": "E2"},
+                {"head": "E2", "relation": "accumulates_in", "tail": "E1"},
+                {"head": "E4", "relation": "affects", "tail": "E5"},
+                {"head": "E1", "relation": "affects", "tail": "E9"},
+                {"head": "E1", "relation": "regulates", "tail": "E2"},
+            ]})
+        client = _FakeClient(answer)
+        extractor = RelationExtractor(client, max_pairs=8)
+        documents = [("doc", TEXT, sample_entities()), ("empty", "No entities.", [])]
+
+        async def run():
+            results = []
+            async for result in extractor.extract(documents):
+                results.append(result)
+            return results
+        results = asyncio.run(run())
+        self.assertEqual(extractor.pairs, 15)
+        self.assertEqual(extractor.prompts, 3)
+        self.assertEqual(len(client.prompts), 3)
+        self.assertIn("Text:\nQuercetin accumulates in leaves of Arabidopsis. Drought increased quercetin.\n",
+                      client.prompts[0])
+        self.assertIn("E1 - E2: accumulates_in, activates", client.prompts[0])
+        by_doc = {}
+        for result in results:
+            by_doc[result.doc_id] = result
+        self.assertEqual(by_doc["empty"].relations, [])
+        found = []
+        for relation in by_doc["doc"].relations:
+            found.append((relation.head.text, relation.relation, relation.tail.text))
+        # Wrong directions and pairs asked about in another prompt are dropped
+        self.assertEqual(found, [("Quercetin", "accumulates_in", "leaves"),
+                                 ("quercetin", "accumulates_in", "Drought")])
+
+if __name__ == "__main__":
+    unittest.main()
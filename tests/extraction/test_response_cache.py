@@ -0,0 +1,99 @@
+"""
+Tests for the persistent LLM response cache.
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+def _write_entries(cache_dir, worker, count):
+    from aim2.extraction.cache import ResponseCache
+    with ResponseCache(cache_dir) as cache:
+        for number in range(count):
+            cache.put(f"prompt {worker}-{number}", "gpt-4", {"temperature": 0.2}, f"answer {number}")
+            cache.get(f"prompt {(worker + 1) % 3}-{number}", "gpt-4", {"temperature": 0.2})
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for ResponseCache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name) / "llm"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rerun_makes_no_calls(self):
+        """A second run over the same prompts is answered from the cache."""
+        from aim2.extraction.cache import ResponseCache, cache_key
+        params = {"temperature": 0.2, "max_tokens": 1000, "top_p": 1.0}
+        self.assertEqual(cache_key("p", "gpt-4", params),
+                         cache_key("p", "gpt-4", {"top_p": 1.0, "max_tokens": 1000, "temperature": 0.2}))
+        self.assertNotEqual(cache_key("p", "gpt-4", params), cache_key("p", "gpt-4", {"temperature": 0.3}))
+        self.assertNotEqual(cache_key("p", "gpt-4", params), cache_key("p", "gpt-4o", params))
+
+        calls = []
+        def call(prompt):
+            calls.append(prompt)
+            return '{"entities": []} ' + prompt
+        prompts = []
+        for number in range(20):
+            prompts.append(f"Extract entities from chunk {number}")
+        with ResponseCache(self.cache_dir) as cache:
+            for prompt in prompts:
+                cache.get_or_call(prompt, "gpt-4", params, call)
+            self.assertEqual(len(calls), 20)
+            self.assertEqual(cache.stats.hit_rate, 0.0)
+
+        with ResponseCache.from_config({"cache_dir": str(self.cache_dir)}) as cache:
+            for prompt in prompts:
+                self.assertEqual(cache.get_or_call(prompt, "gpt-4", params, call),
+                                 '{"entities": []} ' + prompt)
+            self.assertEqual(len(calls), 20)
+            self.assertEqual(cache.metrics()["hit_rate"], 1.0)
+            self.assertIsNone(cache.get(prompts[0], "gpt-4", {"temperature": 0.9}))
+            self.assertEqual(len(cache), 20)
+        self.assertIsNone(ResponseCache.from_config({"cache_enabled": False}))
+
+    def test_eviction(self):
+        """Least recently used and expired responses are evicted."""
+        from aim2.extraction.cache import ResponseCache
+        with ResponseCache(self.cache_dir, max_size_mb=0.01) as cache:
+            for number in range(10):
+                # Random responses of about 1.5 KB compressed
+                cache.put(f"p{number}", "m", None, os.urandom(1500).hex())
+                time.sleep(0.01)
+            cache.get("p0", "m")
+            removed = cache.evict()
+            self.assertGreater(removed, 0)
+            self.assertLessEqual(cache.size_bytes(), 0.01 * 1024 * 1024)
+            self.assertIsNotNone(cache.get("p0", "m"))
+            self.assertIsNone(cache.get("p1", "m"))
+            self.assertEqual(cache.stats.evictions, removed)
+
+        with ResponseCache(self.cache_dir, max_age_days=1e-9) as cache:
+            time.sleep(0.01)
+            self.assertIsNone(cache.get("p0", "m"))
+            cache.evict()
+            self.assertEqual(len(cache), 0)
+
+    def test_concurrent_processes(self):
+        """Processes writing and reading at the same time lose no entries."""
+        from aim2.extraction.cache import ResponseCache
+        context = multiprocessing.get_context()
+        processes = []
+        for worker in range(3):
+            process = context.Process(target=_write_entries, args=(self.cache_dir, worker, 40))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+        with ResponseCache(self.cache_dir) as cache:
+            self.assertEqual(len(cache), 120)
+            self.assertEqual(cache.get("prompt 2-39", "gpt-4", {"temperature": 0.2}), "answer 39")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for the ontology import cache.
+
+The cache is exercised against a local file:// mirror, so no network access
+is needed.
+"""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from owlready2 import ObjectProperty, Thing, World
+
+def write_test_ontology(path, iri, class_names):
+    """Write a small RDF/XML ontology with the given classes to path."""
+    world = World()
+    onto = world.get_ontology(iri)
+    with onto:
+        class part_of(ObjectProperty):
+            pass
+        for name in class_names:
+            new_class = type(name, (Thing,), {"namespace": onto})
+            new_class.label = [name.lower()]
+    onto.save(file=str(path), format="rdfxml")
+    world.close()
+
+class TestOntologyCache(unittest.TestCase):
+    """Test cases for OntologyCache."""
+
+    def setUp(self):
+        """Create a mirror directory with one source ontology and a cache."""
+        from aim2.ontology.cache import OntologyCache
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.mirror = Path(self.test_dir.name) / "mirror"
+        self.mirror.mkdir()
+        self.source = self.mirror / "po.owl"
+        write_test_ontology(self.source, "http://example.org/po.owl", ["Leaf", "Root"])
+        self.iri = self.source.as_uri()
+        self.cache = OntologyCache(Path(self.test_dir.name) / "cache")
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.cache.close()
+        self.test_dir.cleanup()
+
+    def test_second_lookup_is_a_hit(self):
+        """Test that an unchanged source is served from the cache."""
+        first = self.cache.get(self.iri)
+        second = self.cache.get(self.iri)
+        self.assertEqual(self.cache.stats.misses, 1)
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.revalidations, 1)
+        self.assertEqual(sorted(first.objs), sorted(second.objs))
+        self.assertEqual(self.cache.metrics()["hit_rate"], 0.5)
+
+    def test_changed_source_is_parsed_again(self):
+        """Test that a modified source invalidates the cached entry."""
+        self.cache.get(self.iri)
+        write_test_ontology(self.source, "http://example.org/po.owl", ["Leaf", "Root", "Stem"])
+        stat = self.source.stat()
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        triples = self.cache.get(self.iri)
+        self.assertEqual(self.cache.stats.misses, 2)
+        self.assertIn("http://example.org/po.owl#Stem", str(triples.objs))
+
+    def test_cached_copy_used_when_source_unavailable(self):
+        """Test that the cache works offline once populated."""
+        self.cache.get(self.iri)
+        os.remove(self.source)
+        triples = self.cache.get(self.iri)
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertGreater(len(triples), 0)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted over budget."""
+        from aim2.ontology.cache import OntologyCache
+        other = self.mirror / "go.owl"
+        write_test_ontology(other, "http://example.org/go.owl", ["Process"])
+        cache = OntologyCache(self.cache.cache_dir, max_size_mb=0.0001)
+        try:
+            cache.get(self.iri)
+            cache.get(other.as_uri())
+            self.assertEqual(cache.stats.evictions, 1)
+            self.assertIsNone(cache._lookup(self.iri))
+            self.assertIsNotNone(cache._lookup(other.as_uri()))
+        finally:
+            cache.close()
+
+    def test_import_ontology_uses_cache(self):
+        """Test that AIM2Ontology.import_ontology goes through the cache."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=Path(self.test_dir.name) / "store.sqlite3",
+                                cache=self.cache)
+        try:
+            ontology.import_ontology(self.iri, "po")
+            po = ontology.imported_ontologies["po"]
+            self.assertEqual(po.Leaf.label, ["leaf"])
+            self.assertIsNotNone(po.part_of)
+            self.assertEqual(self.cache.stats.misses, 1)
+        finally:
+            ontology.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the transitive-closure index.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from owlready2 import World
+
+class TestClosureIndex(unittest.TestCase):
+    """Test cases for ClosureIndex."""
+
+    def setUp(self):
+        """Build a small plant anatomy in a private world."""
+        from aim2.ontology.schema import init_ontology
+        self.world = World()
+        self.onto = init_ontology(self.world)
+        with self.onto:
+            self.plant = self.onto.StructuralAnnotation("plant")
+            self.shoot = self.onto.StructuralAnnotation("shoot")
+            self.root = self.onto.StructuralAnnotation("root")
+            self.leaf = self.onto.StructuralAnnotation("leaf")
+            self.shoot.part_of.append(self.plant)
+            self.root.part_of.append(self.plant)
+            self.plant.has_part.append(self.leaf)  # stated through the inverse
+            self.leaf.part_of.append(self.shoot)
+            self.flavonoid = self.onto.FunctionalAnnotation("flavonoid")
+            self.flavonoid.located_in.append(self.leaf)
+
+    def tearDown(self):
+        self.world.close()
+
+    def build_index(self):
+        from aim2.ontology.closure import ClosureIndex
+        index = ClosureIndex(self.onto)
+        index.rebuild()
+        return index
+
+    def test_ancestor_tests(self):
+        """Test ancestor checks, including edges stated through has_part."""
+        index = self.build_index()
+        self.assertTrue(index.is_ancestor("part_of", self.plant, self.leaf))
+        self.assertTrue(index.is_ancestor("part_of", self.shoot, self.leaf))
+        self.assertFalse(index.is_ancestor("part_of", self.root, self.leaf))
+        self.assertFalse(index.is_ancestor("part_of", self.leaf, self.leaf))
+        self.assertEqual(set(index.ancestors("part_of", self.leaf)),
+                         {self.shoot.storid, self.plant.storid})
+
+    def test_located_in_any_part(self):
+        """Test the composed query: everything located in any part of the plant."""
+        index = self.build_index()
+        parts = index.descendants("part_of", self.plant)
+        self.assertEqual(set(parts), {self.shoot.storid, self.root.storid, self.leaf.storid})
+        located = set()
+        for part in parts + [self.plant.storid]:
+            located.update(index.descendants("located_in", part))
+        self.assertEqual(located, {self.flavonoid.storid})
+
+    def test_affects_includes_subproperties(self):
+        """Test that the affects relation covers its sub-properties transitively."""
+        with self.onto:
+            gene = self.onto.FunctionalAnnotation("gene")
+            enzyme = self.onto.FunctionalAnnotation("enzyme")
+            gene.upregulates.append(enzyme)
+            enzyme.inhibits.append(self.flavonoid)
+        index = self.build_index()
+        self.assertTrue(index.is_ancestor("affects", self.flavonoid, gene))
+
+    def test_incremental_update(self):
+        """Test that new relations are merged without a rebuild."""
+        from aim2.ontology.closure import ClosureIndex
+        index = self.build_index()
+        with self.onto:
+            cell = self.onto.StructuralAnnotation("cell")
+            cell.part_of.append(self.leaf)
+        with patch.object(ClosureIndex, "rebuild", side_effect=AssertionError("rebuilt")), \
+                patch("aim2.ontology.closure.edge_state", side_effect=AssertionError("scanned")):
+            self.assertEqual(index.update(), 1)
+            # Nothing deleted, nothing new: only the rows past the watermark are read
+            self.assertEqual(index.update(), 0)
+        self.assertTrue(index.is_ancestor("part_of", self.plant, cell))
+        self.assertIn(cell.storid, index.descendants("part_of", self.shoot))
+
+    def test_update_after_removal(self):
+        """Test that removed relations are noticed, including a replaced last row."""
+        index = self.build_index()
+        self.leaf.part_of.remove(self.shoot)
+        index.update()
+        self.assertFalse(index.is_ancestor("part_of", self.shoot, self.leaf))
+        self.assertTrue(index.is_ancestor("part_of", self.plant, self.leaf))
+
+        # The freed rowid of the last row is reused by the next insert
+        with self.onto:
+            self.flavonoid.located_in.remove(self.leaf)
+            self.flavonoid.located_in.append(self.root)
+        index.update()
+        self.assertEqual(index.descendants("located_in", self.leaf), [])
+        self.assertEqual(index.descendants("located_in", self.root), [self.flavonoid.storid])
+
+class TestClosureIndexPersistence(unittest.TestCase):
+    """Test cases for persisting the index next to the ontology file."""
+
+    def test_index_reloaded_after_save(self):
+        """Test that a saved index is reused instead of rebuilt."""
+        from aim2.ontology.closure import ClosureIndex, closure_path
+        from aim2.ontology.manager import AIM2Ontology
+        with tempfile.TemporaryDirectory() as tmp:
+            owl_path = Path(tmp) / "aim2.owl"
+            store = Path(tmp) / "store.sqlite3"
+            ontology = AIM2Ontology(owl_path, quadstore_path=store, use_cache=False)
+            with ontology.onto:
+                leaf = ontology.onto.StructuralAnnotation("leaf")
+                shoot = ontology.onto.StructuralAnnotation("shoot")
+                leaf.part_of.append(shoot)
+            ontology.closure_index()
+            ontology.save()
+            ontology.close()
+            self.assertTrue(closure_path(owl_path).exists())
+
+            reader = AIM2Ontology(owl_path, quadstore_path=store, read_only=True, use_cache=False)
+            try:
+                with patch.object(ClosureIndex, "rebuild", side_effect=AssertionError("rebuilt")):
+                    index = reader.closure_index()
+                self.assertTrue(index.is_ancestor("part_of", reader.onto.shoot, reader.onto.leaf))
+            finally:
+                reader.close()
+
+if __name__ == "__main__":
+    unittest.main()
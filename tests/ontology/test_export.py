@@ -0,0 +1,138 @@
+"""
+Tests for the ontology export formats.
+"""
+import gzip
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from owlready2 import AnnotationProperty, World
+
+class TestExportOntology(unittest.TestCase):
+    """Test cases for export_ontology."""
+
+    def setUp(self):
+        """Build the AIM2 schema with a few annotated classes in a private world."""
+        from aim2.ontology.schema import init_ontology
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.world = World()
+        self.onto = init_ontology(self.world)
+        with self.world.get_ontology("http://www.geneontology.org/formats/oboInOwl#"):
+            type("hasExactSynonym", (AnnotationProperty,), {})
+        with self.onto:
+            self.onto.StructuralAnnotation.label = ['structural "annotation"\nline']
+            self.onto.StructuralAnnotation.hasExactSynonym = ["structure"]
+            self.onto.FunctionalAnnotation("gene_1").hasConfidence = 0.5
+
+    def tearDown(self):
+        self.world.close()
+        self.test_dir.cleanup()
+
+    def path(self, name: str) -> Path:
+        return Path(self.test_dir.name) / name
+
+    def test_export_format_from_suffix(self):
+        """Test that the format and compression follow the file name."""
+        from aim2.ontology.export import export_format
+        self.assertEqual(export_format("aim2.owl"), ("rdfxml", False))
+        self.assertEqual(export_format("aim2.nt.gz"), ("ntriples", True))
+        self.assertEqual(export_format("aim2.cols"), ("columns", False))
+
+    def test_ntriples_roundtrip(self):
+        """Test that gzipped N-Triples load back with escaped literals intact."""
+        from aim2.ontology.export import export_ontology
+        path = export_ontology(self.onto, self.path("aim2.nt.gz"))
+        with gzip.open(path, "rb") as f:
+            content = f.read()
+        world = World()
+        try:
+            world.get_ontology(self.onto.base_iri).load(fileobj=io.BytesIO(content), format="ntriples")
+            structural = world[self.onto.StructuralAnnotation.iri]
+            self.assertEqual(structural.label, ['structural "annotation"\nline'])
+            self.assertEqual(world[self.onto.gene_1.iri].hasConfidence, 0.5)
+        finally:
+            world.close()
+
+    def test_columns_roundtrip(self):
+        """Test that the columnar dump holds the hierarchy, labels and synonyms."""
+        from aim2.ontology.export import export_ontology, load_columns
+        export_ontology(self.onto, self.path("aim2.cols"))
+        columns = load_columns(self.path("aim2.cols"))
+        structural = self.onto.StructuralAnnotation.iri
+        self.assertEqual(columns.parents(structural), [self.onto.Annotation.iri])
+        self.assertEqual(columns.labels(structural), ['structural "annotation"\nline'])
+        self.assertEqual(columns.synonyms(structural), [("hasExactSynonym", "structure")])
+
+    def test_failed_export_leaves_no_partial_file(self):
+        """Test that an error while writing keeps the previous file."""
+        from aim2.ontology import export
+        path = self.path("aim2.nt")
+        path.write_text("previous\n")
+        with patch.object(export, "write_ntriples", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                export.export_ontology(self.onto, path)
+        self.assertEqual(path.read_text(), "previous\n")
+        self.assertEqual(list(Path(self.test_dir.name).iterdir()), [path])
+
+class TestAIM2OntologySave(unittest.TestCase):
+    """Test cases for the formats and change detection of AIM2Ontology.save."""
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.store_path = Path(self.test_dir.name) / "store.sqlite3"
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_save_skipped_when_unchanged(self):
+        """Test that saving an unchanged ontology again does not rewrite the file."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=self.store_path, use_cache=False)
+        path = Path(self.test_dir.name) / "aim2.nt.gz"
+        try:
+            self.assertTrue(ontology.save(path))
+            self.assertFalse(ontology.save(path))
+            self.assertTrue(ontology.save(path, force=True))
+            with ontology.onto:
+                ontology.onto.StructuralAnnotation("leaf")
+            self.assertTrue(ontology.save(path))
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.assertIn("aim2.owl#leaf>", f.read())
+        finally:
+            ontology.close()
+
+    def test_save_after_edit_in_place(self):
+        """Test that replacing a value, which reuses the freed rowid, is saved."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=self.store_path, use_cache=False)
+        path = Path(self.test_dir.name) / "aim2.nt"
+        try:
+            with ontology.onto:
+                leaf = ontology.onto.StructuralAnnotation("leaf")
+                leaf.label = ["first"]
+            self.assertTrue(ontology.save(path))
+            leaf.label = ["second"]
+            self.assertTrue(ontology.save(path))
+            content = path.read_text(encoding="utf-8")
+            self.assertIn('"second"', content)
+            self.assertNotIn('"first"', content)
+        finally:
+            ontology.close()
+
+    def test_save_rewrites_modified_file(self):
+        """Test that an export changed on disk is written again."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=self.store_path, use_cache=False)
+        path = Path(self.test_dir.name) / "aim2.owl"
+        try:
+            ontology.save(path)
+            path.write_text("corrupted")
+            self.assertTrue(ontology.save(path))
+            self.assertIn("rdf:RDF", path.read_text())
+        finally:
+            ontology.close()
+
+if __name__ == "__main__":
+    unittest.main()
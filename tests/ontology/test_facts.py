@@ -0,0 +1,97 @@
+"""
+Tests for bulk fact insertion.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from owlready2 import AnnotatedRelation, World
+
+class TestBulkAddFacts(unittest.TestCase):
+    """Test cases for bulk_add_facts."""
+
+    def setUp(self):
+        """Build the AIM2 schema in a private world."""
+        from aim2.ontology.schema import init_ontology
+        self.world = World()
+        self.onto = init_ontology(self.world)
+
+    def tearDown(self):
+        self.world.close()
+
+    def test_creates_individuals_typed_by_range(self):
+        """Test that new objects become individuals of the property range."""
+        from aim2.ontology.facts import bulk_add_facts
+        stats = bulk_add_facts(self.onto, [("gene_1", "has_functional_annotation", "flavonoid_synthesis")])
+        self.assertEqual(stats.facts, 1)
+        self.assertEqual(stats.new_individuals, 2)
+        self.assertIn(self.onto.FunctionalAnnotation, self.onto.flavonoid_synthesis.is_a)
+        self.assertEqual(self.onto.gene_1.has_functional_annotation, [self.onto.flavonoid_synthesis])
+
+    def test_existing_individuals_are_reused(self):
+        """Test that facts on existing individuals do not redeclare them."""
+        from aim2.ontology.facts import Fact, bulk_add_facts
+        with self.onto:
+            leaf = self.onto.StructuralAnnotation("leaf")
+        self.assertEqual(leaf.has_part, [])
+        stats = bulk_add_facts(self.onto, [Fact("cell", self.onto.part_of, leaf),
+                                           Fact("vacuole", "part_of", "cell")], batch_size=1)
+        self.assertEqual(stats.new_individuals, 2)
+        self.assertEqual(self.onto.vacuole.part_of, [self.onto.cell])
+        self.assertEqual(leaf.has_part, [self.onto.cell])
+        self.assertEqual(leaf.is_a, [self.onto.StructuralAnnotation])
+
+    def test_inverses_written_to_inferred_ontology(self):
+        """Test that inverse triples are materialized like the reasoner does."""
+        from aim2.ontology.facts import bulk_add_facts
+        from aim2.ontology.reasoning import INFERRED_IRI
+        stats = bulk_add_facts(self.onto, [("anthocyanin", "located_in", "vacuole"),
+                                           ("gene_1", "accumulates_in", "vacuole")])
+        self.assertEqual(stats.inverse_triples, 1)
+        inferred = self.world.get_ontology(INFERRED_IRI)
+        rows = self.world.graph.execute(
+            "SELECT s, o FROM objs WHERE c=? AND p=?",
+            (inferred.graph.c, self.onto.has_location.storid)).fetchall()
+        self.assertEqual(rows, [(self.onto.vacuole.storid, self.onto.anthocyanin.storid)])
+        self.assertEqual(self.onto.vacuole.has_location, [self.onto.anthocyanin])
+
+    def test_confidence_and_source_annotate_the_relation(self):
+        """Test that confidence and source are readable through Owlready2."""
+        from aim2.ontology.facts import bulk_add_facts
+        bulk_add_facts(self.onto, [("gene_1", "upregulates", "gene_2", 0.75, "PMID:12345")])
+        gene_1 = self.onto.gene_1
+        gene_2 = self.onto.gene_2
+        self.assertEqual(AnnotatedRelation(gene_1, self.onto.upregulates, gene_2).hasConfidence, [0.75])
+        self.assertEqual(self.onto.hasSource[gene_1, self.onto.upregulates, gene_2], ["PMID:12345"])
+
+    def test_invalid_records_rejected(self):
+        """Test that unknown predicates and bad confidences raise ValueError."""
+        from aim2.ontology.facts import bulk_add_facts
+        with self.assertRaises(ValueError):
+            bulk_add_facts(self.onto, [("gene_1", "no_such_property", "gene_2")])
+        with self.assertRaises(ValueError):
+            bulk_add_facts(self.onto, [("gene_1", "affects", "gene_2", 1.5)])
+        self.assertIsNone(self.onto.gene_2)
+
+class TestAIM2OntologyBulkAddFacts(unittest.TestCase):
+    """Test cases for AIM2Ontology.bulk_add_facts."""
+
+    def test_facts_committed_to_quadstore(self):
+        """Test that bulk-added facts persist through commit()."""
+        from aim2.ontology.manager import AIM2Ontology
+        with tempfile.TemporaryDirectory() as tmp:
+            store = Path(tmp) / "store.sqlite3"
+            writer = AIM2Ontology(quadstore_path=store, use_cache=False)
+            writer.bulk_add_facts([("gene_1", "has_functional_annotation", "f_1", 0.9, "PMID:1")])
+            writer.close()
+
+            reader = AIM2Ontology(quadstore_path=store, read_only=True, use_cache=False)
+            try:
+                self.assertEqual(reader.onto.gene_1.has_functional_annotation, [reader.onto.f_1])
+                with self.assertRaises(RuntimeError):
+                    reader.bulk_add_facts([("gene_2", "affects", "gene_1")])
+            finally:
+                reader.close()
+
+if __name__ == "__main__":
+    unittest.main()
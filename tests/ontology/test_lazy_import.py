@@ -0,0 +1,51 @@
+"""
+Tests for the lazy import behaviour of the ontology package.
+
+Each check runs in a fresh interpreter, since the ontology is cached per process.
+"""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+def run_python(code):
+    """Run ``code`` in a fresh interpreter and return its stripped stdout."""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+class TestLazyOntologyImport(unittest.TestCase):
+    """Test cases for side-effect-free import of aim2.ontology."""
+
+    def test_package_import_does_not_load_owlready2(self):
+        """Test that importing the package does not pull in Owlready2."""
+        output = run_python("import sys, aim2.ontology; print('owlready2' in sys.modules)")
+        self.assertEqual(output, "False")
+
+    def test_manager_import_does_not_build_ontology(self):
+        """Test that importing AIM2Ontology does not build the schema."""
+        output = run_python(
+            "from aim2.ontology import AIM2Ontology\n"
+            "from aim2.ontology import schema\n"
+            "print(schema._onto is None)"
+        )
+        self.assertEqual(output, "True")
+
+    def test_onto_is_built_once(self):
+        """Test that every access path returns the same ontology object."""
+        output = run_python(
+            "from aim2.ontology import onto, AIM2Ontology\n"
+            "from aim2.ontology.schema import get_onto\n"
+            "print(onto is get_onto() is AIM2Ontology().onto)"
+        )
+        self.assertEqual(output, "True")
+
+    def test_schema_exports_resolve(self):
+        """Test that schema entities listed in __all__ resolve lazily."""
+        from aim2.ontology.schema import StructuralAnnotation, get_onto
+        self.assertIs(StructuralAnnotation, get_onto().StructuralAnnotation)
+
+if __name__ == "__main__":
+    unittest.main()
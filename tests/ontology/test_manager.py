@@ -103,5 +103,108 @@ class TestAIM2OntologyManager(unittest.TestCase):
             # But we want to ensure the method exists and is callable
             pass
 
+class TestAIM2OntologyQuadstore(unittest.TestCase):
+    """Test cases for the SQLite quadstore backend of AIM2Ontology."""
+    
+    def setUp(self):
+        """Set up a temporary directory for the quadstore."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.store_path = Path(self.test_dir.name) / "cache" / "aim2.sqlite3"
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.test_dir.cleanup()
+    
+    def test_new_quadstore_contains_schema(self):
+        """Test that a new quadstore is created with the AIM2 schema."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=self.store_path)
+        try:
+            self.assertTrue(ontology.persistent)
+            self.assertTrue(self.store_path.exists())
+            self.assertIsNotNone(ontology.onto.StructuralAnnotation)
+        finally:
+            ontology.close()
+    
+    def test_committed_changes_visible_to_read_only_reader(self):
+        """Test that committed individuals can be read by another instance."""
+        from aim2.ontology.manager import AIM2Ontology
+        writer = AIM2Ontology(quadstore_path=self.store_path)
+        with writer.onto:
+            writer.onto.StructuralAnnotation("leaf_1")
+        writer.commit()
+        
+        reader = AIM2Ontology(quadstore_path=self.store_path, read_only=True)
+        try:
+            reader.load()
+            self.assertIsNotNone(reader.onto.leaf_1)
+            self.assertIn(reader.onto.leaf_1, list(reader.onto.StructuralAnnotation.instances()))
+            with self.assertRaises(RuntimeError):
+                reader.commit()
+        finally:
+            reader.close()
+            writer.close()
+    
+    def test_read_only_requires_existing_store(self):
+        """Test that opening a missing quadstore read-only fails."""
+        from aim2.ontology.manager import AIM2Ontology
+        with self.assertRaises(FileNotFoundError):
+            AIM2Ontology(quadstore_path=self.store_path, read_only=True)
+    
+    def test_rdfxml_export_is_explicit(self):
+        """Test that a quadstore-backed ontology can still be exported to RDF/XML."""
+        from aim2.ontology.manager import AIM2Ontology
+        owl_path = Path(self.test_dir.name) / "export.owl"
+        ontology = AIM2Ontology(quadstore_path=self.store_path)
+        try:
+            ontology.commit()
+            self.assertFalse(owl_path.exists())
+            ontology.save(owl_path)
+            self.assertTrue(owl_path.exists())
+        finally:
+            ontology.close()
+
+class TestImportOntologies(unittest.TestCase):
+    """Test cases for parallel multi-ontology import."""
+    
+    def setUp(self):
+        """Write two small source ontologies to a temporary directory."""
+        from owlready2 import Thing, World
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.sources = {}
+        for prefix in ("po", "go"):
+            world = World()
+            onto = world.get_ontology(f"http://example.org/{prefix}.owl")
+            with onto:
+                type(f"{prefix.upper()}_0001", (Thing,), {"namespace": onto})
+            path = Path(self.test_dir.name) / f"{prefix}.owl"
+            onto.save(file=str(path))
+            world.close()
+            self.sources[prefix] = str(path)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.test_dir.cleanup()
+    
+    def test_import_ontologies_merges_all_sources(self):
+        """Test that all sources are imported and timings are reported."""
+        from aim2.ontology.manager import AIM2Ontology
+        ontology = AIM2Ontology(quadstore_path=Path(self.test_dir.name) / "store.sqlite3",
+                                use_cache=False)
+        try:
+            report = ontology.import_ontologies(self.sources, max_workers=2)
+            self.assertEqual(set(report), {"po", "go"})
+            for timing in report.values():
+                self.assertGreater(timing["triples"], 0)
+                self.assertIn("parse_seconds", timing)
+                self.assertGreater(timing["insert_seconds"], 0)
+            self.assertIsNotNone(ontology.imported_ontologies["po"].PO_0001)
+            self.assertIsNotNone(ontology.world["http://example.org/go.owl#GO_0001"])
+            
+            # Already imported prefixes are skipped
+            self.assertEqual(ontology.import_ontologies(self.sources), {})
+        finally:
+            ontology.close()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the ontology operation metrics.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from owlready2 import World
+
+class TestOntologyProfiler(unittest.TestCase):
+    """Test cases for OntologyProfiler."""
+
+    def setUp(self):
+        """Build the AIM2 schema in a private world."""
+        from aim2.ontology.profiling import OntologyProfiler
+        from aim2.ontology.schema import init_ontology
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.world = World()
+        self.onto = init_ontology(self.world)
+        self.log_path = Path(self.test_dir.name) / "logs" / "metrics.jsonl"
+        self.profiler = OntologyProfiler(self.world, self.log_path, entity_counts=True)
+
+    def tearDown(self):
+        self.world.close()
+        self.test_dir.cleanup()
+
+    def test_measure_records_counts(self):
+        """Test that a measured block records timing, triples and entity counts."""
+        with self.profiler.measure("load", "leaves.owl"):
+            with self.onto:
+                self.onto.StructuralAnnotation("leaf")
+                self.onto.StructuralAnnotation("root")
+            self.profiler.note(source="test")
+        record = self.profiler.last("load")
+        self.assertEqual(record.target, "leaves.owl")
+        self.assertGreaterEqual(record.wall_seconds, 0.0)
+        self.assertGreater(record.triples_added, 0)
+        self.assertEqual(record.entity_counts["StructuralAnnotation"], 2)
+        self.assertEqual(record.entity_counts["FunctionalAnnotation"], 0)
+        self.assertGreater(record.entity_counts["ObjectProperty"], 10)
+        self.assertEqual(record.details["source"], "test")
+        self.assertIsNone(record.error)
+
+    def test_default_and_disabled_profilers(self):
+        """Test that triples are only estimated by default and that a disabled profiler does nothing."""
+        from unittest.mock import patch
+        from aim2.ontology.profiling import OntologyProfiler
+        profiler = OntologyProfiler(self.world)
+        with profiler.measure("load"):
+            with self.onto:
+                self.onto.StructuralAnnotation("leaf")
+        record = profiler.last()
+        self.assertEqual(record.details["peak_rss_scope"], "process")
+        self.assertGreater(record.triples_added, 0)
+        self.assertEqual(record.entity_counts, {})
+        self.assertEqual(record.details["triples_scope"], "max_rowid")
+
+        disabled = OntologyProfiler(self.world, self.log_path, enabled=False)
+        with patch("aim2.ontology.profiling._reset_peak_rss") as reset, \
+                patch("aim2.ontology.profiling.estimate_triples") as estimate:
+            with disabled.measure("load"):
+                disabled.note(source="test")
+        reset.assert_not_called()
+        estimate.assert_not_called()
+        self.assertEqual(disabled.records, [])
+        self.assertFalse(self.log_path.exists())
+
+    def test_peak_rss_reset_opt_in(self):
+        """Test that the peak RSS is only reset on request, and not under another measure."""
+        from unittest.mock import patch
+        from aim2.ontology.profiling import OntologyProfiler
+        with patch("aim2.ontology.profiling._reset_peak_rss", return_value=True) as reset:
+            with self.profiler.measure("load"):
+                pass
+            reset.assert_not_called()
+            profiler = OntologyProfiler(self.world, reset_peak_rss=True)
+            with profiler.measure("import_ontologies"):
+                with profiler.measure("import_ontology"):
+                    pass
+            reset.assert_called_once()
+        self.assertEqual(profiler.last("import_ontology").details["peak_rss_scope"], "process")
+        self.assertNotIn("peak_rss_scope", profiler.last("import_ontologies").details)
+
+    def test_failures_recorded_and_logged(self):
+        """Test that failed operations are recorded and written as JSON lines."""
+        from aim2.ontology.profiling import load_metrics
+        with self.assertRaises(ValueError):
+            with self.profiler.measure("save"):
+                raise ValueError("no path")
+        records = load_metrics(self.log_path)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].operation, "save")
+        self.assertEqual(records[0].error, "ValueError: no path")
+
+class TestAIM2OntologyMetrics(unittest.TestCase):
+    """Test cases for the metrics of AIM2Ontology operations."""
+
+    def test_operations_are_measured(self):
+        """Test that save and reason calls are recorded with their targets."""
+        from aim2.ontology.manager import AIM2Ontology
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "metrics.jsonl"
+            ontology = AIM2Ontology(quadstore_path=Path(tmp) / "store.sqlite3", use_cache=False,
+                                    metrics_log=log_path)
+            try:
+                owl_path = Path(tmp) / "aim2.owl"
+                ontology.save(owl_path)
+                ontology.save(owl_path)
+                ontology.reason(incremental=True)
+            finally:
+                ontology.close()
+            operations = []
+            for record in ontology.metrics:
+                operations.append(record.operation)
+            self.assertEqual(operations, ["save", "save", "reason"])
+            self.assertEqual(ontology.metrics[0].target, str(owl_path))
+            self.assertTrue(ontology.metrics[1].details["skipped"])
+            self.assertIsNone(ontology.metrics[2].target)
+            self.assertEqual(len(log_path.read_text().splitlines()), 3)
+
+            quiet = AIM2Ontology(quadstore_path=Path(tmp) / "quiet.sqlite3", use_cache=False,
+                                 metrics=False)
+            try:
+                quiet.save(Path(tmp) / "quiet.owl")
+            finally:
+                quiet.close()
+            self.assertEqual(quiet.metrics, [])
+
+if __name__ == "__main__":
+    unittest.main()
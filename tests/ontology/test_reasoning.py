@@ -0,0 +1,106 @@
+"""
+Tests for the incremental reasoner.
+"""
+import unittest
+from unittest.mock import patch
+
+from owlready2 import World
+
+class TestIncrementalReasoner(unittest.TestCase):
+    """Test cases for IncrementalReasoner."""
+
+    def setUp(self):
+        """Build the AIM2 schema in a private world."""
+        from aim2.ontology.reasoning import IncrementalReasoner
+        from aim2.ontology.schema import init_ontology
+        self.world = World()
+        self.onto = init_ontology(self.world)
+        self.reasoner = IncrementalReasoner(self.onto)
+
+    def tearDown(self):
+        self.world.close()
+
+    def test_subproperty_implies_affects(self):
+        """Test that sub-properties of affects are materialized as affects."""
+        with self.onto:
+            gene = self.onto.FunctionalAnnotation("gene")
+            protein = self.onto.FunctionalAnnotation("protein")
+            gene.inhibits.append(protein)
+        stats = self.reasoner.reason()
+        self.assertTrue(stats.full)
+        self.assertIn(protein, gene.affects)
+
+    def test_part_of_is_transitive_with_inverse(self):
+        """Test the transitive closure of part_of and its has_part inverse."""
+        with self.onto:
+            cell = self.onto.StructuralAnnotation("cell")
+            leaf = self.onto.StructuralAnnotation("leaf")
+            shoot = self.onto.StructuralAnnotation("shoot")
+            cell.part_of.append(leaf)
+            leaf.part_of.append(shoot)
+        self.reasoner.reason()
+        self.assertIn(shoot, cell.part_of)
+        self.assertIn(cell, shoot.has_part)
+        self.assertEqual(self.reasoner.closure("part_of", cell), {leaf.storid, shoot.storid})
+
+    def test_incremental_run_only_reads_new_facts(self):
+        """Test that a second run processes only the new batch."""
+        with self.onto:
+            cell = self.onto.StructuralAnnotation("cell")
+            leaf = self.onto.StructuralAnnotation("leaf")
+            shoot = self.onto.StructuralAnnotation("shoot")
+            cell.part_of.append(leaf)
+        self.reasoner.reason()
+
+        with self.onto:
+            leaf.part_of.append(shoot)
+        stats = self.reasoner.reason()
+        self.assertFalse(stats.full)
+        self.assertEqual(stats.asserted_triples, 1)
+        self.assertIn(shoot, cell.part_of)
+
+        # Nothing new: nothing to do, without scanning the asserted relations
+        with patch("aim2.ontology.reasoning.edge_state", side_effect=AssertionError("scanned")):
+            stats = self.reasoner.reason()
+        self.assertEqual(stats.asserted_triples, 0)
+        self.assertEqual(stats.inferred_triples, 0)
+
+    def test_full_run_matches_incremental(self):
+        """Test that a full recomputation yields the same inferred triples."""
+        with self.onto:
+            a = self.onto.StructuralAnnotation("a")
+            b = self.onto.StructuralAnnotation("b")
+            c = self.onto.StructuralAnnotation("c")
+            a.part_of.append(b)
+        self.reasoner.reason()
+        with self.onto:
+            b.part_of.append(c)
+            c.located_in.append(a)
+        self.reasoner.reason()
+        query = "SELECT s, p, o FROM objs WHERE c=? ORDER BY s, p, o"
+        context = self.reasoner.inferred.graph.c
+        incremental = self.world.graph.execute(query, (context,)).fetchall()
+        self.reasoner.reason(full=True)
+        self.assertEqual(self.world.graph.execute(query, (context,)).fetchall(), incremental)
+
+    def test_removed_fact_retracts_inferences(self):
+        """Test that a removal is noticed and cached values of loaded entities are refreshed."""
+        with self.onto:
+            cell = self.onto.StructuralAnnotation("cell")
+            leaf = self.onto.StructuralAnnotation("leaf")
+            shoot = self.onto.StructuralAnnotation("shoot")
+            cell.part_of.append(leaf)
+            leaf.part_of.append(shoot)
+        self.reasoner.reason()
+        self.assertIn(shoot, cell.part_of)
+        self.assertIn(cell, shoot.has_part)
+
+        leaf.part_of.remove(shoot)
+        stats = self.reasoner.reason()
+        self.assertTrue(stats.full)
+        self.assertEqual(cell.part_of, [leaf])
+        self.assertEqual(shoot.has_part, [])
+        self.assertEqual(self.reasoner.closure("part_of", cell), {leaf.storid})
+
+if __name__ == "__main__":
+    unittest.main()
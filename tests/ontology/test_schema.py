@@ -151,9 +151,9 @@ class TestAIM2OntologySchema(unittest.TestCase):
         assert_has_thing_domain(self.onto.made_via, 'made_via')
         assert_has_thing_range(self.onto.made_via, 'made_via')
         
-        # Test accumulates_in
-        assert_has_thing_domain(self.onto.accumulates_in, 'accumulates_in')
-        assert_has_thing_range(self.onto.accumulates_in, 'accumulates_in')
+        # Test accumulates_in: from a compound to where it accumulates
+        self.assertEqual(self.onto.accumulates_in.domain, [self.onto.StructuralAnnotation])
+        self.assertEqual(self.onto.accumulates_in.range, [self.onto.SourceAnnotation])
         
         # Test affects
         assert_has_thing_domain(self.onto.affects, 'affects')
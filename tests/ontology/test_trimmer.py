@@ -0,0 +1,98 @@
+"""
+Tests for the streaming allow-list trimmer.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from owlready2 import ObjectProperty, Thing, World
+
+class TestTrimOntology(unittest.TestCase):
+    """Test cases for trim_ontology."""
+
+    def setUp(self):
+        """Write a small PO-like source ontology to a temporary directory."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.test_dir.name) / "po.owl"
+        self.destination = Path(self.test_dir.name) / "trimmed" / "po_subset.owl"
+
+        world = World()
+        onto = world.get_ontology("http://purl.obolibrary.org/obo/po.owl")
+        obo = onto.get_namespace("http://purl.obolibrary.org/obo/")
+        with obo:
+            class part_of(ObjectProperty):
+                pass
+            entity = type("PO_0025131", (Thing,), {})
+            organ = type("PO_0009008", (entity,), {})
+            leaf = type("PO_0025034", (organ,), {})
+            root = type("PO_0009005", (organ,), {})
+            shoot = type("PO_0009006", (entity,), {})
+            leaf.label = ["leaf"]
+            leaf.comment = ["A phyllome that is not associated with a reproductive structure."]
+            root.label = ["root"]
+            leaf.is_a.append(part_of.some(shoot))
+        onto.save(file=str(self.source), format="rdfxml")
+        world.close()
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.test_dir.cleanup()
+
+    def load_trimmed(self):
+        world = World()
+        onto = world.get_ontology(str(self.destination)).load()
+        return world, onto
+
+    def test_keeps_allow_listed_terms_and_ancestors(self):
+        """Test that allow-listed terms are kept together with their ancestors."""
+        from aim2.ontology.importers import trim_ontology
+        report = trim_ontology(self.source, self.destination, ["PO:0025034"])
+        self.assertEqual(report.total_classes, 5)
+        self.assertEqual(report.kept_classes, 3)
+
+        world, onto = self.load_trimmed()
+        try:
+            leaf = world["http://purl.obolibrary.org/obo/PO_0025034"]
+            self.assertIsNotNone(leaf)
+            self.assertEqual(leaf.label, ["leaf"])
+            self.assertEqual(len(leaf.comment), 1)
+            self.assertIsNotNone(world["http://purl.obolibrary.org/obo/PO_0009008"])
+            self.assertIsNotNone(world["http://purl.obolibrary.org/obo/PO_0025131"])
+            self.assertIsNone(world["http://purl.obolibrary.org/obo/PO_0009005"])
+        finally:
+            world.close()
+
+    def test_drops_axioms_on_dropped_terms(self):
+        """Test that restrictions pointing outside the subset are removed."""
+        from aim2.ontology.importers import trim_ontology
+        report = trim_ontology(self.source, self.destination, ["PO_0025034"])
+        self.assertEqual(report.dropped_axioms, 1)
+
+        world, onto = self.load_trimmed()
+        try:
+            self.assertIsNone(world["http://purl.obolibrary.org/obo/PO_0009006"])
+            self.assertIsNotNone(world["http://purl.obolibrary.org/obo/part_of"])
+        finally:
+            world.close()
+
+    def test_restriction_kept_when_filler_is_kept(self):
+        """Test that restrictions on kept terms survive trimming."""
+        from aim2.ontology.importers import trim_ontology
+        trim_ontology(self.source, self.destination, ["PO_0025034", "PO_0009006"])
+
+        world, onto = self.load_trimmed()
+        try:
+            leaf = world["http://purl.obolibrary.org/obo/PO_0025034"]
+            self.assertIn("part_of.some", str(leaf.is_a))
+        finally:
+            world.close()
+
+    def test_load_allow_list(self):
+        """Test reading an allow-list file with comments and labels."""
+        from aim2.ontology.importers import load_allow_list
+        path = Path(self.test_dir.name) / "allow.txt"
+        path.write_text("# PO subset\nPO:0025034 leaf\n\nhttp://purl.obolibrary.org/obo/PO_0009005\n")
+        self.assertEqual(load_allow_list(path), {"PO_0025034", "PO_0009005"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -107,5 +107,142 @@ class TestConfigSystem(unittest.TestCase):
         if "AIM2_API__KEY" in os.environ:
             del os.environ["AIM2_API__KEY"]
 
+    def test_config_snapshot_is_frozen(self):
+        """Test attribute access and that the snapshot cannot be modified."""
+        from aim2.config import reload_config
+        config = reload_config()
+        
+        self.assertEqual(config.database.host, "localhost")
+        self.assertEqual(config.paths.log_dir, "/path/to/logs")
+        with self.assertRaises(AttributeError):
+            config.database.host = "elsewhere"
+        with self.assertRaises(TypeError):
+            config["database"]["host"] = "elsewhere"
+        
+        # to_dict() gives an independent mutable copy
+        copy = config.to_dict()
+        copy["database"]["host"] = "elsewhere"
+        self.assertEqual(config.database.host, "localhost")
+    
+    def test_typed_sections(self):
+        """Test that typed sections convert values and fill in defaults."""
+        self.test_config["extraction"] = {"llm": {"temperature": "0.5"}}
+        with open(self.config_path, 'w') as f:
+            yaml.dump(self.test_config, f)
+        os.environ["AIM2_CORPUS__PUBMED__DELAY"] = "0.1"
+        
+        from aim2.config import LLMConfig, reload_config
+        try:
+            config = reload_config()
+        finally:
+            del os.environ["AIM2_CORPUS__PUBMED__DELAY"]
+        
+        self.assertIsInstance(config.extraction.llm, LLMConfig)
+        self.assertEqual(config.extraction.llm.temperature, 0.5)
+        self.assertEqual(config.extraction.llm.max_tokens, 1000)
+        self.assertEqual(config.corpus.pubmed.delay, 0.1)
+        self.assertEqual(config.corpus.pubmed.batch_size, 100)
+    
+    def test_invalid_typed_value(self):
+        """Test that a value of the wrong type in a typed section is rejected."""
+        self.test_config["extraction"] = {"chunking": {"chunk_size": "large"}}
+        with open(self.config_path, 'w') as f:
+            yaml.dump(self.test_config, f)
+        
+        from aim2.config import reload_config
+        with self.assertRaises(ValueError):
+            reload_config()
+    
+    def test_config_snapshot_pickles(self):
+        """Test that a snapshot survives pickling into worker processes."""
+        import pickle
+        from aim2.config import reload_config
+        config = reload_config()
+        
+        restored = pickle.loads(pickle.dumps(config))
+        self.assertEqual(restored, config)
+        self.assertEqual(restored.api.endpoint, "https://api.example.com")
+        with self.assertRaises(AttributeError):
+            restored.api.endpoint = "elsewhere"
+    
+    def test_concurrent_first_access(self):
+        """Test that threads loading the config at once share one snapshot."""
+        from concurrent.futures import ThreadPoolExecutor
+        import aim2.config
+        aim2.config._config = None
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = []
+            for _ in range(32):
+                futures.append(pool.submit(aim2.config.get_config))
+            snapshots = set()
+            for future in futures:
+                snapshots.add(id(future.result()))
+        self.assertEqual(len(snapshots), 1)
+
+    def rewrite_config(self):
+        """Write self.test_config and make sure the modification time moves."""
+        stat = self.config_path.stat()
+        with open(self.config_path, 'w') as f:
+            yaml.dump(self.test_config, f)
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    
+    def test_watcher_reloads_and_notifies(self):
+        """Test that a changed file is reloaded and subscribers of changed sections notified."""
+        from aim2.config import ConfigWatcher, get_config, reload_config, subscribe
+        self.test_config["corpus"] = {"pubmed": {"delay": 0.34}}
+        self.rewrite_config()
+        old = reload_config()
+        
+        pubmed_changes = []
+        api_changes = []
+        unsubscribe_pubmed = subscribe(lambda new, old: pubmed_changes.append((new, old)), "corpus.pubmed")
+        unsubscribe_api = subscribe(lambda new, old: api_changes.append(new), "api")
+        try:
+            watcher = ConfigWatcher()
+            self.assertFalse(watcher.check())
+            
+            self.test_config["corpus"]["pubmed"]["delay"] = 0.1
+            self.rewrite_config()
+            self.assertTrue(watcher.check())
+            self.assertFalse(watcher.check())
+        finally:
+            unsubscribe_pubmed()
+            unsubscribe_api()
+        
+        self.assertEqual(get_config().corpus.pubmed.delay, 0.1)
+        self.assertEqual(old.corpus.pubmed.delay, 0.34)
+        self.assertEqual(len(pubmed_changes), 1)
+        self.assertEqual(pubmed_changes[0][0].delay, 0.1)
+        self.assertEqual(pubmed_changes[0][1].delay, 0.34)
+        self.assertEqual(api_changes, [])
+    
+    def test_watcher_keeps_snapshot_on_invalid_config(self):
+        """Test that an invalid edit is ignored and the previous snapshot kept."""
+        from aim2.config import ConfigWatcher, get_config, reload_config
+        reload_config()
+        watcher = ConfigWatcher()
+        
+        self.test_config["extraction"] = {"llm": {"temperature": 5.0}}
+        self.rewrite_config()
+        self.assertFalse(watcher.check())
+        self.assertEqual(watcher.errors, 1)
+        self.assertNotIn("extraction", get_config())
+    
+    def test_watcher_thread(self):
+        """Test that the background thread picks up a change."""
+        import threading
+        from aim2.config import ConfigWatcher, reload_config, subscribe
+        reload_config()
+        changed = threading.Event()
+        unsubscribe = subscribe(lambda new, old: changed.set(), "database")
+        try:
+            with ConfigWatcher(interval=0.01):
+                self.test_config["database"]["port"] = 6543
+                self.rewrite_config()
+                self.assertTrue(changed.wait(5))
+        finally:
+            unsubscribe()
+
 if __name__ == "__main__":
     unittest.main()